@@ -28,6 +28,12 @@ export interface IPriceListItem {
 
   // Semantic Search
   embedding?: number[];
+  // Compact unit-normalized vector (float16 or int8 + norm), alternative to `embedding`
+  embedding_bin?: Buffer;
+  // Identity of the embedding input, used by re-imports to reuse the vector
+  embedding_text_hash?: string;
+  embedding_model?: string;
+  embedding_version?: string;
   extracted_properties?: Record<string, unknown>;
 
   // UMAP Visualization
@@ -67,6 +73,10 @@ const PriceListItemSchema = new Schema<IPriceListItem>({
   price_lists: { type: Map, of: Number },
 
   embedding: { type: [Number], select: false },
+  embedding_bin: { type: Buffer, select: false },
+  embedding_text_hash: { type: String },
+  embedding_model: { type: String },
+  embedding_version: { type: String },
   extracted_properties: { type: Schema.Types.Mixed },
 
   map2d: {
@@ -92,6 +102,8 @@ PriceListItemSchema.index({ project_id: 1, estimate_id: 1 });
 PriceListItemSchema.index({ project_id: 1, estimate_id: 1, wbs6_code: 1, wbs7_code: 1 });
 // Sort index for Catalog
 PriceListItemSchema.index({ project_id: 1, code: 1 });
+// Embedding reuse lookup on re-import
+PriceListItemSchema.index({ project_id: 1, embedding_text_hash: 1 });
 PriceListItemSchema.index({ code: 1 });
 
 export const PriceListItem = model<IPriceListItem>('PriceListItem', PriceListItemSchema);
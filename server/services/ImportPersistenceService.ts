@@ -31,6 +31,10 @@ type PythonPriceListItem = {
     price?: number;
     priceListId?: string;
     embedding?: number[];
+    embedding_bin?: string; // base64, quantized vector (see services/importer embedding/vectors.py)
+    embedding_text_hash?: string;
+    embedding_model?: string;
+    embedding_version?: string;
     extracted_properties?: Record<string, unknown>;
     extractedProperties?: Record<string, unknown>;
 };
@@ -169,6 +173,28 @@ type PendingAlert = OfferAlertInsert & { itemIndex: number };
 
 const isImportDebug = process.env.IMPORT_DEBUG === '1';
 
+// Vector fields of a price list item: the ones missing from the import are
+// removed, so a stale embedding (float array or binary) never outlives its text hash.
+function embeddingUpdate(item: PythonPriceListItem) {
+    const fields: Record<string, unknown> = {
+        embedding: item.embedding,
+        embedding_bin: item.embedding_bin ? Buffer.from(item.embedding_bin, 'base64') : undefined,
+        embedding_text_hash: item.embedding_text_hash,
+        embedding_model: item.embedding_model,
+        embedding_version: item.embedding_version,
+    };
+    const set: Record<string, unknown> = {};
+    const unset: Record<string, ''> = {};
+    for (const [key, value] of Object.entries(fields)) {
+        if (value === undefined || value === null) {
+            unset[key] = '';
+        } else {
+            set[key] = value;
+        }
+    }
+    return { set, unset };
+}
+
 export async function persistImportResult(payload: PythonImportResult, projectId: string) {
     // Branch based on estimate type
     const estType = payload.estimate?.type; // 'project' | 'offer'
@@ -308,6 +334,7 @@ async function persistProjectEstimate(payload: PythonImportResult, projectId: st
                 }
 
                 const { short_description, long_description, unit } = normalizeTextFields(item);
+                const vectors = embeddingUpdate(item);
 
                 if (isImportDebug && idx < 3) {
                     console.log(`[DEBUG] After normalize #${idx}:`, {
@@ -332,9 +359,10 @@ async function persistProjectEstimate(payload: PythonImportResult, projectId: st
                                 price: item.price,
                                 price_list_id: priceListIdStr,
                                 wbs_ids: mappedGroups,
-                                embedding: item.embedding,
+                                ...vectors.set,
                                 extracted_properties: item.extracted_properties || (item as any).extractedProperties,
                             },
+                            ...(Object.keys(vectors.unset).length ? { $unset: vectors.unset } : {}),
                         },
                         upsert: true,
                     },
@@ -15,6 +15,8 @@ import numpy as np
 from bson import ObjectId
 import pymongo
 
+from embedding.vectors import BINARY_FIELD, stored_vector, stored_vector_filter
+
 logger = logging.getLogger(__name__)
 
 
@@ -92,6 +94,19 @@ class PriceAnalysisResult:
 # Core Math Functions
 # =============================================================================
 
+def _with_unit_vectors(items) -> List[Dict]:
+    """Items with `embedding` decoded (float array or binary) as a float32 unit vector."""
+    result = []
+    for item in items:
+        vector = stored_vector(item)
+        if vector is None:
+            continue
+        item["embedding"] = vector
+        item.pop(BINARY_FIELD, None)
+        result.append(item)
+    return result
+
+
 def cosine_similarity(a: List[float], b: List[float]) -> float:
     """
     Compute cosine similarity between two vectors.
@@ -255,12 +270,14 @@ class PriceAnalyzer:
         except:
             pid = project_id
         
-        items = list(coll.find({
-            "$or": [
-                {"project_id": pid},
-                {"project_id": project_id}
-            ],
-            "embedding": {"$exists": True, "$ne": None}
+        items = _with_unit_vectors(coll.find({
+            "$and": [
+                {"$or": [
+                    {"project_id": pid},
+                    {"project_id": project_id}
+                ]},
+                stored_vector_filter(),
+            ]
         }))
         
         logger.info(f"Fetched {len(items)} items with embeddings for project {project_id}")
@@ -324,7 +341,7 @@ class PriceAnalyzer:
         Returns list of neighbors with similarity scores.
         """
         target_embedding = target.get("embedding")
-        if not target_embedding:
+        if target_embedding is None:
             return []
         
         target_id = str(target.get("_id", ""))
@@ -335,10 +352,11 @@ class PriceAnalyzer:
                 continue  # Skip self
             
             candidate_embedding = candidate.get("embedding")
-            if not candidate_embedding:
+            if candidate_embedding is None or len(candidate_embedding) != len(target_embedding):
                 continue
             
-            similarity = cosine_similarity(target_embedding, candidate_embedding)
+            # Unit vectors (see _with_unit_vectors): cosine similarity is the dot product
+            similarity = float(np.dot(target_embedding, candidate_embedding))
             
             if similarity >= params.min_similarity:
                 neighbors.append({
@@ -729,9 +747,8 @@ class GlobalPriceAnalyzer(PriceAnalyzer):
         if not or_conditions:
             return []
         
-        items = list(coll.find({
-            "$or": or_conditions,
-            "embedding": {"$exists": True, "$ne": None}
+        items = _with_unit_vectors(coll.find({
+            "$and": [{"$or": or_conditions}, stored_vector_filter()]
         }))
         
         # Add string project_id for tracking
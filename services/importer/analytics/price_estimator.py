@@ -17,9 +17,10 @@ import numpy as np
 import pymongo
 from bson import ObjectId
 
-from embedding import JinaEmbedder, get_embedder
+from embedding import Embedder, get_embedder
 from embedding.extraction.llm_extractor import LLMExtractor
 from embedding.extraction.router import FamilyRouter
+from embedding.vectors import stored_vector, stored_vector_filter, stored_vector_projection
 
 logger = logging.getLogger(__name__)
 
@@ -277,7 +278,7 @@ class PriceEstimator:
         self.close()
         return False
     
-    def _get_embedder(self) -> JinaEmbedder:
+    def _get_embedder(self) -> Embedder:
         if self._embedder is None:
             self._embedder = get_embedder()
         return self._embedder
@@ -295,7 +296,7 @@ class PriceEstimator:
         return self._family_router
 
     def _normalize_vector(self, vector: List[float]) -> Optional[np.ndarray]:
-        if not vector:
+        if vector is None or len(vector) == 0:
             return None
         vec = np.array(vector, dtype=np.float32)
         norm = np.linalg.norm(vec)
@@ -575,7 +576,7 @@ class PriceEstimator:
         
         # Build query
         match_query: Dict[str, Any] = {
-            "embedding": {"$exists": True, "$type": "array"},
+            "$and": [stored_vector_filter()],
             "price": {"$exists": True, "$gt": 0},
         }
         
@@ -599,18 +600,19 @@ class PriceEstimator:
             "extended_description": 1,
             "price": 1,
             "unit": 1,
-            "embedding": 1,
+            **stored_vector_projection(),
             "extracted_properties": 1,
         }
         
         items = list(coll.find(match_query, projection).limit(5000))  # Cap for performance
         logger.info(f"Loaded {len(items)} items with embeddings")
         
-        # Compute similarities
+        # Compute similarities (stored vectors are decoded as unit vectors)
         query_vec = np.array(query_embedding, dtype=np.float32)
         query_norm = np.linalg.norm(query_vec)
         if query_norm == 0:
             return []
+        query_vec = query_vec / query_norm
         
         # Get project names
         project_names = self._get_project_names(project_ids)
@@ -621,19 +623,14 @@ class PriceEstimator:
         expected_dim = len(query_embedding)
         
         for item in items:
-            emb = item.get("embedding")
-            if not emb:
+            emb = stored_vector(item)
+            if emb is None:
                 continue
             if len(emb) != expected_dim:
                 skipped_dim_mismatch += 1
                 continue
             
-            item_vec = np.array(emb, dtype=np.float32)
-            item_norm = np.linalg.norm(item_vec)
-            if item_norm == 0:
-                continue
-            
-            similarity = float(np.dot(query_vec, item_vec) / (query_norm * item_norm))
+            similarity = float(np.dot(query_vec, emb))
             
             if similarity >= min_similarity:
                 element_type = None
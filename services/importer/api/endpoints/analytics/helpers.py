@@ -7,6 +7,7 @@ import re
 import hashlib
 from typing import List, Optional, Dict, Any, Tuple
 
+from embedding.cache import hash_text
 from embedding.extraction.props_text import build_weighted_props_text
 
 
@@ -107,13 +108,6 @@ def normalize_weights(base_weight: float, detail_weight: float) -> Tuple[float,
     return base_weight / total, detail_weight / total
 
 
-def hash_text(text: str) -> str:
-    """Generate a SHA1 hash of text."""
-    if not text:
-        return ""
-    return hashlib.sha1(text.encode("utf-8")).hexdigest()
-
-
 def has_meaningful_value(value: Any) -> bool:
     """Check if a value is meaningful (not empty/None)."""
     if value is None:
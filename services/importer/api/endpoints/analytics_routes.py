@@ -25,6 +25,7 @@ from api.endpoints.analytics.schemas import (
 )
 from embedding.extraction.embedding_composer import EmbeddingComposer
 from embedding import get_embedder
+from embedding.vectors import stored_unit_matrix, stored_vector_filter, stored_vector_projection
 
 logger = logging.getLogger(__name__)
 
@@ -198,13 +199,13 @@ def _run_compute_map_job(project_id: str):
     # The log showed project_id is an ObjectId. We receive string.
     try:
         project_oid = ObjectId(project_id)
-        query = {"project_id": project_oid, embedding_field: {"$type": "array"}}
+        query = {"project_id": project_oid, **stored_vector_filter(embedding_field)}
     except Exception:
         logger.warning(f"Could not cast project_id {project_id} to ObjectId. Trying as string.")
-        query = {"project_id": project_id, embedding_field: {"$type": "array"}}
+        query = {"project_id": project_id, **stored_vector_filter(embedding_field)}
 
     # Projection
-    projection = {embedding_field: 1}
+    projection = stored_vector_projection(embedding_field)
     
     docs = list(coll.find(query, projection))
     logger.info(f"Found {len(docs)} items with embeddings for project {project_id}")
@@ -214,21 +215,15 @@ def _run_compute_map_job(project_id: str):
         client.close()
         return
 
-    # 2. Prepare Data
-    ids = []
-    vectors = []
-    for d in docs:
-        emb = d.get(embedding_field)
-        if emb and len(emb) == 1024: # Check dimensions
-            ids.append(d["_id"])
-            vectors.append(emb)
+    # 2. Prepare Data (float arrays or binary vectors, decoded as unit vectors)
+    X, valid = stored_unit_matrix(docs, dims=1024, field=embedding_field)
+    ids = [docs[i]["_id"] for i in valid]
 
     if not ids:
         logger.warning("No valid vectors found.")
         client.close()
         return
 
-    X = np.array(vectors, dtype=np.float32)
     n_samples = len(X)
     
     # 3. Clustering (HDBSCAN)
@@ -362,7 +357,7 @@ def _run_global_compute_map_job(
         embedding_field = "embeddings"
     
     # 2. Build query for items with embeddings
-    query: Dict[str, Any] = {embedding_field: {"$type": "array"}}
+    query: Dict[str, Any] = {"$and": [stored_vector_filter(embedding_field)]}
     
     # Filter by project_ids if provided
     if project_ids:
@@ -376,7 +371,7 @@ def _run_global_compute_map_job(
         query["$or"] = or_conditions
     
     # Fetch all items with embeddings
-    projection = {"_id": 1, "project_id": 1, embedding_field: 1}
+    projection = {"_id": 1, "project_id": 1, **stored_vector_projection(embedding_field)}
     docs = list(coll.find(query, projection))
     logger.info(f"Found {len(docs)} total items with embeddings")
     
@@ -385,21 +380,15 @@ def _run_global_compute_map_job(
         client.close()
         return
 
-    # 3. Prepare Data - collect all vectors
-    ids = []
-    vectors = []
-    for d in docs:
-        emb = d.get(embedding_field)
-        if emb and len(emb) == 1024:  # Check dimensions
-            ids.append(d["_id"])
-            vectors.append(emb)
+    # 3. Prepare Data - collect all vectors (float arrays or binary, as unit vectors)
+    X, valid = stored_unit_matrix(docs, dims=1024, field=embedding_field)
+    ids = [docs[i]["_id"] for i in valid]
 
     if len(ids) < 5:
         logger.warning(f"Only {len(ids)} valid vectors found. Not enough for UMAP.")
         client.close()
         return
 
-    X = np.array(vectors, dtype=np.float32)
     n_samples = len(X)
     logger.info(f"Processing {n_samples} vectors for global UMAP")
     
@@ -0,0 +1,21 @@
+"""
+Embedding Endpoints
+Counters and size of the persistent embedding cache (see embedding.cache).
+"""
+
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+
+from core import settings
+from embedding import get_embedding_cache
+
+router = APIRouter()
+
+
+@router.get("/cache")
+async def embedding_cache_stats():
+    """Hits, misses, entries and size of the embedding cache (shared by the import workers)."""
+    if not settings.embedding_cache_enabled:
+        return {"enabled": False}
+    stats = await run_in_threadpool(get_embedding_cache().stats)
+    return {"enabled": True, **stats}
@@ -0,0 +1,39 @@
+"""
+Import Job Endpoints
+Status, queue depth and results of the import jobs queued by the
+`.../jobs` import endpoints (see application.import_jobs).
+"""
+
+from fastapi import APIRouter, HTTPException
+
+from application.import_jobs import get_import_jobs
+
+router = APIRouter()
+
+
+@router.get("")
+async def import_jobs_status():
+    """Queue depth (jobs queued + running), workers and jobs per status."""
+    return get_import_jobs().stats()
+
+
+@router.get("/{job_id}")
+async def import_job_status(job_id: str):
+    """Status of a job, with the state of each stage (parse, transform, embed...)."""
+    job = get_import_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job.to_dict()
+
+
+@router.get("/{job_id}/result")
+async def import_job_result(job_id: str):
+    """Result of a finished job: 409 while it runs, 400 with the error if it failed."""
+    job = get_import_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    if job.status == "failed":
+        raise HTTPException(400, f"Import error: {job.error}")
+    if job.status != "done":
+        raise HTTPException(409, f"Job {job.status}")
+    return job.result
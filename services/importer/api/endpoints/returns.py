@@ -1,18 +1,25 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+from functools import partial
+from typing import Any, Callable
 
 from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile, status
+from starlette.concurrency import run_in_threadpool
 
+from api.endpoints.shared.pipeline import submit_upload_job
+from application.import_jobs import ImportJob
 from core import settings
 from ingestion.raw_import_service import SixRawImportService
+from ingestion.returns_batch import build_batch_jobs, parse_returns_batch
 from registry import (
     parse_excel_estimate_from_bytes,
     parse_lx_estimate_from_bytes,
     parse_mx_estimate_from_bytes,
+    preview_excel_return_from_bytes,
 )
 from utils.rate_limit import SlidingWindowRateLimiter, enforce_rate_limit
+from utils.upload import enforce_upload_size, mapped_file, remove_upload_file, upload_buffer, upload_to_file
 
 router = APIRouter()
 returns_rate_limiter = SlidingWindowRateLimiter(settings.import_rate_limit_per_minute, 60)
@@ -84,6 +91,22 @@ def _pick_parser(mode: str):
     return parse_lx_estimate_from_bytes
 
 
+async def _job_result(job: ImportJob) -> Any:
+    try:
+        return await job.wait()
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def _parse_stage(path: str, *, parser: Callable[..., Any], **kwargs: Any) -> Any:
+    with mapped_file(path) as content:
+        return parser(file_bytes=content, **kwargs)
+
+
+def _computo_stage(estimate: Any, *, project_id: str) -> dict[str, Any]:
+    return _build_computo_payload(project_id, estimate, None)
+
+
 @router.post(
     "/{commessa_id}/returns/lx",
     status_code=status.HTTP_200_OK,
@@ -102,25 +125,19 @@ async def import_returns_lx_raw(
     client_ip = request.client.host if request.client else "anonymous"
     enforce_rate_limit(returns_rate_limiter, client_ip)
 
-    payload = await file.read()
-    if len(payload) > settings.max_upload_size_mb * 1024 * 1024:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File troppo grande",
-        )
+    enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024)
 
-    try:
-        items = raw_service.parse_lx_raw(
-            file_bytes=payload,
-            filename=file.filename,
-            sheet_name=sheet_name,
-            code_columns=(code_columns or "").split(",") if code_columns else None,
-            description_columns=(description_columns or "").split(",") if description_columns else None,
-            price_column=price_column or "",
-            quantity_column=quantity_column,
-        )
-    except Exception as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    parse = partial(
+        _parse_stage,
+        parser=raw_service.parse_lx_raw,
+        filename=file.filename,
+        sheet_name=sheet_name,
+        code_columns=(code_columns or "").split(",") if code_columns else None,
+        description_columns=(description_columns or "").split(",") if description_columns else None,
+        price_column=price_column or "",
+        quantity_column=quantity_column,
+    )
+    items = await _job_result(await submit_upload_job("returns-lx", file, [("parse", parse)]))
 
     return {
         "return_id": return_id,
@@ -148,26 +165,20 @@ async def import_returns_mx_raw(
     client_ip = request.client.host if request.client else "anonymous"
     enforce_rate_limit(returns_rate_limiter, client_ip)
 
-    payload = await file.read()
-    if len(payload) > settings.max_upload_size_mb * 1024 * 1024:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File troppo grande",
-        )
-
-    try:
-        returns = raw_service.parse_mx_raw(
-            file_bytes=payload,
-            filename=file.filename,
-            sheet_name=sheet_name,
-            code_columns=(code_columns or "").split(",") if code_columns else None,
-            description_columns=(description_columns or "").split(",") if description_columns else None,
-            price_column=price_column or "",
-            quantity_column=quantity_column,
-            progressive_column=progressive_column,
-        )
-    except Exception as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024)
+
+    parse = partial(
+        _parse_stage,
+        parser=raw_service.parse_mx_raw,
+        filename=file.filename,
+        sheet_name=sheet_name,
+        code_columns=(code_columns or "").split(",") if code_columns else None,
+        description_columns=(description_columns or "").split(",") if description_columns else None,
+        price_column=price_column or "",
+        quantity_column=quantity_column,
+        progressive_column=progressive_column,
+    )
+    returns = await _job_result(await submit_upload_job("returns-mx", file, [("parse", parse)]))
 
     return {
         "return_id": return_id,
@@ -176,47 +187,33 @@ async def import_returns_mx_raw(
     }
 
 
-@router.post(
-    "/{commessa_id}/ritorni/batch-single-file",
-    status_code=status.HTTP_200_OK,
-)
-async def import_ritorni_batch_single_file(
+def _parse_single_file_companies(
+    file_bytes: bytes,
+    *,
     commessa_id: str,
-    request: Request,
-    file: UploadFile = File(...),
-    mode: str = Form(default="lx"),  # lx | mx | excel
-    sheet_name: str | None = Form(default=None),
-    code_columns: str | None = Form(default=None),
-    description_columns: str | None = Form(default=None),
-    price_column: str | None = Form(default=None),
-    quantity_column: str | None = Form(default=None),
-    progressive_column: str | None = Form(default=None),
-    companies_config: str | None = Form(default=None),
+    filename: str | None,
+    mode: str,
+    sheet_name: str | None,
+    code_columns: str | None,
+    description_columns: str | None,
+    price_column: str | None,
+    quantity_column: str | None,
+    progressive_column: str | None,
+    companies_config: str | None,
+    raw_columns: bool = False,
 ) -> dict[str, Any]:
-    client_ip = request.client.host if request.client else "anonymous"
-    enforce_rate_limit(returns_rate_limiter, client_ip)
-
-    payload = await file.read()
-    if len(payload) > settings.max_upload_size_mb * 1024 * 1024:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File troppo grande",
-        )
-
-    parser_fn = _pick_parser(mode)
-    try:
-        parsed = parser_fn(
-            file_bytes=payload,
-            filename=file.filename,
-            sheet_name=sheet_name,
-            code_columns=(code_columns or "").split(",") if code_columns else None,
-            description_columns=(description_columns or "").split(",") if description_columns else None,
-            price_column=price_column,
-            quantity_column=quantity_column,
-            progressive_column=progressive_column,
-        )
-    except Exception as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    """Verification parse of the file, then one parse per company configuration."""
+    parser_fn = partial(_pick_parser(mode), raw_columns=raw_columns)
+    parser_fn(
+        file_bytes=file_bytes,
+        filename=filename,
+        sheet_name=sheet_name,
+        code_columns=(code_columns or "").split(",") if code_columns else None,
+        description_columns=(description_columns or "").split(",") if description_columns else None,
+        price_column=price_column,
+        quantity_column=quantity_column,
+        progressive_column=progressive_column,
+    )
 
     companies = _parse_companies_config(companies_config)
     # If no companies were provided, fallback to a single default entry
@@ -238,8 +235,8 @@ async def import_ritorni_batch_single_file(
 
         try:
             parsed_for_company = parser_fn(
-                file_bytes=payload,
-                filename=file.filename,
+                file_bytes=file_bytes,
+                filename=filename,
                 sheet_name=sheet_name,
                 code_columns=(code_cols or "").split(",") if code_cols else None,
                 description_columns=(desc_cols or "").split(",") if desc_cols else None,
@@ -279,6 +276,169 @@ async def import_ritorni_batch_single_file(
     }
 
 
+@router.post(
+    "/{commessa_id}/ritorni/batch-single-file",
+    status_code=status.HTTP_200_OK,
+)
+async def import_ritorni_batch_single_file(
+    commessa_id: str,
+    request: Request,
+    file: UploadFile = File(...),
+    mode: str = Form(default="lx"),  # lx | mx | excel
+    sheet_name: str | None = Form(default=None),
+    code_columns: str | None = Form(default=None),
+    description_columns: str | None = Form(default=None),
+    price_column: str | None = Form(default=None),
+    quantity_column: str | None = Form(default=None),
+    progressive_column: str | None = Form(default=None),
+    companies_config: str | None = Form(default=None),
+    raw_columns: bool = Form(default=False),
+) -> dict[str, Any]:
+    client_ip = request.client.host if request.client else "anonymous"
+    enforce_rate_limit(returns_rate_limiter, client_ip)
+
+    enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024)
+
+    # Parse di verifica e parse di ogni azienda nello stesso job, sulla stessa copia dell'upload
+    parse = partial(
+        _parse_stage,
+        parser=_parse_single_file_companies,
+        commessa_id=commessa_id,
+        filename=file.filename,
+        mode=mode,
+        sheet_name=sheet_name,
+        code_columns=code_columns,
+        description_columns=description_columns,
+        price_column=price_column,
+        quantity_column=quantity_column,
+        progressive_column=progressive_column,
+        companies_config=companies_config,
+        raw_columns=raw_columns,
+    )
+    return await _job_result(await submit_upload_job("returns-batch", file, [("parse", parse)]))
+
+
+@router.post(
+    "/{commessa_id}/ritorni/batch",
+    status_code=status.HTTP_200_OK,
+)
+async def import_ritorni_batch(
+    commessa_id: str,
+    request: Request,
+    files: list[UploadFile] = File(...),
+    mode: str = Form(default="lx"),  # lx | mx | excel
+    sheet_name: str | None = Form(default=None),
+    code_columns: str | None = Form(default=None),
+    description_columns: str | None = Form(default=None),
+    price_column: str | None = Form(default=None),
+    quantity_column: str | None = Form(default=None),
+    progressive_column: str | None = Form(default=None),
+    companies_config: str | None = Form(default=None),
+) -> dict[str, Any]:
+    # Un solo passaggio dal rate limiter per l'intero blocco di file
+    client_ip = request.client.host if request.client else "anonymous"
+    enforce_rate_limit(returns_rate_limiter, client_ip)
+
+    for file in files:
+        enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024)
+
+    companies = _parse_companies_config(companies_config)
+    jobs, failed = build_batch_jobs(
+        companies,
+        [file.filename for file in files],
+        {
+            "code_columns": code_columns,
+            "description_columns": description_columns,
+            "price_column": price_column,
+            "quantity_column": quantity_column,
+            "progressive_column": progressive_column,
+        },
+    )
+
+    # Una copia su disco per upload: ai processi del pool va solo il percorso
+    paths: list[str] = []
+    try:
+        for file in files:
+            paths.append(await run_in_threadpool(upload_to_file, file))
+        # Il pool di processi lavora fuori dall'event loop
+        results = await run_in_threadpool(
+            parse_returns_batch,
+            [(file.filename, path) for file, path in zip(files, paths)],
+            jobs,
+            mode=mode,
+            sheet_name=sheet_name,
+            workers=settings.returns_batch_workers,
+            header_max_rows=settings.returns_preview_max_rows,
+        )
+    finally:
+        for path in paths:
+            remove_upload_file(path)
+
+    computi: dict[str, Any] = {}
+    success: list[str] = []
+    for job, result in zip(jobs, results):
+        if isinstance(result, Exception):
+            failed.append(
+                {
+                    "company": job.company_id,
+                    "error": str(result),
+                    "error_type": result.__class__.__name__,
+                    "details": {"file": files[job.file_index].filename},
+                    "config": job.config,
+                }
+            )
+            continue
+        computi[job.company_id] = _build_computo_payload(
+            commessa_id,
+            result,
+            job.company_id,
+            round_number=job.config.get("round_number") or job.config.get("round"),
+            round_mode=job.config.get("round_mode"),
+            mode=mode,
+        )
+        success.append(job.company_id)
+
+    return {
+        "success": success,
+        "failed": failed,
+        "total": len(success) + len(failed),
+        "success_count": len(success),
+        "failed_count": len(failed),
+        "computi": computi,
+    }
+
+
+def _ritorni_stages(
+    commessa_id: str,
+    mode: str,
+    filename: str | None,
+    sheet_name: str | None,
+    code_columns: list[str] | None,
+    description_columns: list[str] | None,
+    price_column: str | None,
+    quantity_column: str | None,
+    progressive_column: str | None,
+    header_row_index: int | None,
+    long_description_columns: list[str] | None,
+    raw_columns: bool = False,
+) -> list[tuple[str, Callable[[Any], Any]]]:
+    parse = partial(
+        _parse_stage,
+        parser=_pick_parser(mode),
+        filename=filename,
+        sheet_name=sheet_name,
+        code_columns=code_columns,
+        description_columns=description_columns,
+        price_column=price_column,
+        quantity_column=quantity_column,
+        progressive_column=progressive_column,
+        header_row_index=header_row_index,
+        long_description_columns=long_description_columns,
+        raw_columns=raw_columns,
+    )
+    return [("parse", parse), ("payload", partial(_computo_stage, project_id=commessa_id))]
+
+
 @router.post(
     "/{commessa_id}/ritorni",
     status_code=status.HTTP_200_OK,
@@ -296,33 +456,81 @@ async def import_ritorni_single(
     progressive_column: str | None = Form(default=None),
     header_row_index: int | None = Form(default=None),
     long_description_columns: list[str] | None = Form(default=None),
+    raw_columns: bool = Form(default=False),
 ) -> dict[str, Any]:
     client_ip = request.client.host if request.client else "anonymous"
     enforce_rate_limit(returns_rate_limiter, client_ip)
 
-    payload = await file.read()
-    if len(payload) > settings.max_upload_size_mb * 1024 * 1024:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File troppo grande",
-        )
+    enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024)
+
+    stages = _ritorni_stages(
+        commessa_id, mode, file.filename, sheetName, code_columns, description_columns, price_column,
+        quantity_column, progressive_column, header_row_index, long_description_columns, raw_columns,
+    )
+    job = await submit_upload_job("returns", file, stages)
+    return await _job_result(job)
+
 
-    parser_fn = _pick_parser(mode)
+@router.post(
+    "/{commessa_id}/ritorni/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_ritorni_single(
+    commessa_id: str,
+    request: Request,
+    file: UploadFile = File(...),
+    mode: str = Form(default="lx"),  # lx | mx | excel
+    sheetName: str | None = Form(default=None),
+    code_columns: list[str] | None = Form(default=None),
+    description_columns: list[str] | None = Form(default=None),
+    price_column: str | None = Form(default=None),
+    quantity_column: str | None = Form(default=None),
+    progressive_column: str | None = Form(default=None),
+    header_row_index: int | None = Form(default=None),
+    long_description_columns: list[str] | None = Form(default=None),
+    raw_columns: bool = Form(default=False),
+) -> dict[str, Any]:
+    """Queues the `/ritorni` parse: poll `/jobs/{job_id}`, then fetch the computo from `/jobs/{job_id}/result`."""
+    client_ip = request.client.host if request.client else "anonymous"
+    enforce_rate_limit(returns_rate_limiter, client_ip)
+
+    enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024)
+
+    stages = _ritorni_stages(
+        commessa_id, mode, file.filename, sheetName, code_columns, description_columns, price_column,
+        quantity_column, progressive_column, header_row_index, long_description_columns, raw_columns,
+    )
+    job = await submit_upload_job("returns", file, stages)
+    return job.to_dict()
+
+
+@router.post(
+    "/{commessa_id}/ritorni/preview",
+    status_code=status.HTTP_200_OK,
+)
+async def preview_ritorni(
+    commessa_id: str,
+    request: Request,
+    file: UploadFile = File(...),
+    sheetName: str | None = Form(default=None),
+    header_row_index: int | None = Form(default=None),
+) -> dict[str, Any]:
+    client_ip = request.client.host if request.client else "anonymous"
+    enforce_rate_limit(returns_rate_limiter, client_ip)
+
+    enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024)
+
+    # Per la mappatura delle colonne bastano le prime righe: il foglio non è letto per intero.
+    # Zip, shared strings e righe si leggono comunque fuori dall'event loop
     try:
-        parsed = parser_fn(
-            file_bytes=payload,
-            filename=file.filename,
-            sheet_name=sheetName,
-            code_columns=code_columns,
-            description_columns=description_columns,
-            price_column=price_column,
-            quantity_column=quantity_column,
-            progressive_column=progressive_column,
-            header_row_index=header_row_index,
-            long_description_columns=long_description_columns,
-        )
+        with upload_buffer(file) as payload:
+            return await run_in_threadpool(
+                preview_excel_return_from_bytes,
+                file_bytes=payload,
+                filename=file.filename,
+                sheet_name=sheetName,
+                header_row_index=header_row_index,
+                max_rows=settings.returns_preview_max_rows,
+            )
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
-
-    return _build_computo_payload(commessa_id, parsed, None)
-
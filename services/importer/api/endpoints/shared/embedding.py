@@ -4,11 +4,24 @@ Extracts common embedding computation from six.py and xpwe.py
 """
 
 import os
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Sequence, Set
 import logging
 
+from core import settings
+from embedding.cache import hash_text
+from embedding.vectors import (
+    BINARY_FIELD,
+    STORAGE_FORMATS,
+    decode_vector,
+    encode_vector_base64,
+    stored_vector_filter,
+    stored_vector_projection,
+)
 from infrastructure.dto import PriceList
 
+# Version of the plain (description only) embeddings, see `compute_embeddings_for_items`
+TEXT_EMBEDDING_VERSION = "text"
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +34,8 @@ def compute_embeddings_for_items(
     use_weighted_props: bool = False,
     use_two_pass_embedding: bool = True,
     props_replication_k: int = 3,
+    project_id: Optional[str] = None,
+    reuse_embeddings: bool = False,
 ) -> int:
     """
     Compute embeddings for price list items.
@@ -35,6 +50,10 @@ def compute_embeddings_for_items(
         use_weighted_props: Use weighted property text building
         use_two_pass_embedding: Use two-pass embedding strategy
         props_replication_k: Replication factor for property text
+        project_id: Project (commessa) whose stored items may be reused
+        reuse_embeddings: Copy the vectors of the project's stored items with
+                          the same text hash, model and version instead of
+                          computing them again (one bulk query)
         
     Returns:
         Number of items successfully embedded
@@ -59,9 +78,8 @@ def compute_embeddings_for_items(
             logger.info("No items to embed")
             return 0
         
-        logger.info(f"Computing embeddings for {len(items_to_embed)} items...")
-        
         # Choose embedding strategy
+        composer = None
         if extract_properties:
             from embedding.extraction.embedding_composer import EmbeddingComposer
             composer = EmbeddingComposer(
@@ -71,26 +89,53 @@ def compute_embeddings_for_items(
                 use_two_pass_embedding=use_two_pass_embedding,
                 props_replication_k=props_replication_k,
             )
-            vectors = composer.batch_compose(items_to_embed)
+            embedder = composer.embedder
+            version = composer.version
         else:
             from embedding import get_embedder
             embedder = get_embedder()
-            texts = []
-            for item in items_to_embed:
-                text = item.extended_description or item.long_description or item.description
-                texts.append(text if text else "")
-            vectors = embedder.compute_embeddings(texts)
+            version = TEXT_EMBEDDING_VERSION
+        model = embedder.model
+        text_hashes = [hash_text(_embedding_input(item, composer)) for item in items_to_embed]
+
+        stored = {}
+        if reuse_embeddings and project_id:
+            stored = lookup_stored_embeddings(project_id, text_hashes, model, version)
+        pending = [i for i, text_hash in enumerate(text_hashes) if text_hash not in stored]
+        pending_items = [items_to_embed[i] for i in pending]
+        logger.info(
+            f"Computing embeddings for {len(pending_items)} items "
+            f"({len(items_to_embed) - len(pending_items)} reused from stored items)..."
+        )
         
-        # Assign vectors back to items
-        if len(vectors) != len(items_to_embed):
-            logger.warning(f"Embedding count mismatch: {len(vectors)} vs {len(items_to_embed)}")
-            return 0
+        computed = []
+        if pending_items:
+            if composer is not None:
+                computed = composer.batch_compose(pending_items)
+            else:
+                texts = [_embedding_input(item, None) for item in pending_items]
+                computed = embedder.compute_embeddings(texts)
+            if len(computed) != len(pending_items):
+                logger.warning(f"Embedding count mismatch: {len(computed)} vs {len(pending_items)}")
+                computed = [None] * len(pending_items)
+        
+        vectors = [stored.get(text_hash) for text_hash in text_hashes]
+        for i, vector in zip(pending, computed):
+            vectors[i] = vector
         
+        # Assign vectors back to items
+        storage = resolve_storage_format()
         count = 0
         for i, vector in enumerate(vectors):
             if vector:
-                original_idx = indices_map[i]
-                price_list.items[original_idx].embedding = vector
+                item = price_list.items[indices_map[i]]
+                if storage == "float":
+                    item.embedding = vector
+                else:
+                    item.embedding_bin = encode_vector_base64(vector, storage)
+                item.embedding_text_hash = text_hashes[i] or None
+                item.embedding_model = model
+                item.embedding_version = version
                 count += 1
         
         logger.info(f"Embeddings assigned for {count} items")
@@ -103,6 +148,82 @@ def compute_embeddings_for_items(
         return 0
 
 
+def lookup_stored_embeddings(
+    project_id: str,
+    text_hashes: Sequence[str],
+    model: str,
+    version: str,
+) -> Dict[str, List[float]]:
+    """
+    Vectors of the project's stored price list items by text hash, for the
+    given embedder model and version, in one query. Empty when the database
+    is not configured or not reachable: the import then computes everything.
+    """
+    hashes = sorted({text_hash for text_hash in text_hashes if text_hash})
+    mongo_uri = os.getenv("MONGODB_URI")
+    if not hashes or not mongo_uri:
+        return {}
+
+    import pymongo
+    from bson import ObjectId
+
+    client = pymongo.MongoClient(mongo_uri, connectTimeoutMS=5000, serverSelectionTimeoutMS=5000)
+    try:
+        try:
+            db = client.get_database()
+        except pymongo.errors.ConfigurationError:
+            db = client.get_database("test")
+        coll = db[_price_item_collection(db)]
+        query = {
+            "project_id": ObjectId(project_id) if ObjectId.is_valid(project_id) else project_id,
+            "embedding_text_hash": {"$in": hashes},
+            "embedding_model": model,
+            "embedding_version": version,
+            **stored_vector_filter(),
+        }
+        projection = {"_id": 0, "embedding_text_hash": 1, **stored_vector_projection()}
+        found: Dict[str, List[float]] = {}
+        for doc in coll.find(query, projection):
+            if doc["embedding_text_hash"] in found:
+                continue
+            # The full-precision array wins over the binary copy
+            vector = doc.get("embedding")
+            if not vector and doc.get(BINARY_FIELD) is not None:
+                decoded = decode_vector(doc[BINARY_FIELD])
+                vector = decoded.tolist() if decoded is not None else None
+            if vector:
+                found[doc["embedding_text_hash"]] = vector
+    except pymongo.errors.PyMongoError as e:
+        logger.warning(f"Stored embeddings lookup failed, computing all: {e}")
+        return {}
+    finally:
+        client.close()
+    logger.info(f"Stored embeddings: {len(found)}/{len(hashes)} texts found for project {project_id}")
+    return found
+
+
+def resolve_storage_format() -> str:
+    storage = (settings.embedding_storage or "float").lower()
+    if storage not in STORAGE_FORMATS:
+        logger.warning(f"Unknown embedding storage '{storage}', storing float arrays")
+        return "float"
+    return storage
+
+
+def _price_item_collection(db) -> str:
+    # Mongoose pluralizes the model name; older databases use the singular
+    names = db.list_collection_names()
+    return "pricelistitem" if "pricelistitem" in names and "pricelistitems" not in names else "pricelistitems"
+
+
+def _embedding_input(item, composer) -> str:
+    """Text identifying the item's embedding (the text embedded, or base + detail texts when composed)."""
+    if composer is not None:
+        base_text, detail_text = composer.compose_item_text(item)
+        return f"{base_text}\x00{detail_text}"
+    return item.extended_description or item.long_description or item.description or ""
+
+
 def get_used_pli_ids(estimate) -> Set[str]:
     """Extract the set of used PriceListItem IDs from an estimate."""
     used_ids = set()
@@ -0,0 +1,119 @@
+"""
+Import Pipeline Stages
+Parse, transform and embed steps of the SIX/XPWE imports, run as the stages
+of an import job (application.import_jobs) in a worker process.
+Each stage is a module-level function bound with functools.partial, so the
+pool can pickle it, and takes the output of the previous stage.
+
+The upload reaches the worker as the path of its only on-disk copy (see
+`submit_upload_job`): the first stage maps the file, nothing is copied into
+memory or pickled to the pool.
+"""
+
+import logging
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from application.import_jobs import ImportJob, ImportQueueFull, get_import_jobs
+from application.process_file import cached_file_content, process_file_content
+from loader import LoaderService
+from utils.upload import mapped_file, remove_upload_file, upload_buffer, upload_to_file
+
+from .embedding import compute_embeddings_for_items, get_used_pli_ids
+from .schemas import ImportResult
+
+logger = logging.getLogger(__name__)
+
+
+def parse_stage(
+    path: str,
+    *,
+    format_hint: str,
+    filename: Optional[str],
+    preventivo_id: Optional[str] = None,
+):
+    with mapped_file(path) as content:
+        return process_file_content(content, format_hint, filename=filename, preventivo_id=preventivo_id)
+
+
+def transform_stage(
+    normalized,
+    *,
+    project_id: str,
+    preventivo_id: Optional[str],
+    extract_properties: bool,
+) -> ImportResult:
+    project, groups, price_list, estimate = LoaderService.transform(
+        normalized,
+        project_id=project_id,
+        preventivo_id=preventivo_id,
+        extract_properties=extract_properties,
+    )
+    return ImportResult(project=project, groups=groups, price_list=price_list, estimate=estimate)
+
+
+def embed_stage(result: ImportResult, *, used_items_only: bool, **options: Any) -> ImportResult:
+    """Embeddings of the price list items (only those used by the estimate if `used_items_only`)."""
+    if result.price_list.items:
+        used_pli_ids = get_used_pli_ids(result.estimate) if used_items_only else None
+        compute_embeddings_for_items(
+            price_list=result.price_list,
+            used_pli_ids=used_pli_ids if used_pli_ids else None,
+            **options,
+        )
+    return result
+
+
+async def submit_upload_job(
+    kind: str,
+    file: UploadFile,
+    stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+) -> ImportJob:
+    """
+    Queue `stages` on the upload. The first stage receives the path of a job
+    file holding the upload (the request spool is released at once), removed
+    when the job ends.
+    """
+    path = await run_in_threadpool(upload_to_file, file)
+    try:
+        job = get_import_jobs().submit(kind, stages, path)
+    except ImportQueueFull as exc:
+        remove_upload_file(path)
+        raise HTTPException(503, str(exc))
+    job.future.add_done_callback(lambda _future: remove_upload_file(path))
+    return job
+
+
+async def submit_import_job(
+    kind: str,
+    file: UploadFile,
+    format_hint: str,
+    stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+    preventivo_id: Optional[str] = None,
+) -> ImportJob:
+    """
+    Queue parse + `stages` for an upload. A parse already in the cache (e.g.
+    from the preview) is passed instead of the file and the parse stage is
+    skipped.
+    """
+    with upload_buffer(file) as content:
+        cached = await run_in_threadpool(
+            cached_file_content, content, format_hint, filename=file.filename, preventivo_id=preventivo_id
+        )
+    if cached is None:
+        parse = partial(parse_stage, format_hint=format_hint, filename=file.filename, preventivo_id=preventivo_id)
+        return await submit_upload_job(kind, file, [("parse", parse), *stages])
+
+    try:
+        return get_import_jobs().submit(kind, list(stages), cached, skipped=["parse"])
+    except ImportQueueFull as exc:
+        raise HTTPException(503, str(exc))
+
+
+def embedding_stages(compute_embeddings: bool, used_items_only: bool, **options: Any) -> List[Tuple[str, Callable]]:
+    if not compute_embeddings:
+        return []
+    return [("embed", partial(embed_stage, used_items_only=used_items_only, **options))]
@@ -4,18 +4,61 @@ Parses .six/.xml files and transforms to database schema.
 """
 
 import logging
+from functools import partial
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form
+from starlette.concurrency import run_in_threadpool
 
 from application.process_file import process_file_content
-from loader import LoaderService
-from api.endpoints.shared import ImportResult, compute_embeddings_for_items, get_used_pli_ids
+from api.endpoints.shared import ImportResult
+from api.endpoints.shared.pipeline import embedding_stages, submit_import_job, transform_stage
 from core import settings
+from utils.upload import enforce_upload_size, upload_buffer
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _six_stages(
+    commessa_id: str,
+    preventivo_id: str | None,
+    compute_embeddings: bool,
+    extract_properties: bool,
+    use_weighted_props: bool,
+    use_two_pass_embedding: bool,
+    props_replication_k: int,
+    base_weight: float,
+    detail_weight: float,
+    reuse_embeddings: bool,
+):
+    """Transform using LoaderService, then embeddings of the used items (if requested)."""
+    transform = partial(
+        transform_stage,
+        project_id=commessa_id,
+        preventivo_id=preventivo_id,
+        extract_properties=extract_properties,
+    )
+    return [("transform", transform)] + embedding_stages(
+        compute_embeddings,
+        used_items_only=True,
+        extract_properties=extract_properties,
+        base_weight=base_weight,
+        detail_weight=detail_weight,
+        use_weighted_props=use_weighted_props,
+        use_two_pass_embedding=use_two_pass_embedding,
+        props_replication_k=props_replication_k,
+        project_id=commessa_id,
+        reuse_embeddings=reuse_embeddings,
+    )
+
+
+def _check_six_upload(file: UploadFile) -> None:
+    if not file.filename or not file.filename.lower().endswith((".six", ".xml")):
+        raise HTTPException(400, "File must be .six or .xml")
+
+    enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024, "File too large")
+
+
 @router.post("/{commessa_id}/import-six", response_model=ImportResult)
 async def import_six(
     commessa_id: str,
@@ -28,64 +71,55 @@ async def import_six(
     props_replication_k: int = Form(3),
     base_weight: float = Form(0.4),
     detail_weight: float = Form(0.6),
+    reuse_embeddings: bool = Form(True),
 ):
     """
     Parses a SIX file and transforms it into the new Database Scheme.
     Returns the objects that would be saved to MongoDB.
+    Runs as an import job and waits for it (see `/import-six/jobs`).
     """
-    if not file.filename or not file.filename.lower().endswith((".six", ".xml")):
-        raise HTTPException(400, "File must be .six or .xml")
-    
-    content = await file.read()
-    if len(content) > settings.max_upload_size_mb * 1024 * 1024:
-        raise HTTPException(413, "File too large")
-    
+    _check_six_upload(file)
+    stages = _six_stages(
+        commessa_id, preventivo_id, compute_embeddings, extract_properties, use_weighted_props,
+        use_two_pass_embedding, props_replication_k, base_weight, detail_weight,
+        reuse_embeddings,
+    )
+    job = await submit_import_job("six", file, "six", stages, preventivo_id=preventivo_id)
     try:
-        # 1. Parse using Domain Logic (SixParser)
-        normalized = process_file_content(content, "six", filename=file.filename)
-        
-        # 2. Transform using LoaderService
-        project, groups, price_list, estimate = LoaderService.transform(
-            normalized, 
-            project_id=commessa_id,
-            preventivo_id=preventivo_id,
-            extract_properties=extract_properties,
-        )
-
-        # 3. Compute Embeddings (if requested)
-        if compute_embeddings and price_list.items:
-            used_pli_ids = get_used_pli_ids(estimate)
-            compute_embeddings_for_items(
-                price_list=price_list,
-                used_pli_ids=used_pli_ids if used_pli_ids else None,
-                extract_properties=extract_properties,
-                base_weight=base_weight,
-                detail_weight=detail_weight,
-                use_weighted_props=use_weighted_props,
-                use_two_pass_embedding=use_two_pass_embedding,
-                props_replication_k=props_replication_k,
-            )
-        
-        # DEBUG: Log sample of price_list.items to verify long_description
-        if price_list.items:
-            for i, pli in enumerate(price_list.items[:3]):
-                logger.debug(f"PLI #{i}: code={pli.code[:30] if pli.code else ''}, "
-                             f"desc={pli.description[:30] if pli.description else ''}, "
-                             f"long_desc={pli.long_description[:50] if pli.long_description else 'EMPTY'}")
-        
-        return ImportResult(
-            project=project,
-            groups=groups,
-            price_list=price_list,
-            estimate=estimate
-        )
-
+        return await job.wait()
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"SIX import job {job.id} failed")
         raise HTTPException(400, f"Import error: {str(e)}")
 
 
+@router.post("/{commessa_id}/import-six/jobs", status_code=202)
+async def submit_import_six(
+    commessa_id: str,
+    file: UploadFile = File(...),
+    preventivo_id: str = Form(None),
+    compute_embeddings: bool = Form(False),
+    extract_properties: bool = Form(False),
+    use_weighted_props: bool = Form(False),
+    use_two_pass_embedding: bool = Form(True),
+    props_replication_k: int = Form(3),
+    base_weight: float = Form(0.4),
+    detail_weight: float = Form(0.6),
+    reuse_embeddings: bool = Form(True),
+):
+    """
+    Queues the SIX import and returns the job at once: poll `/jobs/{job_id}`,
+    then fetch the ImportResult from `/jobs/{job_id}/result`.
+    """
+    _check_six_upload(file)
+    stages = _six_stages(
+        commessa_id, preventivo_id, compute_embeddings, extract_properties, use_weighted_props,
+        use_two_pass_embedding, props_replication_k, base_weight, detail_weight,
+        reuse_embeddings,
+    )
+    job = await submit_import_job("six", file, "six", stages, preventivo_id=preventivo_id)
+    return job.to_dict()
+
+
 @router.post("/{commessa_id}/import-six/preview")
 async def preview_six(
     commessa_id: str,
@@ -95,17 +129,14 @@ async def preview_six(
     Parses a SIX file and returns a summary for preview.
     Used by frontend to select which Preventivo to import.
     """
-    if not file.filename or not file.filename.lower().endswith((".six", ".xml")):
-        raise HTTPException(400, "File must be .six or .xml")
-    
-    content = await file.read()
-    if len(content) > settings.max_upload_size_mb * 1024 * 1024:
-        raise HTTPException(413, "File too large")
+    _check_six_upload(file)
     
     try:
-        # Parse using Domain Logic
+        # Parse using Domain Logic, off the event loop; in this process, so the
+        # parse cache hands the result to the import that follows
         logger.info(f"Processing preview for {file.filename}")
-        normalized = process_file_content(content, "six", filename=file.filename)
+        with upload_buffer(file) as content:
+            normalized = await run_in_threadpool(process_file_content, content, "six", filename=file.filename)
         logger.info(f"Normalized result has {len(normalized.preventivi)} preventivi")
         
         # Use Preview Service
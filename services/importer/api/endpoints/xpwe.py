@@ -4,17 +4,72 @@ Parses .xpwe files and transforms to database schema.
 """
 
 import json
+import logging
+from functools import partial
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form
+from starlette.concurrency import run_in_threadpool
 
 from application.process_file import process_file_content
-from loader import LoaderService
 from parsers.shared.wbs_constants import CANONICAL_WBS_LEVELS
-from api.endpoints.shared import ImportResult, compute_embeddings_for_items
+from api.endpoints.shared import ImportResult
+from api.endpoints.shared.pipeline import embedding_stages, submit_import_job, transform_stage
 from core import settings
+from utils.upload import enforce_upload_size, upload_buffer
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _xpwe_stages(
+    commessa_id: str,
+    preventivo_id: str | None,
+    wbs_mapping: str | None,
+    compute_embeddings: bool,
+    extract_properties: bool,
+    use_weighted_props: bool,
+    use_two_pass_embedding: bool,
+    props_replication_k: int,
+    base_weight: float,
+    detail_weight: float,
+    reuse_embeddings: bool,
+):
+    """WBS mapping (if provided), transform using LoaderService, embeddings of all items (if requested)."""
+    stages = []
+    if wbs_mapping:
+        stages.append(("wbs_mapping", partial(_wbs_mapping_stage, wbs_mapping_json=wbs_mapping)))
+    stages.append(
+        (
+            "transform",
+            partial(
+                transform_stage,
+                project_id=commessa_id,
+                preventivo_id=preventivo_id,
+                extract_properties=extract_properties,
+            ),
+        )
+    )
+    return stages + embedding_stages(
+        compute_embeddings,
+        used_items_only=False,  # Embed all items for XPWE
+        extract_properties=extract_properties,
+        base_weight=base_weight,
+        detail_weight=detail_weight,
+        use_weighted_props=use_weighted_props,
+        use_two_pass_embedding=use_two_pass_embedding,
+        props_replication_k=props_replication_k,
+        project_id=commessa_id,
+        reuse_embeddings=reuse_embeddings,
+    )
+
+
+def _check_xpwe_upload(file: UploadFile) -> None:
+    if not file.filename:
+        raise HTTPException(400, "Filename required")
+
+    enforce_upload_size(file, settings.max_upload_size_mb * 1024 * 1024, "File too large")
+
+
 @router.post("/{commessa_id}/import-xpwe/raw", response_model=ImportResult)
 async def import_xpwe_raw(
     commessa_id: str,
@@ -28,57 +83,58 @@ async def import_xpwe_raw(
     props_replication_k: int = Form(3),
     base_weight: float = Form(0.4),
     detail_weight: float = Form(0.6),
+    reuse_embeddings: bool = Form(True),
 ):
     """
     Parses a XPWE file and transforms it into the new Database Scheme.
+    Runs as an import job and waits for it (see `/import-xpwe/raw/jobs`).
     """
-    if not file.filename:
-        raise HTTPException(400, "Filename required")
-    
-    content = await file.read()
-    if len(content) > settings.max_upload_size_mb * 1024 * 1024:
-        raise HTTPException(413, "File too large")
-    
+    _check_xpwe_upload(file)
+    stages = _xpwe_stages(
+        commessa_id, preventivo_id, wbs_mapping, compute_embeddings, extract_properties,
+        use_weighted_props, use_two_pass_embedding, props_replication_k, base_weight, detail_weight,
+        reuse_embeddings,
+    )
+    job = await submit_import_job("xpwe", file, "xpwe", stages)
     try:
-        # 1. Parse using Domain Logic
-        normalized = process_file_content(content, "xpwe", filename=file.filename)
+        return await job.wait()
+    except Exception as e:
+        logger.exception(f"XPWE import job {job.id} failed")
+        raise HTTPException(400, f"Import error: {str(e)}")
 
-        # 2. Apply WBS Mapping if provided
-        if wbs_mapping:
-            _apply_wbs_mapping(normalized, wbs_mapping)
-        
-        # 3. Transform using LoaderService
-        project, groups, price_list, estimate = LoaderService.transform(
-            normalized, 
-            project_id=commessa_id,
-            preventivo_id=preventivo_id,
-            extract_properties=extract_properties,
-        )
 
-        # 4. Compute Embeddings (if requested)
-        if compute_embeddings and price_list.items:
-            compute_embeddings_for_items(
-                price_list=price_list,
-                used_pli_ids=None,  # Embed all items for XPWE
-                extract_properties=extract_properties,
-                base_weight=base_weight,
-                detail_weight=detail_weight,
-                use_weighted_props=use_weighted_props,
-                use_two_pass_embedding=use_two_pass_embedding,
-                props_replication_k=props_replication_k,
-            )
-        
-        return ImportResult(
-            project=project,
-            groups=groups,
-            price_list=price_list,
-            estimate=estimate
-        )
+@router.post("/{commessa_id}/import-xpwe/raw/jobs", status_code=202)
+async def submit_import_xpwe_raw(
+    commessa_id: str,
+    file: UploadFile = File(...),
+    preventivo_id: str = Form(None),
+    wbs_mapping: str = Form(None),
+    compute_embeddings: bool = Form(False),
+    extract_properties: bool = Form(False),
+    use_weighted_props: bool = Form(False),
+    use_two_pass_embedding: bool = Form(True),
+    props_replication_k: int = Form(3),
+    base_weight: float = Form(0.4),
+    detail_weight: float = Form(0.6),
+    reuse_embeddings: bool = Form(True),
+):
+    """
+    Queues the XPWE import and returns the job at once: poll `/jobs/{job_id}`,
+    then fetch the ImportResult from `/jobs/{job_id}/result`.
+    """
+    _check_xpwe_upload(file)
+    stages = _xpwe_stages(
+        commessa_id, preventivo_id, wbs_mapping, compute_embeddings, extract_properties,
+        use_weighted_props, use_two_pass_embedding, props_replication_k, base_weight, detail_weight,
+        reuse_embeddings,
+    )
+    job = await submit_import_job("xpwe", file, "xpwe", stages)
+    return job.to_dict()
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(400, f"Import error: {str(e)}")
+
+def _wbs_mapping_stage(normalized, wbs_mapping_json: str):
+    _apply_wbs_mapping(normalized, wbs_mapping_json)
+    return normalized
 
 
 def _apply_wbs_mapping(normalized, wbs_mapping_json: str):
@@ -126,16 +182,13 @@ async def preview_xpwe_raw(
     """
     Parses a XPWE file and returns a summary for preview.
     """
-    if not file.filename:
-        raise HTTPException(400, "Filename required")
-    
-    content = await file.read()
-    if len(content) > settings.max_upload_size_mb * 1024 * 1024:
-        raise HTTPException(413, "File too large")
+    _check_xpwe_upload(file)
     
     try:
         print(f"DEBUG Endpoint: Processing XPWE preview for {file.filename}")
-        normalized = process_file_content(content, "xpwe", filename=file.filename)
+        # Off the event loop, in this process: the parse cache serves the import that follows
+        with upload_buffer(file) as content:
+            normalized = await run_in_threadpool(process_file_content, content, "xpwe", filename=file.filename)
         
         # Analyze WBS Structure for Mapping UI
         wbs_kinds_found = {}
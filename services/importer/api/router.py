@@ -11,6 +11,8 @@ from core import settings as app_settings
 from api.endpoints import six as six_endpoints
 from api.endpoints import xpwe as xpwe_endpoints
 from api.endpoints import returns as returns_endpoints
+from api.endpoints import jobs as jobs_endpoints
+from api.endpoints import embeddings as embeddings_endpoints
 from api.endpoints import analytics_routes as analytics_endpoints
 from api.endpoints import extraction as extraction_endpoints
 from api.endpoints import price_estimator as price_estimator_endpoints
@@ -37,6 +39,18 @@ api_router.include_router(
     tags=["import-returns"]
 )
 
+api_router.include_router(
+    jobs_endpoints.router,
+    prefix="/jobs",
+    tags=["import-jobs"]
+)
+
+api_router.include_router(
+    embeddings_endpoints.router,
+    prefix="/embeddings",
+    tags=["embeddings"]
+)
+
 # Analytics Endpoints
 api_router.include_router(
     analytics_endpoints.router, 
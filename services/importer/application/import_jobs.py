@@ -0,0 +1,321 @@
+"""
+Import jobs - parse, transform and embed off the API event loop.
+
+An import is a list of named stages (picklable callables, each receiving the
+output of the previous one) run as a single task on a bounded process pool.
+Submitting returns an `ImportJob` at once: the caller polls its status and
+fetches the result, or awaits it (the synchronous endpoints are thin wrappers
+doing exactly that). Workers report the start and end of every stage on an
+event queue drained by a thread of the API process, so the status shows the
+stage in progress while the job runs.
+
+- bounded: at most `max_pending` jobs queued or running, `submit` raises
+  `ImportQueueFull` beyond that;
+- finished jobs (and their results) are kept for `ttl_seconds`;
+- `workers=0` runs the jobs on one thread of the API process instead of a
+  process pool (still off the event loop).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core import settings
+
+logger = logging.getLogger(__name__)
+
+Stage = Tuple[str, Callable[[Any], Any]]
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+PENDING = "pending"
+SKIPPED = "skipped"
+
+# Event queue of the worker (set by the pool initializer)
+_events: Any = None
+
+
+class ImportQueueFull(RuntimeError):
+    """Too many import jobs queued or running."""
+
+
+@dataclass
+class ImportJob:
+    id: str
+    kind: str
+    stages: Dict[str, str]
+    status: str = QUEUED
+    stage: Optional[str] = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def progress(self) -> float:
+        """Share of the stages completed (skipped stages count as completed)."""
+        if not self.stages:
+            return 1.0
+        completed = sum(1 for state in self.stages.values() if state in (DONE, SKIPPED))
+        return completed / len(self.stages)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": dict(self.stages),
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "error_type": self.error_type,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    async def wait(self) -> Any:
+        """Result of the job; raises the exception of the failed stage."""
+        return await asyncio.wrap_future(self.future)
+
+
+class ImportJobQueue:
+    def __init__(
+        self,
+        workers: int,
+        max_pending: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._jobs: Dict[str, ImportJob] = {}
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+        self._events: Any = None
+        self._drain: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(cls) -> "ImportJobQueue":
+        return cls(
+            workers=settings.import_job_workers,
+            max_pending=settings.import_job_max_pending,
+            ttl_seconds=settings.import_job_ttl_seconds,
+        )
+
+    # --- submit / lookup ---
+
+    def submit(
+        self,
+        kind: str,
+        stages: Sequence[Stage],
+        value: Any,
+        skipped: Sequence[str] = (),
+    ) -> ImportJob:
+        """
+        Queue a job running `stages` on `value`. `skipped` names stages shown
+        in the status as already satisfied (e.g. a parse found in the cache).
+        """
+        with self._lock:
+            self._purge()
+            if self.pending >= self.max_pending:
+                raise ImportQueueFull(f"Import queue full ({self.max_pending} jobs pending)")
+            job = ImportJob(id=uuid.uuid4().hex, kind=kind, stages={}, created_at=self._clock())
+            job.stages = {name: SKIPPED for name in skipped}
+            job.stages.update({name: PENDING for name, _fn in stages})
+            self._jobs[job.id] = job
+            try:
+                job.future = self._ensure_executor().submit(_run_stages, job.id, list(stages), value)
+            except BrokenExecutor:
+                # A worker died (e.g. out of memory): start a new pool
+                logger.warning("Import job pool broken, restarting it")
+                self._stop_executor()
+                job.future = self._ensure_executor().submit(_run_stages, job.id, list(stages), value)
+        job.future.add_done_callback(lambda future, job=job: self._finish(job, future))
+        return job
+
+    def get(self, job_id: str) -> ImportJob | None:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge()
+            jobs = list(self._jobs.values())
+        by_status = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        for job in jobs:
+            by_status[job.status] += 1
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "depth": by_status[QUEUED] + by_status[RUNNING],
+            **by_status,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._stop_executor()
+
+    # --- internals ---
+
+    def _stop_executor(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self._drain is not None:
+            # The drain thread exits at the sentinel, after the events already queued
+            self._events.put(None)
+            self._drain = None
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is not None:
+            return self._executor
+        if self.workers > 0:
+            context = multiprocessing.get_context()
+            self._events = context.SimpleQueue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._events,),
+            )
+        else:
+            self._events = queue.SimpleQueue()
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="import-job",
+                initializer=_init_worker,
+                initargs=(self._events,),
+            )
+        self._drain = threading.Thread(target=self._drain_events, args=(self._events,), daemon=True)
+        self._drain.start()
+        return self._executor
+
+    def _drain_events(self, events: Any) -> None:
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            job_id, stage, state, at = event
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.finished:
+                    continue
+                job.stages[stage] = state
+                if state == RUNNING:
+                    job.stage = stage
+                    job.status = RUNNING
+                    if job.started_at is None:
+                        job.started_at = at
+
+    def _finish(self, job: ImportJob, future: Future) -> None:
+        with self._lock:
+            job.finished_at = self._clock()
+            job.stage = None
+            if future.cancelled():
+                job.status, job.error, job.error_type = FAILED, "Job cancelled", "CancelledError"
+                return
+            exc = future.exception()
+            if exc is None:
+                job.status = DONE
+                job.result = future.result()
+                job.stages = {name: DONE if state != SKIPPED else state for name, state in job.stages.items()}
+                return
+            job.status = FAILED
+            job.error = str(exc)
+            job.error_type = exc.__class__.__name__
+            # Stage events may still be in the queue: the exception names its stage
+            failed_stage = getattr(exc, "import_stage", None)
+            if failed_stage in job.stages:
+                names = list(job.stages)
+                for name in names[: names.index(failed_stage)]:
+                    if job.stages[name] != SKIPPED:
+                        job.stages[name] = DONE
+                job.stages[failed_stage] = FAILED
+        logger.warning(f"Import job {job.id} ({job.kind}) failed: {job.error}")
+
+    def _purge(self) -> None:
+        now = self._clock()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at is not None and now - job.finished_at > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def _init_worker(events: Any) -> None:
+    global _events
+    _events = events
+
+
+def _report(job_id: str, stage: str, state: str) -> None:
+    if _events is not None:
+        _events.put((job_id, stage, state, time.time()))
+
+
+def _run_stages(job_id: str, stages: List[Stage], value: Any) -> Any:
+    for name, fn in stages:
+        _report(job_id, name, RUNNING)
+        try:
+            value = fn(value)
+        except Exception as exc:
+            exc.import_stage = name
+            raise
+        _report(job_id, name, DONE)
+    return value
+
+
+_queue: ImportJobQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_import_jobs() -> ImportJobQueue:
+    """Process-wide job queue configured from settings."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = ImportJobQueue.from_settings()
+    return _queue
+
+
+def shutdown_import_jobs() -> None:
+    global _queue
+    with _queue_lock:
+        job_queue, _queue = _queue, None
+    if job_queue is not None:
+        job_queue.shutdown()
+
+
+__all__ = [
+    "ImportJob",
+    "ImportJobQueue",
+    "ImportQueueFull",
+    "get_import_jobs",
+    "shutdown_import_jobs",
+]
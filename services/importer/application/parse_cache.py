@@ -0,0 +1,248 @@
+"""
+Content-addressed cache of parsed estimates.
+
+The client previews a file and then imports the same bytes: both calls go
+through `process_file_content`, which would parse the file twice. Results are
+cached under SHA-256(content) + format + parser version + filename (the
+filename becomes the project name), so the second call skips parsing.
+
+- memory tier: LRU bounded by `max_bytes`, entries expire after `ttl_seconds`;
+- disk tier (optional, `directory`): one file per key, bounded by
+  `disk_max_bytes`, same TTL, shared by the worker processes of a host;
+- single-flight: concurrent requests for a key wait for the one parse in
+  progress instead of starting their own.
+
+Entries are stored as the JSON of the NormalizedEstimate: the caller that
+parsed gets the original object, every hit gets its own copy (endpoints mutate
+the estimate, e.g. the XPWE WBS mapping), and no pickle is read from disk.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+from core import settings
+from domain import NormalizedEstimate
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(content: bytes, format_hint: str, parser_version: str, filename: str | None = None) -> str:
+    digest = hashlib.sha256(content).hexdigest()
+    # The filename only needs to be told apart, hash it to keep keys file-system safe
+    name = hashlib.sha256((filename or "").encode("utf-8")).hexdigest()[:16]
+    return f"{format_hint}-{parser_version}-{digest}-{name}"
+
+
+class ParseCache:
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        directory: str | None = None,
+        disk_max_bytes: int = 0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self._clock = clock
+        # key -> (expiry time, serialized estimate), least recently used first
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls) -> "ParseCache":
+        return cls(
+            max_bytes=settings.parse_cache_max_mb * 1024 * 1024,
+            ttl_seconds=settings.parse_cache_ttl_seconds,
+            directory=settings.parse_cache_dir,
+            disk_max_bytes=settings.parse_cache_disk_max_mb * 1024 * 1024,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get(self, key: str) -> Optional[NormalizedEstimate]:
+        """A private copy of the cached estimate, or None."""
+        data = self._lookup(key)
+        return NormalizedEstimate.model_validate_json(data) if data is not None else None
+
+    def get_or_parse(self, key: str, parse: Callable[[], NormalizedEstimate]) -> NormalizedEstimate:
+        """
+        The cached estimate for `key`, or the result of `parse()` (stored for
+        the next callers). Concurrent calls for the same key share one parse;
+        a failed parse is not cached and its error is raised to every waiter.
+        """
+        data = self._lookup(key)
+        if data is not None:
+            return NormalizedEstimate.model_validate_json(data)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            logger.info(f"Parse cache: waiting for the parse in progress of {key[:24]}")
+            return NormalizedEstimate.model_validate_json(future.result())
+
+        try:
+            estimate = parse()
+            data = estimate.model_dump_json().encode("utf-8")
+            self.put(key, data)
+            future.set_result(data)
+            return estimate
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def put(self, key: str, data: bytes) -> None:
+        self._store_memory(key, data)
+        if self.directory:
+            self._store_disk(key, data)
+
+    # -- memory tier -------------------------------------------------------
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, data = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return data
+                self._drop(key)
+
+        data = self._load_disk(key, now) if self.directory else None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._store_memory(key, data)
+        return data
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (self._clock() + self.ttl_seconds, data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        _, data = self._entries.pop(key)
+        self._size -= len(data)
+
+    # -- disk tier ---------------------------------------------------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_disk(self, key: str, now: float) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl_seconds <= now:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _store_disk(self, key: str, data: bytes) -> None:
+        if len(data) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            # The file time carries the entry age (same clock as the memory tier)
+            now = self._clock()
+            os.utime(tmp, (now, now))
+            os.replace(tmp, path)
+            self._evict_disk()
+        except OSError as exc:
+            logger.warning(f"Parse cache: cannot write {path}: {exc}")
+
+    def _evict_disk(self) -> None:
+        """Removes expired files, then the oldest ones beyond disk_max_bytes."""
+        now = self._clock()
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                stat = entry.stat()
+                if stat.st_mtime + self.ttl_seconds <= now:
+                    self._remove(entry.path)
+                else:
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_cache: ParseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    """Process-wide cache configured from settings."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ParseCache.from_settings()
+    return _cache
+
+
+__all__ = ["ParseCache", "cache_key", "get_parse_cache"]
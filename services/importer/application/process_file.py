@@ -2,17 +2,23 @@
 Process File Use Case - Main entry point for file processing.
 
 This module orchestrates file parsing using the appropriate parser.
+Parse results are cached by content (see application.parse_cache), so the
+import that follows a preview of the same file does not parse it again.
 """
 
 from typing import Optional
 from registry import get_parser
 from domain import NormalizedEstimate
+from core import settings
+from application.parse_cache import cache_key, get_parse_cache
 
 
 def process_file_content(
     file_content: bytes, 
     format_hint: str, 
-    filename: Optional[str] = None
+    filename: Optional[str] = None,
+    preventivo_id: Optional[str] = None,
+    use_cache: bool = True,
 ) -> NormalizedEstimate:
     """
     Main entry point to process a file buffer.
@@ -21,13 +27,45 @@ def process_file_content(
         file_content: Raw bytes of the file.
         format_hint: 'six', 'excel', etc.
         filename: Optional filename for logging/debug.
+        preventivo_id: Optional preventivo to parse; the others are skipped.
+        use_cache: Look up / store the result in the parse cache.
         
     Returns:
         NormalizedEstimate with relational data.
     """
     parser = get_parser(format_hint)
-    estimate = parser.parse(file_content, filename=filename)
-    return estimate
+    if not (use_cache and settings.parse_cache_enabled):
+        return parser.parse(file_content, filename=filename, preventivo_id=preventivo_id)
+
+    cache = get_parse_cache()
+    key = cache_key(file_content, format_hint, parser.version, filename)
+    if preventivo_id:
+        # Import after a preview: the full parse is cached, keep the selected preventivo
+        cached = cache.get(key)
+        if cached is not None:
+            return parser.restrict_to_preventivo(cached, preventivo_id)
+        return parser.parse(file_content, filename=filename, preventivo_id=preventivo_id)
+
+    return cache.get_or_parse(key, lambda: parser.parse(file_content, filename=filename))
+
+
+def cached_file_content(
+    file_content: bytes,
+    format_hint: str,
+    filename: Optional[str] = None,
+    preventivo_id: Optional[str] = None,
+) -> Optional[NormalizedEstimate]:
+    """
+    The cached result `process_file_content` would return, without parsing:
+    None if the file is not in the parse cache.
+    """
+    if not settings.parse_cache_enabled:
+        return None
+    parser = get_parser(format_hint)
+    cached = get_parse_cache().get(cache_key(file_content, format_hint, parser.version, filename))
+    if cached is None or not preventivo_id:
+        return cached
+    return parser.restrict_to_preventivo(cached, preventivo_id)
 
 
 def process_file_path(file_path: str, format_hint: str) -> NormalizedEstimate:
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from functools import partial
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from application import import_jobs as import_jobs_module
+from application.import_jobs import ImportJobQueue, ImportQueueFull
+from parsers.tests.fixtures import build_six_document
+
+
+def _add(value: int, amount: int) -> int:
+    return value + amount
+
+
+def _fail(value: int) -> int:
+    raise ValueError(f"bad value {value}")
+
+
+def _wait_for(event_path: str, value: int) -> int:
+    # Blocks the (single) worker until the test creates the file
+    while not os.path.exists(event_path):
+        time.sleep(0.01)
+    return value
+
+
+def _result(job):
+    return asyncio.run(job.wait())
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestImportJobQueue(unittest.TestCase):
+    def _queue(self, workers: int = 0, **kwargs) -> ImportJobQueue:
+        job_queue = ImportJobQueue(workers=workers, max_pending=kwargs.pop("max_pending", 4), ttl_seconds=60, **kwargs)
+        self.addCleanup(job_queue.shutdown)
+        return job_queue
+
+    def _wait_status(self, job, status: str) -> None:
+        deadline = time.time() + 10
+        while job.status != status and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(job.status, status)
+
+    def test_stages_run_in_order(self) -> None:
+        job_queue = self._queue()
+        job = job_queue.submit("test", [("one", partial(_add, amount=1)), ("two", partial(_add, amount=10))], 5)
+        self.assertEqual(_result(job), 16)
+        self._wait_status(job, "done")
+        self.assertEqual(job.stages, {"one": "done", "two": "done"})
+        self.assertEqual(job.result, 16)
+        self.assertEqual(job.to_dict()["progress"], 1.0)
+
+    def test_process_pool(self) -> None:
+        job_queue = self._queue(workers=1)
+        job = job_queue.submit("test", [("parse", partial(_add, amount=2))], 40, skipped=["cache"])
+        self.assertEqual(_result(job), 42)
+        self._wait_status(job, "done")
+        self.assertEqual(job.stages, {"cache": "skipped", "parse": "done"})
+
+    def test_failed_stage(self) -> None:
+        job_queue = self._queue()
+        job = job_queue.submit("test", [("one", partial(_add, amount=1)), ("two", _fail), ("three", _fail)], 1)
+        with self.assertRaises(ValueError):
+            _result(job)
+        self._wait_status(job, "failed")
+        self.assertEqual(job.error, "bad value 2")
+        self.assertEqual(job.error_type, "ValueError")
+        self.assertEqual(job.stages, {"one": "done", "two": "failed", "three": "pending"})
+
+    def test_progress_and_queue_depth(self) -> None:
+        job_queue = self._queue(max_pending=2)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        release = os.path.join(directory.name, "release")
+        first = job_queue.submit("test", [("wait", partial(_wait_for, release)), ("add", partial(_add, amount=1))], 1)
+        second = job_queue.submit("test", [("add", partial(_add, amount=1))], 2)
+        self._wait_status(first, "running")
+        self.assertEqual(first.stage, "wait")
+        self.assertEqual(first.stages, {"wait": "running", "add": "pending"})
+        self.assertEqual(second.status, "queued")
+        self.assertEqual(job_queue.stats()["depth"], 2)
+        with self.assertRaises(ImportQueueFull):
+            job_queue.submit("test", [("add", partial(_add, amount=1))], 3)
+
+        open(release, "w").close()
+        self.assertEqual(_result(first), 2)
+        self.assertEqual(_result(second), 3)
+        self._wait_status(second, "done")
+        self.assertEqual(job_queue.stats()["depth"], 0)
+
+    def test_finished_jobs_expire(self) -> None:
+        clock = _Clock()
+        job_queue = self._queue(clock=clock)
+        job = job_queue.submit("test", [("add", partial(_add, amount=1))], 1)
+        _result(job)
+        self._wait_status(job, "done")
+        self.assertIs(job_queue.get(job.id), job)
+        clock.now += 61
+        self.assertIsNone(job_queue.get(job.id))
+
+
+class TestImportJobEndpoints(unittest.TestCase):
+    def setUp(self) -> None:
+        from api.endpoints import jobs, six
+
+        job_queue = ImportJobQueue(workers=0, max_pending=4, ttl_seconds=60)
+        patcher = mock.patch.object(import_jobs_module, "_queue", job_queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(job_queue.shutdown)
+        cache = mock.patch("core.settings.parse_cache_enabled", False)
+        cache.start()
+        self.addCleanup(cache.stop)
+
+        app = FastAPI()
+        app.include_router(six.router, prefix="/commesse")
+        app.include_router(jobs.router, prefix="/jobs")
+        self.client = TestClient(app)
+        self.document = build_six_document(groups=5, products=20, preventivi=1, rilevazioni=30)
+
+    def test_sync_endpoint_matches_job_result(self) -> None:
+        response = self.client.post("/commesse/p1/import-six", files={"file": ("a.six", self.document)})
+        self.assertEqual(response.status_code, 200)
+        synchronous = response.json()
+
+        submitted = self.client.post("/commesse/p1/import-six/jobs", files={"file": ("a.six", self.document)})
+        self.assertEqual(submitted.status_code, 202)
+        job_id = submitted.json()["job_id"]
+        self.assertEqual(set(submitted.json()["stages"]), {"parse", "transform"})
+
+        job = import_jobs_module.get_import_jobs().get(job_id)
+        _result(job)
+        deadline = time.time() + 10
+        while self.client.get(f"/jobs/{job_id}").json()["status"] != "done" and time.time() < deadline:
+            time.sleep(0.01)
+        status = self.client.get(f"/jobs/{job_id}").json()
+        self.assertEqual(status["stages"], {"parse": "done", "transform": "done"})
+
+        result = self.client.get(f"/jobs/{job_id}/result").json()
+        self.assertEqual(len(result["estimate"]["items"]), len(synchronous["estimate"]["items"]))
+        self.assertEqual(result["price_list"]["items"], synchronous["price_list"]["items"])
+        self.assertEqual(self.client.get("/jobs").json()["done"], 2)
+
+    def test_job_file_removed_when_the_job_ends(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with mock.patch("tempfile.tempdir", directory.name):
+            submitted = self.client.post("/commesse/p1/import-six/jobs", files={"file": ("a.six", self.document)})
+        self.assertEqual(submitted.status_code, 202)
+        _result(import_jobs_module.get_import_jobs().get(submitted.json()["job_id"]))
+        deadline = time.time() + 10
+        while os.listdir(directory.name) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(os.listdir(directory.name), [])
+
+    def test_failed_import(self) -> None:
+        response = self.client.post("/commesse/p1/import-six", files={"file": ("a.six", b"<not-six")})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["detail"].startswith("Import error:"))
+        self.assertEqual(self.client.get("/jobs/unknown").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from application import parse_cache as parse_cache_module
+from application.parse_cache import ParseCache, cache_key
+from application.process_file import process_file_content
+from domain import NormalizedEstimate, PreventivoModel
+from parsers.six.parser import SixParser
+from parsers.tests.fixtures import build_six_document
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _estimate(name: str, preventivi: int = 1) -> NormalizedEstimate:
+    estimate = NormalizedEstimate(project_name=name)
+    estimate.preventivi = [PreventivoModel(id=f"p{i}", code=f"P{i}") for i in range(preventivi)]
+    return estimate
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = _Clock()
+        self.cache = ParseCache(max_bytes=10_000, ttl_seconds=60, clock=self.clock)
+
+    def test_key_depends_on_content_format_version_and_filename(self) -> None:
+        base = cache_key(b"abc", "six", "1", "a.six")
+        self.assertEqual(base, cache_key(b"abc", "six", "1", "a.six"))
+        for other in (
+            cache_key(b"abd", "six", "1", "a.six"),
+            cache_key(b"abc", "xpwe", "1", "a.six"),
+            cache_key(b"abc", "six", "2", "a.six"),
+            cache_key(b"abc", "six", "1", "b.six"),
+        ):
+            self.assertNotEqual(base, other)
+
+    def test_hit_returns_an_equal_private_copy(self) -> None:
+        parsed = self.cache.get_or_parse("k", lambda: _estimate("A"))
+        hit = self.cache.get_or_parse("k", lambda: self.fail("parsed twice"))
+        self.assertEqual(hit, parsed)
+        self.assertIsNot(hit, parsed)
+        hit.project_name = "changed"
+        self.assertEqual(self.cache.get("k").project_name, "A")
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+    def test_entries_expire(self) -> None:
+        self.cache.get_or_parse("k", lambda: _estimate("A"))
+        self.clock.now += 61
+        self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_least_recently_used_entries_are_evicted_by_size(self) -> None:
+        size = len(_estimate("A").model_dump_json())
+        cache = ParseCache(max_bytes=size * 2, ttl_seconds=60, clock=self.clock)
+        cache.get_or_parse("a", lambda: _estimate("A"))
+        cache.get_or_parse("b", lambda: _estimate("B"))
+        cache.get("a")
+        cache.get_or_parse("c", lambda: _estimate("C"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertLessEqual(cache.stats()["bytes"], size * 2)
+
+    def test_failed_parse_is_not_cached(self) -> None:
+        def fail():
+            raise ValueError("broken file")
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_parse("k", fail)
+        self.assertEqual(self.cache.get_or_parse("k", lambda: _estimate("A")).project_name, "A")
+
+    def test_concurrent_requests_share_one_parse(self) -> None:
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_parse():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return _estimate("A")
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(self.cache.get_or_parse("k", slow_parse)))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_parse("k", slow_parse)))
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result.project_name == "A" for result in results))
+
+    def test_disk_tier_is_shared_between_instances(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            first = ParseCache(max_bytes=10_000, ttl_seconds=60, directory=directory, disk_max_bytes=10_000, clock=self.clock)
+            first.get_or_parse("k", lambda: _estimate("A"))
+
+            second = ParseCache(max_bytes=10_000, ttl_seconds=60, directory=directory, disk_max_bytes=10_000, clock=self.clock)
+            self.assertEqual(second.get("k").project_name, "A")
+            self.assertEqual(second.stats()["disk_hits"], 1)
+
+            self.clock.now += 61
+            third = ParseCache(max_bytes=10_000, ttl_seconds=60, directory=directory, disk_max_bytes=10_000, clock=self.clock)
+            self.assertIsNone(third.get("k"))
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_disk_tier_evicts_oldest_files_beyond_its_size(self) -> None:
+        size = len(_estimate("A").model_dump_json())
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParseCache(max_bytes=10_000, ttl_seconds=60, directory=directory, disk_max_bytes=size * 2, clock=self.clock)
+            for key in ("a", "b", "c"):
+                self.clock.now += 1
+                cache.get_or_parse(key, lambda: _estimate("X"))
+            self.assertEqual(sorted(os.listdir(directory)), ["b.json", "c.json"])
+
+
+class TestProcessFileCache(unittest.TestCase):
+    def setUp(self) -> None:
+        logging.disable(logging.CRITICAL)
+        self.cache = ParseCache(max_bytes=256 * 1024 * 1024, ttl_seconds=60)
+        patcher = mock.patch.object(parse_cache_module, "_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.document = build_six_document(preventivi=3, rilevazioni=40, seed=9)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def test_import_after_preview_does_not_parse(self) -> None:
+        with mock.patch.object(SixParser, "parse", autospec=True, side_effect=SixParser.parse) as parse:
+            preview = process_file_content(self.document, "six", filename="test.six")
+            imported = process_file_content(self.document, "six", filename="test.six", preventivo_id="prv2")
+        self.assertEqual(parse.call_count, 1)
+
+        expected = SixParser().parse(self.document, filename="test.six", preventivo_id="prv2")
+        self.assertEqual(imported.model_dump(mode="json"), expected.model_dump(mode="json"))
+        self.assertEqual(len(preview.preventivi), 3)
+
+    def test_cache_can_be_bypassed(self) -> None:
+        with mock.patch.object(SixParser, "parse", autospec=True, side_effect=SixParser.parse) as parse:
+            process_file_content(self.document, "six", filename="test.six", use_cache=False)
+            process_file_content(self.document, "six", filename="test.six", use_cache=False)
+        self.assertEqual(parse.call_count, 2)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,6 +14,59 @@ class Settings(BaseSettings):
     max_request_body_mb: int = 160
     import_rate_limit_per_minute: int = 12
 
+    # Parser SIX: sopra questa dimensione (MB) usa la lettura in streaming (0 = mai)
+    six_streaming_min_mb: int = 20
+    # Parser SIX: processi per i preventivi di un file letto in DOM (0/1 = sequenziale)
+    six_parallel_workers: int = 0
+    # Parser XPWE: sopra questa dimensione (MB) usa la lettura in streaming (0 = mai)
+    xpwe_streaming_min_mb: int = 20
+    # Anteprima dei ritorni Excel: righe lette al massimo per intestazione e colonne
+    returns_preview_max_rows: int = 500
+    # Import in blocco dei ritorni: processi per il parse dei file (0/1 = sequenziale)
+    returns_batch_workers: int = 4
+
+    # Job di import (parse, trasformazione, embedding fuori dall'event loop):
+    # processi del pool (0 = un thread del processo API), job in coda o in corso al massimo,
+    # durata dei job conclusi e dei loro risultati
+    import_job_workers: int = 2
+    import_job_max_pending: int = 16
+    import_job_ttl_seconds: int = 900
+
+    # Backend degli embedding: "jina" (API), "local" (modello su CPU da
+    # embedding_model_path, sentence-transformers o ONNX), "hashing"
+    # (deterministico, senza rete: test e benchmark)
+    embedding_backend: str = "jina"
+    embedding_model_path: str | None = None
+    embedding_local_runtime: str = "auto"
+    embedding_hashing_dims: int = 1024
+
+    # Formato dei vettori salvati: "float" (array, indicizzabile da Atlas
+    # $vectorSearch), "float16" o "int8" (binario compatto in embedding_bin)
+    embedding_storage: str = "float"
+
+    # Client Jina: batch in volo contemporaneamente (connessioni keep-alive) e
+    # dimensione massima di un batch (testi e token stimati, ~3 caratteri per token)
+    embedding_concurrency: int = 4
+    embedding_batch_max_items: int = 128
+    embedding_batch_max_tokens: int = 8192
+
+    # Cache persistente degli embedding (chiave: hash di modello + testo), file SQLite
+    # (None = ~/.cache/taboolo/embeddings.sqlite3), condiviso fra API e worker
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str | None = None
+    embedding_cache_max_mb: int = 1024
+
+    # Parser XML (SIX, XPWE): "etree", "lxml", "auto" = lxml se installato
+    xml_backend: str = "etree"
+
+    # Cache dei parse (chiave: SHA-256 del file + formato + versione parser)
+    parse_cache_enabled: bool = True
+    parse_cache_max_mb: int = 256
+    parse_cache_ttl_seconds: int = 1800
+    # Livello su disco opzionale, condiviso fra i processi (None = solo memoria)
+    parse_cache_dir: str | None = None
+    parse_cache_disk_max_mb: int = 2048
+
     # CORS
     cors_origins: list[str] | tuple[str, ...] | str | None = Field(
         default_factory=lambda: [
@@ -2,8 +2,26 @@ from typing import Protocol, BinaryIO
 from domain import NormalizedEstimate
 
 class ParserProtocol(Protocol):
-    def parse(self, file_content: bytes, filename: str | None = None) -> NormalizedEstimate:
+    # Part of the parse cache key: bump it whenever the output of parse() changes
+    version: str = "1"
+
+    def parse(
+        self,
+        file_content: bytes,
+        filename: str | None = None,
+        preventivo_id: str | None = None,
+    ) -> NormalizedEstimate:
         """
-        Parse raw bytes into a NormalizedEstimate.
+        Parse raw bytes into a NormalizedEstimate. `file_content` may be any
+        bytes-like object, e.g. the mmap of an upload's spooled file.
+        With `preventivo_id`, parsers may restrict the result to that preventivo.
         """
         ...
+
+    def restrict_to_preventivo(self, estimate: NormalizedEstimate, preventivo_id: str) -> NormalizedEstimate:
+        """
+        Applies `preventivo_id` to the estimate of a full parse, as parse() does
+        with it (used on cached results). Parsers that ignore it return the
+        estimate unchanged.
+        """
+        return estimate
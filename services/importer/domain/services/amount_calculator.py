@@ -9,6 +9,8 @@ Encapsulates the business logic for:
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional
 
+from .fixed_point import amount_2dp, round_quantity_and_amount
+
 
 class AmountCalculator:
     """
@@ -53,17 +55,12 @@ class AmountCalculator:
         """
         if quantity is None or unit_price is None:
             return 0.0, 0.0
-            
-        decimal_qty = Decimal(str(quantity))
-        decimal_price = Decimal(str(unit_price))
         
+        # Integer-cents arithmetic, same results as the Decimal computation
         if round_quantity_first:
-            decimal_qty = cls.round_quantity(quantity)
-        
-        amount = decimal_qty * decimal_price
-        rounded_amount = cls.round_amount(amount)
+            return round_quantity_and_amount(quantity, unit_price)
         
-        return float(decimal_qty), float(rounded_amount)
+        return float(quantity), amount_2dp(quantity, unit_price)
     
     @classmethod
     def calculate_simple(cls, quantity: float, unit_price: float) -> float:
@@ -0,0 +1,215 @@
+"""
+Fixed-point helpers (integer cents) for quantities and amounts.
+
+Every function reproduces, bit for bit, the legacy Decimal expressions used by
+the parsers and loaders:
+
+- `round_2dp(x)`        == float(Decimal(str(x)).quantize(Decimal("0.01"), ROUND_HALF_UP))
+- `round_2dp_10f(x)`    == float(Decimal(f"{x:.10f}").quantize(Decimal("0.01"), ROUND_HALF_UP))
+- `product_2dp(values)` == float((Decimal("1.0") * Decimal(str(v1)) * ...).quantize(Decimal("0.01"), ROUND_HALF_UP))
+- `amount_2dp(q, p)`    == float((Decimal(str(q)) * Decimal(str(p))).quantize(Decimal("0.01"), ROUND_HALF_UP))
+- `round_quantity_and_amount(q, p)` == the same with the quantity quantized to cents first
+- `CentsTotal`          == a Decimal running sum of `Decimal(str(x)).quantize(Decimal("0.01"), ROUND_HALF_UP)`
+
+The fast paths work on scaled integers (and one float multiplication for the
+rounding decision); the sign of zero is kept as Decimal keeps it. Inputs for
+which the integer path could differ (values too close to a .xx5 tie to decide
+in floating point, non-finite values, results beyond the 28 digits of the
+default Decimal context) go through the original Decimal expression, which
+also raises the same exceptions.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from math import copysign, floor
+from typing import Iterable, Optional, Sequence, Tuple
+
+CENT = Decimal("0.01")
+
+# Integer results below this bound are exact in the default Decimal context (28 digits)
+_DECIMAL_EXACT_LIMIT = 10 ** 27
+# Above this magnitude (in cents) a float no longer resolves the cents fraction
+_FLOAT_CENTS_LIMIT = 2.0 ** 52
+
+
+def _decimal_round_2dp(value: float) -> float:
+    return float(Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _decimal_round_2dp_10f(value: float) -> float:
+    return float(Decimal(f"{value:.10f}").quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _half_up_cents(value: float, slack: float) -> Optional[int]:
+    """
+    Absolute cents of `value` rounded half up, or None when the float value is
+    within `slack` (plus the multiplication error) of a half cent and the
+    decimal representation has to decide.
+    """
+    scaled = value * 100.0
+    if scaled < 0:
+        scaled = -scaled
+    if not scaled < _FLOAT_CENTS_LIMIT:  # also catches inf and nan
+        return None
+    cents = floor(scaled)
+    distance = scaled - cents - 0.5
+    tolerance = slack + scaled * 1e-13
+    if -tolerance <= distance <= tolerance:
+        return None
+    return cents + 1 if distance > 0 else cents
+
+
+def _exact_cents(value: float) -> Optional[int]:
+    """Signed cents when `Decimal(str(value))` has at most 2 decimals, else None."""
+    if -1e13 < value < 1e13:
+        # Below 1e13 floats are closer than half a cent, so a float that round-trips
+        # through its cents is exactly that 2-decimal number
+        cents = round(value * 100.0)
+        if cents / 100 == value:
+            return cents
+    return None
+
+
+def _split_decimal(value: float) -> Optional[Tuple[int, int]]:
+    """`Decimal(str(value))` as (integer coefficient, number of decimals), None if exponent notation."""
+    text = str(value)
+    if "e" in text or "n" in text:  # 1e-05, inf, nan
+        return None
+    whole, dot, fraction = text.partition(".")
+    return int(whole + fraction), len(fraction)
+
+
+def _scale_to_cents(coefficient: int, decimals: int) -> int:
+    """Round |coefficient| * 10**-decimals to cents, half up."""
+    magnitude = -coefficient if coefficient < 0 else coefficient
+    if decimals <= 2:
+        return magnitude * 10 ** (2 - decimals)
+    divisor = 10 ** (decimals - 2)
+    cents, remainder = divmod(magnitude, divisor)
+    if 2 * remainder >= divisor:
+        cents += 1
+    return cents
+
+
+def to_cents(value: float) -> int:
+    """`Decimal(str(value))` rounded half up to cents, as an integer number of cents."""
+    cents = _half_up_cents(value, 0.0)
+    if cents is None:
+        return int(Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+    return -cents if value < 0 else cents
+
+
+def round_2dp(value: float) -> float:
+    """Round to 2 decimals, ROUND_HALF_UP, on the shortest decimal representation of the float."""
+    cents = _half_up_cents(value, 0.0)
+    if cents is None:
+        return _decimal_round_2dp(value)
+    return copysign(cents / 100, value)
+
+
+def round_2dp_10f(value: float) -> float:
+    """Round to 2 decimals, ROUND_HALF_UP, after formatting the float with 10 decimals."""
+    # Formatting moves the value by up to 5e-11, i.e. 5e-9 cents
+    cents = _half_up_cents(value, 1e-8)
+    if cents is None:
+        return _decimal_round_2dp_10f(value)
+    return copysign(cents / 100, value)
+
+
+def product_2dp(values: Sequence[float]) -> float:
+    """Product of 2-decimal values (as `Decimal(str(v))`), rounded to 2 decimals ROUND_HALF_UP."""
+    product = 1
+    negative = False
+    for value in values:
+        cents = _exact_cents(value)
+        if cents is None:
+            return _decimal_product_2dp(values)
+        product *= cents
+        if copysign(1.0, value) < 0:
+            negative = not negative
+    if not -_DECIMAL_EXACT_LIMIT < product < _DECIMAL_EXACT_LIMIT:
+        return _decimal_product_2dp(values)
+    cents = _scale_to_cents(product, 2 * len(values))
+    return copysign(cents / 100, -1.0 if negative else 1.0)
+
+
+def _decimal_product_2dp(values: Iterable[float]) -> float:
+    product = Decimal("1.0")
+    for value in values:
+        product *= Decimal(str(value))
+    return float(product.quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def amount_2dp(quantity: float, unit_price: float) -> float:
+    """`quantity * unit_price` on their decimal representations, rounded to 2 decimals ROUND_HALF_UP."""
+    qty_cents = _exact_cents(quantity)
+    price_cents = _exact_cents(unit_price)
+    if qty_cents is not None and price_cents is not None:
+        qty = (qty_cents, 2)
+        price = (price_cents, 2)
+    else:
+        qty = _split_decimal(quantity)
+        price = _split_decimal(unit_price)
+    if qty is not None and price is not None:
+        product = qty[0] * price[0]
+        if -_DECIMAL_EXACT_LIMIT < product < _DECIMAL_EXACT_LIMIT:
+            cents = _scale_to_cents(product, qty[1] + price[1])
+            negative = (copysign(1.0, quantity) < 0) != (copysign(1.0, unit_price) < 0)
+            return copysign(cents / 100, -1.0 if negative else 1.0)
+    amount = Decimal(str(quantity)) * Decimal(str(unit_price))
+    return float(amount.quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def round_quantity_and_amount(quantity: float, unit_price: float) -> Tuple[float, float]:
+    """
+    Legacy amount: the quantity is rounded to 2 decimals first, then multiplied
+    by the price and the amount rounded to 2 decimals (ROUND_HALF_UP).
+    """
+    if -1e13 < quantity < 1e13:
+        # The rounded float converts back to exactly the quantized Decimal
+        qty = round_2dp(quantity)
+        return qty, amount_2dp(qty, unit_price)
+    decimal_qty = Decimal(str(quantity)).quantize(CENT, rounding=ROUND_HALF_UP)
+    amount = (decimal_qty * Decimal(str(unit_price))).quantize(CENT, rounding=ROUND_HALF_UP)
+    return float(decimal_qty), float(amount)
+
+
+class CentsTotal:
+    """
+    Running sum of values each rounded to cents (ROUND_HALF_UP), kept as an
+    integer number of cents.
+    """
+
+    __slots__ = ("cents", "_decimal")
+
+    def __init__(self) -> None:
+        self.cents = 0
+        # Beyond the exact range the sum continues as the Decimal it replaces
+        self._decimal: Optional[Decimal] = None
+
+    def add(self, value: float) -> None:
+        cents = to_cents(value)
+        if self._decimal is None:
+            total = self.cents + cents
+            if -_DECIMAL_EXACT_LIMIT < total < _DECIMAL_EXACT_LIMIT:
+                self.cents = total
+                return
+            self._decimal = Decimal(self.cents).scaleb(-2)
+        self._decimal += Decimal(cents).scaleb(-2)
+
+    @property
+    def value(self) -> float:
+        if self._decimal is not None:
+            return float(self._decimal)
+        return self.cents / 100
+
+
+__all__ = [
+    "CENT",
+    "CentsTotal",
+    "amount_2dp",
+    "product_2dp",
+    "round_2dp",
+    "round_2dp_10f",
+    "round_quantity_and_amount",
+    "to_cents",
+]
@@ -0,0 +1,153 @@
+import math
+import os
+import random
+import sys
+import unittest
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from domain.services.fixed_point import (
+    CentsTotal,
+    amount_2dp,
+    product_2dp,
+    round_2dp,
+    round_2dp_10f,
+    round_quantity_and_amount,
+    to_cents,
+)
+
+CENT = Decimal("0.01")
+
+
+# Reference implementations: the Decimal expressions the fixed-point helpers replace
+def _ref_round_2dp(x):
+    return float(Decimal(str(x)).quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _ref_round_2dp_10f(x):
+    return float(Decimal(f"{x:.10f}").quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _ref_product_2dp(values):
+    prod = Decimal("1.0")
+    for v in values:
+        prod *= Decimal(str(v))
+    return float(prod.quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _ref_amount(q, p, round_first):
+    dq = Decimal(str(q))
+    if round_first:
+        dq = dq.quantize(CENT, rounding=ROUND_HALF_UP)
+    return float(dq), float((dq * Decimal(str(p))).quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _random_float(rnd: random.Random) -> float:
+    """Floats biased towards the hard cases: half-cent ties, tiny values, signed zeros, large magnitudes."""
+    kind = rnd.random()
+    sign = -1 if rnd.random() < 0.4 else 1
+    if kind < 0.25:
+        # Exactly on (or one decimal digit around) a half cent
+        base = rnd.randint(0, 10 ** rnd.randint(1, 9))
+        return sign * float(f"{base}.{rnd.randint(0, 99):02d}5{rnd.choice(['', '', '0', '1', '9', '00001', '99999'])}")
+    if kind < 0.35:
+        value = rnd.randint(0, 10 ** 6) / 1000 + rnd.choice((0.0, 1e-12, -1e-12, 5e-11, -5e-11, 1e-10))
+        return sign * value
+    if kind < 0.45:
+        # Results of float arithmetic (e.g. 2.3 * 1.1 = 2.5299999999999994)
+        return sign * round(rnd.uniform(0, 100), 2) * round(rnd.uniform(0, 100), 2)
+    if kind < 0.5:
+        return rnd.choice((0.0, -0.0, 0.004, -0.004, 0.005, -0.005, 1e-5, -1e-7, 0.015, 1.005, 2.675))
+    if kind < 0.6:
+        return sign * rnd.uniform(0, 10) ** rnd.randint(10, 30)
+    return sign * rnd.uniform(0, 10 ** rnd.randint(0, 8))
+
+
+class TestFixedPointEquivalence(unittest.TestCase):
+    """Property-style checks: random inputs must give bit-identical results to Decimal."""
+
+    SAMPLES = 20000
+
+    def setUp(self) -> None:
+        self.rnd = random.Random(20240501)
+
+    def assertSame(self, actual, expected, context) -> None:
+        # repr() tells 0.0 and -0.0 apart
+        self.assertEqual(repr(actual), repr(expected), context)
+
+    def test_round_2dp(self) -> None:
+        for _ in range(self.SAMPLES):
+            x = _random_float(self.rnd)
+            try:
+                expected = _ref_round_2dp(x)
+            except InvalidOperation:
+                self.assertRaises(InvalidOperation, round_2dp, x)
+                continue
+            self.assertSame(round_2dp(x), expected, x)
+            self.assertEqual(Decimal(to_cents(x)).scaleb(-2), Decimal(str(x)).quantize(CENT, rounding=ROUND_HALF_UP), x)
+
+    def test_round_2dp_10f(self) -> None:
+        for _ in range(self.SAMPLES):
+            x = _random_float(self.rnd)
+            try:
+                expected = _ref_round_2dp_10f(x)
+            except InvalidOperation:
+                self.assertRaises(InvalidOperation, round_2dp_10f, x)
+                continue
+            self.assertSame(round_2dp_10f(x), expected, x)
+
+    def test_product_2dp(self) -> None:
+        for _ in range(self.SAMPLES):
+            values = [_ref_round_2dp(_random_float(self.rnd) % 1e6) for _ in range(self.rnd.randint(1, 4))]
+            if self.rnd.random() < 0.1:
+                values.append(self.rnd.choice((0.0, -0.0, 1e15, -3.5)))
+            try:
+                expected = _ref_product_2dp(values)
+            except InvalidOperation:
+                self.assertRaises(InvalidOperation, product_2dp, values)
+                continue
+            self.assertSame(product_2dp(values), expected, values)
+
+    def test_amounts(self) -> None:
+        for _ in range(self.SAMPLES):
+            q = _random_float(self.rnd)
+            p = self.rnd.choice((_random_float(self.rnd), round(self.rnd.uniform(0, 5000), self.rnd.randint(0, 5)), 0.0, 7))
+            try:
+                expected = _ref_amount(q, p, True)
+            except InvalidOperation:
+                continue
+            self.assertEqual(tuple(map(repr, round_quantity_and_amount(q, p))), tuple(map(repr, expected)), (q, p))
+            try:
+                expected_amount = _ref_amount(q, p, False)[1]
+            except InvalidOperation:
+                continue
+            self.assertSame(amount_2dp(q, p), expected_amount, (q, p))
+
+    def test_cents_total(self) -> None:
+        for _ in range(500):
+            total = CentsTotal()
+            expected = Decimal(0)
+            for _ in range(self.rnd.randint(0, 30)):
+                x = _random_float(self.rnd) % 1e9 * self.rnd.choice((1, -1))
+                total.add(x)
+                expected += Decimal(str(x)).quantize(CENT, rounding=ROUND_HALF_UP)
+            self.assertSame(total.value, float(expected), expected)
+
+    def test_cents_total_beyond_exact_range(self) -> None:
+        total = CentsTotal()
+        expected = Decimal(0)
+        for x in (9.87654321e24, 9.87654321e24, 1.23, 5e24):
+            total.add(x)
+            expected += Decimal(str(x)).quantize(CENT, rounding=ROUND_HALF_UP)
+        self.assertEqual(total.value, float(expected))
+
+    def test_non_finite_values_raise_like_decimal(self) -> None:
+        for func in (round_2dp, round_2dp_10f, to_cents):
+            self.assertRaises(InvalidOperation, func, math.inf)
+
+
+if __name__ == "__main__":
+    unittest.main()
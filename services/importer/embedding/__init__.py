@@ -1,3 +1,15 @@
-from .client import JinaEmbedder, get_embedder
+from .client import JinaEmbedder
+from .backends import Embedder, HashingEmbedder, LocalEmbedder, get_embedder
+from .cache import CachedEmbedder, EmbeddingCache, get_embedding_cache, hash_text
 
-__all__ = ["JinaEmbedder", "get_embedder"]
+__all__ = [
+    "Embedder",
+    "JinaEmbedder",
+    "LocalEmbedder",
+    "HashingEmbedder",
+    "get_embedder",
+    "CachedEmbedder",
+    "EmbeddingCache",
+    "get_embedding_cache",
+    "hash_text",
+]
@@ -0,0 +1,250 @@
+"""
+Embedding backends.
+
+`settings.embedding_backend` selects the embedder returned by `get_embedder()`:
+
+- "jina" (default): the Jina AI API (`JinaEmbedder`, needs JINA_API_KEY);
+- "local": a model on CPU loaded from `settings.embedding_model_path`, with
+  sentence-transformers or, for an exported model (`model.onnx` +
+  `tokenizer.json`), onnxruntime + tokenizers (`embedding_local_runtime`);
+- "hashing": deterministic feature hashing of words and character trigrams,
+  no model and no network, for tests and load benchmarks.
+
+Every backend implements `Embedder`: `compute_embeddings(texts)` returns one
+vector (or None) per text, or [] when the backend is not usable, and `model`
+names the vectors (it is part of the embedding cache key, so vectors of
+different backends never mix). Jina and local vectors go through the
+persistent embedding cache; hashing vectors are cheaper to compute than to
+look up. Vectors of different backends are not comparable: after switching
+backend the stored embeddings must be computed again.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Protocol, Tuple, runtime_checkable
+
+import numpy as np
+
+from .client import JinaEmbedder
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("jina", "local", "hashing")
+LOCAL_RUNTIMES = ("auto", "sentence-transformers", "onnx")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    model: str
+
+    def compute_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[Optional[List[float]]]:
+        ...
+
+
+class HashingEmbedder:
+    """
+    Deterministic embedder: words and character trigrams hashed (blake2b,
+    stable across processes) into `dims` signed buckets, L2-normalized.
+    Texts sharing words get close vectors, so similarity search behaves
+    plausibly, but there is no semantics beyond the shared tokens.
+    """
+
+    def __init__(self, dims: int = 1024) -> None:
+        self.dims = max(8, dims)
+        self.model = f"hashing-{self.dims}"
+
+    def compute_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[Optional[List[float]]]:
+        return [self._vector(text) for text in texts]
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dims, dtype=np.float64)
+        for token in self._tokens(text or ""):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dims] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        tokens = []
+        for word in _TOKEN_RE.findall(text.lower()):
+            tokens.append(word)
+            padded = f"#{word}#"
+            tokens.extend(f"3:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return tokens
+
+
+# Files whose size and mtime identify the weights of a local model
+_MODEL_FILES = ("model.onnx", "model.safetensors", "pytorch_model.bin", "config.json", "tokenizer.json")
+
+
+def _local_model_id(path: str) -> str:
+    """
+    `local:<name>@<fingerprint>`: the fingerprint hashes the absolute path and
+    the size/mtime of the model files, so two models with the same directory
+    or file name (or new weights at the same path) never share cached vectors.
+    """
+    path = os.path.abspath(path)
+    if os.path.isfile(path):
+        folder, files = os.path.dirname(path), [os.path.basename(path)]
+    else:
+        folder, files = path, []
+    files += [name for name in _MODEL_FILES if name not in files]
+    digest = hashlib.blake2b(path.encode("utf-8"), digest_size=6)
+    for name in files:
+        try:
+            stat = os.stat(os.path.join(folder, name))
+        except OSError:
+            continue
+        digest.update(f"|{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return f"local:{os.path.basename(path)}@{digest.hexdigest()}"
+
+
+class LocalEmbedder:
+    """
+    Model on CPU loaded (lazily, once per process) from a sentence-transformers
+    directory or an ONNX export (`model.onnx` + `tokenizer.json`, mean pooling
+    of the last hidden state). Vectors are L2-normalized.
+    """
+
+    def __init__(self, path: str, runtime: str = "auto", batch_size: int = 64, max_length: int = 512) -> None:
+        self.path = path
+        self.runtime = runtime if runtime in LOCAL_RUNTIMES else "auto"
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        self.model = _local_model_id(path)
+        self._encode: Any = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def compute_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[Optional[List[float]]]:
+        if not texts:
+            return []
+        encode = self._load()
+        if encode is None:
+            return []
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = encode([text or "" for text in texts[start:start + self.batch_size]])
+            norms = np.linalg.norm(batch, axis=1, keepdims=True)
+            vectors.extend((batch / np.where(norms == 0, 1, norms)).tolist())
+        return vectors
+
+    def _load(self) -> Any:
+        with self._lock:
+            if self._encode is None and not self._failed:
+                try:
+                    self._encode = self._load_runtime()
+                    logger.info(f"Local embedding model loaded from {self.path}")
+                except Exception as exc:
+                    self._failed = True
+                    logger.error(f"Local embedding model unavailable ({self.path}): {exc}")
+            return self._encode
+
+    def _load_runtime(self):
+        onnx_file = self.path if self.path.endswith(".onnx") else os.path.join(self.path, "model.onnx")
+        runtime = self.runtime
+        if runtime == "auto":
+            runtime = "onnx" if os.path.isfile(onnx_file) else "sentence-transformers"
+        if runtime == "onnx":
+            return self._load_onnx(onnx_file)
+
+        from sentence_transformers import SentenceTransformer
+
+        encoder = SentenceTransformer(self.path, device="cpu")
+        return lambda batch: np.asarray(encoder.encode(batch, batch_size=self.batch_size), dtype=np.float64)
+
+    def _load_onnx(self, onnx_file: str):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        tokenizer = Tokenizer.from_file(os.path.join(os.path.dirname(onnx_file), "tokenizer.json"))
+        tokenizer.enable_truncation(self.max_length)
+        tokenizer.enable_padding()
+        session = onnxruntime.InferenceSession(onnx_file, providers=["CPUExecutionProvider"])
+        input_names = {node.name for node in session.get_inputs()}
+
+        def encode(batch: List[str]) -> np.ndarray:
+            encodings = tokenizer.encode_batch(batch)
+            ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in input_names:
+                feeds["token_type_ids"] = np.zeros_like(ids)
+            output = session.run(None, {name: value for name, value in feeds.items() if name in input_names})[0]
+            if output.ndim == 2:
+                return output.astype(np.float64)
+            weights = mask[..., None].astype(np.float64)
+            return (output * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+
+        return encode
+
+
+def resolve_backend(backend: str | None = None) -> str:
+    """Backend for a setting value (None = settings.embedding_backend)."""
+    from core import settings
+
+    choice = (backend or settings.embedding_backend or "jina").lower()
+    if choice not in BACKENDS:
+        logger.warning(f"Unknown embedding backend '{choice}', using Jina")
+        return "jina"
+    if choice == "local" and not settings.embedding_model_path:
+        logger.warning("Embedding backend 'local' requested without embedding_model_path, using Jina")
+        return "jina"
+    return choice
+
+
+def _build(backend: str) -> Tuple[Tuple[Any, ...], Any]:
+    from core import settings
+
+    if backend == "hashing":
+        key = (backend, settings.embedding_hashing_dims)
+        return key, lambda: HashingEmbedder(settings.embedding_hashing_dims)
+    if backend == "local":
+        key = (backend, settings.embedding_model_path, settings.embedding_local_runtime)
+        return key, lambda: LocalEmbedder(settings.embedding_model_path, runtime=settings.embedding_local_runtime)
+    key = (backend, os.getenv("JINA_API_KEY") or None)
+    return key, JinaEmbedder.from_settings
+
+
+_embedders: Dict[Tuple[Any, ...], Any] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(backend: str | None = None) -> Embedder:
+    """
+    Process-wide embedder of the configured backend (one connection pool or
+    loaded model per process), behind the persistent embedding cache unless
+    it is the hashing backend or the cache is disabled.
+    """
+    from core import settings
+
+    backend = resolve_backend(backend)
+    key, factory = _build(backend)
+    with _embedders_lock:
+        embedder = _embedders.get(key)
+        if embedder is None:
+            embedder = _embedders[key] = factory()
+    if backend == "hashing" or not settings.embedding_cache_enabled:
+        return embedder
+    from .cache import CachedEmbedder, get_embedding_cache
+
+    return CachedEmbedder(embedder, get_embedding_cache())
+
+
+__all__ = [
+    "BACKENDS",
+    "Embedder",
+    "HashingEmbedder",
+    "LocalEmbedder",
+    "get_embedder",
+    "resolve_backend",
+]
@@ -0,0 +1,251 @@
+"""
+Persistent, content-addressed cache of text embeddings.
+
+Re-imports of a project and price lists shared across projects embed the
+same texts again and again. `CachedEmbedder` sits in front of an embedder:
+texts are deduplicated within each call, looked up in a SQLite file under
+hash(model, text), and only the misses go to the embedding service.
+
+- vectors are stored as float64 blobs, so a hit returns the exact vector the
+  service returned;
+- the file is bounded by `max_bytes`: beyond it the least recently used
+  vectors are evicted;
+- hit/miss counters are kept in the same file, shared by every process using
+  it (API process and import job workers).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        vector BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        last_used REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)",
+    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+# Bound on the variables of one SQLite statement (SQLITE_MAX_VARIABLE_NUMBER)
+_LOOKUP_CHUNK = 500
+# After an eviction the file is brought back under this share of the limit
+_EVICT_TO = 0.9
+
+
+def hash_text(text: str) -> str:
+    """Generate a SHA1 hash of text."""
+    if not text:
+        return ""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def embedding_key(model: str, text: str) -> str:
+    return hash_text(f"{model}\x00{text}")
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_bytes: int, clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+
+    @classmethod
+    def from_settings(cls) -> "EmbeddingCache":
+        from core import settings
+
+        path = settings.embedding_cache_path or os.path.join(
+            os.path.expanduser("~"), ".cache", "taboolo", "embeddings.sqlite3"
+        )
+        return cls(path=path, max_bytes=settings.embedding_cache_max_mb * 1024 * 1024)
+
+    # --- lookup / store ---
+
+    def get_many(self, model: str, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Vectors found for `keys` (missing keys are absent); counts hits and misses."""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = list(keys[start:start + _LOOKUP_CHUNK])
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({marks})",
+                    [model, *chunk],
+                )
+                for key, blob in rows:
+                    found[key] = array("d", blob).tolist()
+            now = self._clock()
+            with conn:
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._count(conn, hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, Sequence[float]]) -> None:
+        if not vectors:
+            return
+        now = self._clock()
+        rows = []
+        for key, vector in vectors.items():
+            blob = array("d", vector).tobytes()
+            rows.append((key, model, blob, len(blob), now))
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._evict(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connection()
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters"))
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    # --- internals ---
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per process: a forked worker opens its own
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, hits: int, misses: int) -> None:
+        conn.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [("hits", hits), ("misses", misses)],
+        )
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (size,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        if size <= self.max_bytes:
+            return
+        target = size - int(self.max_bytes * _EVICT_TO)
+        freed = 0
+        evicted: List[str] = []
+        for key, entry_size in conn.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            evicted.append(key)
+            freed += entry_size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key in evicted])
+        logger.info(f"Embedding cache: evicted {len(evicted)} vectors ({freed / 1e6:.1f} MB)")
+
+
+class CachedEmbedder:
+    """
+    Embedder with the `compute_embeddings` interface of `inner`, answering
+    from `cache` and sending only the distinct missing texts to `inner`.
+    """
+
+    def __init__(self, inner: Any, cache: EmbeddingCache) -> None:
+        self.inner = inner
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        # api_key and the other attributes of the wrapped embedder
+        return getattr(self.inner, name)
+
+    def compute_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[Optional[List[float]]]:
+        if not texts:
+            return []
+        model = model or self.inner.model
+        keys = [embedding_key(model, text) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+        try:
+            vectors: Dict[str, Optional[List[float]]] = dict(self.cache.get_many(model, unique_keys))
+        except sqlite3.Error as exc:
+            logger.warning(f"Embedding cache unavailable ({exc}), calling the embedder directly")
+            return self.inner.compute_embeddings(texts, model=model)
+
+        missing = [key for key in unique_keys if key not in vectors]
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            computed = self.inner.compute_embeddings([text_by_key[key] for key in missing], model=model)
+            if len(computed) != len(missing):
+                if not vectors and len(missing) == len(keys):
+                    # Nothing cached and no usable answer: same result as without the cache
+                    return computed
+                logger.warning(f"Embedder returned {len(computed)} vectors for {len(missing)} texts")
+                computed = [None] * len(missing)
+            fresh = {key: vector for key, vector in zip(missing, computed) if vector is not None}
+            vectors.update(zip(missing, computed))
+            try:
+                self.cache.put_many(model, fresh)
+            except sqlite3.Error as exc:
+                logger.warning(f"Embedding cache write failed: {exc}")
+        logger.info(
+            f"Embeddings: {len(texts)} texts, {len(unique_keys)} distinct, "
+            f"{len(unique_keys) - len(missing)} cached, {len(missing)} requested"
+        )
+        return [vectors.get(key) for key in keys]
+
+
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache configured from settings."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache.from_settings()
+    return _cache
+
+
+__all__ = [
+    "CachedEmbedder",
+    "EmbeddingCache",
+    "embedding_key",
+    "get_embedding_cache",
+    "hash_text",
+]
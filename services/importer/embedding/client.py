@@ -1,26 +1,80 @@
 import logging
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
 import requests
-from typing import List, Optional
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
 JINA_API_URL = "https://api.jina.ai/v1/embeddings"
 
+# Status codes retried with backoff; a batch refused as too large is split instead
+RETRY_STATUS = {429, 500, 502, 503, 504}
+TOO_LARGE_HINTS = ("token", "too long", "too large", "length")
+# Rough token estimate for batch sizing (Italian descriptions: ~3 characters per token)
+CHARS_PER_TOKEN = 3
+
+
 class JinaEmbedder:
     """
     Service to generate embeddings using Jina AI API.
+
+    Batches are packed up to `max_batch_items` texts and `max_batch_tokens`
+    estimated tokens, and up to `concurrency` of them are in flight at once
+    over a keep-alive connection pool. A batch answered with 429/5xx retries
+    with exponential backoff in its own worker, without holding the others;
+    a batch refused as too large is split in two. Output order always
+    matches the input, failed texts are None.
     """
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        *,
+        model: str = "jina-embeddings-v3",
+        api_url: str = JINA_API_URL,
+        concurrency: int = 4,
+        max_batch_items: int = 128,
+        max_batch_tokens: int = 8192,
+        max_retries: int = 3,
+        retry_delay: float = 2.0,
+        timeout: float = 30.0,
+    ):
         # Allow passing key explicitly or fallback to env
         self.api_key = api_key or os.getenv("JINA_API_KEY")
         if not self.api_key:
             logger.warning("JINA_API_KEY not set. Embedding generation will be skipped or fail.")
+        self.model = model
+        self.api_url = api_url
+        self.concurrency = max(1, concurrency)
+        self.max_batch_items = max(1, max_batch_items)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self._session: requests.Session | None = None
+        self._session_pid: int | None = None
+        self._session_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, api_key: Optional[str] = None) -> "JinaEmbedder":
+        from core import settings
 
-    def compute_embeddings(self, texts: List[str], model: str = "jina-embeddings-v3") -> List[List[float]]:
+        return cls(
+            api_key,
+            concurrency=settings.embedding_concurrency,
+            max_batch_items=settings.embedding_batch_max_items,
+            max_batch_tokens=settings.embedding_batch_max_tokens,
+        )
+
+    def compute_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
         """
-        Generate embeddings for a list of texts.
-        Returns a list of vectors (list of floats).
+        Generate embeddings for a list of texts (with `model`, default `self.model`).
+        Returns a list of vectors (list of floats), None for the texts whose batch failed.
         """
         if not self.api_key:
             logger.error("Attempted to compute embeddings without JINA_API_KEY.")
@@ -29,57 +83,132 @@ class JinaEmbedder:
         if not texts:
             return []
 
-        # Jina API has limits (e.g. 2048 items per batch for English). 
-        # For simplicity we process in chunks of 50 to be safe and responsive.
-        BATCH_SIZE = 50
-        all_embeddings = []
+        model = model or self.model
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        batches = self._plan_batches(texts)
+        session = self._get_session()
+        workers = min(self.concurrency, len(batches))
+        if workers == 1:
+            for start, end in batches:
+                self._embed_batch(session, texts, start, end, model, results)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jina") as executor:
+                futures = [
+                    executor.submit(self._embed_batch, session, texts, start, end, model, results)
+                    for start, end in batches
+                ]
+                for future in futures:
+                    future.result()
+
+        failed = sum(1 for vector in results if vector is None)
+        if failed:
+            logger.warning(f"Jina embeddings: {failed}/{len(texts)} texts without a vector")
+        return results
+
+    def close(self) -> None:
+        with self._session_lock:
+            if self._session is not None and self._session_pid == os.getpid():
+                self._session.close()
+            self._session = None
+
+    # --- internals ---
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
+    def _get_session(self) -> requests.Session:
+        # Connections are not shared with a forked worker: one session per process
+        with self._session_lock:
+            if self._session is None or self._session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}",
+                })
+                self._session, self._session_pid = session, os.getpid()
+            return self._session
+
+    def _plan_batches(self, texts: Sequence[str]) -> List[Tuple[int, int]]:
+        """Contiguous (start, end) ranges within the item and estimated token limits."""
+        batches: List[Tuple[int, int]] = []
+        start, tokens = 0, 0
+        for idx, text in enumerate(texts):
+            cost = len(text or "") // CHARS_PER_TOKEN + 1
+            if idx > start and (idx - start >= self.max_batch_items or tokens + cost > self.max_batch_tokens):
+                batches.append((start, idx))
+                start, tokens = idx, 0
+            tokens += cost
+        batches.append((start, len(texts)))
+        return batches
+
+    def _embed_batch(
+        self,
+        session: requests.Session,
+        texts: Sequence[str],
+        start: int,
+        end: int,
+        model: str,
+        results: List[Optional[List[float]]],
+    ) -> None:
+        batch = list(texts[start:end])
+        payload = {
+            "model": model,
+            "input": batch,
+            # "embedding_type": "float" # Default is float
         }
 
-        for i in range(0, len(texts), BATCH_SIZE):
-            batch = texts[i : i + BATCH_SIZE]
-            
-            payload = {
-                "model": model,
-                "input": batch,
-                # "embedding_type": "float" # Default is float
-            }
-
-            import time
-            
-            # Retry configuration
-            max_retries = 3
-            retry_delay = 2  # seconds
-
-            for attempt in range(max_retries):
-                try:
-                    response = requests.post(JINA_API_URL, headers=headers, json=payload, timeout=30)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Jina returns { "data": [ { "object": "embedding", "embedding": [...] }, ... ] }
-                    # We need to preserve order.
-                    batch_embeddings = [item["embedding"] for item in data.get("data", [])]
-                    
-                    if len(batch_embeddings) != len(batch):
-                        logger.warning(f"Jina returned {len(batch_embeddings)} vectors for {len(batch)} inputs. Padding with None.")
-                        # If mismatch, alignment is broken, but we continue processing next batches
-                    
-                    all_embeddings.extend(batch_embeddings)
-                    break # Success, exit retry loop
-
-                except Exception as e:
-                    logger.error(f"Error calling Jina API (Attempt {attempt + 1}/{max_retries}): {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_delay * (attempt + 1)) # Exponentialish backoff
-                    else:
-                        # Final failure for this batch
-                        all_embeddings.extend([None] * len(batch))
-
-        return all_embeddings
-
-def get_embedder() -> JinaEmbedder:
-    return JinaEmbedder()
+        for attempt in range(self.max_retries):
+            try:
+                response = session.post(self.api_url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.error(f"Error calling Jina API (Attempt {attempt + 1}/{self.max_retries}): {e}")
+                self._backoff(attempt)
+                continue
+
+            if end - start > 1 and _too_large(response):
+                # Over the provider limits despite the estimate: halve the batch
+                middle = (start + end) // 2
+                logger.warning(f"Jina refused a batch of {end - start} texts ({response.status_code}), splitting it")
+                self._embed_batch(session, texts, start, middle, model, results)
+                self._embed_batch(session, texts, middle, end, model, results)
+                return
+            if response.status_code in RETRY_STATUS:
+                logger.error(
+                    f"Jina API returned {response.status_code} (Attempt {attempt + 1}/{self.max_retries})"
+                )
+                self._backoff(attempt, response.headers.get("Retry-After"))
+                continue
+            try:
+                response.raise_for_status()
+                data = response.json().get("data", [])
+            except (requests.HTTPError, ValueError) as e:
+                logger.error(f"Error calling Jina API: {e}")
+                return
+
+            # Jina returns { "data": [ { "object": "embedding", "index": i, "embedding": [...] }, ... ] }
+            if len(data) != len(batch):
+                logger.warning(f"Jina returned {len(data)} vectors for {len(batch)} inputs. Padding with None.")
+            for position, item in enumerate(data):
+                index = item.get("index", position)
+                if 0 <= index < len(batch):
+                    results[start + index] = item.get("embedding")
+            return
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> None:
+        if attempt >= self.max_retries - 1:
+            return
+        delay = self.retry_delay * (2 ** attempt)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        # Jitter: batches throttled together do not retry together
+        time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def _too_large(response: requests.Response) -> bool:
+    if response.status_code == 413:
+        return True
+    return response.status_code == 400 and any(hint in response.text.lower() for hint in TOO_LARGE_HINTS)
+
@@ -4,7 +4,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
-from embedding import JinaEmbedder
+from embedding import Embedder, get_embedder
 from embedding.extraction.props_text import build_weighted_props_text
 
 logger = logging.getLogger(__name__)
@@ -18,14 +18,14 @@ class EmbeddingComposer:
 
     def __init__(
         self,
-        embedder: Optional[JinaEmbedder] = None,
+        embedder: Optional[Embedder] = None,
         base_weight: float = 0.4,
         detail_weight: float = 0.6,
         use_weighted_props: bool = False,
         use_two_pass_embedding: bool = True,
         props_replication_k: int = 3,
     ):
-        self.embedder = embedder or JinaEmbedder()
+        self.embedder = embedder or get_embedder()
         self.base_weight = base_weight
         self.detail_weight = detail_weight
         self.use_weighted_props = bool(use_weighted_props)
@@ -62,6 +62,28 @@ class EmbeddingComposer:
                 return str(value)
         return None
 
+    @property
+    def version(self) -> str:
+        """Composition settings: same texts and same version give the same vector."""
+        base_w, detail_w = self._normalize_weights()
+        props_mode = "weighted" if self.use_weighted_props else "plain"
+        passes = "two-pass" if self.use_two_pass_embedding else "single"
+        return f"composed:b{base_w:.4f}:d{detail_w:.4f}:{props_mode}:{passes}:k{self.props_replication_k}"
+
+    def compose_item_text(
+        self,
+        item: Any,
+        properties_field: str = "extracted_properties",
+        min_confidence: float = 0.5,
+    ) -> Tuple[str, str]:
+        return self.compose_text(
+            self._pick_description(item),
+            self._get_field(item, properties_field),
+            category=self._get_field(item, "category"),
+            wbs6_text=self._pick_wbs6_text(item),
+            min_confidence=min_confidence,
+        )
+
     def compose_text(
         self,
         description: str,
@@ -179,16 +201,9 @@ class EmbeddingComposer:
         token_counter: Counter = Counter()
 
         for idx, item in enumerate(items):
-            description = self._pick_description(item)
-            extracted_props = self._get_field(item, properties_field)
-            category = self._get_field(item, "category")
-            wbs6_text = self._pick_wbs6_text(item)
-
-            base_text, detail_text = self.compose_text(
-                description,
-                extracted_props,
-                category=category,
-                wbs6_text=wbs6_text,
+            base_text, detail_text = self.compose_item_text(
+                item,
+                properties_field=properties_field,
                 min_confidence=min_confidence,
             )
 
@@ -0,0 +1,97 @@
+"""
+Local stand-in for the Jina embeddings API, for the client tests and the
+throughput benchmark.
+
+Each request sleeps `latency` plus `per_item` per text, then answers with
+deterministic vectors (the text length, its position and the batch size)
+listed in reverse order with their `index`, as the real API may do. The
+first `fail_first` requests get 429, and batches above `max_items` get 413.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubJinaServer:
+    def __init__(self, latency: float = 0.0, per_item: float = 0.0, fail_first: int = 0, max_items: int | None = None):
+        self.latency = latency
+        self.per_item = per_item
+        self.fail_first = fail_first
+        self.max_items = max_items
+        self.requests = 0
+        self.batch_sizes: list[int] = []
+        self.connections = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/embeddings"
+
+    def __enter__(self) -> "StubJinaServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                texts = body["input"]
+                with stub._lock:
+                    stub.requests += 1
+                    number = stub.requests
+                    stub._in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub._in_flight)
+                try:
+                    time.sleep(stub.latency + stub.per_item * len(texts))
+                    if number <= stub.fail_first:
+                        self._reply(429, {"detail": "rate limited"}, {"Retry-After": "0"})
+                    elif stub.max_items is not None and len(texts) > stub.max_items:
+                        self._reply(413, {"detail": "too many tokens"})
+                    else:
+                        with stub._lock:
+                            stub.batch_sizes.append(len(texts))
+                        data = [
+                            {"object": "embedding", "index": i, "embedding": [float(len(text)), float(i), float(len(texts))]}
+                            for i, text in enumerate(texts)
+                        ]
+                        self._reply(200, {"data": data[::-1]})
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+
+            def _reply(self, status, payload, headers=None):
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+        return Handler
@@ -0,0 +1,106 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from core import settings
+from embedding import CachedEmbedder, Embedder, HashingEmbedder, JinaEmbedder, LocalEmbedder, get_embedder
+
+
+class HashingEmbedderTest(unittest.TestCase):
+    def test_deterministic_normalized_and_similar_for_shared_words(self):
+        embedder = HashingEmbedder(dims=256)
+        a, b, c, empty = embedder.compute_embeddings(
+            ["Massetto in sabbia e cemento", "massetto sabbia cemento", "Serramento in alluminio", ""]
+        )
+
+        self.assertEqual(a, HashingEmbedder(dims=256).compute_embeddings(["Massetto in sabbia e cemento"])[0])
+        self.assertEqual(len(a), 256)
+        self.assertAlmostEqual(float(np.linalg.norm(a)), 1.0)
+        self.assertGreater(np.dot(a, b), np.dot(a, c))
+        self.assertEqual(empty, [0.0] * 256)
+        self.assertIsInstance(embedder, Embedder)
+
+
+class LocalEmbedderTest(unittest.TestCase):
+    def test_sentence_transformers_model(self):
+        class FakeSentenceTransformer:
+            def __init__(self, path, device):
+                self.path = path
+
+            def encode(self, texts, batch_size):
+                return np.array([[len(text), 0.0, 0.0, 0.0] if text else [0.0] * 4 for text in texts])
+
+        module = types.SimpleNamespace(SentenceTransformer=FakeSentenceTransformer)
+        with mock.patch.dict(sys.modules, {"sentence_transformers": module}):
+            embedder = LocalEmbedder("/models/e5-small", batch_size=2)
+            vectors = embedder.compute_embeddings(["abc", "", "de"])
+
+        self.assertTrue(embedder.model.startswith("local:e5-small@"))
+        self.assertEqual(vectors, [[1.0, 0.0, 0.0, 0.0], [0.0] * 4, [1.0, 0.0, 0.0, 0.0]])
+
+    def test_unavailable_model_returns_empty(self):
+        with mock.patch.dict(sys.modules, {"sentence_transformers": None}):
+            embedder = LocalEmbedder("/missing/model")
+            with self.assertLogs("embedding.backends", level="ERROR"):
+                self.assertEqual(embedder.compute_embeddings(["a"]), [])
+            self.assertEqual(embedder.compute_embeddings(["a"]), [])
+
+
+    def test_model_id_names_the_model_not_the_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = []
+            for name in ("e5-large", "bge-m3"):
+                os.makedirs(os.path.join(root, name))
+                paths.append(os.path.join(root, name, "model.onnx"))
+                with open(paths[-1], "wb") as fh:
+                    fh.write(name.encode())
+            ids = [LocalEmbedder(path).model for path in paths]
+            self.assertNotEqual(ids[0], ids[1])
+            self.assertTrue(ids[0].startswith("local:model.onnx@"))
+            self.assertEqual(LocalEmbedder(paths[0]).model, ids[0])
+
+            # New weights at the same path
+            with open(paths[0], "wb") as fh:
+                fh.write(b"retrained weights")
+            self.assertNotEqual(LocalEmbedder(paths[0]).model, ids[0])
+
+        self.assertNotEqual(LocalEmbedder("/a/v1/model").model, LocalEmbedder("/a/v2/model").model)
+
+
+class GetEmbedderTest(unittest.TestCase):
+    def test_backend_selected_by_settings(self):
+        with mock.patch.object(settings, "embedding_backend", "hashing"), \
+                mock.patch.object(settings, "embedding_hashing_dims", 64):
+            embedder = get_embedder()
+            self.assertIsInstance(embedder, HashingEmbedder)
+            self.assertIs(get_embedder(), embedder)
+            self.assertEqual(len(embedder.compute_embeddings(["voce"])[0]), 64)
+
+        with mock.patch.object(settings, "embedding_backend", "local"), \
+                mock.patch.object(settings, "embedding_model_path", "/models/e5-small"), \
+                mock.patch.object(settings, "embedding_cache_enabled", False):
+            self.assertIsInstance(get_embedder(), LocalEmbedder)
+
+    def test_jina_behind_cache_and_unknown_backend_falls_back(self):
+        with mock.patch.object(settings, "embedding_backend", "jina"):
+            embedder = get_embedder()
+        self.assertIsInstance(embedder, CachedEmbedder)
+        self.assertIsInstance(embedder.inner, JinaEmbedder)
+
+        with mock.patch.object(settings, "embedding_backend", "word2vec"), \
+                mock.patch.object(settings, "embedding_cache_enabled", False):
+            with self.assertLogs("embedding.backends", level="WARNING"):
+                self.assertIsInstance(get_embedder(), JinaEmbedder)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from embedding.cache import CachedEmbedder, EmbeddingCache, embedding_key
+
+
+class FakeEmbedder:
+    model = "fake-model"
+
+    def __init__(self, available=True):
+        self.calls = []
+        self.available = available
+
+    def compute_embeddings(self, texts, model=None):
+        self.calls.append(list(texts))
+        if not self.available:
+            return []
+        return [[float(len(text)), 0.5, -1.25] for text in texts]
+
+
+class EmbeddingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "embeddings.sqlite3")
+
+    def _cache(self, max_bytes=1 << 20, clock=None):
+        cache = EmbeddingCache(self.path, max_bytes=max_bytes, **({"clock": clock} if clock else {}))
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_second_import_makes_no_embedding_calls(self):
+        inner = FakeEmbedder()
+        texts = ["muratura", "intonaco", "massetto"]
+        first = CachedEmbedder(inner, self._cache()).compute_embeddings(texts)
+
+        # New process, same file: everything is served from disk
+        again = CachedEmbedder(inner, self._cache()).compute_embeddings(texts)
+
+        self.assertEqual(len(inner.calls), 1)
+        self.assertEqual(first, again)
+        self.assertEqual(again[0], [8.0, 0.5, -1.25])
+
+    def test_texts_deduplicated_within_batch(self):
+        inner = FakeEmbedder()
+        embedder = CachedEmbedder(inner, self._cache())
+
+        vectors = embedder.compute_embeddings(["a", "bb", "a", "bb", "a"])
+
+        self.assertEqual(inner.calls, [["a", "bb"]])
+        self.assertEqual(vectors[0], vectors[2])
+        self.assertEqual(vectors[1], vectors[3])
+
+        embedder.compute_embeddings(["bb", "ccc"])
+        self.assertEqual(inner.calls[-1], ["ccc"])
+
+    def test_counters_and_model_in_key(self):
+        cache = self._cache()
+        embedder = CachedEmbedder(FakeEmbedder(), cache)
+        embedder.compute_embeddings(["x", "y"])
+        embedder.compute_embeddings(["x", "z"])
+        embedder.compute_embeddings(["x"], model="other-model")
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 4))
+        self.assertEqual(stats["entries"], 4)
+        self.assertNotEqual(embedding_key("m1", "x"), embedding_key("m2", "x"))
+
+    def test_eviction_is_size_bounded_and_keeps_recent(self):
+        now = [0.0]
+        # Three vectors of 3 float64 (24 bytes) fit, a fourth does not
+        cache = self._cache(max_bytes=80, clock=lambda: now[0])
+        inner = FakeEmbedder()
+        embedder = CachedEmbedder(inner, cache)
+        for text in ("a", "b", "c"):
+            now[0] += 1
+            embedder.compute_embeddings([text])
+        now[0] += 1
+        embedder.compute_embeddings(["a"])  # "b" is now the least recently used
+        now[0] += 1
+        embedder.compute_embeddings(["d"])
+
+        self.assertLessEqual(cache.stats()["bytes"], 80)
+        calls = len(inner.calls)
+        embedder.compute_embeddings(["a", "d"])
+        self.assertEqual(len(inner.calls), calls)
+        embedder.compute_embeddings(["b"])
+        self.assertEqual(inner.calls[-1], ["b"])
+
+    def test_unavailable_embedder_result_unchanged_and_not_cached(self):
+        inner = FakeEmbedder(available=False)
+        cache = self._cache()
+        embedder = CachedEmbedder(inner, cache)
+
+        self.assertEqual(embedder.compute_embeddings(["a", "b"]), [])
+        self.assertEqual(cache.stats()["entries"], 0)
+
+        CachedEmbedder(FakeEmbedder(), cache).compute_embeddings(["a"])
+        self.assertEqual(embedder.compute_embeddings(["a", "b"]), [[1.0, 0.5, -1.25], None])
+
+
+if __name__ == "__main__":
+    unittest.main()
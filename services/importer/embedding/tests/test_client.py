@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from embedding.client import JinaEmbedder
+from embedding.tests.stub_server import StubJinaServer
+
+
+def _embedder(server, **options):
+    options.setdefault("retry_delay", 0.01)
+    return JinaEmbedder("test-key", api_url=server.url, **options)
+
+
+class JinaEmbedderTest(unittest.TestCase):
+    def test_concurrent_batches_keep_order_and_connections(self):
+        texts = [f"voce {i}" + "x" * (i % 7) for i in range(230)]
+        with StubJinaServer(latency=0.02) as server:
+            embedder = _embedder(server, concurrency=4, max_batch_items=20)
+            vectors = embedder.compute_embeddings(texts)
+            embedder.compute_embeddings(texts[:40])
+            embedder.close()
+
+        self.assertEqual([vector[0] for vector in vectors], [float(len(text)) for text in texts])
+        self.assertEqual(server.requests, 12 + 2)
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertLessEqual(server.max_in_flight, 4)
+        # Keep-alive: the second call reuses the pool
+        self.assertLessEqual(server.connections, 4)
+
+    def test_batches_bounded_by_estimated_tokens(self):
+        texts = ["a" * 300] * 10  # ~101 tokens each
+        embedder = JinaEmbedder("test-key", max_batch_items=100, max_batch_tokens=250)
+
+        self.assertEqual(embedder._plan_batches(texts), [(0, 2), (2, 4), (4, 6), (6, 8), (8, 10)])
+        self.assertEqual(embedder._plan_batches(["a" * 3000]), [(0, 1)])
+
+    def test_rate_limited_batch_retries_and_oversized_batch_is_split(self):
+        texts = [str(i) for i in range(40)]
+        with StubJinaServer(fail_first=2, max_items=10) as server:
+            vectors = _embedder(server, concurrency=2, max_batch_items=20).compute_embeddings(texts)
+
+        self.assertEqual([vector[0] for vector in vectors], [float(len(text)) for text in texts])
+        self.assertTrue(all(size <= 10 for size in server.batch_sizes))
+
+    def test_failed_batch_is_none_without_shifting_others(self):
+        texts = [str(i) for i in range(30)]
+        with StubJinaServer(fail_first=100) as server:
+            vectors = _embedder(server, concurrency=3, max_batch_items=10, max_retries=2).compute_embeddings(texts)
+
+        self.assertEqual(vectors, [None] * 30)
+        self.assertEqual(server.requests, 6)
+
+    def test_without_api_key_returns_empty(self):
+        embedder = JinaEmbedder("")
+        embedder.api_key = None
+        self.assertEqual(embedder.compute_embeddings(["a"]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from api.endpoints.shared import embedding as shared_embedding
+from core import settings
+from embedding import HashingEmbedder, hash_text
+from infrastructure.dto import PriceList, PriceListItem
+
+PROJECT_ID = "65a1b2c3d4e5f60718293a4b"
+
+
+def _price_list(descriptions):
+    items = [
+        PriceListItem(_id=f"pli-{i}", code=f"A.{i}", description=text, unit="m2", price=1.0)
+        for i, text in enumerate(descriptions)
+    ]
+    return PriceList(_id="pl-1", projectId=PROJECT_ID, name="Elenco", items=items)
+
+
+class StoredEmbeddingReuseTest(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(settings, "embedding_backend", "hashing"),
+            mock.patch.object(settings, "embedding_hashing_dims", 32),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _embed(self, price_list, stored):
+        calls = []
+        original = HashingEmbedder.compute_embeddings
+
+        def counting(embedder, texts, model=None):
+            calls.append(list(texts))
+            return original(embedder, texts, model)
+
+        with mock.patch.object(shared_embedding, "lookup_stored_embeddings", return_value=stored) as lookup, \
+                mock.patch.object(HashingEmbedder, "compute_embeddings", counting):
+            count = shared_embedding.compute_embeddings_for_items(
+                price_list, project_id=PROJECT_ID, reuse_embeddings=True
+            )
+        return count, calls, lookup
+
+    def test_only_new_or_changed_texts_are_embedded(self):
+        first = _price_list(["Massetto", "Intonaco", "Tinteggiatura"])
+        self._embed(first, stored={})
+        stored = {item.embedding_text_hash: item.embedding for item in first.items}
+
+        revised = _price_list(["Massetto", "Intonaco civile", "Tinteggiatura", "Massetto"])
+        count, calls, lookup = self._embed(revised, stored)
+
+        self.assertEqual(count, 4)
+        self.assertEqual(calls, [["Intonaco civile"]])
+        lookup.assert_called_once()
+        _project, hashes, model, version = lookup.call_args.args
+        self.assertEqual((model, version), ("hashing-32", "text"))
+        self.assertEqual(hashes[0], hash_text("Massetto"))
+        self.assertEqual(revised.items[0].embedding, first.items[0].embedding)
+        self.assertEqual(revised.items[3].embedding, first.items[0].embedding)
+        self.assertEqual(revised.items[1].embedding_text_hash, hash_text("Intonaco civile"))
+
+    def test_reuse_disabled_skips_lookup(self):
+        price_list = _price_list(["Massetto"])
+        with mock.patch.object(shared_embedding, "lookup_stored_embeddings") as lookup:
+            count = shared_embedding.compute_embeddings_for_items(price_list, project_id=PROJECT_ID)
+        lookup.assert_not_called()
+        self.assertEqual(count, 1)
+        self.assertEqual(price_list.items[0].embedding_model, "hashing-32")
+
+    def test_lookup_is_one_query_by_project_hash_model_and_version(self):
+        collection = mock.MagicMock()
+        collection.find.return_value = [{"embedding_text_hash": "h1", "embedding": [0.5, 0.5]}]
+        db = mock.MagicMock()
+        db.list_collection_names.return_value = ["pricelistitems", "projects"]
+        db.__getitem__.return_value = collection
+        client = mock.MagicMock()
+        client.get_database.return_value = db
+
+        with mock.patch.dict(os.environ, {"MONGODB_URI": "mongodb://db/taboolo"}), \
+                mock.patch("pymongo.MongoClient", return_value=client):
+            found = shared_embedding.lookup_stored_embeddings(PROJECT_ID, ["h1", "h2", "h1", ""], "jina-embeddings-v3", "text")
+
+        self.assertEqual(found, {"h1": [0.5, 0.5]})
+        db.__getitem__.assert_called_once_with("pricelistitems")
+        collection.find.assert_called_once()
+        query = collection.find.call_args.args[0]
+        self.assertEqual(str(query["project_id"]), PROJECT_ID)
+        self.assertEqual(query["embedding_text_hash"], {"$in": ["h1", "h2"]})
+        self.assertEqual((query["embedding_model"], query["embedding_version"]), ("jina-embeddings-v3", "text"))
+        client.close.assert_called_once()
+
+    def test_lookup_without_database_returns_nothing(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(shared_embedding.lookup_stored_embeddings(PROJECT_ID, ["h1"], "m", "text"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+import bson
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from core import settings
+from embedding.vectors import (
+    decode_unit,
+    decode_vector,
+    encode_vector,
+    encode_vector_base64,
+    stored_unit_matrix,
+    stored_vector,
+)
+
+
+def _vector(seed, dims=1024):
+    return np.random.default_rng(seed).normal(size=dims).tolist()
+
+
+class VectorEncodingTest(unittest.TestCase):
+    def test_round_trip_keeps_direction_and_norm(self):
+        vector = _vector(1)
+        original = np.array(vector)
+        for fmt, min_cosine in (("float16", 0.99999), ("int8", 0.9995)):
+            decoded = decode_vector(encode_vector(vector, fmt))
+            cosine = float(np.dot(decoded, original) / (np.linalg.norm(decoded) * np.linalg.norm(original)))
+            self.assertGreater(cosine, min_cosine, fmt)
+            self.assertAlmostEqual(float(np.linalg.norm(decoded)), float(np.linalg.norm(original)), places=3)
+            unit, _norm = decode_unit(encode_vector_base64(vector, fmt))
+            self.assertAlmostEqual(float(np.linalg.norm(unit)), 1.0, places=5)
+
+    def test_binary_is_several_times_smaller_than_arrays(self):
+        vector = _vector(2)
+        as_bson = len(bson.encode({"embedding": vector}))
+        as_json = len(json.dumps(vector))
+        self.assertGreater(as_bson / len(bson.encode({"embedding_bin": bson.Binary(encode_vector(vector, "float16"))})), 6)
+        self.assertGreater(as_bson / len(bson.encode({"embedding_bin": bson.Binary(encode_vector(vector, "int8"))})), 12)
+        self.assertGreater(as_json / len(json.dumps(encode_vector_base64(vector, "float16"))), 6)
+
+    def test_stored_documents_in_any_format(self):
+        docs = [
+            {"embedding": [3.0, 4.0]},
+            {"embedding_bin": bson.Binary(encode_vector([0.0, 2.0], "int8"))},
+            {"embedding_bin": encode_vector([1.0, 1.0, 1.0], "float16")},
+            {"embedding": []},
+            {"embedding_bin": b"\x01\x00"},
+        ]
+        np.testing.assert_allclose(stored_vector(docs[0]), [0.6, 0.8], rtol=1e-6)
+        self.assertIsNone(stored_vector(docs[3]))
+        self.assertIsNone(stored_vector(docs[4]))
+
+        matrix, indices = stored_unit_matrix(docs, dims=2)
+        self.assertEqual(indices, [0, 1])
+        self.assertEqual(matrix.dtype, np.float32)
+        np.testing.assert_allclose(matrix, [[0.6, 0.8], [0.0, 1.0]], atol=1e-6)
+
+        empty, none = stored_unit_matrix([{}], dims=4)
+        self.assertEqual((empty.shape, none), ((0, 4), []))
+
+    def test_float_array_wins_over_binary_copy(self):
+        from scripts.migrate_embeddings import convert
+
+        doc = {"embedding": [3.0, 4.0], "embedding_bin": bson.Binary(encode_vector([0.0, 1.0], "int8"))}
+        np.testing.assert_allclose(stored_vector(doc), [0.6, 0.8], rtol=1e-6)
+
+        update, _before, _after = convert(doc, "float", keep_float=False)
+        self.assertEqual(update, {"$unset": {"embedding_bin": ""}})
+        self.assertIsNone(convert({"embedding": [3.0, 4.0]}, "float", keep_float=False)[0])
+
+    def test_import_stores_compact_vectors_when_configured(self):
+        from api.endpoints.shared.embedding import compute_embeddings_for_items
+        from embedding.tests.test_stored_reuse import _price_list
+
+        price_list = _price_list(["Massetto", "Intonaco"])
+        with mock.patch.object(settings, "embedding_backend", "hashing"), \
+                mock.patch.object(settings, "embedding_storage", "float16"):
+            self.assertEqual(compute_embeddings_for_items(price_list), 2)
+
+        item = price_list.items[0]
+        self.assertIsNone(item.embedding)
+        self.assertEqual(len(decode_vector(item.embedding_bin)), settings.embedding_hashing_dims)
+        self.assertIn("embedding_bin", item.model_dump(by_alias=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
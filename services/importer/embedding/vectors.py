@@ -0,0 +1,171 @@
+"""
+Compact binary encoding of embedding vectors.
+
+A vector is stored unit-normalized, as float16 or as int8 with a scale, after
+a small header with its dimension and original L2 norm:
+
+    float16: <B code=1> <B 0> <H dims> <f norm>           + dims * 2 bytes
+    int8:    <B code=2> <B 0> <H dims> <f norm> <f scale> + dims * 1 byte
+
+A 1024-dim Jina vector takes 2 KB (float16) or 1 KB (int8) instead of ~13 KB
+as a BSON array of doubles and ~22 KB as JSON. Stored documents keep the
+binary in `embedding_bin` (BSON binary; base64 in API payloads), written
+when `settings.embedding_storage` is "float16" or "int8". The float array in
+`embedding` stays the default: Atlas `$vectorSearch` indexes that field.
+
+Readers go through `stored_vector` / `stored_unit_matrix`, which accept both
+fields and all encodings and return float32 unit vectors, so cosine
+similarity is a plain dot product without recomputing norms. When a document
+has both fields (`migrate_embeddings.py --keep-float`) the full-precision
+array wins; imports write one field and remove the other.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import struct
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+STORAGE_FORMATS = ("float", "float16", "int8")
+BINARY_FIELD = "embedding_bin"
+
+_FLOAT16 = 1
+_INT8 = 2
+_HEADER = struct.Struct("<BBHf")
+_SCALE = struct.Struct("<f")
+
+
+def encode_vector(vector: Sequence[float], fmt: str = "float16") -> bytes:
+    """Binary encoding of `vector` ("float16" or "int8")."""
+    values = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(values))
+    unit = values / norm if norm > 0 else values
+    if fmt == "float16":
+        return _HEADER.pack(_FLOAT16, 0, len(values), norm) + unit.astype("<f2").tobytes()
+    if fmt == "int8":
+        peak = float(np.max(np.abs(unit))) if len(unit) else 0.0
+        scale = peak / 127 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(unit / scale), -127, 127).astype(np.int8)
+        return _HEADER.pack(_INT8, 0, len(values), norm) + _SCALE.pack(scale) + quantized.tobytes()
+    raise ValueError(f"Unknown embedding encoding '{fmt}'")
+
+
+def encode_vector_base64(vector: Sequence[float], fmt: str = "float16") -> str:
+    return base64.b64encode(encode_vector(vector, fmt)).decode("ascii")
+
+
+def decode_unit(value: Any) -> Optional[Tuple[np.ndarray, float]]:
+    """
+    (float32 unit vector, original norm) of a stored value: a list of floats,
+    binary (bytes, BSON Binary) or its base64 text. None when empty or invalid.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _decode_binary(bytes(value))
+    values = np.asarray(value, dtype=np.float32)
+    if values.ndim != 1 or not len(values):
+        return None
+    norm = float(np.linalg.norm(values))
+    return (values / norm if norm > 0 else values), norm
+
+
+def decode_vector(value: Any) -> Optional[np.ndarray]:
+    """float32 vector of a stored value, with its original norm restored."""
+    decoded = decode_unit(value)
+    if decoded is None:
+        return None
+    unit, norm = decoded
+    return unit * np.float32(norm)
+
+
+def stored_vector(doc: Mapping[str, Any], field: str = "embedding") -> Optional[np.ndarray]:
+    """Unit vector of a stored document: the float array if present, else the binary field."""
+    value = doc.get(field)
+    if not _has_items(value) and field == "embedding":
+        value = doc.get(BINARY_FIELD)
+    decoded = decode_unit(value)
+    return decoded[0] if decoded is not None else None
+
+
+def stored_unit_matrix(
+    docs: Sequence[Mapping[str, Any]],
+    dims: Optional[int] = None,
+    field: str = "embedding",
+) -> Tuple[np.ndarray, List[int]]:
+    """
+    float32 matrix of the unit vectors of `docs` (one row per usable document)
+    and the indices of those documents. Documents without a vector, or with a
+    dimension other than `dims` (when given), are skipped.
+    """
+    rows: List[np.ndarray] = []
+    indices: List[int] = []
+    for idx, doc in enumerate(docs):
+        vector = stored_vector(doc, field)
+        if vector is None or (dims is not None and len(vector) != dims):
+            continue
+        rows.append(vector)
+        indices.append(idx)
+    if not rows:
+        return np.zeros((0, dims or 0), dtype=np.float32), indices
+    return np.vstack(rows), indices
+
+
+def stored_vector_filter(field: str = "embedding") -> Dict[str, Any]:
+    """Mongo condition matching documents with a vector in either field."""
+    if field != "embedding":
+        return {field: {"$type": "array"}}
+    return {"$or": [{field: {"$type": "array"}}, {BINARY_FIELD: {"$type": "binData"}}]}
+
+
+def stored_vector_projection(field: str = "embedding") -> Dict[str, int]:
+    if field != "embedding":
+        return {field: 1}
+    return {field: 1, BINARY_FIELD: 1}
+
+
+def _has_items(value: Any) -> bool:
+    return value is not None and len(value) > 0
+
+
+def _decode_binary(raw: bytes) -> Optional[Tuple[np.ndarray, float]]:
+    if len(raw) < _HEADER.size:
+        return None
+    code, _reserved, dims, norm = _HEADER.unpack_from(raw)
+    offset = _HEADER.size
+    if code == _FLOAT16 and len(raw) == offset + 2 * dims:
+        unit = np.frombuffer(raw, dtype="<f2", count=dims, offset=offset).astype(np.float32)
+    elif code == _INT8 and len(raw) == offset + _SCALE.size + dims:
+        (scale,) = _SCALE.unpack_from(raw, offset)
+        quantized = np.frombuffer(raw, dtype=np.int8, count=dims, offset=offset + _SCALE.size)
+        unit = quantized.astype(np.float32) * np.float32(scale)
+    else:
+        return None
+    if not dims:
+        return None
+    # Re-normalize: quantization moves the norm slightly off 1
+    unit_norm = float(np.linalg.norm(unit))
+    if unit_norm > 0:
+        unit /= unit_norm
+    return unit, float(norm)
+
+
+__all__ = [
+    "BINARY_FIELD",
+    "STORAGE_FORMATS",
+    "decode_unit",
+    "decode_vector",
+    "encode_vector",
+    "encode_vector_base64",
+    "stored_unit_matrix",
+    "stored_vector",
+    "stored_vector_filter",
+    "stored_vector_projection",
+]
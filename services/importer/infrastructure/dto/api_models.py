@@ -69,6 +69,14 @@ class PriceListItem(BaseModel):
     
     # Semantic Search
     embedding: Optional[List[float]] = None
+    # Same vector in compact binary form (base64, see embedding.vectors) when
+    # settings.embedding_storage is "float16" or "int8"; `embedding` is then empty
+    embedding_bin: Optional[str] = None
+    # Identity of the embedding input (hash of the embedded text, embedder
+    # model, composition version): lets a re-import reuse the stored vector
+    embedding_text_hash: Optional[str] = None
+    embedding_model: Optional[str] = None
+    embedding_version: Optional[str] = None
 
     # Extracted technical properties (LLM output)
     extracted_properties: Optional[Dict[str, Any]] = Field(None, alias="extractedProperties")
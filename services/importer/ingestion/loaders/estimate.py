@@ -1,10 +1,14 @@
 
+import logging
 from typing import List, Optional
-from decimal import Decimal, ROUND_HALF_UP
 
 from infrastructure.dto import Estimate, EstimateItem, MeasurementDetail, PriceList
 from domain import NormalizedEstimate
 from domain.services.amount_calculator import AmountCalculator
+from domain.services.fixed_point import round_2dp_10f
+from ingestion.loaders.index import LoaderIndex
+
+logger = logging.getLogger(__name__)
 
 
 class EstimateLoader:
@@ -13,8 +17,13 @@ class EstimateLoader:
         estimate: NormalizedEstimate, 
         project_id: str, 
         price_list: PriceList, 
-        preventivo_id: Optional[str] = None
+        preventivo_id: Optional[str] = None,
+        index: Optional[LoaderIndex] = None,
     ) -> Estimate:
+        if index is None:
+            index = LoaderIndex(estimate, preventivo_id)
+        if not index.price_list_items:
+            index.index_price_list(price_list)
         
         # Using the first defined preventivo name as the estimate name
         est_name = "Computo Generale"
@@ -24,50 +33,37 @@ class EstimateLoader:
         est_items = []
         
         # Filter preventivi if ID is provided
-        target_preventivi = estimate.preventivi
+        target_preventivi = index.preventivi
         
-        print(f"[Loader] Total preventivi in file: {len(estimate.preventivi)}", flush=True)
-        print(f"[Loader] preventivo_id filter: {preventivo_id}", flush=True)
+        logger.info(f"Total preventivi in file: {len(estimate.preventivi)}, preventivo_id filter: {preventivo_id}")
         
         if preventivo_id:
-             target_preventivi = [p for p in estimate.preventivi if p.id == preventivo_id]
              # Update estimate name to match selected
              if target_preventivi:
                  est_name = target_preventivi[0].name or est_name
-                 print(f"[Loader] Filtered to {len(target_preventivi)} preventivo: '{est_name}'", flush=True)
+                 logger.info(f"Filtered to {len(target_preventivi)} preventivo: '{est_name}'")
              else:
-                 print(f"[Loader] WARNING: No preventivo found with id={preventivo_id}!", flush=True)
                  # List available IDs for debugging
                  available_ids = [p.id for p in estimate.preventivi[:5]]
-                 print(f"[Loader] Available IDs (first 5): {available_ids}", flush=True)
+                 logger.warning(f"No preventivo found with id={preventivo_id}! Available IDs (first 5): {available_ids}")
         else:
-             print(f"[Loader] No preventivo_id provided, loading ALL {len(target_preventivi)} preventivi!", flush=True)
+             logger.info(f"No preventivo_id provided, loading ALL {len(target_preventivi)} preventivi")
         
         # Count total measurements
         total_meas = sum(len(p.measurements) for p in target_preventivi)
-        print(f"[Loader] Total measurements to process: {total_meas}", flush=True)
+        logger.info(f"Total measurements to process: {total_meas}")
         
-        # Optimized Lookup Map for Domain Items (needed for price resolution)
-        domain_item_map = {item.id: item for item in estimate.price_list_items}
+        # Lookup maps for price list items and domain items (needed for price resolution)
+        pli_map = index.price_list_items
+        domain_item_map = index.domain_items
+        debug = logger.isEnabledFor(logging.DEBUG)
+        # Measurements whose price list is missing from their product: one warning at the end
+        missing_price_lists = 0
+        missing_example = None
 
         for prev in target_preventivi:
             for meas in prev.measurements:
                 # One Measurement in Domain = One Item in DB
-                
-                # Conversion of details
-                details = []
-                for d in meas.details:
-                    details.append(MeasurementDetail(
-                        formula=d.formula, 
-                        value=float(d.quantity)
-                    ))
-                
-                # Parse progressive to float for payload if possible
-                prog_val = 0
-                if meas.progressive:
-                    try:
-                         prog_val = float(meas.progressive)
-                    except: pass
 
                 # Calculate explicit amount with legacy rounding logic
                 try:
@@ -75,7 +71,7 @@ class EstimateLoader:
                     used_price_list = "default"
                     
                     # 1. Find the base product item
-                    matching_item = next((item for item in price_list.items if item.id == meas.product_id), None)
+                    matching_item = pli_map.get(meas.product_id)
                     
                     if matching_item:
                         # Default to the basic price we extracted earlier
@@ -89,20 +85,14 @@ class EstimateLoader:
                                  unit_price = prod.price_by_list[meas.price_list_id]
                                  used_price_list = meas.price_list_id
                              else:
-                                 # Debug: why is the price_list_id not found?
-                                 if prod:
-                                     print(f"[Loader] WARN: price_list_id={meas.price_list_id} not in price_by_list for product {meas.product_id}. Available keys: {list(prod.price_by_list.keys())}", flush=True)
-                                 else:
-                                     print(f"[Loader] WARN: product {meas.product_id} not found in domain_item_map. Meas.price_list_id={meas.price_list_id}", flush=True)
-                        
-                        # SPECIFIC DEBUG for L001.020.01 issue
-                        if meas.product_id == "11181" or (matching_item and matching_item.code == "L001.020.01"):
-                            prod = domain_item_map.get(meas.product_id)
-                            print(f"[DEBUG L001.020.01] product={meas.product_id}, price_list_id={meas.price_list_id}, price_by_list={prod.price_by_list if prod else 'N/A'}, USED={used_price_list}, PRICE={unit_price}", flush=True)
+                                 missing_price_lists += 1
+                                 if missing_example is None:
+                                     available = list(prod.price_by_list.keys()) if prod else None
+                                     missing_example = (meas.product_id, meas.price_list_id, available)
                         
                         # Debug log for first 10 items with price_list_id
-                        if meas.price_list_id and len(est_items) < 10:
-                            print(f"[Loader Debug] Item {meas.id}: product={meas.product_id}, price_list_id={meas.price_list_id}, used={used_price_list}, price={unit_price}", flush=True)
+                        if debug and meas.price_list_id and len(est_items) < 10:
+                            logger.debug(f"Item {meas.id}: product={meas.product_id}, price_list_id={meas.price_list_id}, used={used_price_list}, price={unit_price}")
                     
                     # Use AmountCalculator for consistent rounding
                     final_qty, calc_amount = AmountCalculator.calculate(
@@ -111,7 +101,7 @@ class EstimateLoader:
                         round_quantity_first=True
                     )
                 except Exception as e:
-                    print(f"[Loader Error] Failed to calc legacy amount for {meas.id}: {e}", flush=True)
+                    logger.error(f"Failed to calc legacy amount for {meas.id}: {e}")
                     calc_amount = 0.0
                     final_qty = meas.total_quantity # Fallback
                     unit_price = 0.0
@@ -131,6 +121,13 @@ class EstimateLoader:
                         for d in meas.details
                     ]
                 ))
+
+        if missing_price_lists:
+            product_id, price_list_id, available = missing_example
+            logger.warning(
+                f"{missing_price_lists} measurements use a price list their product has no price for, "
+                f"default price used (e.g. product {product_id}, price_list_id={price_list_id}, available: {available})"
+            )
                 
         return Estimate(
             projectId=project_id,
@@ -142,5 +139,5 @@ class EstimateLoader:
     @staticmethod
     def _legacy_round(val: float) -> float:
         if val is None: return 0.0
-        # Convert to string first to avoid float precision issues
-        return float(Decimal(f"{val:.10f}").quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+        # Same result as Decimal(f"{val:.10f}") quantized to cents
+        return round_2dp_10f(val)
@@ -0,0 +1,42 @@
+from typing import Dict, List, Optional
+
+from infrastructure.dto import PriceList, PriceListItem, WbsNode
+from domain import NormalizedEstimate, PreventivoModel, PriceListItem as DomainPriceItem
+
+
+class LoaderIndex:
+    """
+    Lookup maps shared by the loaders of one transform, built once instead of
+    scanning lists per measurement/product:
+
+    - domain products and the selected preventivi of the estimate;
+    - WBS6/WBS7 labels by group id (for the denormalized price list fields);
+    - price list items by id, once the price list exists.
+
+    Duplicate ids resolve as before: the first price list item (the linear
+    scan returned the first match), the last product and group (the dicts).
+    """
+
+    def __init__(self, estimate: NormalizedEstimate, preventivo_id: Optional[str] = None) -> None:
+        self.domain_items: Dict[str, DomainPriceItem] = {prod.id: prod for prod in estimate.price_list_items}
+
+        self.preventivi: List[PreventivoModel] = estimate.preventivi
+        if preventivo_id:
+            self.preventivi = [p for p in estimate.preventivi if p.id == preventivo_id]
+
+        self.wbs6_labels: Dict[str, str] = {}
+        self.wbs7_labels: Dict[str, str] = {}
+        self.price_list_items: Dict[str, PriceListItem] = {}
+
+    def index_groups(self, groups: List[WbsNode]) -> None:
+        for grp in groups:
+            self.wbs6_labels.pop(grp.id, None)
+            self.wbs7_labels.pop(grp.id, None)
+            if grp.level == 6:
+                self.wbs6_labels[grp.id] = grp.description or grp.code
+            elif grp.level == 7:
+                self.wbs7_labels[grp.id] = grp.description or grp.code
+
+    def index_price_list(self, price_list: PriceList) -> None:
+        for item in price_list.items:
+            self.price_list_items.setdefault(item.id, item)
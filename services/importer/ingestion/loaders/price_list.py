@@ -1,7 +1,11 @@
 
+import logging
 from typing import List, Optional
 from infrastructure.dto import PriceList, PriceListItem, WbsNode
 from domain import NormalizedEstimate
+from ingestion.loaders.index import LoaderIndex
+
+logger = logging.getLogger(__name__)
 
 class PriceListLoader:
     @staticmethod
@@ -9,15 +13,21 @@ class PriceListLoader:
         estimate: NormalizedEstimate, 
         project_id: str, 
         groups: List[WbsNode], 
-        preventivo_id: Optional[str] = None
+        preventivo_id: Optional[str] = None,
+        index: Optional[LoaderIndex] = None,
     ) -> PriceList:
+        if index is None:
+            index = LoaderIndex(estimate, preventivo_id)
+        if not (index.wbs6_labels or index.wbs7_labels):
+            index.index_groups(groups)
         
         pl_items = []
-        # Map for fast group lookup
-        group_map = {g.id: g for g in groups}
+        # Precomputed group maps: WBS6/WBS7 label by group id
+        wbs6_labels = index.wbs6_labels
+        wbs7_labels = index.wbs7_labels
 
         # Determine target price list ID from the selected preventivo's measurements
-        target_price_list_id = PriceListLoader._determine_target_price_list(estimate, preventivo_id)
+        target_price_list_id = PriceListLoader._determine_target_price_list(index.preventivi)
         
         for prod in estimate.price_list_items:
             # Map Unit ID to string label if available
@@ -30,19 +40,17 @@ class PriceListLoader:
                     price_val = prod.price_by_list[target_price_list_id]
                 else:
                     # Fallback to first price if target not found
-                    price_val = list(prod.price_by_list.values())[0]
+                    price_val = next(iter(prod.price_by_list.values()))
             
             # Resolve denormalized WBS fields
             _wbs6 = None
             _wbs7 = None
             
             for wid in prod.wbs_ids:
-                if wid in group_map:
-                    grp = group_map[wid]
-                    if grp.level == 6:
-                        _wbs6 = grp.description or grp.code
-                    elif grp.level == 7:
-                        _wbs7 = grp.description or grp.code
+                if wid in wbs6_labels:
+                    _wbs6 = wbs6_labels[wid]
+                elif wid in wbs7_labels:
+                    _wbs7 = wbs7_labels[wid]
 
             pl_items.append(PriceListItem(
                 _id=prod.id, # Use XML ID
@@ -64,11 +72,8 @@ class PriceListLoader:
         )
 
     @staticmethod
-    def _determine_target_price_list(estimate: NormalizedEstimate, preventivo_id: Optional[str]) -> Optional[str]:
+    def _determine_target_price_list(target_preventivi) -> Optional[str]:
         target_price_list_id = None
-        target_preventivi = estimate.preventivi
-        if preventivo_id:
-            target_preventivi = [p for p in estimate.preventivi if p.id == preventivo_id]
         
         # Extract the listaQuotazioneId from the first measurement that has one
         for prev in target_preventivi:
@@ -80,8 +85,8 @@ class PriceListLoader:
                 break
         
         if target_price_list_id:
-            print(f"[Loader] Using target price list ID: {target_price_list_id}", flush=True)
+            logger.info(f"Using target price list ID: {target_price_list_id}")
         else:
-            print("[Loader] WARN: No price_list_id found in measurements, using first price", flush=True)
+            logger.warning("No price_list_id found in measurements, using first price")
             
         return target_price_list_id
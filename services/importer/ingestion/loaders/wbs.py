@@ -1,10 +1,13 @@
 
+import logging
 from typing import List
 import re
 
 from infrastructure.dto import WbsNode
 from domain import NormalizedEstimate
 
+logger = logging.getLogger(__name__)
+
 class WbsLoader:
     @staticmethod
     def create(estimate: NormalizedEstimate, project_id: str) -> List[WbsNode]:
@@ -50,7 +53,7 @@ class WbsLoader:
         wbs6_groups = [g for g in groups if g.level == 6]
         
         if wbs6_groups:
-            print(f"[Loader] Processing {len(wbs6_groups)} WBS6 nodes for normalization...", flush=True)
+            logger.info(f"Processing {len(wbs6_groups)} WBS6 nodes for normalization...")
             
             # Normalize descriptions
             for g in wbs6_groups:
@@ -60,7 +63,7 @@ class WbsLoader:
             unique_descs = list(set(g.normalized_description for g in wbs6_groups if g.normalized_description))
             
             if unique_descs:
-                print(f"[Loader] Computing embeddings for {len(unique_descs)} unique WBS6 categories...", flush=True)
+                logger.info(f"Computing embeddings for {len(unique_descs)} unique WBS6 categories...")
                 try:
                     from embedding import get_embedder
                     embedder = get_embedder()
@@ -77,7 +80,7 @@ class WbsLoader:
                         if g.normalized_description in embedding_map:
                             g.embedding = embedding_map[g.normalized_description]
                     
-                    print(f"[Loader] Successfully computed {len(embedding_map)} WBS6 embeddings", flush=True)
+                    logger.info(f"Successfully computed {len(embedding_map)} WBS6 embeddings")
                 except Exception as e:
-                    print(f"[Loader] WARNING: Failed to compute WBS6 embeddings: {e}", flush=True)
+                    logger.warning(f"Failed to compute WBS6 embeddings: {e}")
 
@@ -0,0 +1,279 @@
+"""
+Import in blocco dei ritorni di più aziende: N file, una o più configurazioni
+di colonne per file, parse in parallelo su un pool di processi.
+
+Il parse avviene in due fasi sullo stesso pool: prima l'intestazione di ogni
+file (solo le prime righe del foglio), poi il parse completo di ogni
+(file, azienda). Il pool è unico per processo e condiviso da tutte le
+richieste: i processi partono una volta sola e i blocchi concorrenti non
+superano insieme il numero di processi configurato. Le colonne non indicate nella configurazione sono risolte
+una sola volta per layout di intestazione e riusate per tutti i file che lo
+condividono, così file con lo stesso tracciato ricevono la stessa mappatura.
+
+Ogni upload è scritto una volta su disco (`upload_to_file`) e ai processi
+va solo il suo percorso: le due fasi lo aprono con `mapped_file`, così il
+contenuto non è mai copiato in memoria né serializzato verso il pool.
+
+Le lettere di colonna, indicate o suggerite, sono quelle del foglio (colonne
+vuote comprese), come nell'anteprima dei ritorni: il parse le legge con
+`raw_columns=True`.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence
+
+from parsers.excel.detector import detect_column_suggestions, detect_sheet_layout
+from parsers.excel.reader import open_sheet_rows
+from parsers.shared.buffers import BufferReader
+from registry import (
+    parse_excel_estimate_from_bytes,
+    parse_lx_estimate_from_bytes,
+    parse_mx_estimate_from_bytes,
+)
+from utils.upload import mapped_file
+
+logger = logging.getLogger(__name__)
+
+# Campo della configurazione -> suggerimento di `detect_column_suggestions`
+_SUGGESTED_COLUMNS = {
+    "price_column": "prezzo",
+    "quantity_column": "quantita",
+    "progressive_column": "progressivo",
+    "code_columns": "codice",
+    "description_columns": "descrizione",
+}
+_MULTI_COLUMNS = ("code_columns", "description_columns")
+
+_PARSERS: dict[str, Callable[..., Any]] = {
+    "lx": parse_lx_estimate_from_bytes,
+    "mx": parse_mx_estimate_from_bytes,
+    "excel": parse_excel_estimate_from_bytes,
+}
+
+
+@dataclass
+class ReturnBatchJob:
+    """Parse di un file con la mappatura di colonne di un'azienda."""
+
+    file_index: int
+    company_id: str
+    columns: dict[str, Any] = field(default_factory=dict)
+    config: dict[str, Any] = field(default_factory=dict)
+
+
+def build_batch_jobs(
+    companies: Sequence[dict[str, Any]],
+    filenames: Sequence[str | None],
+    defaults: dict[str, Any],
+) -> tuple[list[ReturnBatchJob], list[dict[str, Any]]]:
+    """
+    Associa le configurazioni delle aziende ai file caricati.
+
+    Una configurazione indica il file con `file` (nome) o `file_index`;
+    senza, la i-esima configurazione va all'i-esimo file (a tutte sul file se
+    ne è stato caricato uno solo). Senza configurazioni ogni file è un'azienda.
+    Restituisce i job e gli errori delle configurazioni senza file.
+    """
+    if not companies:
+        companies = [{} for _ in filenames]
+
+    jobs: list[ReturnBatchJob] = []
+    failed: list[dict[str, Any]] = []
+    for idx, cfg in enumerate(companies):
+        company_id = cfg.get("id") or cfg.get("name") or f"company_{idx+1}"
+        file_index = _config_file_index(cfg, idx, filenames)
+        if file_index is None:
+            failed.append(
+                {
+                    "company": company_id,
+                    "error": "No uploaded file matches the company configuration.",
+                    "error_type": "ValueError",
+                    "details": {"file": cfg.get("file"), "file_index": cfg.get("file_index")},
+                    "config": cfg,
+                }
+            )
+            continue
+        columns = {name: cfg.get(name) or defaults.get(name) for name in _SUGGESTED_COLUMNS}
+        for name in _MULTI_COLUMNS:
+            columns[name] = _split_columns(columns[name])
+        jobs.append(ReturnBatchJob(file_index=file_index, company_id=company_id, columns=columns, config=cfg))
+    return jobs, failed
+
+
+def parse_returns_batch(
+    files: Sequence[tuple[str | None, str]],
+    jobs: Sequence[ReturnBatchJob],
+    *,
+    mode: str,
+    sheet_name: str | None,
+    workers: int,
+    header_max_rows: int = 500,
+) -> list[Any]:
+    """
+    Parse dei job; per ogni job la `NormalizedEstimate` o l'eccezione del parse.
+
+    `files` sono (nome, percorso su disco) degli upload. Con `workers` >= 2 le due
+    fasi girano sul pool di processi condiviso (`workers` processi al
+    massimo), altrimenti in questo processo.
+    """
+    parser_key = (mode or "").strip().lower()
+    if parser_key not in _PARSERS:
+        parser_key = "lx"
+    used_files = sorted({job.file_index for job in jobs})
+    workers = min(workers, os.cpu_count() or 1)
+
+    if workers >= 2 and jobs:
+        try:
+            executor = _get_pool(workers)
+            return _run_batch(executor.map, files, used_files, jobs, parser_key, sheet_name, header_max_rows)
+        except (OSError, RuntimeError) as exc:
+            # Nessun pool disponibile (sandbox, worker interrotto): parse in questo processo
+            if isinstance(exc, BrokenExecutor):
+                shutdown_returns_batch_pool()
+            logger.warning(f"Parallel return batch unavailable ({exc}), parsing sequentially")
+    return _run_batch(map, files, used_files, jobs, parser_key, sheet_name, header_max_rows)
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool di processi del modulo, creato alla prima richiesta (ricreato se cambia `workers`)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool, _pool_workers = ProcessPoolExecutor(max_workers=workers), workers
+        return _pool
+
+
+def shutdown_returns_batch_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_batch(
+    map_fn: Callable[..., Any],
+    files: Sequence[tuple[str | None, str]],
+    used_files: list[int],
+    jobs: Sequence[ReturnBatchJob],
+    parser_key: str,
+    sheet_name: str | None,
+    header_max_rows: int,
+) -> list[Any]:
+    headers = dict(
+        zip(
+            used_files,
+            map_fn(
+                _read_header,
+                [files[idx][1] for idx in used_files],
+                [sheet_name] * len(used_files),
+                [header_max_rows] * len(used_files),
+            ),
+        )
+    )
+    suggested_by_header: dict[tuple[Any, ...], dict[str, str]] = {}
+    for header in headers.values():
+        if header is not None and header not in suggested_by_header:
+            suggested_by_header[header] = _suggested_columns(header)
+    logger.info(f"Return batch: {len(jobs)} jobs, {len(used_files)} files, {len(suggested_by_header)} header layouts")
+
+    tasks = []
+    for job in jobs:
+        columns = dict(job.columns)
+        header = headers.get(job.file_index)
+        if header is not None:
+            for name, letter in suggested_by_header[header].items():
+                if not columns.get(name):
+                    columns[name] = [letter] if name in _MULTI_COLUMNS else letter
+        filename, path = files[job.file_index]
+        tasks.append((parser_key, path, filename, sheet_name, columns))
+    return list(map_fn(_parse_job, tasks))
+
+
+def _read_header(path: str, sheet_name: str | None, max_rows: int) -> tuple[Any, ...] | None:
+    """Riga di intestazione del foglio, letta sulle prime righe."""
+    try:
+        with mapped_file(path) as content, BufferReader(content) as stream, open_sheet_rows(stream, sheet_name) as reader:
+            sheet_rows = iter(reader)
+            try:
+                layout = detect_sheet_layout(
+                    (values for values, _formulas in sheet_rows),
+                    max_rows=max_rows,
+                )
+            finally:
+                sheet_rows.close()
+    except Exception:
+        # Il parse completo del file riporta l'errore
+        return None
+    if layout.header_idx is None:
+        return None
+    return tuple(None if value is None else str(value).strip() for value in layout.rows[layout.header_idx])
+
+
+def _suggested_columns(header: tuple[Any, ...]) -> dict[str, str]:
+    suggestions = detect_column_suggestions([header], 0)["suggestions"]
+    return {
+        name: suggestions[key].column_letter
+        for name, key in _SUGGESTED_COLUMNS.items()
+        if key in suggestions
+    }
+
+
+def _parse_job(task: tuple[str, str, str | None, str | None, dict[str, Any]]) -> Any:
+    parser_key, path, filename, sheet_name, columns = task
+    try:
+        with mapped_file(path) as content:
+            return _PARSERS[parser_key](
+                file_bytes=content,
+                filename=filename,
+                sheet_name=sheet_name,
+                code_columns=columns.get("code_columns"),
+                description_columns=columns.get("description_columns"),
+                price_column=columns.get("price_column"),
+                quantity_column=columns.get("quantity_column"),
+                progressive_column=columns.get("progressive_column"),
+                raw_columns=True,
+            )
+    except Exception as exc:
+        return exc
+
+
+def _config_file_index(cfg: dict[str, Any], idx: int, filenames: Sequence[str | None]) -> int | None:
+    if cfg.get("file"):
+        try:
+            return list(filenames).index(cfg["file"])
+        except ValueError:
+            return None
+    if cfg.get("file_index") is not None:
+        try:
+            file_index = int(cfg["file_index"])
+        except (TypeError, ValueError):
+            return None
+        return file_index if 0 <= file_index < len(filenames) else None
+    if len(filenames) == 1:
+        return 0
+    return idx if idx < len(filenames) else None
+
+
+def _split_columns(value: Any) -> list[str] | None:
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value.split(",")
+    return [str(column) for column in value]
+
+
+__all__ = ["ReturnBatchJob", "build_batch_jobs", "parse_returns_batch", "shutdown_returns_batch_pool"]
@@ -0,0 +1,70 @@
+import logging
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from domain import NormalizedEstimate
+from domain.services.amount_calculator import AmountCalculator
+from ingestion.loaders.estimate import EstimateLoader
+from ingestion.loaders.index import LoaderIndex
+from loader import LoaderService
+from parsers.six.parser import SixParser
+from parsers.tests.fixtures import build_six_document
+
+
+def _estimate() -> NormalizedEstimate:
+    estimate = SixParser().parse(build_six_document(seed=5, preventivi=2, rilevazioni=80, products=60))
+    for node in estimate.wbs_nodes:
+        # WBS6 descriptions would be embedded by the WBS loader
+        if node.level == 6:
+            node.level = 7
+    return estimate
+
+
+class TestLoaderIndex(unittest.TestCase):
+    def test_transform_prices_measurements_from_their_product(self) -> None:
+        estimate = _estimate()
+        products = {prod.id: prod for prod in estimate.price_list_items}
+        _project, _groups, price_list, estimate_doc = LoaderService.transform(estimate, project_id="p1")
+
+        price_list_items = {item.id: item for item in price_list.items}
+        measurements = [meas for prev in estimate.preventivi for meas in prev.measurements]
+        self.assertEqual(len(estimate_doc.items), len(measurements))
+        for meas, item in zip(measurements, estimate_doc.items):
+            prices = products[meas.product_id].price_by_list
+            expected = prices.get(meas.price_list_id, price_list_items[meas.product_id].price)
+            self.assertEqual(item.unit_price, expected)
+            self.assertEqual(
+                item.amount,
+                AmountCalculator.calculate(meas.total_quantity, expected, round_quantity_first=True)[1],
+            )
+
+    def test_duplicate_price_list_items_resolve_to_the_first(self) -> None:
+        estimate = _estimate()
+        _project, groups, price_list, _estimate_doc = LoaderService.transform(estimate, project_id="p1")
+        first = price_list.items[0]
+        price_list.items.append(first.model_copy(update={"price": first.price + 100}))
+        index = LoaderIndex(estimate)
+        index.index_groups(groups)
+
+        estimate_doc = EstimateLoader.create(estimate, "p1", price_list, index=index)
+        used = [item for item in estimate_doc.items if item.price_list_item_id == first.id]
+        for item in used:
+            self.assertNotEqual(item.unit_price, first.price + 100)
+
+    def test_missing_price_list_is_logged_once(self) -> None:
+        estimate = _estimate()
+        for meas in estimate.preventivi[0].measurements:
+            meas.price_list_id = "unknown-list"
+        with self.assertLogs("ingestion.loaders.estimate", level=logging.WARNING) as logs:
+            LoaderService.transform(estimate, project_id="p1")
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("price_list_id=unknown-list", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+
+from api.endpoints import returns
+from ingestion import returns_batch
+from ingestion.returns_batch import build_batch_jobs, parse_returns_batch
+from registry import parse_mx_estimate_from_bytes
+from utils.upload import upload_to_file
+
+HEADER = ["Progressivo", "Codice", "Descrizione", "Quantita", "Prezzo"]
+
+
+def _workbook(header: list[str], rows: list[dict]) -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Ritorno"
+    sheet.append(header)
+    for row in rows:
+        sheet.append([row.get(name) for name in header])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _rows(count: int, price: float) -> list[dict]:
+    return [
+        {
+            "Progressivo": idx,
+            "Codice": f"A.{idx:03d}",
+            "Descrizione": f"Voce {idx}",
+            "Quantita": idx * 1.5,
+            "Prezzo": price + idx,
+        }
+        for idx in range(1, count + 1)
+    ]
+
+
+def _items(estimate) -> list[tuple]:
+    return [(item.progressive, item.code, item.quantity, item.unit_price, item.amount) for item in estimate.items]
+
+
+class TestBuildBatchJobs(unittest.TestCase):
+    def test_configs_map_to_files(self) -> None:
+        jobs, failed = build_batch_jobs(
+            [
+                {"id": "alfa", "file": "b.xlsx", "price_column": "E"},
+                {"id": "beta", "file_index": 0, "code_columns": "B,C"},
+                {"name": "gamma"},
+                {"id": "delta", "file": "missing.xlsx"},
+            ],
+            ["a.xlsx", "b.xlsx", "c.xlsx"],
+            {"price_column": "D", "description_columns": "C"},
+        )
+        self.assertEqual([(job.company_id, job.file_index) for job in jobs], [("alfa", 1), ("beta", 0), ("gamma", 2)])
+        self.assertEqual(jobs[0].columns["price_column"], "E")
+        self.assertEqual(jobs[1].columns["price_column"], "D")
+        self.assertEqual(jobs[1].columns["code_columns"], ["B", "C"])
+        self.assertEqual(jobs[2].columns["description_columns"], ["C"])
+        self.assertEqual([entry["company"] for entry in failed], ["delta"])
+
+    def test_one_company_per_file_without_config(self) -> None:
+        jobs, failed = build_batch_jobs([], ["a.xlsx", "b.xlsx"], {})
+        self.assertEqual([(job.company_id, job.file_index) for job in jobs], [("company_1", 0), ("company_2", 1)])
+        self.assertEqual(failed, [])
+
+
+class TestParseReturnsBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        reordered = ["Codice", "Progressivo", "Prezzo", "Descrizione", "Quantita"]
+        self.contents = [
+            _workbook(HEADER, _rows(8, 10)),
+            _workbook(HEADER, _rows(5, 20)),
+            _workbook(reordered, _rows(6, 30)),
+        ]
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.files = [self._write(name, content) for name, content in zip(("a.xlsx", "b.xlsx", "c.xlsx"), self.contents)]
+        self.jobs, _failed = build_batch_jobs([], [name for name, _path in self.files], {})
+
+    def _write(self, name: str, content: bytes) -> tuple[str, str]:
+        path = os.path.join(self.folder, name)
+        with open(path, "wb") as fh:
+            fh.write(content)
+        return name, path
+
+    def _expected(self, index: int, columns: dict) -> list[tuple]:
+        name, _path = self.files[index]
+        return _items(parse_mx_estimate_from_bytes(file_bytes=self.contents[index], filename=name, **columns))
+
+    def test_detection_is_shared_by_files_with_the_same_header(self) -> None:
+        with mock.patch.object(
+            returns_batch, "_suggested_columns", wraps=returns_batch._suggested_columns
+        ) as suggested, mock.patch.object(returns_batch, "_parse_job", wraps=returns_batch._parse_job) as parse_job:
+            results = parse_returns_batch(self.files, self.jobs, mode="mx", sheet_name=None, workers=0)
+        self.assertEqual(suggested.call_count, 2)
+        # Ai job va il percorso del file, non il contenuto
+        self.assertEqual([call.args[0][1] for call in parse_job.call_args_list], [path for _name, path in self.files])
+
+        columns = dict(code_columns=["B"], description_columns=["C"], quantity_column="D", price_column="E", progressive_column="A")
+        self.assertEqual(_items(results[0]), self._expected(0, columns))
+        self.assertEqual(_items(results[1]), self._expected(1, columns))
+        reordered = dict(code_columns=["A"], description_columns=["D"], quantity_column="E", price_column="C", progressive_column="B")
+        self.assertEqual(_items(results[2]), self._expected(2, reordered))
+
+    def test_process_pool_matches_sequential(self) -> None:
+        self.addCleanup(returns_batch.shutdown_returns_batch_pool)
+        sequential = parse_returns_batch(self.files, self.jobs, mode="mx", sheet_name=None, workers=0)
+        parallel = parse_returns_batch(self.files, self.jobs, mode="mx", sheet_name=None, workers=2)
+        self.assertEqual([_items(result) for result in parallel], [_items(result) for result in sequential])
+
+    def test_requests_share_one_pool(self) -> None:
+        self.addCleanup(returns_batch.shutdown_returns_batch_pool)
+        cpus = mock.patch.object(returns_batch.os, "cpu_count", return_value=4)
+        cpus.start()
+        self.addCleanup(cpus.stop)
+        parse_returns_batch(self.files, self.jobs, mode="mx", sheet_name=None, workers=2)
+        pool = returns_batch._pool
+        self.assertIsNotNone(pool)
+        again = parse_returns_batch(self.files[:1], self.jobs[:1], mode="mx", sheet_name=None, workers=2)
+        self.assertIs(returns_batch._pool, pool)
+        self.assertTrue(again[0].items)
+
+    def test_parse_errors_are_returned_per_job(self) -> None:
+        files = self.files[:1] + [self._write("broken.xlsx", b"not a workbook")]
+        jobs, _failed = build_batch_jobs([], [name for name, _content in files], {})
+        results = parse_returns_batch(files, jobs, mode="lx", sheet_name=None, workers=0)
+        self.assertTrue(results[0].items)
+        self.assertIsInstance(results[1], Exception)
+
+
+class TestBatchEndpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        app = FastAPI()
+        app.include_router(returns.router, prefix="/commesse")
+        self.client = TestClient(app)
+
+    def test_combined_payload(self) -> None:
+        files = [
+            ("files", ("a.xlsx", _workbook(HEADER, _rows(4, 10)))),
+            ("files", ("b.xlsx", _workbook(HEADER, _rows(3, 20)))),
+        ]
+        config = '[{"id": "alfa", "file": "a.xlsx", "round": 1}, {"id": "beta", "file": "b.xlsx"}, {"id": "gamma", "file": "c.xlsx"}]'
+        with mock.patch.object(returns.settings, "returns_batch_workers", 0):
+            response = self.client.post(
+                "/commesse/p1/ritorni/batch",
+                files=files,
+                data={"mode": "mx", "companies_config": config},
+            )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["success"], ["alfa", "beta"])
+        self.assertEqual([entry["company"] for entry in body["failed"]], ["gamma"])
+        self.assertEqual((body["total"], body["success_count"], body["failed_count"]), (3, 2, 1))
+        self.assertEqual(body["computi"]["alfa"]["round_number"], 1)
+        self.assertEqual(len(body["computi"]["alfa"]["items"]), 4)
+        self.assertEqual(len(body["computi"]["beta"]["items"]), 3)
+
+    def test_upload_files_removed_after_the_batch(self) -> None:
+        paths = []
+
+        def to_file(file):
+            paths.append(upload_to_file(file))
+            return paths[-1]
+
+        files = [("files", ("a.xlsx", _workbook(HEADER, _rows(2, 10))))]
+        with mock.patch.object(returns, "upload_to_file", side_effect=to_file), \
+                mock.patch.object(returns.settings, "returns_batch_workers", 0):
+            response = self.client.post("/commesse/p1/ritorni/batch", files=files, data={"mode": "mx"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(paths), 1)
+        self.assertFalse(os.path.exists(paths[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
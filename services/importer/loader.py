@@ -19,6 +19,7 @@ from ingestion.loaders.project import ProjectLoader
 from ingestion.loaders.wbs import WbsLoader
 from ingestion.loaders.price_list import PriceListLoader
 from ingestion.loaders.estimate import EstimateLoader
+from ingestion.loaders.index import LoaderIndex
 from embedding.extraction.service import PropertyExtractionService
 
 class LoaderService:
@@ -30,17 +31,22 @@ class LoaderService:
         extract_properties: bool = False,
     ) -> Tuple[Project, List[WbsNode], PriceList, Estimate]:
         
+        # Lookup maps shared by the loaders (products, groups, price list items by id)
+        index = LoaderIndex(estimate, preventivo_id)
+
         # 1. Project
         project = ProjectLoader.create(estimate, project_id)
         
         # 2. Groups (WBS)
         groups = WbsLoader.create(estimate, project.id)
+        index.index_groups(groups)
         
         # 3. PriceList
-        price_list = PriceListLoader.create(estimate, project.id, groups, preventivo_id)
+        price_list = PriceListLoader.create(estimate, project.id, groups, preventivo_id, index=index)
+        index.index_price_list(price_list)
 
         # 4. Estimate
-        estimate_doc = EstimateLoader.create(estimate, project.id, price_list, preventivo_id)
+        estimate_doc = EstimateLoader.create(estimate, project.id, price_list, preventivo_id, index=index)
 
         # 5. Extract technical properties (optional)
         if extract_properties and price_list.items:
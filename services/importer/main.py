@@ -10,8 +10,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.router import api_router
+from application.import_jobs import shutdown_import_jobs
+from ingestion.returns_batch import shutdown_returns_batch_pool
 from core import settings
 from core.logging import configure_logging
+from utils.upload import UploadSizeLimitMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +60,10 @@ async def lifespan(app: FastAPI):
     # Qui l'app è pronta a ricevere richieste
     yield
 
+    # Chiude i pool dei job di import e dell'import in blocco dei ritorni
+    shutdown_import_jobs()
+    shutdown_returns_batch_pool()
+
     # Eventuale logica di shutdown (chiusura connessioni, flush, ecc.)
     # al momento non necessario -> pass
     # es: semantic_embedding_service.close() se servisse in futuro
@@ -83,6 +90,13 @@ def create_app() -> FastAPI:
     # Router API
     application.include_router(api_router)
 
+    # Limite dell'intera richiesta applicato mentre il body arriva, non dopo averlo
+    # letto tutto; il limite per file (max_upload_size_mb) lo applicano gli endpoint
+    application.add_middleware(
+        UploadSizeLimitMiddleware,
+        max_bytes=settings.max_request_body_mb * 1024 * 1024,
+    )
+
     # CORS rigoroso
     allowed_origins = _build_cors_origins()
     application.add_middleware(
@@ -0,0 +1,205 @@
+"""
+Columnar Excel processing - the data rows of a sheet as one pandas frame.
+
+Vectorized counterparts of the row helpers in `processor`: numeric coercion
+(EU decimal commas, currency symbols), price sanitization, progressive
+extraction and the head/tail measurement rules of the return parsers run on
+whole columns, so the parsers build `ParsedItem`s only for the rows that
+survive. Results match the row helpers cell by cell.
+Depends on processor and math_utils.
+"""
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+from parsers.excel.processor import has_external_formula
+from parsers.shared.math_utils import ceil_amount
+
+# Python types `cell_to_float` passes through as numbers (bool is an int)
+_NUMBER_TYPES = (int, float, bool)
+_EMPTY_MARKERS = ["", " "]
+# What float() accepts once the text is reduced to digits, separators and signs
+_FLOAT_TEXT = r"-?(?:\d+\.?\d*|\.\d+)"
+
+
+def rows_to_frame(rows: Sequence[tuple[Any, ...]]) -> pd.DataFrame:
+    """Object-dtype frame of row tuples: cells keep their Python values, None stays None."""
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(list(rows), dtype=object)
+
+
+def data_frame(frame: pd.DataFrame, kept_indexes: list[int], header_idx: int) -> pd.DataFrame:
+    """
+    The rows after the header, restricted to the kept columns and renumbered
+    from 0: positions match `rows[header_idx + 1:]` of `drop_empty_columns`.
+    """
+    data = frame.iloc[header_idx + 1:, kept_indexes]
+    return data.set_axis(range(len(kept_indexes)), axis=1).reset_index(drop=True)
+
+
+def column(frame: pd.DataFrame, index: int | None) -> pd.Series:
+    """Column `index` of the frame, or an all-None column if it does not exist."""
+    if index is None or index not in frame.columns:
+        return pd.Series([None] * len(frame), index=frame.index, dtype=object)
+    return frame[index]
+
+
+def filled_mask(values: pd.Series | pd.DataFrame) -> pd.Series | pd.DataFrame:
+    """Cells that are not None, "" or " " (the `row_has_values` rule)."""
+    return ~(values.isna() | values.isin(_EMPTY_MARKERS))
+
+
+def rows_with_values(frame: pd.DataFrame) -> pd.Series:
+    """Rows with at least one filled cell."""
+    if frame.empty:
+        return pd.Series(False, index=frame.index)
+    return filled_mask(frame).any(axis=1)
+
+
+def columns_with_values(frame: pd.DataFrame, indexes: list[int]) -> bool:
+    """Vectorized `column_has_values`: any filled cell in the given columns."""
+    present = [idx for idx in indexes if idx in frame.columns]
+    if not present:
+        return False
+    return bool(filled_mask(frame[present]).to_numpy().any())
+
+
+def float_values(values: pd.Series) -> pd.Series:
+    """
+    Vectorized `cell_to_float`: numbers pass through, text is stripped of
+    currency symbols and spaces, "1.234,5" and "1,5" read as EU decimals.
+    Cells that are not numbers are NaN.
+    """
+    result = pd.Series(np.nan, index=values.index, dtype="float64")
+    if values.empty:
+        return result
+
+    kinds = values.map(type)
+    numbers = kinds.isin(_NUMBER_TYPES)
+    if numbers.any():
+        result[numbers] = values[numbers].astype("float64")
+
+    texts = values[kinds == str]
+    if not texts.empty:
+        cleaned = texts.str.strip().str.replace(r"[^\d,.\-]", "", regex=True)
+        comma = cleaned.str.contains(",", regex=False)
+        dot = cleaned.str.contains(".", regex=False)
+        cleaned = cleaned.where(~(comma & dot), cleaned.str.replace(".", "", regex=False))
+        cleaned = cleaned.str.replace(",", ".", regex=False)
+        valid = cleaned.str.fullmatch(_FLOAT_TEXT)
+        if valid.any():
+            result[valid[valid].index] = cleaned[valid].astype("float64")
+    return result
+
+
+def sanitize_prices(prices: pd.Series) -> pd.Series:
+    """Vectorized `sanitize_price_candidate`: negatives dropped, amounts rounded to cents."""
+    result = prices.where(prices >= 0)
+    valid = result.notna()
+    if valid.any():
+        result[valid] = result[valid].map(ceil_amount)
+    return result
+
+
+def progressive_values(values: pd.Series) -> pd.Series:
+    """Vectorized `cell_to_progressive`: int(float(value)) as float64, NaN when not a number."""
+    result = pd.Series(np.nan, index=values.index, dtype="float64")
+    if values.empty:
+        return result
+
+    kinds = values.map(type)
+    numbers = kinds.isin(_NUMBER_TYPES)
+    if numbers.any():
+        result[numbers] = np.trunc(values[numbers].astype("float64"))
+    texts = kinds == str
+    if texts.any():
+        # float() accepts far more text than digits (exponents, "inf", "1_000"): kept per cell
+        result[texts] = values[texts].map(_text_to_progressive)
+    return result.where(np.isfinite(result))
+
+
+def tail_quantities(
+    blocks: pd.Series,
+    tail: pd.Series,
+    quantities: pd.Series,
+    prices: pd.Series,
+) -> pd.Series:
+    """
+    Vectorized `head_to_tail_quantity` over head/tail blocks.
+
+    `blocks` numbers the rows by block, `tail` marks the tail rows,
+    `quantities`/`prices` are the raw quantity and price cells. Per block,
+    the quantities of the tail rows are summed up to the first row with a
+    price or a quantity that is not a number. Blocks without any quantity
+    are missing from the result.
+    """
+    kinds = quantities.map(type)
+    blank = quantities.isna()
+    strings = kinds == str
+    if strings.any():
+        blank[strings] = quantities[strings].str.strip() == ""
+    numbers = pd.Series(np.nan, index=quantities.index, dtype="float64")
+    numeric = kinds.isin(_NUMBER_TYPES)
+    if numeric.any():
+        numbers[numeric] = quantities[numeric].astype("float64")
+    texts = strings & ~blank
+    if texts.any():
+        numbers[texts] = quantities[texts].map(_text_to_float)
+
+    stop = (filled_mask(prices) | (~blank & numbers.isna())) & tail
+    stopped = stop.astype("int8").groupby(blocks).cummax().astype(bool)
+    counted = tail & ~stopped & ~blank
+    return numbers[counted].groupby(blocks[counted]).sum()
+
+
+def external_formula_mask(formula_rows: Sequence[tuple[Any, ...]], index: int | None) -> np.ndarray:
+    """Rows whose cell `index` is an external formula (see `has_external_formula`)."""
+    mask = np.zeros(len(formula_rows), dtype=bool)
+    if index is None:
+        return mask
+    for position, row in enumerate(formula_rows):
+        # Formula rows are empty tuples unless the row has formulas
+        if row:
+            mask[position] = has_external_formula(row, index)
+    return mask
+
+
+def optional_float(value: Any) -> float | None:
+    """A column value as the row helpers return it: float, or None for NaN/missing."""
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
+def _text_to_float(value: str) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def _text_to_progressive(value: str) -> float:
+    try:
+        return float(int(float(value)))
+    except (ValueError, TypeError, OverflowError):
+        return np.nan
+
+
+__all__ = [
+    "rows_to_frame",
+    "data_frame",
+    "column",
+    "filled_mask",
+    "rows_with_values",
+    "columns_with_values",
+    "float_values",
+    "sanitize_prices",
+    "progressive_values",
+    "tail_quantities",
+    "external_formula_mask",
+    "optional_float",
+]
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Sequence
 
 from openpyxl.utils import column_index_from_string, get_column_letter
 
-from parsers.excel.processor import column_has_values
+from parsers.excel.processor import (
+    HEADER_SEARCH_ROWS,
+    column_has_values,
+    drop_empty_columns,
+    locate_header_row,
+)
 
 
 @dataclass
@@ -22,7 +27,42 @@ class ColumnSuggestion:
     header_label: str | None = None
 
 
-def detect_column_suggestions(rows: list[tuple[Any, ...]], header_idx: int) -> dict[str, Any]:
+@dataclass
+class SheetLayout:
+    """
+    Header and columns of a sheet, detected on its first rows.
+
+    Column indexes and letters are sheet coordinates: no column is dropped,
+    since a column empty in the prefix may have values further down.
+    """
+    rows: list[tuple[Any, ...]]
+    header_idx: int | None
+    # Columns without any value in the prefix (informative, still reported in `rows`)
+    empty_columns: int
+    suggestions: dict[str, ColumnSuggestion] = field(default_factory=dict)
+    profiles: list[ColumnProfile] = field(default_factory=list)
+    # Columns with values below the header
+    filled_columns: list[int] = field(default_factory=list)
+    rows_read: int = 0
+    truncated: bool = False
+
+
+def column_letter(index: int, kept_columns: Sequence[int] | None = None) -> str:
+    """
+    Letter of a column of the compacted rows: in sheet coordinates when
+    `kept_columns` (the `drop_empty_columns` kept indexes) is given.
+    """
+    if kept_columns is not None and 0 <= index < len(kept_columns):
+        index = kept_columns[index]
+    return get_column_letter(index + 1)
+
+
+def detect_column_suggestions(
+    rows: list[tuple[Any, ...]],
+    header_idx: int,
+    *,
+    kept_columns: Sequence[int] | None = None,
+) -> dict[str, Any]:
     if header_idx < 0 or header_idx >= len(rows):
         return {"suggestions": {}, "profiles": []}
     header = rows[header_idx]
@@ -32,7 +72,7 @@ def detect_column_suggestions(rows: list[tuple[Any, ...]], header_idx: int) -> d
         if value is None:
             continue
         label = str(value).strip()
-        letter = get_column_letter(idx + 1)
+        letter = column_letter(idx, kept_columns)
         profile = ColumnProfile(column_index=idx, column_letter=letter, header_label=label)
         profiles.append(profile)
         normalized = label.lower()
@@ -55,18 +95,29 @@ def columns_to_indexes(
     *,
     header_row: Sequence[Any] | None,
     required: bool = True,
+    kept_columns: Sequence[int] | None = None,
 ) -> list[int]:
+    """
+    Indexes (in the compacted rows) of columns given as letters or header titles.
+
+    Letters refer to the compacted rows, or to the sheet when `kept_columns`
+    (the `drop_empty_columns` kept indexes) is given: a sheet column dropped
+    as empty is then not found.
+    """
     if not columns:
         if required:
             raise ValueError(f"Columns {name} not provided")
         return []
     indexes: list[int] = []
     header_lookup = {str(val).strip().lower(): idx for idx, val in enumerate(header_row or []) if val}
+    sheet_lookup = {raw: idx for idx, raw in enumerate(kept_columns)} if kept_columns is not None else None
     for col in columns:
         col_clean = col.strip()
         try:
             # If it is a letter (A,B,AA) convert to 0-based index
             index = column_index_from_string(col_clean) - 1
+            if sheet_lookup is not None:
+                index = sheet_lookup.get(index)
         except Exception:
             # Try matching the header title
             index = header_lookup.get(col_clean.lower())
@@ -86,12 +137,15 @@ def single_column_index(
     *,
     header_row: Sequence[Any] | None,
     required: bool = True,
+    kept_columns: Sequence[int] | None = None,
 ) -> int | None:
     if column is None and not required:
         return None
     if column is None and required:
         raise ValueError(f"Column {name} not provided")
-    indexes = columns_to_indexes([column or ""], name, header_row=header_row, required=required)
+    indexes = columns_to_indexes(
+        [column or ""], name, header_row=header_row, required=required, kept_columns=kept_columns
+    )
     return indexes[0] if indexes else None
 
 
@@ -133,3 +187,56 @@ def ensure_indexes(
         f"Cannot find column {name}. "
         f"Detected headers: {available or 'no valid headers.'}"
     )
+
+
+def detect_sheet_layout(
+    rows: Iterable[tuple[Any, ...]],
+    *,
+    header_row_index: int | None = None,
+    max_rows: int = 500,
+    settle_rows: int = 50,
+) -> SheetLayout:
+    """
+    Header and column detection on a bounded prefix of the sheet rows.
+
+    Reading stops at `max_rows`, or earlier once the header search window is
+    covered and no new non-empty column has shown up for `settle_rows` rows.
+    The header row is located as the parsers do (on the prefix without its
+    empty columns); columns, suggestions and rows are in sheet coordinates,
+    the ones the parsers accept with `raw_columns=True`.
+    """
+    prefix: list[tuple[Any, ...]] = []
+    seen_columns: set[int] = set()
+    unchanged = 0
+    iterator = iter(rows)
+    for values in iterator:
+        prefix.append(values)
+        before = len(seen_columns)
+        seen_columns.update(idx for idx, value in enumerate(values) if value is not None)
+        unchanged = unchanged + 1 if len(seen_columns) == before else 0
+        if len(prefix) >= max_rows or (len(prefix) >= HEADER_SEARCH_ROWS and unchanged >= settle_rows):
+            break
+    truncated = next(iterator, None) is not None
+
+    compacted, empty_columns, _kept = drop_empty_columns(prefix)
+    if header_row_index is not None and header_row_index >= 0:
+        header_idx = header_row_index if header_row_index < len(prefix) else None
+    else:
+        header_idx = locate_header_row(compacted)
+    layout = SheetLayout(
+        rows=[tuple(row) for row in prefix],
+        header_idx=header_idx,
+        empty_columns=empty_columns,
+        rows_read=len(prefix),
+        truncated=truncated,
+    )
+    if header_idx is None:
+        return layout
+
+    detection = detect_column_suggestions(layout.rows, header_idx)
+    layout.suggestions = detection["suggestions"]
+    layout.profiles = detection["profiles"]
+    data_rows = layout.rows[header_idx + 1:]
+    width = max((len(row) for row in layout.rows), default=0)
+    layout.filled_columns = [idx for idx in range(width) if column_has_values(data_rows, [idx])]
+    return layout
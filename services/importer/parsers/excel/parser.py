@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Sequence
+from typing import Sequence, BinaryIO
 
-from openpyxl.utils import get_column_letter
+import numpy as np
+import pandas as pd
 
 from parsers.shared.base_types import MAX_WBS_LEVELS
 from parsers.shared.math_utils import _calculate_line_amount
 from parsers.excel.detector import (
     ColumnSuggestion,
     ColumnProfile,
+    column_letter,
     detect_column_suggestions,
     ensure_indexes,
     warn_and_use,
@@ -20,26 +22,34 @@ from parsers.excel.detector import (
 from parsers.excel.processor import (
     drop_empty_columns,
     locate_header_row,
-    column_has_values,
-    row_has_values,
     combine_code,
     combine_text,
-    cell_to_float,
-    cell_to_progressive,
-    apply_column_filter,
     extract_wbs_levels,
-    sanitize_price_candidate,
 )
-from parsers.excel.reader import load_excel_workbook, select_sheet, read_all_rows
+from parsers.excel.columnar import (
+    column,
+    columns_with_values,
+    data_frame,
+    float_values,
+    optional_float,
+    progressive_values,
+    rows_to_frame,
+    rows_with_values,
+    sanitize_prices,
+    tail_quantities,
+)
+from parsers.excel.reader import open_sheet_rows
 from parsers.excel.types import ParsedEstimate, ParsedItem
-from parsers.helpers.text_and_measure import head_to_tail_quantity, tokenize_description
+from parsers.helpers.text_and_measure import tokenize_description
 
 
 def parse_estimate_excel(
-    file_path: Path,
+    file_path: Path | BinaryIO,
     sheet_name: str | None = None,
     price_column: str | None = None,
     quantity_column: str | None = None,
+    *,
+    raw_columns: bool = False,
 ) -> ParsedEstimate:
     """
     Generic Excel estimate parser with auto-detection.
@@ -53,11 +63,12 @@ def parse_estimate_excel(
         price_column=price_column or "",
         quantity_column=quantity_column,
         combine_totals=True,
+        raw_columns=raw_columns,
     )
 
 
 def parse_custom_return_excel(
-    file_path: Path,
+    file_path: Path | BinaryIO,
     sheet_name: str | None,
     code_columns: Sequence[str],
     description_columns: Sequence[str],
@@ -66,8 +77,14 @@ def parse_custom_return_excel(
     progressive_column: str | None = None,
     *,
     combine_totals: bool = True,
+    raw_columns: bool = False,
 ) -> ParsedEstimate:
-    """Public API: wrapper around `_parse_custom_return_excel`."""
+    """
+    Public API: wrapper around `_parse_custom_return_excel`.
+
+    Column letters refer to the sheet without its empty columns, or to the
+    sheet itself with `raw_columns` (the coordinates of the returns preview).
+    """
     return _parse_custom_return_excel(
         file_path,
         sheet_name,
@@ -77,11 +94,12 @@ def parse_custom_return_excel(
         quantity_column,
         progressive_column,
         combine_totals=combine_totals,
+        raw_columns=raw_columns,
     )
 
 
 def _parse_custom_return_excel(
-    file_path: Path,
+    file_path: Path | BinaryIO,
     sheet_name: str | None,
     code_columns: Sequence[str],
     description_columns: Sequence[str],
@@ -90,16 +108,16 @@ def _parse_custom_return_excel(
     progressive_column: str | None = None,
     *,
     combine_totals: bool = True,
+    raw_columns: bool = False,
 ) -> ParsedEstimate:
-    workbook = load_excel_workbook(file_path, data_only=True, read_only=True)
-    try:
-        sheet = select_sheet(workbook, sheet_name)
-        raw_rows = read_all_rows(sheet)
-    finally:
-        workbook.close()
+    # Formulas are not used here: only the cached values of a single pass over the sheet
+    with open_sheet_rows(file_path, sheet_name) as reader:
+        sheet_title = reader.title
+        raw_rows = [values for values, _formulas in reader]
 
     # Pre-normalize table: drop fully empty columns and fill missing values where needed
-    rows, dropped_columns, kept_column_indexes = drop_empty_columns(raw_rows)
+    frame = rows_to_frame(raw_rows)
+    rows, dropped_columns, kept_column_indexes = drop_empty_columns(raw_rows, frame)
     header_idx = locate_header_row(rows)
     if header_idx is None:
         raise ValueError("The selected Excel sheet does not contain importable rows.")
@@ -107,8 +125,11 @@ def _parse_custom_return_excel(
     if not data_rows:
         raise ValueError("The selected sheet does not contain data after the header row.")
 
+    data = data_frame(frame, kept_column_indexes, header_idx)
     header_row = rows[header_idx]
-    detection = detect_column_suggestions(rows, header_idx)
+    # Sheet coordinates: letters are read against the columns kept in `rows`
+    kept_columns = kept_column_indexes if raw_columns else None
+    detection = detect_column_suggestions(rows, header_idx, kept_columns=kept_columns)
     suggestions: dict[str, ColumnSuggestion] = detection.get("suggestions", {})
     profiles: list[ColumnProfile] = detection.get("profiles", [])
 
@@ -118,23 +139,33 @@ def _parse_custom_return_excel(
             f"Automatically ignored {dropped_columns} completely empty columns."
         )
     try:
-        code_indexes = columns_to_indexes(code_columns, "codice", header_row=header_row, required=False)
+        code_indexes = columns_to_indexes(
+            code_columns, "codice", header_row=header_row, required=False, kept_columns=kept_columns
+        )
     except ValueError:
         code_indexes = []
     try:
-        description_indexes = columns_to_indexes(description_columns, "descrizione", header_row=header_row, required=False)
+        description_indexes = columns_to_indexes(
+            description_columns, "descrizione", header_row=header_row, required=False, kept_columns=kept_columns
+        )
     except ValueError:
         description_indexes = []
     try:
-        price_index = single_column_index(price_column, "prezzo unitario", header_row=header_row)
+        price_index = single_column_index(
+            price_column, "prezzo unitario", header_row=header_row, kept_columns=kept_columns
+        )
     except ValueError:
         price_index = None
     try:
-        quantity_index = single_column_index(quantity_column, "quantita", header_row=header_row, required=False)
+        quantity_index = single_column_index(
+            quantity_column, "quantita", header_row=header_row, required=False, kept_columns=kept_columns
+        )
     except ValueError:
         quantity_index = None
     try:
-        progressive_index = single_column_index(progressive_column, "progressivo", header_row=header_row, required=False)
+        progressive_index = single_column_index(
+            progressive_column, "progressivo", header_row=header_row, required=False, kept_columns=kept_columns
+        )
     except ValueError:
         progressive_index = None
 
@@ -150,23 +181,23 @@ def _parse_custom_return_excel(
             "Cannot find the unit price column. "
             f"Detected headers: {available or 'no valid headers.'}"
         )
-    if not column_has_values(data_rows, [price_index]):
+    if not columns_with_values(data, [price_index]):
         raise ValueError(
-            f"The selected price column ({get_column_letter(price_index + 1)}) is empty. "
+            f"The selected price column ({column_letter(price_index, kept_columns)}) is empty. "
             "Check the chosen column in the sheet."
         )
     if quantity_index is None:
         quantity_index = warn_and_use("quantity", suggestions.get("quantita"), column_warnings)
-    elif quantity_index is not None and not column_has_values(data_rows, [quantity_index]):
+    elif quantity_index is not None and not columns_with_values(data, [quantity_index]):
         raise ValueError(
-            f"The selected quantity column ({get_column_letter(quantity_index + 1)}) is empty. "
+            f"The selected quantity column ({column_letter(quantity_index, kept_columns)}) is empty. "
             "Check the chosen column in the sheet."
         )
     if progressive_index is None:
         progressive_index = warn_and_use("progressivo", suggestions.get("progressivo"), column_warnings)
-    elif progressive_index is not None and not column_has_values(data_rows, [progressive_index]):
+    elif progressive_index is not None and not columns_with_values(data, [progressive_index]):
         raise ValueError(
-            f"The selected progressive column ({get_column_letter(progressive_index + 1)}) is empty. "
+            f"The selected progressive column ({column_letter(progressive_index, kept_columns)}) is empty. "
             "Check the chosen column in the sheet."
         )
     if not code_indexes and not description_indexes and progressive_index is None:
@@ -174,85 +205,59 @@ def _parse_custom_return_excel(
             "Select at least one column for code, description, or progressive."
         )
     
-    workbook_formulas = load_excel_workbook(file_path, data_only=False, read_only=True)
-    try:
-        formula_sheet = select_sheet(workbook_formulas, sheet_name)
-        # Note: min_row is 1-based in openpyxl, header_idx is 0-based
-        raw_formula_rows = list(formula_sheet.iter_rows(min_row=header_idx + 2, values_only=False))
-        formula_rows = apply_column_filter(raw_formula_rows, kept_column_indexes)
-    finally:
-        workbook_formulas.close()
-
-    # formula_rows_iter = iter(formula_rows) # Unused in original code?
-
-    items: list[ParsedItem] = []
-    order = 0
-
-    # Head-to-tail logic: 1 progressive = 1 item
-    cleaned_rows = []
-    for row in data_rows:
-        if not row_has_values(row):
-            continue
+    # Columnar pass over the data rows (see parsers.excel.columnar)
+    prices = float_values(column(data, price_index))
+    head_quantities = float_values(column(data, quantity_index))
+    progressives = progressive_values(column(data, progressive_index))
 
+    # Drop empty rows, then summary and chapter/title rows: only rows without
+    # price, quantity and progressive can be either, their text is read per row
+    keep = rows_with_values(data)
+    text_only = keep & prices.isna() & head_quantities.isna() & (progressives.isna() | (progressives == 0))
+    for position in np.flatnonzero(text_only.to_numpy()):
+        row = data_rows[position]
         code_value = combine_code(row, code_indexes)
         description_value = combine_text(row, description_indexes)
-        raw_price = cell_to_float(row, price_index)
-        quantity_value_head = cell_to_float(row, quantity_index) if quantity_index is not None else None
-        progressive_value = cell_to_progressive(row, progressive_index)
-
         # Skip summary rows only if empty
-        if (
-            description_value
-            and description_value.lower().startswith("totale ")
-            and not progressive_value
-            and raw_price is None
-            and quantity_value_head is None
-        ):
-            continue
-
+        if description_value and description_value.lower().startswith("totale "):
+            keep.iat[position] = False
         # Skip chapter/title rows
-        if (code_value or description_value) and progressive_value is None and quantity_value_head is None and raw_price is None:
-            continue
-
-        cleaned_rows.append(row)
-
-    progressive_indexes = []
-    for idx, row in enumerate(cleaned_rows):
-        progressive_value = cell_to_progressive(row, progressive_index)
-        if progressive_value is not None:
-            progressive_indexes.append((idx, progressive_value, row))
+        elif (code_value or description_value) and pd.isna(progressives.iat[position]):
+            keep.iat[position] = False
 
-    if not progressive_indexes:
+    # Head-to-tail logic: 1 progressive = 1 item. The kept rows split into
+    # blocks: the progressive (head) row and its tail rows up to the next one.
+    heads = keep & progressives.notna()
+    if not heads.any():
         raise ValueError("No progressive value found: select the correct column.")
+    blocks = heads.cumsum()
+    in_block = keep & (blocks > 0)
+    tail = in_block & ~heads
 
-    def _find_tail_price(rows, start_idx: int, price_idx: int | None, prog_idx: int | None):
-        """Find first non-empty price after head row, stop at next progressive."""
-        if price_idx is None:
-            return None
-        for tail in rows[start_idx + 1 :]:
-            if prog_idx is not None and cell_to_progressive(tail, prog_idx) is not None:
-                break
-            tail_price = sanitize_price_candidate(cell_to_float(tail, price_idx))
-            if tail_price is not None:
-                return tail_price
-        return None
+    head_prices = sanitize_prices(prices[heads])
+    tail_prices = sanitize_prices(prices[tail]).groupby(blocks[tail]).first().to_dict()
+    # Tail quantities use the actual mapped columns (not defaults 0/1)
+    tail_quantity_by_block = tail_quantities(
+        blocks[in_block],
+        tail[in_block],
+        column(data, quantity_index if quantity_index is not None else 1)[in_block],
+        column(data, price_index if price_index is not None else 0)[in_block],
+    ).to_dict()
 
-    for prog_idx, prog_value, row in progressive_indexes:
+    items: list[ParsedItem] = []
+    order = 0
+    for position, block in blocks[heads].items():
+        row = data_rows[position]
+        prog_value = int(progressives.at[position])
         description_value = combine_text(row, description_indexes)
-        unit_price = sanitize_price_candidate(cell_to_float(row, price_index))
+        unit_price = optional_float(head_prices.at[position])
         if unit_price is None:
-            unit_price = _find_tail_price(cleaned_rows, prog_idx, price_index, progressive_index)
+            unit_price = optional_float(tail_prices.get(block))
 
-        # Quantity: either from the same row or from following measure rows
-        quantity_value = cell_to_float(row, quantity_index) if quantity_index is not None else None
+        # Quantity: either from the same row or from the measure rows of the block
+        quantity_value = optional_float(head_quantities.at[position])
         if quantity_value is None:
-            # Read tail quantities using the actual mapped columns (not defaults 0/1)
-            quantity_value = head_to_tail_quantity(
-                cleaned_rows,
-                prog_idx,
-                qty_col=quantity_index if quantity_index is not None else 1,
-                price_col=price_index if price_index is not None else 0,
-            )
+            quantity_value = optional_float(tail_quantity_by_block.get(block))
 
         if quantity_value is None:
             # logger_warning = (
@@ -276,7 +281,7 @@ def _parse_custom_return_excel(
             amount=amount,
             notes=None,
             metadata={
-                "sheet_name": sheet.title if sheet else None,
+                "sheet_name": sheet_title,
                 "column_warnings": column_warnings or None,
                 "tokens": tokens,
             },
@@ -287,7 +292,7 @@ def _parse_custom_return_excel(
     # If combine_totals=False, skip sum of total rows
     total_amount = sum([item.amount or 0 for item in items]) if combine_totals else None
     return ParsedEstimate(
-        title=sheet.title if sheet else None,
+        title=sheet_title,
         total_amount=total_amount,
         total_quantity=None,
         items=items,
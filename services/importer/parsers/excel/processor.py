@@ -4,6 +4,7 @@ Depends only on base_types and math_utils.
 """
 from __future__ import annotations
 
+from operator import itemgetter
 from typing import Any
 
 import pandas as pd
@@ -12,16 +13,30 @@ from parsers.shared.base_types import ParsedWbsLevel
 from parsers.shared.math_utils import ceil_amount
 from parsers.shared.wbs_utils import normalize_wbs7_code, looks_like_wbs7_code
 
+# Rows searched for the header by `locate_header_row`
+HEADER_SEARCH_ROWS = 30
 
-def drop_empty_columns(rows: list[tuple[Any, ...]]):
-    """Remove completely empty columns from row data."""
+
+def drop_empty_columns(rows: list[tuple[Any, ...]], frame: pd.DataFrame | None = None):
+    """
+    Remove completely empty columns from row data.
+    `frame` is the sheet already loaded as columns (`columnar.rows_to_frame`), if any.
+    """
     if not rows:
         return [], 0, []
-    df = pd.DataFrame(rows)
+    df = frame if frame is not None else pd.DataFrame(rows, dtype=object)
     keep_mask = ~(df.isna().all(axis=0))
     kept_indexes = [idx for idx, keep in enumerate(keep_mask) if keep]
     dropped = len(rows[0]) - len(kept_indexes)
-    cleaned = [tuple(val for idx, val in enumerate(row) if keep_mask.iloc[idx]) for row in rows]
+    width = len(keep_mask)
+    if len(kept_indexes) == width:
+        return [tuple(row) for row in rows], dropped, kept_indexes
+    pick = itemgetter(*kept_indexes) if len(kept_indexes) > 1 else None
+    cleaned = [
+        pick(row) if pick is not None and len(row) == width
+        else tuple(row[idx] for idx in kept_indexes if idx < len(row))
+        for row in rows
+    ]
     return cleaned, dropped, kept_indexes
 
 
@@ -44,13 +59,13 @@ def locate_header_row(rows: list[tuple[Any, ...]]) -> int | None:
     threshold = max(4, int(max_cols * 0.6))
     
     # Search first 30 rows
-    for idx, row in enumerate(rows[:30]):
+    for idx, row in enumerate(rows[:HEADER_SEARCH_ROWS]):
         filled = sum(1 for cell in row if cell not in (None, "", " "))
         if filled >= threshold:
             return idx
     
     # Fallback: first row with at least 3 values
-    for idx, row in enumerate(rows[:30]):
+    for idx, row in enumerate(rows[:HEADER_SEARCH_ROWS]):
         filled = sum(1 for cell in row if cell not in (None, "", " "))
         if filled >= 3:
             return idx
@@ -176,11 +191,9 @@ def has_external_formula(row: tuple[Any, ...] | None, index: int | None) -> bool
         return False
     if index >= len(row):
         return False
+    # Either a cell or the raw formula of a `SheetRowReader` formulas row
     cell = row[index]
-    try:
-        value = cell.value
-    except Exception:
-        value = None
+    value = cell if isinstance(cell, str) else getattr(cell, "value", None)
     if not isinstance(value, str):
         return False
     if not value.startswith("="):
@@ -190,6 +203,7 @@ def has_external_formula(row: tuple[Any, ...] | None, index: int | None) -> bool
 
 
 __all__ = [
+    "HEADER_SEARCH_ROWS",
     "drop_empty_columns",
     "locate_header_row",
     "row_has_values",
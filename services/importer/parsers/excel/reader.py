@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterator
 
 from openpyxl import load_workbook
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from openpyxl.worksheet._reader import DATA_TAG, DIMENSION_TAG, FORMULA_TAG, WorkSheetParser
+from openpyxl.worksheet.dimensions import SheetDimension
 from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.xml.functions import iterparse
 
 
-def load_excel_workbook(file_path: Path, data_only: bool = True, read_only: bool = True):
+def load_excel_workbook(file_path: Path | BinaryIO, data_only: bool = True, read_only: bool = True):
     """
-    Load an Excel workbook.
+    Load an Excel workbook from a path or a seekable binary stream.
     """
     return load_workbook(filename=file_path, data_only=data_only, read_only=read_only)
 
@@ -28,3 +33,145 @@ def read_all_rows(sheet: Worksheet, values_only: bool = True) -> list[tuple[Any,
     Read all rows from a worksheet.
     """
     return list(sheet.iter_rows(values_only=values_only))
+
+
+class SheetRowReader:
+    """
+    Rows of one worksheet as `(values, formulas)` tuples, read in a single pass.
+
+    The sheet XML is streamed once out of the xlsx zip: `values` are the cached
+    results (what `data_only=True` returns, padded to the sheet dimension like
+    `iter_rows(values_only=True)`), `formulas` holds the formula of each cell in
+    the same positions, or is `()` when the row has none. Rows are produced
+    lazily, so callers that do not keep them run in constant memory per row.
+    """
+
+    def __init__(self, file_path: Path | BinaryIO, sheet_name: str | None = None) -> None:
+        self._workbook = _open_workbook(file_path)
+        try:
+            self._sheet = select_sheet(self._workbook, sheet_name)
+        except Exception:
+            self._workbook.close()
+            raise
+        self.title: str | None = self._sheet.title if self._sheet else None
+        self.sheet_names: list[str] = list(self._workbook.sheetnames)
+
+    def __iter__(self) -> Iterator[tuple[tuple[Any, ...], tuple[Any, ...]]]:
+        # Same row/column padding as openpyxl's ReadOnlyWorksheet._cells_by_row
+        sheet = self._sheet
+        workbook = self._workbook
+        max_col = sheet.max_column
+        max_row = sheet.max_row
+        empty_row = (None,) * max_col if max_col is not None else ()
+
+        counter = 1
+        idx = 1
+        with sheet._get_source() as source:
+            parser = _ValueFormulaParser(
+                source,
+                sheet._shared_strings,
+                data_only=True,
+                epoch=workbook.epoch,
+                date_formats=workbook._date_formats,
+                timedelta_formats=workbook._timedelta_formats,
+            )
+            for idx, cells in parser.parse():
+                if max_row is not None and idx > max_row:
+                    break
+                # Rows missing from the XML
+                for _ in range(counter, idx):
+                    counter += 1
+                    yield empty_row, ()
+                if counter <= idx:
+                    counter += 1
+                    yield _row_tuples(cells, max_col)
+
+        if max_row is not None and max_row < idx:
+            for _ in range(counter, max_row + 1):
+                yield empty_row, ()
+
+    def close(self) -> None:
+        self._workbook.close()
+
+    def __enter__(self) -> "SheetRowReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_sheet_rows(file_path: Path | BinaryIO, sheet_name: str | None = None) -> SheetRowReader:
+    """
+    Open a sheet (by name, or the active one) for a single-pass `(values, formulas)` read.
+    """
+    return SheetRowReader(file_path, sheet_name)
+
+
+def _open_workbook(file_path: Path | BinaryIO):
+    """
+    `load_workbook(read_only=True, data_only=True)`, except that sheets are
+    only indexed: openpyxl reads the dimension of every sheet on open and,
+    when a sheet has none, parses all of its rows to find that out.
+    """
+    # Subclasses openpyxl internals: the version is pinned in requirements.txt
+    # and TestOpenpyxlInternals fails if what is used here changes.
+    reader = _IndexingExcelReader(file_path, read_only=True, data_only=True)
+    reader.read()
+    return reader.wb
+
+
+class _IndexingExcelReader(ExcelReader):
+    def read_worksheets(self):
+        # The read-only branch of ExcelReader.read_worksheets
+        for sheet, rel in self.parser.find_sheets():
+            if rel.target not in self.valid_files:
+                continue
+            if "chartsheet" in rel.Type:
+                self.read_chartsheet(sheet, rel)
+                continue
+            ws = _IndexedWorksheet(self.wb, sheet.name, rel.target, self.shared_strings)
+            ws.sheet_state = sheet.state
+            self.wb._sheets.append(ws)
+
+
+class _IndexedWorksheet(ReadOnlyWorksheet):
+    """Read-only sheet whose dimension is looked up in the XML before the rows, if at all."""
+
+    def _get_size(self):
+        with self._get_source() as source:
+            for _event, element in iterparse(source, events=("start",)):
+                if element.tag == DIMENSION_TAG:
+                    dimensions = SheetDimension.from_tree(element).boundaries
+                    if dimensions is not None:
+                        self._min_column, self._min_row, self._max_column, self._max_row = dimensions
+                    return
+                if element.tag == DATA_TAG:
+                    return
+
+
+class _ValueFormulaParser(WorkSheetParser):
+    """openpyxl's sheet parser, keeping the formula of a cell next to its cached value."""
+
+    def parse_cell(self, element):
+        cell = super().parse_cell(element)
+        if element.find(FORMULA_TAG) is not None:
+            cell["formula"] = self.parse_formula(element)
+        return cell
+
+
+def _row_tuples(cells: list[dict], max_col: int | None) -> tuple[tuple[Any, ...], tuple[Any, ...]]:
+    if not cells and not max_col:
+        return (), ()
+    width = max_col or cells[-1]["column"]
+    values: list[Any] = [None] * width
+    formulas: list[Any] | None = None
+    for cell in cells:
+        column = cell["column"]
+        if 1 <= column <= width:
+            values[column - 1] = cell["value"]
+            formula = cell.get("formula")
+            if formula is not None:
+                if formulas is None:
+                    formulas = [None] * width
+                formulas[column - 1] = formula
+    return tuple(values), tuple(formulas) if formulas else ()
@@ -5,16 +5,16 @@ Depends on base_types, math_utils, wbs_utils, and excel utilities.
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Sequence
+from typing import Sequence, BinaryIO
 
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
+import numpy as np
 
 from parsers.shared.base_types import ParsedEstimate, ParsedItem, ParsedWbsLevel
 from parsers.shared.math_utils import calculate_line_amount, ceil_amount
 from parsers.shared.wbs_utils import normalize_wbs7_code, looks_like_wbs7_code
 from parsers.helpers.text_and_measure import head_to_tail_quantity, tokenize_description
 from parsers.excel.detector import (
+    column_letter,
     detect_column_suggestions,
     columns_to_indexes,
     single_column_index,
@@ -25,16 +25,22 @@ from parsers.excel.processor import (
     column_has_values,
     combine_code,
     combine_text,
-    cell_to_float,
-    apply_column_filter,
-    has_external_formula,
-    sanitize_price_candidate,
 )
-from parsers.excel.reader import select_sheet
+from parsers.excel.columnar import (
+    column,
+    columns_with_values,
+    data_frame,
+    external_formula_mask,
+    float_values,
+    optional_float,
+    rows_to_frame,
+    sanitize_prices,
+)
+from parsers.excel.reader import open_sheet_rows
 
 
 def parse_lx_return_excel(
-    file_path: Path,
+    file_path: Path | BinaryIO,
     sheet_name: str | None,
     code_columns: Sequence[str],
     description_columns: Sequence[str],
@@ -43,18 +49,26 @@ def parse_lx_return_excel(
     progressive_column: str | None = None,
     header_row_index: int | None = None,
     long_description_columns: Sequence[str] | None = None,
+    *,
+    raw_columns: bool = False,
 ) -> ParsedEstimate:
     """
     LX linear parser: one row = one item, no header/total combination.
+
+    Column letters refer to the sheet without its empty columns, or to the
+    sheet itself with `raw_columns` (the coordinates of the returns preview).
     """
-    workbook = load_workbook(filename=file_path, data_only=True, read_only=True)
-    try:
-        sheet = select_sheet(workbook, sheet_name)
-        raw_rows = list(sheet.iter_rows(values_only=True))
-    finally:
-        workbook.close()
+    # One pass over the sheet: cached values and formulas (kept only for rows that have any)
+    raw_rows = []
+    raw_formula_rows = []
+    with open_sheet_rows(file_path, sheet_name) as reader:
+        title = reader.title
+        for values, formulas in reader:
+            raw_rows.append(values)
+            raw_formula_rows.append(formulas)
 
-    rows, dropped_columns, kept_column_indexes = drop_empty_columns(raw_rows)
+    frame = rows_to_frame(raw_rows)
+    rows, dropped_columns, kept_column_indexes = drop_empty_columns(raw_rows, frame)
 
     if header_row_index is not None and header_row_index >= 0:
         header_idx = header_row_index
@@ -67,8 +81,11 @@ def parse_lx_return_excel(
     if not data_rows:
         raise ValueError("Il foglio Excel selezionato non contiene dati dopo l'intestazione")
 
+    data = data_frame(frame, kept_column_indexes, header_idx)
     header_row = rows[header_idx]
-    detection = detect_column_suggestions(rows, header_idx)
+    # Sheet coordinates: letters are read against the columns kept in `rows`
+    kept_columns = kept_column_indexes if raw_columns else None
+    detection = detect_column_suggestions(rows, header_idx, kept_columns=kept_columns)
     suggestions = detection.get("suggestions") if detection else {}
     column_warnings: list[str] = []
     if dropped_columns:
@@ -78,7 +95,7 @@ def parse_lx_return_excel(
     # If the user did not select a code column, do NOT auto-suggest one: ignore codes entirely.
     try:
         if code_columns and any(col for col in code_columns):
-            code_indexes = _ensure_indexes_lc("codice", code_columns, data_rows, header_row, column_warnings, suggestions)
+            code_indexes = _ensure_indexes_lc("codice", code_columns, data_rows, header_row, column_warnings, suggestions, kept_columns)
         else:
             code_indexes = []
     except ValueError:
@@ -86,14 +103,14 @@ def parse_lx_return_excel(
     
     # Try to resolve description columns - optional if code is provided
     try:
-        description_indexes = _ensure_indexes_lc("descrizione", description_columns, data_rows, header_row, column_warnings, suggestions)
+        description_indexes = _ensure_indexes_lc("descrizione", description_columns, data_rows, header_row, column_warnings, suggestions, kept_columns)
     except ValueError:
         description_indexes = []  # Description is optional if code is present
 
     # Try to resolve long description columns - optional
     try:
         if long_description_columns and any(col for col in long_description_columns):
-            long_description_indexes = _ensure_indexes_lc("descrizione_estesa", long_description_columns, data_rows, header_row, column_warnings, suggestions)
+            long_description_indexes = _ensure_indexes_lc("descrizione_estesa", long_description_columns, data_rows, header_row, column_warnings, suggestions, kept_columns)
         else:
             long_description_indexes = []
     except ValueError:
@@ -107,23 +124,35 @@ def parse_lx_return_excel(
             f"Intestazioni rilevate: {available or 'nessuna'}"
         )
 
-    price_index = single_column_index(price_column, "prezzo unitario", header_row=header_row)
-    if not _has_values(data_rows, [price_index]):
+    price_index = single_column_index(
+        price_column, "prezzo unitario", header_row=header_row, kept_columns=kept_columns
+    )
+    if not columns_with_values(data, [price_index]):
         raise ValueError(
-            f"La colonna prezzo selezionata ({get_column_letter(price_index + 1)}) non contiene valori. "
+            f"La colonna prezzo selezionata ({column_letter(price_index, kept_columns)}) non contiene valori. "
             "Verifica la colonna scelta nel foglio."
         )
 
-    quantity_index = single_column_index(quantity_column, "quantita", header_row=header_row, required=False)
-    progressive_index = single_column_index(progressive_column, "progressivo", header_row=header_row, required=False)
+    quantity_index = single_column_index(
+        quantity_column, "quantita", header_row=header_row, required=False, kept_columns=kept_columns
+    )
+    progressive_index = single_column_index(
+        progressive_column, "progressivo", header_row=header_row, required=False, kept_columns=kept_columns
+    )
 
-    workbook_formulas = load_workbook(filename=file_path, data_only=False, read_only=True)
-    try:
-        formula_sheet = select_sheet(workbook_formulas, sheet_name)
-        raw_formula_rows = list(formula_sheet.iter_rows(min_row=header_idx + 2, values_only=False))
-        formula_rows = apply_column_filter(raw_formula_rows, kept_column_indexes)
-    finally:
-        workbook_formulas.close()
+    # Columnar pass: quantities, prices and external formulas for every data row at once
+    quantities = float_values(column(data, quantity_index))
+    prices = sanitize_prices(float_values(column(data, price_index)))
+    formula_index = (
+        kept_column_indexes[quantity_index]
+        if quantity_index is not None and quantity_index < len(kept_column_indexes)
+        else None
+    )
+    has_formula = external_formula_mask(raw_formula_rows[header_idx + 1:], formula_index)
+    # Skip item if quantity is an external formula or missing
+    no_quantity = ~has_formula & quantities.isna().to_numpy()
+    skipped_reasons = {"no_quantity": int(no_quantity.sum()), "has_formula": int(has_formula.sum())}
+    kept_rows = np.flatnonzero(~has_formula & ~no_quantity)
 
     # Debug logging
     import logging
@@ -139,25 +168,16 @@ def parse_lx_return_excel(
 
     voci: list[ParsedItem] = []
     ordine = 0
-    skipped_reasons = {"no_quantity": 0, "has_formula": 0}
-    for data_row, formula_row in zip(data_rows, formula_rows):
+    for position in kept_rows:
+        data_row = data_rows[position]
         codice = combine_code(data_row, code_indexes)
         descrizione = combine_text(data_row, description_indexes)
         descrizione_estesa = combine_text(data_row, long_description_indexes)
         progressivo = _cell_to_progressive(data_row, progressive_index)
-        quantita = cell_to_float(data_row, quantity_index) if quantity_index is not None else None
-        prezzo_unitario = sanitize_price_candidate(cell_to_float(data_row, price_index))
-        has_formula = has_external_formula(formula_row, quantity_index)
+        quantita = optional_float(quantities.iat[position])
+        prezzo_unitario = optional_float(prices.iat[position])
         tokens = tokenize_description(descrizione or "")
 
-        # Skip item if quantity is an external formula or missing
-        if has_formula:
-            skipped_reasons["has_formula"] += 1
-            continue
-        if quantita is None:
-            skipped_reasons["no_quantity"] += 1
-            continue
-
         quantita, importo = calculate_line_amount(quantita, prezzo_unitario)
 
         voce = ParsedItem(
@@ -185,7 +205,7 @@ def parse_lx_return_excel(
 
     total_amount = ceil_amount(sum([voce.amount or 0 for voce in voci])) if voci else None
     return ParsedEstimate(
-        title=sheet.title if sheet else None,
+        title=title,
         total_amount=total_amount,
         total_quantity=None,
         items=voci,
@@ -200,9 +220,10 @@ def _ensure_indexes_lc(
     header_row,
     warnings: list[str],
     suggestions: dict,
+    kept_columns: Sequence[int] | None = None,
 ) -> list[int]:
     try:
-        indexes = columns_to_indexes(columns, name, header_row=header_row, required=False)
+        indexes = columns_to_indexes(columns, name, header_row=header_row, required=False, kept_columns=kept_columns)
     except ValueError:
         indexes = []
     if indexes and _has_values(data_rows, indexes):
@@ -1,19 +1,21 @@
 """MX return file parser."""
 from pathlib import Path
-from typing import Sequence
+from typing import Sequence, BinaryIO
 
 from parsers.shared.base_types import ParsedEstimate
 from parsers.excel.parser import parse_custom_return_excel
 
 
 def parse_mx_return_excel(
-    file_path: Path,
+    file_path: Path | BinaryIO,
     sheet_name: str | None,
     code_columns: Sequence[str],
     description_columns: Sequence[str],
     price_column: str,
     quantity_column: str | None = None,
     progressive_column: str | None = None,
+    *,
+    raw_columns: bool = False,
 ) -> ParsedEstimate:
     """MX parser: same logic as custom return but combines totals."""
     return parse_custom_return_excel(
@@ -25,6 +27,7 @@ def parse_mx_return_excel(
         quantity_column,
         progressive_column,
         combine_totals=True,
+        raw_columns=raw_columns,
     )
 
 
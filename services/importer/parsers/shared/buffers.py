@@ -0,0 +1,74 @@
+"""
+Zero-copy readers over in-memory or memory-mapped file contents.
+
+Uploads reach the parsers as one buffer: `bytes`, or an `mmap` of the upload's
+spooled file (`utils.upload.upload_buffer`). Whole-document parsers read the
+buffer directly; the stream consumers (`iterparse`, openpyxl's zip reader) get
+an independent `BufferReader` each, so several reads share the same mapping
+instead of copying it into a `BytesIO` or a temporary file.
+"""
+from __future__ import annotations
+
+import io
+import mmap
+from typing import BinaryIO
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable binary stream over a bytes-like object, without copying it."""
+
+    def __init__(self, buffer) -> None:
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def readall(self) -> bytes:
+        data = self._view[self._pos:].tobytes()
+        self._pos = len(self._view)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        # Release the view so the owner of the buffer (e.g. an mmap) can close it
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def open_buffer(source) -> BinaryIO:
+    """A binary stream for `source`: buffers are wrapped, streams returned as they are."""
+    # mmap objects have read() too, but one position shared by every reader
+    if hasattr(source, "read") and not isinstance(source, mmap.mmap):
+        return source
+    return BufferReader(source)
+
+
+__all__ = ["BufferReader", "open_buffer"]
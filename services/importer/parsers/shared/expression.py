@@ -0,0 +1,205 @@
+"""
+Safe evaluation of the arithmetic formulas found in measurement cells.
+
+The cells of SIX measurements may contain expressions such as "2*3,50",
+"(1,20+0,80)/2" or comparisons like "3>2" (used as 1/0 switches). This module
+parses exactly that grammar into a small AST and evaluates it on Decimal
+operands:
+
+- numbers, `+ - * /`, unary signs and parentheses;
+- chained comparisons `< > <= >= ==`, with `=` read as `==`.
+
+Anything else is rejected explicitly, including the Python-only operators
+`// ** << >>`, `...`, empty parentheses, calls such as "7(2)" and attribute
+access such as "1.5.3": the result is then None, as it is for a division by
+zero. A comparison gives 1.0 or 0.0, any other result is a float.
+
+Results are memoized per string in a bounded LRU cache: formula-heavy sheets
+repeat a small set of distinct cell texts.
+"""
+from __future__ import annotations
+
+import operator
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Same character whitelist and "=" -> "==" rewrite as the former eval-based version
+_ALLOWED = re.compile(r"^[\d\s\.\+\-\*\/\(\)<>=]+$")
+_SINGLE_EQUALS = re.compile(r"(?<![<>!=])=(?![=])")
+_TOKEN = re.compile(r"(\d+\.?\d*)|(\*\*|//|<<|>>|\.\.\.)|(<=|>=|==|[-+*/()<>])|(\s+)|(.)")
+
+# Keeps the recursive descent well below the interpreter recursion limit
+_MAX_NESTING = 100
+
+_BINARY: Dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+_COMPARE: Dict[str, Callable[[Any, Any], Any]] = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+}
+_UNARY: Dict[str, Callable[[Any], Any]] = {"+": operator.pos, "-": operator.neg}
+
+# AST nodes: ("num", Decimal) | ("unary", op, node) | ("binary", op, left, right)
+#            | ("compare", first, [(op, node), ...])
+Node = Tuple[Any, ...]
+
+
+class _SyntaxError(Exception):
+    pass
+
+
+def _tokenize(expr: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    depth = 0
+    for number, unsupported, op, _space, other in _TOKEN.findall(expr):
+        if number:
+            tokens.append(("num", number))
+        elif unsupported:
+            raise _SyntaxError(f"unsupported operator {unsupported!r}")
+        elif op:
+            if op in ("(", ")"):
+                depth += 1 if op == "(" else -1
+                if depth > _MAX_NESTING:
+                    raise _SyntaxError("too many nested parentheses")
+            tokens.append(("op", op))
+        elif other:
+            raise _SyntaxError(f"invalid character {other!r}")
+    return tokens
+
+
+class _Parser:
+    """Recursive descent: comparison < sum < product < signed atom."""
+
+    def __init__(self, tokens: List[Tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> Optional[str]:
+        if self.pos < len(self.tokens):
+            kind, value = self.tokens[self.pos]
+            return value if kind == "op" else None
+        return None
+
+    def _take(self, *ops: str) -> Optional[str]:
+        op = self._peek()
+        if op is not None and op in ops:
+            self.pos += 1
+            return op
+        return None
+
+    def parse(self) -> Node:
+        node = self._comparison()
+        if self.pos != len(self.tokens):
+            raise _SyntaxError("unexpected token")
+        return node
+
+    def _comparison(self) -> Node:
+        first = self._arith()
+        chain = []
+        while True:
+            op = self._take("<", ">", "<=", ">=", "==")
+            if op is None:
+                break
+            chain.append((op, self._arith()))
+        return ("compare", first, chain) if chain else first
+
+    def _arith(self) -> Node:
+        node = self._term()
+        while True:
+            op = self._take("+", "-")
+            if op is None:
+                return node
+            node = ("binary", op, node, self._term())
+
+    def _term(self) -> Node:
+        node = self._factor()
+        while True:
+            op = self._take("*", "/")
+            if op is None:
+                return node
+            node = ("binary", op, node, self._factor())
+
+    def _factor(self) -> Node:
+        signs = []
+        while True:
+            op = self._take("+", "-")
+            if op is None:
+                break
+            signs.append(op)
+        node = self._atom()
+        if self._peek() == "(":
+            raise _SyntaxError("calls are not supported")
+        for op in reversed(signs):
+            node = ("unary", op, node)
+        return node
+
+    def _atom(self) -> Node:
+        if self.pos >= len(self.tokens):
+            raise _SyntaxError("unexpected end")
+        kind, value = self.tokens[self.pos]
+        self.pos += 1
+        if kind == "num":
+            return ("num", Decimal(value))
+        if value == "(":
+            if self._take(")") is not None:
+                raise _SyntaxError("empty parentheses")
+            node = self._comparison()
+            if self._take(")") is None:
+                raise _SyntaxError("unbalanced parenthesis")
+            return node
+        raise _SyntaxError(f"unexpected {value!r}")
+
+
+def _evaluate(node: Node) -> Any:
+    kind = node[0]
+    if kind == "num":
+        return node[1]
+    if kind == "binary":
+        return _BINARY[node[1]](_evaluate(node[2]), _evaluate(node[3]))
+    if kind == "unary":
+        return _UNARY[node[1]](_evaluate(node[2]))
+    # Chained comparison: a < b < c  ==  (a < b) and (b < c), short-circuiting
+    left = _evaluate(node[1])
+    result: Any = True
+    for op, right_node in node[2]:
+        right = _evaluate(right_node)
+        result = _COMPARE[op](left, right)
+        if not result:
+            return result
+        left = right
+    return result
+
+
+@lru_cache(maxsize=8192)
+def evaluate_expression(text: str) -> Optional[float]:
+    """
+    Evaluates a cell formula (comma or dot decimals) with Decimal precision.
+    Returns None when the text is not a valid expression or cannot be evaluated.
+    """
+    clean = text.replace(",", ".").strip()
+    if not _ALLOWED.match(clean):
+        return None
+    try:
+        # Handle equality operator "=" (legacy) -> "=="
+        expr_ready = _SINGLE_EQUALS.sub("==", clean)
+        result = _evaluate(_Parser(_tokenize(expr_ready)).parse())
+        # Convert boolean result to float (True=1.0, False=0.0)
+        if isinstance(result, bool):
+            return 1.0 if result else 0.0
+        return float(result)
+    except (_SyntaxError, ArithmeticError, RecursionError):
+        # Not in the grammar, division by zero / invalid operation, or a
+        # left-deep chain too long to evaluate
+        return None
+
+
+__all__ = ["evaluate_expression"]
@@ -0,0 +1,183 @@
+"""
+Resolution of "vedi voce" quantity references, shared by the SIX and XPWE parsers.
+
+A measurement identified by its progressive can add the (signed, multiplied)
+quantity of other progressives to its own raw quantity. `QuantityGraph` orders
+the progressive -> reference graph topologically (Tarjan SCC, iterative) and
+resolves every progressive exactly once, dependencies first, rounding each
+node to 2 decimals ROUND_HALF_UP.
+
+Circular references are reported through `cycles`. Inside a cycle a reference
+back to a progressive that is still being resolved counts as 0, exactly as
+the former recursive resolution did, so the resolved quantities do not change.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Sequence, Set, Tuple
+
+from domain.services.fixed_point import round_2dp_10f
+
+logger = logging.getLogger(__name__)
+
+Reference = Tuple[Hashable, float]
+
+
+def round_quantity(total: float) -> float:
+    """Legacy rounding of a resolved quantity: 2 decimals, ROUND_HALF_UP."""
+    # Same result as Decimal(f"{total:.10f}") quantized, on integer cents
+    try:
+        return round_2dp_10f(total)
+    except Exception as e:
+        logger.error(f"Rounding failed for {total}: {e}")
+        return total
+
+
+class QuantityGraph:
+    """
+    Memoized resolver for a progressive -> references graph.
+
+    `raw` maps a progressive to its own quantity, `refs` maps a progressive to
+    its `(referenced progressive, multiplier)` pairs, in order. Progressives
+    that are only referenced resolve from a raw quantity of 0.
+    """
+
+    def __init__(
+        self,
+        raw: Mapping[Hashable, float],
+        refs: Mapping[Hashable, Sequence[Reference]],
+        round_fn: Callable[[float], float] = round_quantity,
+    ) -> None:
+        self._raw = raw
+        self._refs = refs
+        self._round = round_fn
+        self._resolved: Dict[Hashable, float] | None = None
+        self._cycles: List[List[Hashable]] = []
+
+    @property
+    def cycles(self) -> List[List[Hashable]]:
+        """Groups of progressives that reference each other (self references included)."""
+        self._ensure_resolved()
+        return self._cycles
+
+    def resolve(self, prog: Hashable) -> float:
+        resolved = self._ensure_resolved()
+        if prog in resolved:
+            return resolved[prog]
+        # Not part of the graph: only its own raw quantity
+        return self._round(self._raw.get(prog, 0.0))
+
+    def resolve_all(self) -> Dict[Hashable, float]:
+        return dict(self._ensure_resolved())
+
+    def _ensure_resolved(self) -> Dict[Hashable, float]:
+        if self._resolved is None:
+            self._resolved = {}
+            for component in self._components():
+                self._resolve_component(component)
+        return self._resolved
+
+    def _nodes(self) -> Iterable[Hashable]:
+        yield from self._raw
+        for prog, refs in self._refs.items():
+            yield prog
+            for ref, _ in refs:
+                yield ref
+
+    def _components(self) -> List[List[Hashable]]:
+        """Strongly connected components in dependency order (Tarjan, iterative)."""
+        refs = self._refs
+        index: Dict[Hashable, int] = {}
+        lowlink: Dict[Hashable, int] = {}
+        on_stack: Set[Hashable] = set()
+        stack: List[Hashable] = []
+        components: List[List[Hashable]] = []
+
+        for start in self._nodes():
+            if start in index:
+                continue
+            index[start] = lowlink[start] = len(index)
+            stack.append(start)
+            on_stack.add(start)
+            work = [(start, iter(refs.get(start, ())))]
+            while work:
+                node, children = work[-1]
+                descended = False
+                for child, _ in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(refs.get(child, ()))))
+                        descended = True
+                        break
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                if descended:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component: List[Hashable] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def _resolve_component(self, component: List[Hashable]) -> None:
+        resolved = self._resolved
+        if len(component) == 1:
+            prog = component[0]
+            refs = self._refs.get(prog, ())
+            if all(ref != prog for ref, _ in refs):
+                total = self._raw.get(prog, 0.0)
+                for ref, mult in refs:
+                    total += resolved[ref] * mult
+                resolved[prog] = self._round(total)
+                return
+
+        members = set(component)
+        self._cycles.append(list(reversed(component)))
+        logger.warning(f"Circular quantity references between progressives {sorted(members, key=str)}")
+        results = {prog: self._resolve_in_cycle(prog, members) for prog in component}
+        resolved.update(results)
+
+    def _resolve_in_cycle(self, start: Hashable, members: Set[Hashable]) -> float:
+        """
+        Depth-first resolution of `start` restricted to its cycle: a reference to
+        a progressive on the current path counts as 0, references leaving the
+        cycle use the already resolved quantities.
+        """
+        raw, refs, resolved = self._raw, self._refs, self._resolved
+        path: Set[Hashable] = {start}
+        # Frame: [progressive, running total, pending references, multiplier of the child being resolved]
+        frames: List[list] = [[start, raw.get(start, 0.0), iter(refs.get(start, ())), 0.0]]
+        while True:
+            frame = frames[-1]
+            for ref, mult in frame[2]:
+                if ref in path:
+                    frame[1] += 0.0 * mult
+                elif ref in members:
+                    frame[3] = mult
+                    path.add(ref)
+                    frames.append([ref, raw.get(ref, 0.0), iter(refs.get(ref, ())), 0.0])
+                    break
+                else:
+                    frame[1] += resolved[ref] * mult
+            else:
+                frames.pop()
+                path.discard(frame[0])
+                value = self._round(frame[1])
+                if not frames:
+                    return value
+                parent = frames[-1]
+                parent[1] += value * parent[3]
+
+
+__all__ = ["QuantityGraph", "round_quantity"]
@@ -0,0 +1,54 @@
+"""
+Restriction of a parsed estimate to a single preventivo.
+
+A SIX file usually carries several preventivi (variants, revisions) sharing
+one prezzario; an import only loads one of them. `select_preventivo` keeps the
+selected preventivo and only the products and WBS nodes it uses.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Set
+
+from domain import NormalizedEstimate
+
+logger = logging.getLogger(__name__)
+
+
+def select_preventivo(estimate: NormalizedEstimate, preventivo_id: str) -> bool:
+    """
+    Trims `estimate` in place to the preventivo `preventivo_id`.
+
+    Products are kept when a measurement of the preventivo uses them, WBS nodes
+    when those measurements or products reference them; original order is
+    preserved. Returns False, leaving the estimate untouched, when no
+    preventivo has that id.
+    """
+    selected = [p for p in estimate.preventivi if p.id == preventivo_id]
+    if not selected:
+        logger.warning(f"Preventivo {preventivo_id} not found, keeping the full estimate")
+        return False
+
+    used_products: Set[str] = set()
+    used_wbs: Set[str] = set()
+    for prev in selected:
+        for m in prev.measurements:
+            used_products.add(m.product_id)
+            used_wbs.update(m.wbs_node_ids)
+
+    items = [item for item in estimate.price_list_items if item.id in used_products]
+    for item in items:
+        used_wbs.update(item.wbs_ids)
+    wbs_nodes = [node for node in estimate.wbs_nodes if node.id in used_wbs]
+
+    logger.info(
+        f"Selected preventivo {preventivo_id}: products {len(estimate.price_list_items)} -> {len(items)}, "
+        f"WBS {len(estimate.wbs_nodes)} -> {len(wbs_nodes)}"
+    )
+    estimate.preventivi = selected
+    estimate.price_list_items = items
+    estimate.wbs_nodes = wbs_nodes
+    return True
+
+
+__all__ = ["select_preventivo"]
@@ -0,0 +1,67 @@
+"""
+XML backend of the XML parsers (SIX, XPWE).
+
+`settings.xml_backend` selects the library that builds the trees:
+
+- "etree" (default): the standard library ElementTree;
+- "lxml": lxml, falling back to ElementTree (with a warning) when missing;
+- "auto": lxml when it is installed, ElementTree otherwise.
+
+lxml elements expose the ElementTree API the parsers use (`find`, `findall`,
+`attrib`, `text`, iteration), parse in C and accept documents beyond the
+libxml2 default limits (`huge_tree`). Comments and processing instructions
+are dropped, as ElementTree does, so the same code walks both trees and
+produces the same NormalizedEstimate. The parsers read attributes element by
+element from Python, where each lxml access creates a proxy object, so lxml
+is not faster across the board: compare with
+scripts/benchmarks/bench_xml_backend.py before switching.
+"""
+from __future__ import annotations
+
+import logging
+import xml.etree.ElementTree as ET
+from typing import Any, BinaryIO, Iterator, Tuple
+
+from core import settings
+
+try:  # optional dependency
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover - depends on the environment
+    lxml_etree = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("auto", "lxml", "etree")
+
+
+def resolve_backend(backend: str | None = None) -> str:
+    """Concrete backend ("lxml" or "etree") for a setting value (None = settings.xml_backend)."""
+    choice = (backend or settings.xml_backend or "etree").lower()
+    if choice not in BACKENDS:
+        logger.warning(f"Unknown XML backend '{choice}', using ElementTree")
+        return "etree"
+    if choice == "etree":
+        return "etree"
+    if lxml_etree is None:
+        if choice == "lxml":
+            logger.warning("XML backend 'lxml' requested but lxml is not installed, using ElementTree")
+        return "etree"
+    return "lxml"
+
+
+def fromstring(content: bytes, backend: str | None = None) -> ET.Element:
+    """Parse a whole document and return its root element."""
+    if resolve_backend(backend) == "lxml":
+        parser = lxml_etree.XMLParser(huge_tree=True, remove_comments=True, remove_pis=True)
+        return lxml_etree.fromstring(content, parser)
+    return ET.fromstring(content)
+
+
+def iterparse(source: BinaryIO, events: Tuple[str, ...], backend: str | None = None) -> Iterator[Tuple[str, Any]]:
+    """`iterparse` of the selected backend, yielding `(event, element)`."""
+    if resolve_backend(backend) == "lxml":
+        return lxml_etree.iterparse(source, events=events, huge_tree=True, remove_comments=True, remove_pis=True)
+    return ET.iterparse(source, events=events)
+
+
+__all__ = ["BACKENDS", "fromstring", "iterparse", "resolve_backend"]
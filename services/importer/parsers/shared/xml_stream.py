@@ -0,0 +1,56 @@
+"""
+Incremental XML reading helpers shared by the XML parsers (SIX, XPWE).
+
+`iter_events` wraps the `iterparse` of the configured XML backend
+(`parsers.shared.xml_backend`) and reports the parent of every element, so a
+parser can process an element when it closes and then `release` it: the
+subtree is cleared and detached from the partially built tree, keeping peak
+memory bound to the largest single element instead of the whole document.
+"""
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from parsers.shared import xml_backend
+from parsers.shared.buffers import open_buffer
+
+
+def iter_events(
+    source: bytes | memoryview | BinaryIO,
+    backend: str | None = None,
+) -> Iterator[Tuple[str, ET.Element, Optional[ET.Element]]]:
+    """
+    Yield `(event, element, parent)` for every "start" and "end" event.
+
+    On "start" only the tag and attributes of the element are reliable; its
+    children and text are available on "end".
+    """
+    stream = open_buffer(source)
+    stack: list[ET.Element] = []
+    try:
+        for event, elem in xml_backend.iterparse(stream, ("start", "end"), backend):
+            if event == "start":
+                parent = stack[-1] if stack else None
+                stack.append(elem)
+                yield event, elem, parent
+            else:
+                stack.pop()
+                yield event, elem, stack[-1] if stack else None
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+class StreamOrderError(Exception):
+    """The document does not follow the order a streaming parse relies on."""
+
+
+def release(elem: ET.Element, parent: Optional[ET.Element]) -> None:
+    """Free a processed element and detach it from its parent."""
+    elem.clear()
+    if parent is not None:
+        parent.remove(elem)
+
+
+__all__ = ["StreamOrderError", "iter_events", "release"]
@@ -5,7 +5,7 @@ import uuid
 import re
 import xml.etree.ElementTree as ET
 import re
-from decimal import Decimal, ROUND_HALF_UP
+from concurrent.futures import ProcessPoolExecutor
 
 # Reference pattern matching old_importer.py
 # Captures: "voce n. 123", "#123", "→ 123", "[123]", "<123>"
@@ -18,8 +18,9 @@ _REFERENCE_PATTERN = re.compile(
     re.IGNORECASE
 )
 
-from typing import Dict, List, Optional, Tuple, Any, Set
+from typing import Callable, Dict, List, Optional, Tuple, Any, Set
 
+from core import settings
 from core.interfaces import ParserProtocol
 from domain import (
     NormalizedEstimate,
@@ -30,16 +31,188 @@ from domain import (
     MeasurementDetail,
     PreventivoModel
 )
+from domain.services.fixed_point import CentsTotal, product_2dp, round_2dp
+from parsers.shared.expression import evaluate_expression
+from parsers.shared.quantity_graph import QuantityGraph
+from parsers.shared import xml_backend
+from parsers.shared.selection import select_preventivo
+from parsers.shared.xml_stream import StreamOrderError, iter_events, release
 
 logger = logging.getLogger(__name__)
 
+
+def _round_2dp_or_none(val: float | None) -> float | None:
+    if val is None: return None
+    return round_2dp(val)
+
+
+# Compact form of an element shipped to the workers: (local tag, attrib, text, children or None)
+_CompactElement = Tuple[str, Dict[str, str], Optional[str], Optional[List[Any]]]
+
+# Context of a parallel preventivo worker process, set once by its initializer:
+# known grpValoreId and prodottoId (as dicts, only membership is read)
+_worker_context: Tuple[Dict[str, None], Dict[str, None]] | None = None
+
+
+def _compact_element(elem: ET.Element, ns_len: int) -> _CompactElement:
+    children = [_compact_element(child, ns_len) for child in elem] if len(elem) else None
+    # dict(): lxml attributes are a live view, not picklable
+    return elem.tag[ns_len:], dict(elem.attrib), elem.text, children
+
+
+def _expand_element(compact: _CompactElement) -> ET.Element:
+    tag, attrib, text, children = compact
+    elem = ET.Element(tag, attrib)
+    elem.text = text
+    if children:
+        elem.extend([_expand_element(child) for child in children])
+    return elem
+
+
+def _init_preventivo_worker(group_ids: List[str], product_ids: List[str]) -> None:
+    global _worker_context
+    _worker_context = (dict.fromkeys(group_ids), dict.fromkeys(product_ids))
+
+
+def _parse_preventivo_subtree(subtree: _CompactElement) -> Tuple[PreventivoModel, List[str]]:
+    """
+    Parses one compact <preventivo> in a worker process. Returns the model
+    and the ids of the products it had to stub (not defined in the prezzario),
+    in the order they were met.
+    """
+    group_ids, product_ids = _worker_context
+    parser = SixParser(streaming=False)
+    # Compact tags carry no namespace
+    parser._group_ref_map = group_ids
+    parser._price_list_items = dict(product_ids)
+    preventivo = parser._build_preventivo(_expand_element(subtree))
+    stubs = list(parser._price_list_items)[len(product_ids):]
+    return preventivo, stubs
+
+
+class _PreventivoAccumulator:
+    """
+    Collects the rilevazioni of one preventivo, aggregating them by progressive,
+    and resolves the referenced quantities once the preventivo is complete.
+    """
+
+    def __init__(self, prev_id: str, code: str) -> None:
+        self.prev_id = prev_id
+        self.code = code
+        self.raw_map: Dict[float, float] = {}
+        self.ref_map: Dict[float, List[Tuple[int, float]]] = {}
+        self.items: List[Measurement] = []
+        # Aggregation Map: Key = Progressive Code (or ID), Value = Measurement
+        self._aggregated: Dict[str, Measurement] = {}
+
+    def add(self, res: Tuple[Measurement, Optional[float], List[Tuple[int, float]]] | None) -> None:
+        if not res:
+            return
+        m, prog, refs = res
+
+        # Key for aggregation: Progressive (Primary) or ID (Fallback)
+        key = m.progressive if m.progressive else m.id
+
+        if key in self._aggregated:
+            # AGGREGATE with existing
+            existing = self._aggregated[key]
+
+            # 1. Sum Quantity
+            existing.total_quantity += m.total_quantity
+
+            # 2. Append Details
+            existing.details.extend(m.details)
+
+            # 3. Merge WBS (Union)
+            for w in m.wbs_node_ids:
+                if w not in existing.wbs_node_ids:
+                    existing.wbs_node_ids.append(w)
+
+            # 4. Ref Map & Raw Map Accumulation
+            if prog is not None:
+                # Important: Accumulate raw quantity for resolution logic
+                self.raw_map[prog] = self.raw_map.get(prog, 0.0) + m.total_quantity
+                if refs:
+                    self.ref_map.setdefault(prog, []).extend(refs)
+        else:
+            # NEW Entry
+            self._aggregated[key] = m
+            self.items.append(m)
+
+            if prog is not None:
+                self.raw_map[prog] = m.total_quantity
+                if refs:
+                    self.ref_map[prog] = refs
+
+    def build(self, name: str) -> PreventivoModel:
+        logger.debug(f"First pass done. Raw map size: {len(self.raw_map)}. Ref map size: {len(self.ref_map)}")
+        if self.ref_map:
+            logger.debug(f"Ref map keys: {list(self.ref_map.keys())[:10]}")
+
+        # Resolve Quantities (each progressive once, references first)
+        logger.info("Resolving quantities...")
+        graph = QuantityGraph(self.raw_map, self.ref_map)
+        measurements: List[Measurement] = []
+        for m in self.items:
+            if m.progressive:
+                try:
+                    prog_int = int(float(m.progressive))
+                    m.total_quantity = graph.resolve(prog_int)
+                except Exception as e:
+                    logger.error(f"Error resolving qty for {m.progressive}: {e}")
+            measurements.append(m)
+
+        return PreventivoModel(
+            id=self.prev_id,
+            code=self.code,
+            name=name,
+            measurements=measurements
+        )
+
+
 class SixParser(ParserProtocol):
     """
     Parses STR Vision SIX XML files into a normalized, relational format.
     Preserves raw formulas and avoids row aggregation.
+
+    Two reading modes produce the same NormalizedEstimate:
+    - DOM: the whole document is loaded with ElementTree.
+    - streaming: `gruppo`, `prodotto`, `unitaDiMisura` and `prvRilevazione`
+      elements are handled as they close and then released, so peak memory
+      follows the largest element instead of the file size. It relies on the
+      definitions preceding the preventivi (as STR Vision writes them) and
+      falls back to the DOM mode otherwise.
+
+    With a `preventivo_id` only that preventivo is parsed: the rilevazioni of
+    the others are skipped and the result keeps only the products and WBS
+    nodes the selected preventivo uses.
+
+    In DOM mode, when every preventivo is parsed and `workers` > 1, the
+    preventivi are serialized and parsed in a process pool, then merged back
+    in document order.
+
+    Trees are built by the XML backend of settings.xml_backend (ElementTree
+    or lxml), see `parsers.shared.xml_backend`.
     """
-    
-    def __init__(self) -> None:
+
+    version = "1"
+
+    def __init__(
+        self,
+        streaming: bool | None = None,
+        workers: int | None = None,
+        backend: str | None = None,
+    ) -> None:
+        # None = decide per file, streaming above settings.six_streaming_min_mb
+        self.streaming = streaming
+        # None = settings.six_parallel_workers
+        self.workers = workers
+        # None = settings.xml_backend
+        self.backend = backend
+        self._preventivo_id: str | None = None
+        self._reset()
+
+    def _reset(self) -> None:
         self.ns = ""
         self._price_list_items: Dict[str, PriceListItem] = {}
         self._wbs_nodes: Dict[str, WbsNode] = {}
@@ -48,127 +221,251 @@ class SixParser(ParserProtocol):
         # Helper map: grpValoreId -> WbsNode
         self._group_ref_map: Dict[str, WbsNode] = {} 
 
-    def parse(self, file_content: bytes, filename: str | None = None) -> NormalizedEstimate:
-        root = ET.fromstring(file_content)
+        # Track "voce" nodes (structural parents) with their extended descriptions
+        # Key: prdId (code), Value: estesa description
+        self._voce_descriptions: Dict[str, str] = {}
+        self._debug_count = 0
+
+    def parse(
+        self,
+        file_content: bytes,
+        filename: str | None = None,
+        preventivo_id: str | None = None,
+    ) -> NormalizedEstimate:
+        self._preventivo_id = preventivo_id
+        if self._use_streaming(file_content):
+            try:
+                return self._parse_streaming(file_content, filename)
+            except StreamOrderError as exc:
+                logger.warning(f"Streaming parse not applicable ({exc}), falling back to DOM parse")
+                self._reset()
+        return self._parse_dom(file_content, filename)
+
+    def restrict_to_preventivo(self, estimate: NormalizedEstimate, preventivo_id: str) -> NormalizedEstimate:
+        select_preventivo(estimate, preventivo_id)
+        return estimate
+
+    def _use_streaming(self, file_content: bytes) -> bool:
+        if self.streaming is not None:
+            return self.streaming
+        threshold_mb = settings.six_streaming_min_mb
+        return threshold_mb > 0 and len(file_content) >= threshold_mb * 1024 * 1024
+
+    def _parse_dom(self, file_content: bytes, filename: str | None) -> NormalizedEstimate:
+        root = xml_backend.fromstring(file_content, self.backend)
         self.ns = self._detect_namespace(root)
         logger.debug(f"Root tag={root.tag}, Detected NS='{self.ns}'")
         
-        # 1. Parse Definitions
-        self._parse_price_lists(root)
-        self._parse_groups_definitions(root)
-        self._parse_products_definitions(root)
-        
         estimate = NormalizedEstimate()
         estimate.project_name = filename or "SIX Import" # Fallback
         
-        # 1b. Parse Units
-        self._parse_units(root, estimate)
-        
-        # 2. Find All Preventivi
-        preventivi_nodes = root.findall(f".//{self.ns}preventivo")
+        # 1. Parse Definitions (gruppi, prodotti, unita di misura) and
+        # collect the preventivi in a single walk of the tree
+        self._parse_price_lists(root)
+        preventivi_nodes = self._collect_definitions(root, estimate)
+        self._build_extended_descriptions()
         logger.debug(f"Found {len(preventivi_nodes)} preventivi nodes using NS='{self.ns}'")
         
         if not preventivi_nodes:
             logger.warning("No preventivo found in SIX file, returning empty estimate")
             return estimate
             
-        for prev_node in preventivi_nodes:
-            # Check if valid (has id/code)
-            prev_id = prev_node.attrib.get("preventivoId")
-            if not prev_id: continue
-            
-            code = prev_node.attrib.get("prvId") or prev_id
-            
-            # Description
-            desc_node = prev_node.find(f"{self.ns}prvDescrizione")
-            desc = ""
-            if desc_node is not None:
-                desc = desc_node.attrib.get("breve") or desc_node.text or ""
-                
-            # Use first valid name as project name if missing
-            if not estimate.project_name or estimate.project_name == "SIX Import":
-                estimate.project_name = desc
-                
-            # 3. Parse Measurements for this preventivo
-            measurements: List[Measurement] = []
-            
-            raw_map = {}
-            ref_map = {}
-            temp_items = []
+        # 2. Parse Measurements, once every product is known
+        valid_nodes = [n for n in preventivi_nodes if n.get("preventivoId")]
+        workers = self._parallel_workers(len(valid_nodes))
+        if workers > 1:
+            self._parse_preventivi_parallel(valid_nodes, estimate, workers)
+        else:
+            for prev_node in preventivi_nodes:
+                self._parse_preventivo(prev_node, estimate)
 
-            # Aggregation Map: Key = Progressive Code (or ID), Value = Measurement
-            aggregated_map = {}
-            
-            # Iterate "prvRilevazione" inside this preventivo
-            for i, node in enumerate(prev_node.findall(f"{self.ns}prvRilevazione")):
-                res = self._parse_rilevazione(node, i)
-                if res:
-                    m, prog, refs = res
-                    
-                    # Key for aggregation: Progressive (Primary) or ID (Fallback)
-                    key = m.progressive if m.progressive else m.id
-                    
-                    if key in aggregated_map:
-                        # AGGREGATE with existing
-                        existing = aggregated_map[key]
-                        
-                        # 1. Sum Quantity
-                        existing.total_quantity += m.total_quantity
-                        
-                        # 2. Append Details
-                        existing.details.extend(m.details)
-                        
-                        # 3. Merge WBS (Union)
-                        for w in m.wbs_node_ids:
-                            if w not in existing.wbs_node_ids:
-                                existing.wbs_node_ids.append(w)
-                                
-                        # 4. Ref Map & Raw Map Accumulation
-                        if prog is not None:
-                             # Important: Accumulate raw quantity for resolution logic
-                             current_raw = raw_map.get(prog, 0.0)
-                             raw_map[prog] = current_raw + m.total_quantity
-                             
-                             if refs:
-                                 if prog not in ref_map: ref_map[prog] = []
-                                 ref_map[prog].extend(refs)
-                                 
-                    else:
-                        # NEW Entry
-                        aggregated_map[key] = m
-                        temp_items.append(m)
-                        
-                        if prog is not None:
-                            raw_map[prog] = m.total_quantity
-                            if refs:
-                                ref_map[prog] = refs
-            
-            logger.debug(f"First pass done. Raw map size: {len(raw_map)}. Ref map size: {len(ref_map)}")
-            if ref_map:
-                logger.debug(f"Ref map keys: {list(ref_map.keys())[:10]}")
-
-            # Resolve Quantities
-            logger.info("Resolving quantities...")
-            for m in temp_items:
-                if m.progressive:
-                    try:
-                        prog_int = int(float(m.progressive))
-                        # Resolve!
-                        final_qty = self._resolve_quantity(prog_int, raw_map, ref_map, set())
-                        m.total_quantity = final_qty
-                    except Exception as e:
-                        logger.error(f"Error resolving qty for {m.progressive}: {e}")
-                measurements.append(m)
-            
-            # Create Model
-            p_model = PreventivoModel(
-                id=prev_id,
-                code=code,
-                name=desc,
-                measurements=measurements
-            )
-            estimate.preventivi.append(p_model)
-        
+        self._finalize(estimate)
+        return estimate
+
+    def _definition_handlers(self, estimate: NormalizedEstimate) -> Dict[str, Callable[[ET.Element], None]]:
+        """Tag -> handler for the definition elements, shared by the DOM and streaming modes."""
+        return {
+            f"{self.ns}gruppo": self._handle_gruppo,
+            f"{self.ns}prodotto": self._handle_prodotto,
+            f"{self.ns}unitaDiMisura": lambda udm: self._handle_unit(udm, estimate),
+        }
+
+    def _collect_definitions(self, root: ET.Element, estimate: NormalizedEstimate) -> List[ET.Element]:
+        """
+        Walks the tree once in document order, dispatching every definition
+        element to its handler by tag, and returns the preventivo nodes.
+        Handled elements and preventivi are not descended into: their content
+        is read by the handler (or later by `_parse_preventivo`), which keeps
+        the measurement rows out of the walk.
+        """
+        handlers = self._definition_handlers(estimate)
+        tag_prev = f"{self.ns}preventivo"
+        preventivi: List[ET.Element] = []
+        stack = [iter(root)]
+        while stack:
+            for elem in stack[-1]:
+                handler = handlers.get(elem.tag)
+                if handler is not None:
+                    handler(elem)
+                elif elem.tag == tag_prev:
+                    preventivi.append(elem)
+                elif len(elem):
+                    stack.append(iter(elem))
+                    break
+            else:
+                stack.pop()
+        return preventivi
+
+    def _parse_streaming(self, file_content: bytes, filename: str | None) -> NormalizedEstimate:
+        estimate = NormalizedEstimate()
+        estimate.project_name = filename or "SIX Import" # Fallback
+
+        root: ET.Element | None = None
+        definitions_done = False
+        preventivi_count = 0
+        accumulator: _PreventivoAccumulator | None = None
+        skipped = False
+        ril_index = 0
+        handlers: Dict[str, Callable[[ET.Element], None]] = {}
+        ordered_tags: Set[str] = set()
+        tag_prev = tag_ril = ""
+
+        for event, elem, parent in iter_events(file_content, self.backend):
+            if event == "start":
+                if root is None:
+                    root = elem
+                    self.ns = self._detect_namespace(root)
+                    logger.debug(f"Root tag={root.tag}, Detected NS='{self.ns}' (streaming)")
+                    handlers = self._definition_handlers(estimate)
+                    # Products must all be known before the first rilevazione
+                    ordered_tags = {f"{self.ns}gruppo", f"{self.ns}prodotto"}
+                    tag_prev = f"{self.ns}preventivo"
+                    tag_ril = f"{self.ns}prvRilevazione"
+                elif elem.tag == tag_prev:
+                    if not definitions_done:
+                        self._build_extended_descriptions()
+                        definitions_done = True
+                    preventivi_count += 1
+                    accumulator = None
+                    ril_index = 0
+                    prev_id = elem.get("preventivoId")
+                    skipped = bool(prev_id) and not self._is_selected(prev_id)
+                    if prev_id and not skipped:
+                        accumulator = _PreventivoAccumulator(prev_id, elem.get("prvId") or prev_id)
+                continue
+
+            tag = elem.tag
+            handler = handlers.get(tag)
+            if handler is not None:
+                if definitions_done and tag in ordered_tags:
+                    raise StreamOrderError(f"<{tag}> found after the first preventivo")
+                handler(elem)
+                release(elem, parent)
+            elif tag == tag_ril and parent is not None and parent.tag == tag_prev:
+                if accumulator is not None:
+                    accumulator.add(self._parse_rilevazione(elem, ril_index))
+                ril_index += 1
+                release(elem, parent)
+            elif tag == tag_prev:
+                if accumulator is not None:
+                    desc = self._preventivo_description(elem)
+                    self._adopt_project_name(estimate, desc)
+                    estimate.preventivi.append(accumulator.build(desc))
+                elif skipped:
+                    self._adopt_project_name(estimate, self._preventivo_description(elem))
+                accumulator = None
+                skipped = False
+                release(elem, parent)
+
+        logger.debug(f"Found {preventivi_count} preventivi nodes using NS='{self.ns}' (streaming)")
+        if not preventivi_count:
+            logger.warning("No preventivo found in SIX file, returning empty estimate")
+            return estimate
+
+        self._finalize(estimate)
+        return estimate
+
+    def _parse_preventivo(self, prev_node: ET.Element, estimate: NormalizedEstimate) -> None:
+        # Check if valid (has id/code)
+        prev_id = prev_node.get("preventivoId")
+        if not prev_id:
+            return
+
+        self._adopt_project_name(estimate, self._preventivo_description(prev_node))
+        if not self._is_selected(prev_id):
+            return
+
+        estimate.preventivi.append(self._build_preventivo(prev_node))
+
+    def _build_preventivo(self, prev_node: ET.Element) -> PreventivoModel:
+        prev_id = prev_node.get("preventivoId")
+        code = prev_node.get("prvId") or prev_id
+
+        # 3. Parse Measurements for this preventivo
+        accumulator = _PreventivoAccumulator(prev_id, code)
+        for i, node in enumerate(prev_node.findall(f"{self.ns}prvRilevazione")):
+            accumulator.add(self._parse_rilevazione(node, i))
+
+        return accumulator.build(self._preventivo_description(prev_node))
+
+    def _parallel_workers(self, preventivi_count: int) -> int:
+        workers = self.workers if self.workers is not None else settings.six_parallel_workers
+        if self._preventivo_id or preventivi_count < 2:
+            return 0
+        return min(workers, preventivi_count)
+
+    def _parse_preventivi_parallel(
+        self, prev_nodes: List[ET.Element], estimate: NormalizedEstimate, workers: int
+    ) -> None:
+        """
+        Fans the preventivi out to a process pool. Workers receive the known
+        group/product ids once, then one compact subtree (nested tuples without
+        namespace, cheaper to pickle than XML text) per preventivo; results are
+        merged in document order, so the estimate is the same as the
+        sequential parse.
+        """
+        for prev_node in prev_nodes:
+            self._adopt_project_name(estimate, self._preventivo_description(prev_node))
+
+        logger.info(f"Parsing {len(prev_nodes)} preventivi on {workers} processes")
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_preventivo_worker,
+                initargs=(list(self._group_ref_map), list(self._price_list_items)),
+            ) as executor:
+                ns_len = len(self.ns)
+                subtrees = [_compact_element(prev_node, ns_len) for prev_node in prev_nodes]
+                results = list(executor.map(_parse_preventivo_subtree, subtrees))
+        except (OSError, RuntimeError) as exc:
+            # No process pool available (sandbox, broken worker): parse in this process
+            logger.warning(f"Parallel parse unavailable ({exc}), parsing preventivi sequentially")
+            for prev_node in prev_nodes:
+                estimate.preventivi.append(self._build_preventivo(prev_node))
+            return
+
+        for preventivo, stubs in results:
+            for prod_id in stubs:
+                if prod_id not in self._price_list_items:
+                    self._price_list_items[prod_id] = PriceListItem(id=prod_id, code="UNK", description="Unknown", unit="nr")
+            estimate.preventivi.append(preventivo)
+
+    def _is_selected(self, prev_id: str) -> bool:
+        return self._preventivo_id is None or prev_id == self._preventivo_id
+
+    def _preventivo_description(self, prev_node: ET.Element) -> str:
+        desc_node = prev_node.find(f"{self.ns}prvDescrizione")
+        desc = ""
+        if desc_node is not None:
+            desc = desc_node.get("breve") or desc_node.text or ""
+        return desc
+
+    def _adopt_project_name(self, estimate: NormalizedEstimate, desc: str) -> None:
+        # Use first valid name as project name if missing
+        if not estimate.project_name or estimate.project_name == "SIX Import":
+            estimate.project_name = desc
+
+    def _finalize(self, estimate: NormalizedEstimate) -> None:
         # 3. Post-Process: Reconstruct Hierarchy & Links
         # User requested to NOT infer parent_id explicitly.
         # self._reconstruct_hierarchy(estimate) 
@@ -192,23 +489,23 @@ class SixParser(ParserProtocol):
         estimate.price_lists = list(self._price_lists.values())
         estimate.wbs_nodes = filtered_wbs_nodes
         estimate.price_list_items = list(self._price_list_items.values())
-        
-        return estimate
 
-    def _parse_units(self, root: ET.Element, estimate: NormalizedEstimate):
-        for udm in root.findall(f".//{self.ns}unitaDiMisura"):
-            u_id = udm.attrib.get("unitaDiMisuraId")
-            if not u_id: continue
-            
-            code = udm.attrib.get("codice") or u_id
-            name = u_id
-            
-            # Try to get description
-            desc_node = udm.find(f"{self.ns}udmDescrizione")
-            if desc_node is not None:
-                name = desc_node.attrib.get("breve") or desc_node.text or code
-            
-            estimate.units[u_id] = name
+        if self._preventivo_id:
+            select_preventivo(estimate, self._preventivo_id)
+
+    def _handle_unit(self, udm: ET.Element, estimate: NormalizedEstimate) -> None:
+        u_id = udm.get("unitaDiMisuraId")
+        if not u_id: return
+        
+        code = udm.get("codice") or u_id
+        name = u_id
+        
+        # Try to get description
+        desc_node = udm.find(f"{self.ns}udmDescrizione")
+        if desc_node is not None:
+            name = desc_node.get("breve") or desc_node.text or code
+        
+        estimate.units[u_id] = name
             
     def _detect_namespace(self, root: ET.Element) -> str:
         if root.tag.startswith("{"):
@@ -221,37 +518,36 @@ class SixParser(ParserProtocol):
         idx = 0
         pass # To be implemented if we need price list names
 
-    def _parse_groups_definitions(self, root: ET.Element):
+    def _handle_gruppo(self, gruppo: ET.Element) -> None:
         """
         Parses <gruppo> and <grpValore> tags to build WBS nodes.
         """
-        for gruppo in root.findall(f".//{self.ns}gruppo"):
-            tipo = (gruppo.attrib.get("tipo") or "").strip()
-            kind, level = self._classify_group(tipo)
+        tipo = (gruppo.get("tipo") or "").strip()
+        kind, level = self._classify_group(tipo)
+        
+        # We want to catch anything that looks like a WBS
+        if kind == "other" and level == 99:
+             pass # Warning? Or just include as 'other'? Include for now.
             
-            # We want to catch anything that looks like a WBS
-            if kind == "other" and level == 99:
-                 pass # Warning? Or just include as 'other'? Include for now.
-                
-            for valore in gruppo.findall(f"{self.ns}grpValore"):
-                grp_id = valore.attrib.get("grpValoreId")
-                if not grp_id: continue
-                
-                code = (valore.attrib.get("vlrId") or "").strip()
-                desc_node = valore.find(f"{self.ns}vlrDescrizione")
-                desc = ""
-                if desc_node is not None:
-                    desc = desc_node.attrib.get("breve") or desc_node.text or ""
-                
-                node = WbsNode(
-                    id=grp_id,
-                    code=code,
-                    name=desc,
-                    level=level,
-                    type=kind
-                )
-                self._wbs_nodes[grp_id] = node
-                self._group_ref_map[grp_id] = node
+        for valore in gruppo.findall(f"{self.ns}grpValore"):
+            grp_id = valore.get("grpValoreId")
+            if not grp_id: continue
+            
+            code = (valore.get("vlrId") or "").strip()
+            desc_node = valore.find(f"{self.ns}vlrDescrizione")
+            desc = ""
+            if desc_node is not None:
+                desc = desc_node.get("breve") or desc_node.text or ""
+            
+            node = WbsNode(
+                id=grp_id,
+                code=code,
+                name=desc,
+                level=level,
+                type=kind
+            )
+            self._wbs_nodes[grp_id] = node
+            self._group_ref_map[grp_id] = node
 
     def _classify_group(self, tipo: str) -> Tuple[str, int]:
         # User requested RAW extraction of kind, logic handling later.
@@ -270,78 +566,75 @@ class SixParser(ParserProtocol):
         # Return the raw string as kind (cleaned slightly of whitespace)
         return tipo.strip(), level
 
-    def _parse_products_definitions(self, root: ET.Element):
-        debug_count = 0
-        
-        # Track "voce" nodes (structural parents) with their extended descriptions
-        # Key: prdId (code), Value: estesa description
-        voce_descriptions: Dict[str, str] = {}
-        
-        for prodotto in root.findall(f".//{self.ns}prodotto"):
-            prod_id = prodotto.attrib.get("prodottoId")
-            if not prod_id: continue
-            
-            code = prodotto.attrib.get("prdId") or prod_id
-            is_voce = prodotto.attrib.get("voce") == "true"
-            
-            # Description
-            desc_node = prodotto.find(f"{self.ns}prdDescrizione")
-            desc = ""
-            desc_ext = ""
-            if desc_node is not None:
-                desc = desc_node.attrib.get("breve") or ""
-                
-                # Robust extraction for estesa (case-insensitive + text fallback)
-                desc_ext = desc_node.attrib.get("estesa")
-                if not desc_ext:
-                    # Try case-insensitive lookup
-                    for k, v in desc_node.attrib.items():
-                        if k.lower().endswith("estesa"):
-                            desc_ext = v
-                            break
-                            
-                # Fallback to text if still empty (rare but possible)
-                if not desc_ext and desc_node.text:
-                    desc_ext = desc_node.text
-                    
-                desc_ext = desc_ext or ""
-                
-                # DEBUG: Log first 5 products that HAVE estesa attribute 
-                if debug_count < 5 and desc_ext:
-                    logger.debug(f"Product {code}: breve='{desc[:50]}...', estesa='{desc_ext[:80]}...'")
-                    debug_count += 1
+    def _handle_prodotto(self, prodotto: ET.Element) -> None:
+        prod_id = prodotto.get("prodottoId")
+        if not prod_id: return
+        
+        code = prodotto.get("prdId") or prod_id
+        is_voce = prodotto.get("voce") == "true"
+        
+        # Description
+        desc_node = prodotto.find(f"{self.ns}prdDescrizione")
+        desc = ""
+        desc_ext = ""
+        if desc_node is not None:
+            desc = desc_node.get("breve") or ""
+            
+            # Robust extraction for estesa (case-insensitive + text fallback)
+            desc_ext = desc_node.get("estesa")
+            if not desc_ext:
+                # Try case-insensitive lookup
+                for k, v in desc_node.attrib.items():
+                    if k.lower().endswith("estesa"):
+                        desc_ext = v
+                        break
+                        
+            # Fallback to text if still empty (rare but possible)
+            if not desc_ext and desc_node.text:
+                desc_ext = desc_node.text
                 
-            desc = desc.strip() or code
-            
-            # Track voce nodes for later extended_description building
-            if is_voce and desc_ext:
-                voce_descriptions[code] = desc_ext.strip()
-                logger.debug(f"Voce node: {code} -> '{desc_ext[:60]}...'")
-            
-            # Unit
-            unit = prodotto.attrib.get("unitaDiMisuraId") or "nr"
-            
-            # Prices
-            prices: Dict[str, float] = {}
-            for quot in prodotto.findall(f"{self.ns}prdQuotazione"):
-                list_id = quot.attrib.get("listaQuotazioneId")
-                val_str = quot.attrib.get("valore")
-                val = self._parse_float(val_str)
-                if list_id and val is not None:
-                    prices[list_id] = val
-            
-            prod = PriceListItem(
-                id=prod_id,
-                code=code,
-                description=desc,
-                long_description=desc_ext,
-                unit=unit,
-                price_by_list=prices
-            )
-            self._price_list_items[prod_id] = prod
-        
-        # SECOND PASS: Build extended_description for leaf items (items with prices)
-        # by concatenating parent voce descriptions
+            desc_ext = desc_ext or ""
+            
+            # DEBUG: Log first 5 products that HAVE estesa attribute 
+            if self._debug_count < 5 and desc_ext:
+                logger.debug(f"Product {code}: breve='{desc[:50]}...', estesa='{desc_ext[:80]}...'")
+                self._debug_count += 1
+            
+        desc = desc.strip() or code
+        
+        # Track voce nodes for later extended_description building
+        if is_voce and desc_ext:
+            self._voce_descriptions[code] = desc_ext.strip()
+            logger.debug(f"Voce node: {code} -> '{desc_ext[:60]}...'")
+        
+        # Unit
+        unit = prodotto.get("unitaDiMisuraId") or "nr"
+        
+        # Prices
+        prices: Dict[str, float] = {}
+        for quot in prodotto.findall(f"{self.ns}prdQuotazione"):
+            list_id = quot.get("listaQuotazioneId")
+            val_str = quot.get("valore")
+            val = self._parse_float(val_str)
+            if list_id and val is not None:
+                prices[list_id] = val
+        
+        prod = PriceListItem(
+            id=prod_id,
+            code=code,
+            description=desc,
+            long_description=desc_ext,
+            unit=unit,
+            price_by_list=prices
+        )
+        self._price_list_items[prod_id] = prod
+
+    def _build_extended_descriptions(self) -> None:
+        """
+        Build extended_description for leaf items (items with prices)
+        by concatenating parent voce descriptions.
+        """
+        voce_descriptions = self._voce_descriptions
         extended_count = 0
         for prod in self._price_list_items.values():
             # Skip if it's a voce node itself (no price) or has no code
@@ -378,7 +671,7 @@ class SixParser(ParserProtocol):
         logger.info(f"Parsed {len(self._price_list_items)} products, {items_with_long_desc} have long_description, {extended_count} have extended_description")
 
     def _parse_rilevazione(self, node: ET.Element, index: int) -> Tuple[Measurement, Optional[int], List[Tuple[int, int]]] | None:
-        prod_id = node.attrib.get("prodottoId")
+        prod_id = node.get("prodottoId")
         if not prod_id: return None
         
         # Ensure product exists (or create stub if XML was incomplete)
@@ -389,14 +682,14 @@ class SixParser(ParserProtocol):
         # Collect ALL referenced WBS nodes
         wbs_refs = []
         for grp_ref in node.findall(f"{self.ns}prvGrpValore"):
-            ref_id = grp_ref.attrib.get("grpValoreId")
+            ref_id = grp_ref.get("grpValoreId")
             if ref_id in self._group_ref_map:
                 wbs_refs.append(ref_id)
         
         # Measurement Details
         details: List[MeasurementDetail] = []
         row_idx = 0
-        total_qty = Decimal(0)
+        total_qty = CentsTotal()
         
         # <prvVediVoce id="uuid" /> or similar reference
         # Usually inside prvRilevazione. 
@@ -405,10 +698,10 @@ class SixParser(ParserProtocol):
         related_id = None
         if vedi_voce_node is not None:
              logger.debug(f"Found prvVediVoce tag! {vedi_voce_node.attrib}")
-             related_id = vedi_voce_node.attrib.get("rifId") or vedi_voce_node.attrib.get("id")
+             related_id = vedi_voce_node.get("rifId") or vedi_voce_node.get("id")
              if related_id:
                  logger.debug(f"Extracted related_id: {related_id}")
-        else:
+        elif logger.isEnabledFor(logging.DEBUG):
              # Debug check for ANY child with 'Vedi' in tag
              for child in list(node):
                  if 'Vedi' in child.tag:
@@ -427,21 +720,17 @@ class SixParser(ParserProtocol):
             formula = self._get_text(misura, "msrFormula") or ""
             
             # Attributes parsing (standard) - round each to 2 decimals
-            def _round_2dp(val):
-                if val is None: return None
-                return float(Decimal(str(val)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-            
-            length = _round_2dp(self._parse_float(misura.attrib.get("lung")))
-            width = _round_2dp(self._parse_float(misura.attrib.get("larg")))
-            height = _round_2dp(self._parse_float(misura.attrib.get("alt")))
-            parts = _round_2dp(self._parse_float(misura.attrib.get("parti")))
+            length = _round_2dp_or_none(self._parse_float(misura.get("lung")))
+            width = _round_2dp_or_none(self._parse_float(misura.get("larg")))
+            height = _round_2dp_or_none(self._parse_float(misura.get("alt")))
+            parts = _round_2dp_or_none(self._parse_float(misura.get("parti")))
             
             # Cell parsing (prvCella) - overrides/supplements attributes if present
             # Format: <prvCella testo="17.50" posizione="1" />
             cells = []
             
             # Determine sign with stateful logic (Context: "A DEDURRE" sets mode for following lines)
-            operazione = misura.attrib.get("operazione", "").strip()
+            operazione = misura.get("operazione", "").strip()
             
             if operazione == "-":
                 running_sign = -1
@@ -464,37 +753,28 @@ class SixParser(ParserProtocol):
             
             if valid_dims:
                 # Calculate from attributes (already rounded above)
-                prod = Decimal("1.0")
-                if parts is not None: prod *= Decimal(str(parts))
-                if length is not None: prod *= Decimal(str(length))
-                if width is not None: prod *= Decimal(str(width))
-                if height is not None: prod *= Decimal(str(height))
-                row_multiplier = float(prod.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+                row_multiplier = product_2dp(valid_dims)
             else:
                 # 2. Try Cells
                 for cella in misura.findall(f"{self.ns}prvCella"):
-                     txt = cella.attrib.get("testo", "")
-                     pos = int(cella.attrib.get("posizione", "0"))
+                     txt = cella.get("testo", "")
+                     pos = int(cella.get("posizione", "0"))
                      val = self._parse_float(txt)
                      if val is not None:
                          # Round each cell value to 2 decimals BEFORE multiplication
-                         val_rounded = float(Decimal(str(val)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+                         val_rounded = round_2dp(val)
                          cells.append((pos, val_rounded, txt))
                 
                 cells.sort(key=lambda x: x[0])
                 if cells:
-                    prod = Decimal("1.0")
-                    for c in cells:
-                         # Multiply rounded values
-                         prod *= Decimal(str(c[1]))
-                    # Round the product as well
-                    row_multiplier = float(prod.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+                    # Multiply rounded values, round the product as well
+                    row_multiplier = product_2dp([c[1] for c in cells])
                     
                     # Debug for L032.020.07 (prodottoId 11524)
-                    prod_id = node.attrib.get("prodottoId")
+                    prod_id = node.get("prodottoId")
                     if prod_id == "11524":
                         cell_details = [(c[2], c[1]) for c in cells]  # (raw_text, rounded_val)
-                        logger.debug(f"[L032.020.07] Cells: {cell_details} -> prod={float(prod):.6f} -> row_multiplier={row_multiplier}")
+                        logger.debug(f"[L032.020.07] Cells: {cell_details} -> row_multiplier={row_multiplier}")
                     
                     # Map first 3 found cells to L/W/H for UI
                     if len(cells) >= 1: length = cells[0][1]
@@ -503,7 +783,7 @@ class SixParser(ParserProtocol):
 
             # 3. Always check prvCommento inside prvMisura
             for commento in misura.findall(f"{self.ns}prvCommento"):
-                txt = commento.attrib.get("estesa") or commento.text or ""
+                txt = commento.get("estesa") or commento.text or ""
                 found_refs = self._extract_references(txt)
                 if found_refs:
                     for ref in found_refs:
@@ -533,7 +813,7 @@ class SixParser(ParserProtocol):
                      formula = "*".join(components)
             
             # Try to get pre-calculated row quantity if available
-            row_qty = self._parse_float(misura.attrib.get("msrQuantita"))
+            row_qty = self._parse_float(misura.get("msrQuantita"))
             
             # If still 0/None, try to calculate from formula logic
             if (row_qty is None or row_qty == 0):
@@ -543,7 +823,7 @@ class SixParser(ParserProtocol):
             # FIX: If references found, ignore row quantity to avoid double counting
             if misura_refs:
                 if row_qty and abs(row_qty) > 0.0001:
-                     logger.info(f"Audit: DISCARDING local qty {row_qty} in node {node.attrib.get('progressivo')} due to refs {misura_refs}")
+                     logger.info(f"Audit: DISCARDING local qty {row_qty} in node {node.get('progressivo')} due to refs {misura_refs}")
                 row_qty = 0.0
 
             if row_qty is None: row_qty = 0.0
@@ -567,21 +847,19 @@ class SixParser(ParserProtocol):
             
             # Round each row to 2 decimals (ceiling) BEFORE summing - matches TeamSystem behavior
             # Example: 4.0870500 becomes 4.09
-            row_qty_decimal = Decimal(str(row_qty))
-            rounded_row = row_qty_decimal.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            total_qty += rounded_row
+            total_qty.add(row_qty)
             row_idx += 1
             
-        progressivo_id = node.attrib.get("progressivo") or str(uuid.uuid4())
+        progressivo_id = node.get("progressivo") or str(uuid.uuid4())
         
         # Try to parse numeric progressive for ordering
         prog_num = None
-        if node.attrib.get("progressivo"):
+        if node.get("progressivo"):
             try:
-                prog_num = float(node.attrib.get("progressivo"))
+                prog_num = float(node.get("progressivo"))
             except: pass
 
-        if float(total_qty) == 0:
+        if total_qty.value == 0:
              # Debug: Why is qty 0?
              has_measurements = len(node.findall(f"{self.ns}prvMisura")) > 0
              msg = ""
@@ -594,7 +872,7 @@ class SixParser(ParserProtocol):
                  logger.warning(msg)
 
         # Extract price list ID (listaQuotazioneId) from the rilevazione node
-        price_list_id = node.attrib.get("listaQuotazioneId")
+        price_list_id = node.get("listaQuotazioneId")
         
         # Return Tuple
         return (Measurement(
@@ -603,7 +881,7 @@ class SixParser(ParserProtocol):
             wbs_node_ids=wbs_refs,
             product_id=prod_id,
             related_item_id=related_id,
-            total_quantity=float(total_qty),
+            total_quantity=total_qty.value,
             details=details,
             price_list_id=price_list_id  # CRITICAL FIX: Pass the price list ID
         ), prog_num, node_refs)
@@ -627,45 +905,11 @@ class SixParser(ParserProtocol):
                     except: pass
         return refs
 
-    def _resolve_quantity(self, prog: int, raw_map: dict, ref_map: dict, stack: set) -> float:
-        if prog in stack:
-            # Cycle detected
-            return 0.0
-        
-        stack.add(prog)
-        
-        # Base raw qty
-        total = raw_map.get(prog, 0.0)
-        
-        # Add refs
-        refs = ref_map.get(prog, [])
-        if refs:
-             logger.debug(f"[Resolve] {prog} has refs: {refs} (Base: {total})")
-
-        for ref_prog, sign in refs:
-            # Recursive resolve
-            ref_qty = self._resolve_quantity(ref_prog, raw_map, ref_map, stack)
-            total += (ref_qty * sign)
-            
-        stack.remove(prog)
-        if refs:
-             logger.debug(f"[Resolve] {prog} -> Final: {total}")
-             
-        # Legacy Rounding: Round final resolved quantity to 2 decimals
-        # Avoid float precision issues by converting to string first
-        try:
-            rounded_total = float(Decimal(f"{total:.10f}").quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-        except Exception as e:
-            logger.error(f"Rounding failed for {prog}: {e}")
-            rounded_total = total
-            
-        return rounded_total
-
     def _get_text(self, node: ET.Element, tag: str, attr: str | None = None) -> str | None:
         child = node.find(f"{self.ns}{tag}")
         if child is not None:
              if attr:
-                 return child.attrib.get(attr, "")
+                 return child.get(attr, "")
              return child.text
         return None
 
@@ -674,44 +918,8 @@ class SixParser(ParserProtocol):
         try:
             return float(val.replace(",", "."))
         except ValueError:
-            # Fallback: Try to evaluate simple arithmetic expression
-            return self._eval_expression(val)
-
-    def _eval_expression(self, val: str) -> float | None:
-        """
-        Evaluates simple arithmetic expressions safely using Decimal for precision.
-        Allowed: digits, . , + - * / ( )
-        """
-        clean = val.replace(",", ".").strip()
-            # Regex to ensure safety: digits, math chars, and comparison operators
-        if not re.match(r'^[\d\s\.\+\-\*\/\(\)<>=]+$', clean):
-            return None
-        
-        try:
-            # Handle equality operator "=" (legacy) -> "=="
-            # Use regex to replace '=' with '==' but avoid breaking '<=' or '>=' if present
-            # Lookbehind: not preceded by < or > or ! or =
-            # Lookahead: not followed by =
-            expr_ready = re.sub(r'(?<![<>!=])=(?![=])', '==', clean)
-            
-            # Use Decimal for precise arithmetic
-            # Replace numbers with Decimal() constructor calls
-            import re as re_mod
-            def to_decimal_expr(expr):
-                # Find all numbers and wrap them in Decimal()
-                return re_mod.sub(r'(\d+\.?\d*)', r'Decimal("\1")', expr)
-            
-            decimal_expr = to_decimal_expr(expr_ready)
-            result = eval(decimal_expr, {"Decimal": Decimal, "__builtins__": {}})
-            
-            # Convert boolean result to float (True=1.0, False=0.0)
-            if isinstance(result, bool):
-                return 1.0 if result else 0.0
-                
-            return float(result)
-        except:
-            return None
-
+            # Fallback: Try to evaluate simple arithmetic expression (cached per text)
+            return evaluate_expression(val)
 
     def _reconstruct_hierarchy(self, estimate: NormalizedEstimate):
         """
@@ -735,27 +943,26 @@ class SixParser(ParserProtocol):
         Links Products to WBS Nodes based on Code prefix matching.
         User requirement: Link ALL matching WBS nodes found in the code structure (e.g. A001 AND A001.010).
         """
-        # Build lookup for WBS codes
-        # Sort codes by length descending to match longest prefix first
-        sorted_wbs_codes = sorted(
-            [n.code for n in self._wbs_nodes.values() if n.code], 
-            key=len, 
-            reverse=True
-        )
-        
-        # Map Code -> NodeID
+        # Prefix index: Code -> NodeID plus the distinct code lengths, longest
+        # first. A product code has exactly one prefix per length, so probing
+        # those prefixes in the map visits the matching WBS codes in the same
+        # longest-first order as scanning every code, without the scan.
         wbs_code_map = {n.code: n.id for n in self._wbs_nodes.values() if n.code}
+        code_lengths = sorted({len(code) for code in wbs_code_map}, reverse=True)
         
         for prod in self._price_list_items.values():
              if not prod.code: continue
              
              # Multi-Tagging Strategy:
-             # Iterate all known WBS codes. If product code starts with WBS code, link it.
+             # Link every known WBS code the product code starts with.
              # This captures the full hierarchy implicitly (Category, Subcategory, etc.)
-             
-             for wbs_code in sorted_wbs_codes:
-                 if prod.code.startswith(wbs_code):
-                     match_id = wbs_code_map[wbs_code]
-                     # Avoid duplicates if any
-                     if match_id not in prod.wbs_ids:
-                         prod.wbs_ids.append(match_id)
+             code = prod.code
+             linked = set(prod.wbs_ids)
+             for length in code_lengths:
+                 if length > len(code):
+                     continue
+                 match_id = wbs_code_map.get(code[:length])
+                 # Avoid duplicates if any
+                 if match_id is not None and match_id not in linked:
+                     linked.add(match_id)
+                     prod.wbs_ids.append(match_id)
@@ -0,0 +1,242 @@
+"""
+Synthetic SIX and XPWE documents for parser tests and benchmarks.
+
+Real STR Vision and PriMus exports cannot be shipped with the repo, so this
+module builds deterministic documents with the same structure: for SIX
+gruppi, prodotti with voce parents, unita di misura, several preventivi with
+cells, formulas, deductions and "vedi voce" references; for XPWE categorie and
+capitoli, the elenco prezzi (EPItem) and the computo (VCItem with RGItem rows).
+"""
+from __future__ import annotations
+
+import random
+from xml.sax.saxutils import quoteattr
+
+SIX_NAMESPACE = "urn:taboolo:six-fixture"
+
+
+def build_six_document(
+    *,
+    groups: int = 20,
+    products: int = 200,
+    preventivi: int = 2,
+    rilevazioni: int = 300,
+    seed: int = 7,
+    namespace: str | None = SIX_NAMESPACE,
+    definitions_first: bool = True,
+    references: bool = True,
+) -> bytes:
+    """
+    Build a SIX document with `rilevazioni` measurement entries per preventivo.
+
+    With `definitions_first=False` the prezzario is written after the
+    preventivi, an order STR Vision does not produce but the parser accepts.
+    With `references=False` no "vedi voce" comments are generated.
+    """
+    rnd = random.Random(seed)
+    out: list[str] = []
+    out.append("<prezzario>")
+
+    # Units
+    for code in ("m", "m2", "m3", "kg", "nr", "cad"):
+        out.append(
+            f"<unitaDiMisura unitaDiMisuraId=\"u_{code}\" codice=\"{code}\">"
+            f"<udmDescrizione breve=\"{code.upper()}\"/></unitaDiMisura>"
+        )
+
+    # Groups (WBS): a chapter/category tree whose codes prefix product codes
+    group_ids: list[str] = []
+    chapters = [f"A{idx:03d}" for idx in range(1, groups + 1)]
+    for level, tipo in ((1, "Supercategorie"), (2, "Categorie"), (6, "WBS 06"), (7, "WBS 07")):
+        out.append(f"<gruppo tipo={quoteattr(tipo)}>")
+        for idx, chapter in enumerate(chapters):
+            grp_id = f"g{level}_{idx}"
+            code = chapter if level == 1 else f"{chapter}.{level:02d}"
+            group_ids.append(grp_id)
+            out.append(
+                f"<grpValore grpValoreId=\"{grp_id}\" vlrId=\"{code}\">"
+                f"<vlrDescrizione breve={quoteattr(f'{tipo} {code} - Lavorazioni')}/></grpValore>"
+            )
+        out.append("</gruppo>")
+
+    # Products: one voce parent per chapter plus priced leaves below it
+    product_ids: list[str] = []
+    for idx, chapter in enumerate(chapters):
+        out.append(
+            f"<prodotto prodottoId=\"v{idx}\" prdId=\"{chapter}\" voce=\"true\">"
+            f"<prdDescrizione breve=\"Voce {chapter}\" estesa={quoteattr(f'Opere del capitolo {chapter}')}/>"
+            "</prodotto>"
+        )
+    for idx in range(products):
+        chapter = chapters[idx % len(chapters)]
+        code = f"{chapter}.{(idx // len(chapters)) % 100:02d}.{idx:04d}"
+        prod_id = f"p{idx}"
+        product_ids.append(prod_id)
+        unit = rnd.choice(("u_m", "u_m2", "u_m3", "u_kg", "u_nr", "u_cad"))
+        quotes = "".join(
+            f"<prdQuotazione listaQuotazioneId=\"L{lst}\" valore=\"{rnd.uniform(1, 900):.2f}\"/>"
+            for lst in range(1, rnd.randint(1, 3) + 1)
+        )
+        description = f"Fornitura e posa {idx} con materiale tipo {rnd.randint(1, 40)}"
+        out.append(
+            f"<prodotto prodottoId=\"{prod_id}\" prdId=\"{code}\" unitaDiMisuraId=\"{unit}\">"
+            f"<prdDescrizione breve={quoteattr(description[:40])} estesa={quoteattr(description)}/>"
+            f"{quotes}</prodotto>"
+        )
+    out.append("</prezzario>")
+    definitions = out
+    out = []
+
+    # Preventivi
+    for prv in range(preventivi):
+        out.append(f"<preventivo preventivoId=\"prv{prv}\" prvId=\"PRV-{prv:02d}\">")
+        out.append(f"<prvDescrizione breve=\"Preventivo {prv}\"/>")
+        for idx in range(rilevazioni):
+            progressivo = idx + 1
+            # A few entries repeat an existing progressive to exercise aggregation
+            if idx > 10 and rnd.random() < 0.05:
+                progressivo = rnd.randint(1, idx)
+            prod_id = rnd.choice(product_ids)
+            if rnd.random() < 0.01:
+                prod_id = f"missing_{idx}"  # undefined product -> stub
+            lista = f" listaQuotazioneId=\"L{rnd.randint(1, 2)}\"" if rnd.random() < 0.8 else ""
+            out.append(f"<prvRilevazione prodottoId=\"{prod_id}\" progressivo=\"{progressivo}\"{lista}>")
+            for grp in rnd.sample(group_ids, 2):
+                out.append(f"<prvGrpValore grpValoreId=\"{grp}\"/>")
+            if rnd.random() < 0.03:
+                out.append(f"<prvVediVoce rifId=\"ref_{idx}\"/>")
+            for row in range(rnd.randint(1, 4)):
+                out.append(_measure_row(rnd, idx, row, references))
+            out.append("</prvRilevazione>")
+        out.append("</preventivo>")
+
+    body = definitions + out if definitions_first else out + definitions
+    ns_attr = f" xmlns={quoteattr(namespace)}" if namespace else ""
+    head = f"<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<documento{ns_attr}>"
+    return "\n".join([head, *body, "</documento>"]).encode("utf-8")
+
+
+def _measure_row(rnd: random.Random, idx: int, row: int, references: bool = True) -> str:
+    kind = rnd.random()
+    operazione = ""
+    if rnd.random() < 0.1:
+        operazione = " operazione=\"-\""
+    elif rnd.random() < 0.1:
+        operazione = " operazione=\"+\""
+
+    if kind < 0.45:
+        attrs = "".join(
+            f" {name}=\"{rnd.uniform(0.1, 30):.3f}\""
+            for name in ("lung", "larg", "alt")
+            if rnd.random() < 0.7
+        )
+        if rnd.random() < 0.3:
+            attrs += f" parti=\"{rnd.randint(1, 6)}\""
+        return f"<prvMisura{operazione}{attrs}/>"
+
+    if kind < 0.8:
+        cells = []
+        for pos in range(1, rnd.randint(1, 3) + 1):
+            choice = rnd.random()
+            if choice < 0.6:
+                text = f"{rnd.uniform(0.1, 40):.3f}".replace(".", ",")
+            elif choice < 0.8:
+                text = f"{rnd.randint(1, 9)}*{rnd.uniform(0.5, 5):.2f}"
+            elif choice < 0.9:
+                text = f"({rnd.randint(1, 9)}+{rnd.randint(1, 9)})/{rnd.randint(1, 4)}"
+            else:
+                text = f"{rnd.randint(1, 9)}>{rnd.randint(1, 9)}"
+            cells.append(f"<prvCella testo={quoteattr(text)} posizione=\"{pos}\"/>")
+        return f"<prvMisura{operazione}>{''.join(cells)}</prvMisura>"
+
+    if kind < 0.9 and idx > 1 and references:
+        ref = rnd.randint(1, idx)
+        multiplier = f" parti=\"{rnd.randint(1, 3)}\"" if rnd.random() < 0.5 else ""
+        return (
+            f"<prvMisura{operazione}{multiplier}>"
+            f"<prvCommento estesa={quoteattr(f'vedi voce n. {ref}')}/></prvMisura>"
+        )
+
+    return f"<prvMisura{operazione} msrQuantita=\"{rnd.uniform(0.5, 120):.4f}\"/>"
+
+
+def build_xpwe_document(
+    *,
+    categories: int = 10,
+    products: int = 200,
+    items: int = 500,
+    seed: int = 7,
+    namespace: str | None = None,
+) -> bytes:
+    """
+    Build a PriMus XPWE document with `items` VCItem entries over `products`
+    EPItem entries. Values are child elements, IDs are attributes, as PriMus
+    writes them.
+    """
+    rnd = random.Random(seed)
+    out: list[str] = ["<PweDatiGenerali>", "<PweDGCapitoliCategorie>"]
+    blocks = (
+        ("PweDGSuperCategorie", "DGSuperCategorieItem", "SC"),
+        ("PweDGCategorie", "DGCategorieItem", "C"),
+        ("PweDGSubCategorie", "DGSubCategorieItem", "SB"),
+        ("PweDGSuperCapitoli", "DGSuperCapitoliItem", "SP"),
+        ("PweDGCapitoli", "DGCapitoliItem", "CP"),
+    )
+    for block, item, prefix in blocks:
+        out.append(f"<{block}>")
+        for idx in range(1, categories + 1):
+            out.append(
+                f"<{item} ID=\"{idx}\"><DesSintetica>{prefix} {idx} - Opere</DesSintetica>"
+                f"<Codice>{prefix}{idx:02d}</Codice></{item}>"
+            )
+        out.append(f"</{block}>")
+    out.extend(["</PweDGCapitoliCategorie>", "</PweDatiGenerali>", "<PweMisurazioni>", "<PweElencoPrezzi>"])
+
+    for idx in range(1, products + 1):
+        prices = "".join(
+            f"<Prezzo{n}>{rnd.uniform(1, 900):.2f}</Prezzo{n}>" if n <= rnd.randint(1, 3) else f"<Prezzo{n}/>"
+            for n in range(1, 6)
+        )
+        links = "".join(
+            f"<{key}>{rnd.randint(0, categories)}</{key}>" for key in ("IDSpCap", "IDCap", "IDSpCat") if rnd.random() < 0.5
+        )
+        description = f"Fornitura e posa {idx} con materiale tipo {rnd.randint(1, 40)}"
+        out.append(
+            f"<EPItem ID=\"{idx}\"><TipoEP>0</TipoEP><Tariffa>A{idx % categories:02d}.{idx:04d}</Tariffa>"
+            f"<Articolo/><DesRidotta>{description[:40]}</DesRidotta><DesEstesa>{description}</DesEstesa>"
+            f"<UnMisura>{rnd.choice(('m', 'm2', 'm3', 'kg', 'cad'))}</UnMisura>{prices}{links}</EPItem>"
+        )
+    out.extend(["</PweElencoPrezzi>", "<PweVociComputo>"])
+
+    for idx in range(1, items + 1):
+        idep = rnd.randint(1, products) if rnd.random() > 0.01 else products + idx  # undefined -> stub
+        rows = []
+        total = 0.0
+        for row in range(rnd.randint(1, 4)):
+            dims = [f"{rnd.uniform(0.1, 30):.3f}" if rnd.random() < 0.7 else "" for _ in range(3)]
+            parti = str(rnd.randint(1, 6)) if rnd.random() < 0.3 else ""
+            qty = 1.0
+            for value in [parti, *dims]:
+                qty *= float(value) if value else 1.0
+            total += qty
+            fields = "".join(
+                f"<{tag}>{value}</{tag}>" if value else f"<{tag}/>"
+                for tag, value in zip(("PartiUguali", "Lunghezza", "Larghezza", "HPeso"), [parti, *dims])
+            )
+            rows.append(
+                f"<RGItem ID=\"{idx * 10 + row}\"><IDVV>-2</IDVV><Descrizione>Riga {row + 1}</Descrizione>"
+                f"{fields}<Quantita>{qty:.3f}</Quantita><Flags>0</Flags></RGItem>"
+            )
+        links = "".join(f"<{key}>{rnd.randint(0, categories)}</{key}>" for key in ("IDSpCat", "IDCat", "IDSbCat"))
+        out.append(
+            f"<VCItem ID=\"{idx}\"><IDEP>{idep}</IDEP><Quantita>{total:.3f}</Quantita><DataMis/>"
+            f"<Flags>0</Flags>{links}<PweVCMisure>{''.join(rows)}</PweVCMisure></VCItem>"
+        )
+    out.extend(["</PweVociComputo>", "</PweMisurazioni>"])
+
+    ns_attr = f" xmlns={quoteattr(namespace)}" if namespace else ""
+    head = f"<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<PweDocumento{ns_attr}>"
+    return "\n".join([head, "<CopyRight>Fixture</CopyRight>", *out, "</PweDocumento>"]).encode("utf-8")
+
+
+__all__ = ["SIX_NAMESPACE", "build_six_document", "build_xpwe_document"]
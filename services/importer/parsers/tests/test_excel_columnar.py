@@ -0,0 +1,95 @@
+import datetime
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+import pandas as pd
+
+from parsers.excel.columnar import (
+    column,
+    columns_with_values,
+    float_values,
+    optional_float,
+    progressive_values,
+    rows_to_frame,
+    sanitize_prices,
+    tail_quantities,
+)
+from parsers.excel.processor import (
+    cell_to_float,
+    cell_to_progressive,
+    column_has_values,
+    drop_empty_columns,
+    sanitize_price_candidate,
+)
+from parsers.helpers.text_and_measure import head_to_tail_quantity
+
+CELLS = [
+    None, 12, 3.25, -4.5, True, "", " ", "  ", "1,5", "€ 1.234,50", " 12.75 ", "-3,2",
+    "1e3", "1.2.3", "abc", "-", ".5", "7.", "0", datetime.datetime(2024, 5, 1), "12", " 7 ",
+]
+
+
+class TestColumnarMatchesRowHelpers(unittest.TestCase):
+    def setUp(self) -> None:
+        self.values = pd.Series(CELLS, dtype=object)
+
+    def test_float_values(self) -> None:
+        expected = [cell_to_float((cell,), 0) for cell in CELLS]
+        self.assertEqual([optional_float(value) for value in float_values(self.values)], expected)
+
+    def test_sanitize_prices(self) -> None:
+        expected = [sanitize_price_candidate(cell_to_float((cell,), 0)) for cell in CELLS]
+        prices = sanitize_prices(float_values(self.values))
+        self.assertEqual([optional_float(value) for value in prices], expected)
+
+    def test_progressive_values(self) -> None:
+        expected = [cell_to_progressive((cell,), 0) for cell in CELLS]
+        progressives = [optional_float(value) for value in progressive_values(self.values)]
+        self.assertEqual([None if value is None else int(value) for value in progressives], expected)
+
+    def test_drop_empty_columns_with_frame(self) -> None:
+        rows = [(None, 1, None, "a"), (None, None, None, "b"), (None, 2, None, None)]
+        self.assertEqual(drop_empty_columns(rows, rows_to_frame(rows)), drop_empty_columns(rows))
+        self.assertEqual(drop_empty_columns(rows)[0], [(1, "a"), (None, "b"), (2, None)])
+
+    def test_columns_with_values(self) -> None:
+        rows = [(None, " ", 1), (None, "", None)]
+        frame = rows_to_frame(rows)
+        for indexes in ([0], [1], [2], [0, 1], [5]):
+            self.assertEqual(columns_with_values(frame, indexes), column_has_values(rows, indexes))
+
+    def test_tail_quantities(self) -> None:
+        # (quantity, price) per row; the head of each block is its first row
+        blocks_rows = [
+            [(None, 10), (2, None), (" ", None), ("3", None), (4, 5.5), (8, None)],
+            [(None, None), ("1,5", None), (2, None)],
+            [(None, 4), (None, None)],
+            [(1, None), (datetime.date(2024, 1, 1), None), (6, None)],
+        ]
+        rows, blocks, tail = [], [], []
+        for number, block in enumerate(blocks_rows, start=1):
+            for position, row in enumerate(block):
+                rows.append(row)
+                blocks.append(number)
+                tail.append(position > 0)
+        frame = rows_to_frame(rows)
+
+        result = tail_quantities(
+            pd.Series(blocks), pd.Series(tail), column(frame, 0), column(frame, 1)
+        ).to_dict()
+
+        expected = {}
+        for number, block in enumerate(blocks_rows, start=1):
+            quantity = head_to_tail_quantity(block, 0, qty_col=0, price_col=1)
+            if quantity is not None:
+                expected[number] = quantity
+        self.assertEqual(result, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
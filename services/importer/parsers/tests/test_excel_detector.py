@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from parsers.excel.detector import detect_column_suggestions, detect_sheet_layout
+from parsers.excel.processor import drop_empty_columns, locate_header_row
+
+
+def _sheet_rows(count: int):
+    yield ("Offerta impresa", None, None, None, None, None)
+    yield (None, None, None, None, None, None)
+    yield ("Progressivo", "Codice", "Descrizione", None, "Quantita", "Prezzo")
+    for i in range(1, count + 1):
+        yield (i, f"A.{i:03d}", f"Voce {i}", None, i * 1.5, 10 + i)
+
+
+class TestDetectSheetLayout(unittest.TestCase):
+    def test_matches_full_sheet_detection(self) -> None:
+        full_rows, dropped, kept = drop_empty_columns(list(_sheet_rows(1000)))
+        header_idx = locate_header_row(full_rows)
+        suggestions = detect_column_suggestions(full_rows, header_idx, kept_columns=kept)["suggestions"]
+
+        layout = detect_sheet_layout(_sheet_rows(1000))
+
+        self.assertEqual(layout.header_idx, header_idx)
+        self.assertEqual(layout.empty_columns, dropped)
+        self.assertEqual(
+            {name: s.column_letter for name, s in layout.suggestions.items()},
+            {name: s.column_letter for name, s in suggestions.items()},
+        )
+        self.assertEqual(layout.filled_columns, [0, 1, 2, 4, 5])
+
+    def test_columns_in_sheet_coordinates(self) -> None:
+        layout = detect_sheet_layout(_sheet_rows(100))
+
+        self.assertEqual(layout.suggestions["quantita"].column_letter, "E")
+        self.assertEqual(layout.suggestions["prezzo"].column_index, 5)
+        self.assertEqual(layout.rows[3], (1, "A.001", "Voce 1", None, 1.5, 11))
+
+    def test_stops_once_columns_are_stable(self) -> None:
+        layout = detect_sheet_layout(_sheet_rows(1000), settle_rows=50)
+
+        self.assertTrue(layout.truncated)
+        self.assertLess(layout.rows_read, 100)
+
+    def test_bounded_by_max_rows(self) -> None:
+        rows = ((i, None, None, None, None, i) if i % 2 else (i, "x", "y", "z", None, None) for i in range(1000))
+        layout = detect_sheet_layout(rows, max_rows=40, settle_rows=1000)
+
+        self.assertEqual(layout.rows_read, 40)
+        self.assertTrue(layout.truncated)
+
+    def test_short_sheet_read_entirely(self) -> None:
+        layout = detect_sheet_layout(_sheet_rows(5), header_row_index=2)
+
+        self.assertFalse(layout.truncated)
+        self.assertEqual(layout.rows_read, 8)
+        self.assertEqual(layout.header_idx, 2)
+        self.assertEqual(layout.profiles[0].header_label, "Progressivo")
+
+
+if __name__ == "__main__":
+    unittest.main()
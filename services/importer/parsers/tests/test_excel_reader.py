@@ -0,0 +1,151 @@
+import datetime
+import inspect
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+import openpyxl
+from openpyxl import Workbook, load_workbook
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from openpyxl.worksheet._reader import DATA_TAG, DIMENSION_TAG, FORMULA_TAG, WorkSheetParser
+
+from parsers.excel.processor import has_external_formula
+from parsers.excel.reader import open_sheet_rows
+from parsers.lx.parser import parse_lx_return_excel
+
+
+def _build_workbook() -> bytes:
+    workbook = Workbook()
+    workbook.active.title = "Copertina"
+    sheet = workbook.create_sheet("Ritorno")
+    sheet["B2"] = "Codice"
+    sheet["C2"] = 3.5
+    sheet["D2"] = datetime.datetime(2024, 1, 2)
+    sheet["E2"] = True
+    sheet["F2"] = "=Altro!A1"
+    sheet["C5"] = "=SUM(C2:C4)"
+    sheet["H7"] = 10
+    workbook.active = 1
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+class TestSheetRowReader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.content = _build_workbook()
+
+    def test_values_match_openpyxl_rows(self) -> None:
+        workbook = load_workbook(io.BytesIO(self.content), data_only=True, read_only=True)
+        expected = list(workbook.active.iter_rows(values_only=True))
+        workbook.close()
+
+        with open_sheet_rows(io.BytesIO(self.content), None) as reader:
+            self.assertEqual(reader.title, "Ritorno")
+            rows = list(reader)
+
+        self.assertEqual([values for values, _ in rows], expected)
+
+    def test_formulas_aligned_with_values(self) -> None:
+        with open_sheet_rows(io.BytesIO(self.content), "Ritorno") as reader:
+            rows = list(reader)
+
+        values, formulas = rows[1]
+        self.assertEqual(len(formulas), len(values))
+        self.assertEqual(formulas[5], "=Altro!A1")
+        self.assertIsNone(formulas[2])
+        self.assertTrue(has_external_formula(formulas, 5))
+        self.assertEqual(rows[4][1][2], "=SUM(C2:C4)")
+        # rows without formulas (and missing rows) carry an empty formulas tuple
+        self.assertEqual(rows[0][1], ())
+        self.assertEqual(rows[6][1], ())
+
+    def test_unknown_sheet_falls_back_to_active(self) -> None:
+        with open_sheet_rows(io.BytesIO(self.content), "Assente") as reader:
+            self.assertEqual(reader.title, "Ritorno")
+
+
+class TestOpenpyxlInternals(unittest.TestCase):
+    """
+    parsers/excel/reader.py extends private openpyxl classes: if an upgrade
+    changes any of what it relies on, fail here rather than at import time.
+    """
+
+    def test_version_within_pin(self) -> None:
+        major, minor = (int(part) for part in openpyxl.__version__.split(".")[:2])
+        self.assertEqual((major, minor), (3, 1), "reader.py is only verified against openpyxl 3.1.x")
+
+    def test_private_members_still_exist(self) -> None:
+        for tag in (DATA_TAG, DIMENSION_TAG, FORMULA_TAG):
+            self.assertIsInstance(tag, str)
+        for cls, names in (
+            (ExcelReader, ("read_worksheets", "read_chartsheet", "read")),
+            (ReadOnlyWorksheet, ("_get_source", "_get_size")),
+            (WorkSheetParser, ("parse", "parse_cell", "parse_formula")),
+        ):
+            for name in names:
+                self.assertTrue(callable(getattr(cls, name, None)), f"{cls.__name__}.{name}")
+
+        params = inspect.signature(WorkSheetParser.__init__).parameters
+        for name in ("src", "shared_strings", "data_only", "epoch", "date_formats", "timedelta_formats"):
+            self.assertIn(name, params)
+        self.assertEqual(
+            list(inspect.signature(ReadOnlyWorksheet.__init__).parameters),
+            ["self", "parent_workbook", "title", "worksheet_path", "shared_strings"],
+        )
+
+    def test_read_only_branch_matches_the_override(self) -> None:
+        # _IndexingExcelReader.read_worksheets copies this branch of upstream
+        source = inspect.getsource(ExcelReader.read_worksheets)
+        for line in (
+            "for sheet, rel in self.parser.find_sheets():",
+            "if rel.target not in self.valid_files:",
+            '"chartsheet" in rel.Type',
+            "ReadOnlyWorksheet(self.wb, sheet.name, rel.target, self.shared_strings)",
+            "ws.sheet_state = sheet.state",
+            "self.wb._sheets.append(ws)",
+        ):
+            self.assertIn(line, source)
+
+    def test_state_read_from_workbook_and_sheet(self) -> None:
+        with open_sheet_rows(io.BytesIO(_build_workbook()), "Ritorno") as reader:
+            workbook, sheet = reader._workbook, reader._sheet
+            self.assertIsInstance(workbook.epoch, datetime.datetime)
+            self.assertIsInstance(workbook._date_formats, set)
+            self.assertIsInstance(workbook._timedelta_formats, set)
+            self.assertIsInstance(sheet, ReadOnlyWorksheet)
+            self.assertIsNotNone(sheet._shared_strings)
+            # B2:H7, from the <dimension> tag read by _IndexedWorksheet._get_size
+            self.assertEqual((sheet._min_column, sheet._min_row, sheet._max_column, sheet._max_row), (2, 2, 8, 7))
+            with sheet._get_source() as source:
+                _idx, cells = next(WorkSheetParser(source, sheet._shared_strings).parse())
+            self.assertTrue({"column", "value"} <= set(cells[0]))
+
+
+class TestLxExternalFormulas(unittest.TestCase):
+    def test_external_quantity_formula_skipped(self) -> None:
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Progressivo", "Codice", "Descrizione", "Quantita", "Prezzo"])
+        for i in range(1, 11):
+            quantity = f"=Computo!D{i}" if i % 5 == 0 else i * 1.5
+            sheet.append([i, f"A.{i:02d}", f"Voce {i}", quantity, 10 + i])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        parsed = parse_lx_return_excel(
+            buffer, None, ["B"], ["C"], "E", quantity_column="D", progressive_column="A"
+        )
+
+        self.assertEqual([item.progressive for item in parsed.items], [1, 2, 3, 4, 6, 7, 8, 9])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import io
+import mmap
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from openpyxl import Workbook
+
+from parsers.lx.parser import parse_lx_return_excel
+from parsers.mx.parser import parse_mx_return_excel
+from registry import (
+    parse_lx_estimate_from_bytes,
+    parse_mx_estimate_from_bytes,
+    preview_excel_return_from_bytes,
+)
+
+
+def _build_workbook() -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Progressivo", "Codice", "Descrizione", "Quantita", "Prezzo"])
+    for i in range(1, 21):
+        sheet.append([i, f"A.{i:02d}", f"Voce {i}", i * 1.5, 10 + i])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+class TestExcelFromBuffer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.content = _build_workbook()
+        self.columns = dict(code_columns=["B"], description_columns=["C"], price_column="E", quantity_column="D")
+
+    def test_buffer_matches_file_path(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ritorno.xlsx")
+            with open(path, "wb") as f:
+                f.write(self.content)
+            from_path = parse_lx_return_excel(path, None, **self.columns)
+
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                from_mmap = parse_lx_estimate_from_bytes(file_bytes=mapped, filename="ritorno.xlsx", **self.columns)
+
+        self.assertEqual(len(from_mmap.items), 20)
+        self.assertEqual(
+            [(i.code, i.quantity, i.unit_price) for i in from_mmap.items],
+            [(i.code, i.quantity, i.unit_price) for i in from_path.items],
+        )
+
+    def test_same_buffer_read_many_times(self) -> None:
+        first = parse_mx_estimate_from_bytes(file_bytes=self.content, filename="ritorno.xlsx", progressive_column="A", **self.columns)
+        second = parse_mx_estimate_from_bytes(file_bytes=self.content, filename="ritorno.xlsx", progressive_column="A", **self.columns)
+        self.assertTrue(first.items)
+        self.assertEqual(
+            [(i.progressive, i.code, i.quantity, i.unit_price) for i in second.items],
+            [(i.progressive, i.code, i.quantity, i.unit_price) for i in first.items],
+        )
+
+    def test_preview_reads_a_bounded_prefix(self) -> None:
+        preview = preview_excel_return_from_bytes(file_bytes=self.content, filename="ritorno.xlsx", max_rows=10)
+
+        self.assertEqual(preview["sheet_names"], ["Sheet"])
+        self.assertEqual(preview["header_row_index"], 0)
+        self.assertEqual(preview["suggestions"]["prezzo"]["column_letter"], "E")
+        self.assertEqual(preview["sample_rows"][0], [1, "A.01", "Voce 1", 1.5, 11])
+        self.assertEqual(preview["rows_read"], 10)
+        self.assertTrue(preview["truncated"])
+        self.assertTrue(all(column["has_values"] for column in preview["columns"]))
+
+    def test_preview_letters_survive_columns_filled_after_the_prefix(self) -> None:
+        # B is empty in the whole sheet, E (no header) only from row 300: the
+        # preview letters are sheet letters, the import maps them with raw_columns
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Progressivo", None, "Codice", "Descrizione", None, "Quantita", "Prezzo"])
+        for i in range(1, 400):
+            sheet.append([i, None, f"A.{i:03d}", f"Voce {i}", "nota" if i >= 300 else None, float(i), 10.0 + i])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        content = buffer.getvalue()
+
+        preview = preview_excel_return_from_bytes(file_bytes=content, filename="ritorno.xlsx")
+        letters = {name: suggestion["column_letter"] for name, suggestion in preview["suggestions"].items()}
+        self.assertTrue(preview["truncated"])
+        self.assertEqual((letters["quantita"], letters["prezzo"]), ("F", "G"))
+
+        columns = dict(
+            code_columns=[letters["codice"]],
+            description_columns=[letters["descrizione"]],
+            price_column=letters["prezzo"],
+            quantity_column=letters["quantita"],
+        )
+        mx = parse_mx_estimate_from_bytes(
+            file_bytes=content, filename="ritorno.xlsx", progressive_column=letters["progressivo"],
+            raw_columns=True, **columns,
+        )
+        lx = parse_lx_estimate_from_bytes(file_bytes=content, filename="ritorno.xlsx", raw_columns=True, **columns)
+        for estimate in (mx, lx):
+            self.assertEqual(len(estimate.items), 399)
+            first = estimate.items[0]
+            self.assertEqual((first.code, first.quantity, first.unit_price), ("A.001", 1.0, 11.0))
+
+
+class TestMxHeadTailBlocks(unittest.TestCase):
+    def _parse(self, rows):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Progressivo", "Codice", "Descrizione", "Quantita", "Prezzo"])
+        for row in rows:
+            sheet.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+        return parse_mx_return_excel(buffer, None, ["B"], ["C"], "E", "D", "A")
+
+    def test_tail_quantity_and_price_per_block(self) -> None:
+        parsed = self._parse([
+            [1, "A.01", "Scavo", None, 10],
+            [None, None, "misura 1", 2, None],
+            [None, None, "misura 2", 3, None],
+            [2, "A.02", "Rinterro", None, None],
+            [None, None, "misura 1", 4, None],
+            [None, None, "prezzo", None, 7.5],
+            [3, "A.03", "Trasporto", 1, 20],
+        ])
+
+        self.assertEqual(
+            [(i.progressive, i.quantity, i.unit_price) for i in parsed.items],
+            [(1, 5.0, 10.0), (2, 4.0, 7.5), (3, 1.0, 20.0)],
+        )
+
+    def test_tail_quantity_stops_at_next_progressive(self) -> None:
+        # The measures of progressive 2 (no price on its head) are not added to progressive 1
+        parsed = self._parse([
+            [1, "A.01", "Scavo", None, 10],
+            [None, None, "misura", 2, None],
+            [2, "A.02", "Rinterro", None, None],
+            [None, None, "misura", 4, None],
+            [None, None, "prezzo", None, 7.5],
+        ])
+
+        self.assertEqual([i.quantity for i in parsed.items], [2.0, 4.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import random
+import re
+import sys
+import unittest
+import warnings
+from decimal import Decimal
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from parsers.shared.expression import evaluate_expression
+
+
+def _eval_reference(val):
+    """The former eval-based implementation, kept as the reference behaviour."""
+    clean = val.replace(",", ".").strip()
+    if not re.match(r'^[\d\s\.\+\-\*\/\(\)<>=]+$', clean):
+        return None
+    try:
+        expr_ready = re.sub(r'(?<![<>!=])=(?![=])', '==', clean)
+        decimal_expr = re.sub(r'(\d+\.?\d*)', r'Decimal("\1")', expr_ready)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", SyntaxWarning)  # e.g. "'tuple' object is not callable"
+            result = eval(decimal_expr, {"Decimal": Decimal, "__builtins__": {}})
+        if isinstance(result, bool):
+            return 1.0 if result else 0.0
+        return float(result)
+    except Exception:
+        return None
+
+
+class TestEvaluateExpression(unittest.TestCase):
+    def test_arithmetic(self) -> None:
+        self.assertEqual(evaluate_expression("2*3,50"), 7.0)
+        self.assertEqual(evaluate_expression("(1,20+0,80)/2"), 1.0)
+        self.assertEqual(evaluate_expression("-(2+3)*-2"), 10.0)
+        self.assertEqual(evaluate_expression("--2,5"), 2.5)
+        self.assertEqual(evaluate_expression("8/4/2"), 1.0)
+        self.assertEqual(evaluate_expression("0,1+0,2"), 0.3)  # Decimal, not float, arithmetic
+        self.assertEqual(evaluate_expression("( 1\n+ 2 )"), 3.0)
+
+    def test_comparisons(self) -> None:
+        self.assertEqual(evaluate_expression("3>2"), 1.0)
+        self.assertEqual(evaluate_expression("3=2"), 0.0)
+        self.assertEqual(evaluate_expression("1<2<3"), 1.0)
+        self.assertEqual(evaluate_expression("(1<2)+(2<3)"), 2.0)
+        # Short-circuit: the failing operand is never evaluated
+        self.assertEqual(evaluate_expression("2<1<(1/0)"), 0.0)
+
+    def test_invalid(self) -> None:
+        for text in ("", "abc", "1/0", "0/0", "1 2", "(1", "1)", ".5", "1<>2", "1===2", "(" * 101 + "1" + ")" * 101):
+            self.assertIsNone(evaluate_expression(text), text)
+
+    def test_rejects_operators_outside_the_grammar(self) -> None:
+        # Valid Python, but not SIX formulas
+        for text in ("2**3", "-7//2", "1<<2", "8>>1", "...", "()", "()==()", "1+()", "7(2)", "7()", "1.5.3", "1 .5"):
+            self.assertIsNone(evaluate_expression(text), text)
+
+    def test_matches_eval_reference(self) -> None:
+        # Within the grammar results match eval; outside it the text is rejected
+        rnd = random.Random(42)
+        alphabet = list("0123456789") * 3 + list(" .+-*/()<>=,") * 2 + ["**", "//", "<<", ">>", "...", "\t", "()"]
+        for _ in range(20000):
+            text = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 10)))
+            compact = re.sub(r"\s", "", text)
+            if any(op in compact for op in ("**", "//", "<<", ">>", "..", "()")):
+                self.assertIsNone(evaluate_expression(text), text)
+            else:
+                self.assertEqual(repr(evaluate_expression(text)), repr(_eval_reference(text)), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from parsers.shared.quantity_graph import QuantityGraph, round_quantity
+
+
+def _recursive_resolve(prog, raw_map, ref_map, stack):
+    """Reference implementation: the former per-call recursive resolution."""
+    if prog in stack:
+        return 0.0
+    stack.add(prog)
+    total = raw_map.get(prog, 0.0)
+    for ref_prog, sign in ref_map.get(prog, []):
+        total += _recursive_resolve(ref_prog, raw_map, ref_map, stack) * sign
+    stack.remove(prog)
+    return round_quantity(total)
+
+
+class TestQuantityGraph(unittest.TestCase):
+    def test_chain_and_shared_references(self) -> None:
+        raw = {1.0: 10.0, 2.0: 2.5, 3.0: 0.0, 4.0: 1.0}
+        refs = {3.0: [(1, 1.0), (2, -2.0)], 4.0: [(3, 0.5), (3, 0.5), (1, 1.0)]}
+        graph = QuantityGraph(raw, refs)
+        self.assertEqual(graph.resolve(3), 5.0)
+        self.assertEqual(graph.resolve(4), 16.0)
+        self.assertEqual(graph.resolve(1), 10.0)
+        self.assertEqual(graph.resolve(99), 0.0)
+        self.assertEqual(graph.cycles, [])
+
+    def test_rounds_each_node_half_up(self) -> None:
+        graph = QuantityGraph({1: 0.125, 2: 0.0}, {2: [(1, 1.0), (1, 1.0)]})
+        self.assertEqual(graph.resolve(1), 0.13)
+        self.assertEqual(graph.resolve(2), 0.26)
+
+    def test_reports_cycles(self) -> None:
+        raw = {1: 1.0, 2: 2.0, 3: 3.0, 4: 4.0}
+        refs = {1: [(2, 1.0)], 2: [(1, 1.0)], 3: [(3, 1.0)], 4: [(1, 1.0)]}
+        graph = QuantityGraph(raw, refs)
+        self.assertEqual(sorted(sorted(c) for c in graph.cycles), [[1, 2], [3]])
+        # Inside a cycle the reference back to the node being resolved counts as 0
+        self.assertEqual(graph.resolve(1), 3.0)
+        self.assertEqual(graph.resolve(2), 3.0)
+        self.assertEqual(graph.resolve(3), 3.0)
+        self.assertEqual(graph.resolve(4), 7.0)
+
+    def test_deep_chain_does_not_recurse(self) -> None:
+        size = sys.getrecursionlimit() * 3
+        raw = {prog: 1.0 for prog in range(size)}
+        refs = {prog: [(prog - 1, 1.0)] for prog in range(1, size)}
+        self.assertEqual(QuantityGraph(raw, refs).resolve(size - 1), float(size))
+
+    def test_matches_recursive_resolution_on_random_graphs(self) -> None:
+        rnd = random.Random(11)
+        for _ in range(300):
+            size = rnd.randint(1, 12)
+            raw = {float(p): round(rnd.uniform(-50, 50), rnd.randint(0, 4)) for p in range(1, size + 1) if rnd.random() < 0.9}
+            refs = {}
+            for p in range(1, size + 1):
+                if rnd.random() < 0.5:
+                    refs[float(p)] = [
+                        (rnd.randint(1, size + 2), rnd.choice((1.0, -1.0, 0.5, 2.25, -3.0)))
+                        for _ in range(rnd.randint(1, 3))
+                    ]
+            graph = QuantityGraph(raw, refs)
+            for p in range(1, size + 3):
+                # repr() also tells 0.0 and -0.0 apart
+                self.assertEqual(repr(graph.resolve(p)), repr(_recursive_resolve(p, raw, refs, set())), (raw, refs, p))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import logging
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from domain import PriceListItem, WbsNode
+from parsers.shared.selection import select_preventivo
+from parsers.six.parser import SixParser
+from parsers.tests.fixtures import build_six_document
+
+
+def _dump(estimate):
+    return estimate.model_dump(mode="json")
+
+
+class TestSixParserStreaming(unittest.TestCase):
+    def setUp(self) -> None:
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def _assert_same_as_dom(self, document: bytes) -> None:
+        dom = SixParser(streaming=False).parse(document, filename="test.six")
+        streamed = SixParser(streaming=True).parse(document, filename="test.six")
+        self.assertEqual(_dump(dom), _dump(streamed))
+
+    def test_streaming_matches_dom(self) -> None:
+        self._assert_same_as_dom(build_six_document(seed=1))
+
+    def test_streaming_matches_dom_without_namespace(self) -> None:
+        self._assert_same_as_dom(build_six_document(seed=2, namespace=None))
+
+    def test_streaming_falls_back_when_definitions_follow_preventivi(self) -> None:
+        self._assert_same_as_dom(build_six_document(seed=3, definitions_first=False))
+
+    def test_parse_output(self) -> None:
+        estimate = SixParser().parse(build_six_document(preventivi=2, rilevazioni=50), filename="test.six")
+        self.assertEqual([p.id for p in estimate.preventivi], ["prv0", "prv1"])
+        self.assertTrue(estimate.units)
+        self.assertTrue(all(m.progressive for p in estimate.preventivi for m in p.measurements))
+        self.assertTrue(any(item.extended_description for item in estimate.price_list_items))
+
+
+
+class TestSixParserPreventivoSelection(unittest.TestCase):
+    def setUp(self) -> None:
+        logging.disable(logging.CRITICAL)
+        self.document = build_six_document(preventivi=3, rilevazioni=40, seed=5)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def test_selected_preventivo_matches_full_parse(self) -> None:
+        full = SixParser(streaming=False).parse(self.document, filename="test.six")
+        expected = full.model_copy(deep=True)
+        self.assertTrue(select_preventivo(expected, "prv1"))
+
+        for streaming in (False, True):
+            selected = SixParser(streaming=streaming).parse(self.document, filename="test.six", preventivo_id="prv1")
+            self.assertEqual(_dump(selected), _dump(expected))
+
+        self.assertEqual([p.id for p in expected.preventivi], ["prv1"])
+        # Project name still comes from the first preventivo of the file
+        self.assertEqual(expected.project_name, full.project_name)
+        used_products = {m.product_id for m in expected.preventivi[0].measurements}
+        self.assertEqual({item.id for item in expected.price_list_items}, used_products)
+        self.assertLess(len(expected.price_list_items), len(full.price_list_items))
+        self.assertLess(len(expected.wbs_nodes), len(full.wbs_nodes))
+
+    def test_unknown_preventivo_keeps_definitions(self) -> None:
+        full = SixParser().parse(self.document, filename="test.six")
+        estimate = SixParser().parse(self.document, filename="test.six", preventivo_id="missing")
+        self.assertEqual(estimate.preventivi, [])
+        self.assertEqual(estimate.project_name, full.project_name)
+        self.assertFalse(select_preventivo(estimate, "missing"))
+
+
+class TestSixParserParallel(unittest.TestCase):
+    def setUp(self) -> None:
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def test_parallel_matches_sequential(self) -> None:
+        document = build_six_document(preventivi=3, rilevazioni=200, seed=11)
+        sequential = SixParser(streaming=False, workers=0).parse(document, filename="test.six")
+        parallel = SixParser(streaming=False, workers=2).parse(document, filename="test.six")
+        self.assertEqual(_dump(parallel), _dump(sequential))
+        # Products referenced but not defined are stubbed in the same order
+        self.assertTrue(any(item.code == "UNK" for item in parallel.price_list_items))
+
+    def test_selected_preventivo_is_not_fanned_out(self) -> None:
+        parser = SixParser(streaming=False, workers=4)
+        parser._preventivo_id = "prv0"
+        self.assertEqual(parser._parallel_workers(3), 0)
+        parser._preventivo_id = None
+        self.assertEqual(parser._parallel_workers(1), 0)
+        self.assertEqual(parser._parallel_workers(3), 3)
+
+
+class TestSixParserWbsLinking(unittest.TestCase):
+    def test_links_every_prefix_longest_first(self) -> None:
+        parser = SixParser()
+        for grp_id, code in (("g1", "A001"), ("g2", "A001.02"), ("g3", "A0"), ("g4", "A001.020"), ("g5", "B01"), ("g6", "")):
+            parser._wbs_nodes[grp_id] = WbsNode(id=grp_id, code=code, name=code, level=1, type="WBS")
+        parser._price_list_items["p1"] = PriceListItem(id="p1", code="A001.02.0001", description="x", unit="nr")
+        parser._price_list_items["p2"] = PriceListItem(id="p2", code="A0", description="y", unit="nr", wbs_ids=["g3"])
+        parser._price_list_items["p3"] = PriceListItem(id="p3", code="", description="z", unit="nr")
+
+        parser._link_products_to_wbs(None)
+
+        self.assertEqual(parser._price_list_items["p1"].wbs_ids, ["g2", "g1", "g3"])
+        self.assertEqual(parser._price_list_items["p2"].wbs_ids, ["g3"])
+        self.assertEqual(parser._price_list_items["p3"].wbs_ids, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import logging
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from parsers.shared import xml_backend
+from parsers.six.parser import SixParser
+from parsers.tests.fixtures import build_six_document, build_xpwe_document
+from parsers.xpwe.parser import PrimusXpweParser
+
+
+def _dump(estimate):
+    data = estimate.model_dump(mode="json")
+    # XPWE preventivi get a random uuid
+    for prev in data["preventivi"]:
+        prev.pop("id")
+    return data
+
+
+class TestResolveBackend(unittest.TestCase):
+    def test_etree_is_always_available(self) -> None:
+        self.assertEqual(xml_backend.resolve_backend("etree"), "etree")
+
+    def test_auto_prefers_lxml_when_installed(self) -> None:
+        expected = "lxml" if xml_backend.lxml_etree is not None else "etree"
+        self.assertEqual(xml_backend.resolve_backend("auto"), expected)
+
+    def test_unknown_backend_falls_back_to_etree(self) -> None:
+        logging.disable(logging.CRITICAL)
+        try:
+            self.assertEqual(xml_backend.resolve_backend("expat"), "etree")
+        finally:
+            logging.disable(logging.NOTSET)
+
+
+@unittest.skipIf(xml_backend.lxml_etree is None, "lxml not installed")
+class TestBackendConformance(unittest.TestCase):
+    """The lxml backend must produce exactly the ElementTree NormalizedEstimate."""
+
+    def setUp(self) -> None:
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def _assert_six_conforms(self, document: bytes) -> None:
+        for streaming in (False, True):
+            etree = SixParser(streaming=streaming, backend="etree").parse(document, filename="test.six")
+            lxml = SixParser(streaming=streaming, backend="lxml").parse(document, filename="test.six")
+            self.assertEqual(_dump(lxml), _dump(etree))
+
+    def test_six(self) -> None:
+        self._assert_six_conforms(build_six_document(seed=21))
+
+    def test_six_without_namespace(self) -> None:
+        self._assert_six_conforms(build_six_document(seed=22, namespace=None))
+
+    def test_six_with_comments_and_processing_instructions(self) -> None:
+        document = build_six_document(seed=23, preventivi=1, rilevazioni=30)
+        document = document.replace(b"<prvMisura", b"<!-- riga --><?pi x?><prvMisura")
+        self._assert_six_conforms(document)
+
+    def test_xpwe(self) -> None:
+        for namespace in (None, "urn:taboolo:xpwe-fixture"):
+            document = build_xpwe_document(seed=24, namespace=namespace)
+            etree = PrimusXpweParser(backend="etree").parse(document, filename="test.xpwe")
+            lxml = PrimusXpweParser(backend="lxml").parse(document, filename="test.xpwe")
+            self.assertEqual(_dump(lxml), _dump(etree))
+
+
+if __name__ == "__main__":
+    unittest.main()
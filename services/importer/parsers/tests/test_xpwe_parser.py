@@ -0,0 +1,130 @@
+import logging
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from parsers.tests.fixtures import build_xpwe_document
+from parsers.xpwe.parser import PrimusXpweParser
+
+_DOCUMENT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<PweDocumento>
+  <PweDatiGenerali>
+    <PweDGCapitoliCategorie>
+      <PweDGCategorie><DGCategorieItem ID="1"><DesSintetica>Scavi</DesSintetica><Codice>C01</Codice></DGCategorieItem></PweDGCategorie>
+    </PweDGCapitoliCategorie>
+  </PweDatiGenerali>
+  <Archivio>
+    <PweMisurazioni>
+      <PweElencoPrezzi>
+        <EPItem ID="7">
+          <Tariffa>A.01</Tariffa><DesRidotta>Scavo</DesRidotta><UnMisura>m3</UnMisura><Prezzo1>12.50</Prezzo1>
+          <PweEPAnalisi><EPAnalisiItem><Prezzo2>99</Prezzo2></EPAnalisiItem></PweEPAnalisi>
+        </EPItem>
+      </PweElencoPrezzi>
+      <PweVociComputo>
+        <VCItem ID="1">
+          <IDEP>7</IDEP><IDCat>1</IDCat>
+          <PweVCMisure>
+            <RGItem><Descrizione>Fondazioni</Descrizione><Lunghezza>2</Lunghezza><Quantita>2.5</Quantita></RGItem>
+            <RGItem><Quantita>0</Quantita></RGItem>
+          </PweVCMisure>
+        </VCItem>
+        <VCItem ID="2"><IDEP>8</IDEP><Quantita>3</Quantita></VCItem>
+      </PweVociComputo>
+    </PweMisurazioni>
+  </Archivio>
+</PweDocumento>
+"""
+
+
+class TestPrimusXpweParser(unittest.TestCase):
+    def setUp(self) -> None:
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def test_sections_and_direct_child_fields(self) -> None:
+        estimate = PrimusXpweParser().parse(_DOCUMENT, filename="test.xpwe")
+
+        item = estimate.price_list_items[0]
+        self.assertEqual((item.id, item.code, item.unit), ("7", "A.01", "m3"))
+        # Prices of the nested analysis are not fields of the EPItem
+        self.assertEqual(item.price_by_list, {"Prezzo1": 12.5})
+        self.assertEqual(item.wbs_ids, ["categoria_1"])
+
+        first, second = estimate.preventivi[0].measurements
+        self.assertEqual(first.total_quantity, 2.5)
+        self.assertEqual([d.description for d in first.details], ["Fondazioni", None])
+        self.assertEqual(second.total_quantity, 3.0)
+        # Undefined product -> stub
+        self.assertEqual(estimate.price_list_items[1].code, "UNK")
+
+    def test_namespace(self) -> None:
+        plain = PrimusXpweParser().parse(build_xpwe_document(seed=4, items=100), filename="test.xpwe")
+        spaced = PrimusXpweParser().parse(
+            build_xpwe_document(seed=4, items=100, namespace="urn:taboolo:xpwe-fixture"), filename="test.xpwe"
+        )
+        self.assertEqual(len(spaced.preventivi[0].measurements), 100)
+        self.assertEqual(
+            [m.model_dump() for m in spaced.preventivi[0].measurements],
+            [m.model_dump() for m in plain.preventivi[0].measurements],
+        )
+        self.assertEqual(len(spaced.price_list_items), len(plain.price_list_items))
+
+
+def _dump(estimate):
+    data = estimate.model_dump(mode="json")
+    # The preventivo gets a random uuid
+    for prev in data["preventivi"]:
+        prev.pop("id")
+    return data
+
+
+class TestPrimusXpweParserStreaming(unittest.TestCase):
+    def setUp(self) -> None:
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def _assert_streaming_matches_dom(self, document: bytes) -> None:
+        dom = PrimusXpweParser(streaming=False).parse(document, filename="test.xpwe")
+        streamed = PrimusXpweParser(streaming=True).parse(document, filename="test.xpwe")
+        self.assertEqual(_dump(streamed), _dump(dom))
+
+    def test_streaming_matches_dom(self) -> None:
+        self._assert_streaming_matches_dom(_DOCUMENT)
+        self._assert_streaming_matches_dom(build_xpwe_document(seed=5))
+
+    def test_streaming_matches_dom_with_namespace(self) -> None:
+        self._assert_streaming_matches_dom(build_xpwe_document(seed=6, namespace="urn:taboolo:xpwe-fixture"))
+
+    def test_streaming_falls_back_when_price_list_follows_computo(self) -> None:
+        start = _DOCUMENT.index(b"<PweElencoPrezzi>")
+        end = _DOCUMENT.index(b"</PweElencoPrezzi>") + len(b"</PweElencoPrezzi>")
+        elenco = _DOCUMENT[start:end]
+        document = _DOCUMENT[:start] + _DOCUMENT[end:]
+        document = document.replace(b"</PweVociComputo>", b"</PweVociComputo>" + elenco)
+
+        estimate = PrimusXpweParser(streaming=True).parse(document, filename="test.xpwe")
+
+        self.assertEqual(_dump(estimate), _dump(PrimusXpweParser(streaming=False).parse(document, filename="test.xpwe")))
+        # The product was known to the first voce: no stub replaced it
+        self.assertEqual(estimate.price_list_items[0].code, "A.01")
+
+    def test_streaming_ignores_items_outside_their_section_like_dom(self) -> None:
+        document = _DOCUMENT.replace(b"</Archivio>", b'<VCItem ID="9"><IDEP>7</IDEP><Quantita>1</Quantita></VCItem></Archivio>')
+
+        estimate = PrimusXpweParser(streaming=True).parse(document, filename="test.xpwe")
+
+        self.assertEqual(len(estimate.preventivi[0].measurements), 2)
+        self.assertEqual(_dump(estimate), _dump(PrimusXpweParser(streaming=False).parse(document, filename="test.xpwe")))
+
+
+if __name__ == "__main__":
+    unittest.main()
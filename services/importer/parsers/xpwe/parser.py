@@ -4,9 +4,10 @@ import logging
 import re
 import uuid
 import xml.etree.ElementTree as ET
-from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Optional, Tuple, Set, Any
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Set, Any
 
+from core import settings
 from core.interfaces import ParserProtocol
 from domain import (
     NormalizedEstimate,
@@ -17,6 +18,10 @@ from domain import (
     MeasurementDetail,
     PreventivoModel,
 )
+from domain.services.fixed_point import round_2dp_10f
+from parsers.shared import xml_backend
+from parsers.shared.buffers import open_buffer
+from parsers.shared.xml_stream import StreamOrderError
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,18 @@ _REFERENCE_PATTERN = re.compile(
 )
 
 
+class _TagMap(dict):
+    """Nome locale -> tag con namespace, calcolato al primo uso."""
+
+    def __init__(self, ns: str) -> None:
+        super().__init__()
+        self.ns = ns
+
+    def __missing__(self, name: str) -> str:
+        tag = self[name] = f"{self.ns}{name}"
+        return tag
+
+
 class PrimusXpweParser(ParserProtocol):
     """
     Parser PriMus/XPWE -> modello normalizzato.
@@ -39,10 +56,23 @@ class PrimusXpweParser(ParserProtocol):
     - preservare dettagli righe misura (RGItem)
     - usare ID XML come chiavi
     - niente mapping merceologico/spaziale qui (fase successiva)
+    - albero XML dal backend di settings.xml_backend (ElementTree o lxml)
+    - file grandi letti in streaming: dizionari prima, poi un VCItem alla volta
     """
 
-    def __init__(self) -> None:
+    version = "1"
+
+    def __init__(self, streaming: bool | None = None, backend: str | None = None) -> None:
+        # None = decide per file, streaming sopra settings.xpwe_streaming_min_mb
+        self.streaming = streaming
+        # None = settings.xml_backend
+        self.backend = backend
+        self._reset()
+
+    def _reset(self) -> None:
         self.ns = ""
+        # nome locale -> tag con namespace, calcolato una volta per parse
+        self._tags = _TagMap("")
         self._price_list_items: Dict[str, PriceListItem] = {}
         self._wbs_nodes: Dict[str, WbsNode] = {}
         self._price_lists: Dict[str, PriceList] = {}
@@ -54,20 +84,138 @@ class PrimusXpweParser(ParserProtocol):
     # --------------------------
     # Public API
     # --------------------------
-    def parse(self, file_content: bytes, filename: str | None = None) -> NormalizedEstimate:
-        root = ET.fromstring(file_content)
+    def parse(
+        self,
+        file_content: bytes,
+        filename: str | None = None,
+        preventivo_id: str | None = None,
+    ) -> NormalizedEstimate:
+        # Un file PriMus contiene un solo computo: preventivo_id non filtra nulla
+        if self._use_streaming(file_content):
+            try:
+                return self._parse_streaming(file_content, filename)
+            except StreamOrderError as exc:
+                logger.warning(f"Streaming parse not applicable ({exc}), falling back to DOM parse")
+                self._reset()
+        return self._parse_dom(file_content, filename)
+
+    def _use_streaming(self, file_content: bytes) -> bool:
+        if self.streaming is not None:
+            return self.streaming
+        threshold_mb = settings.xpwe_streaming_min_mb
+        return threshold_mb > 0 and len(file_content) >= threshold_mb * 1024 * 1024
+
+    def _parse_dom(self, file_content: bytes, filename: str | None) -> NormalizedEstimate:
+        root = xml_backend.fromstring(file_content, self.backend)
         self.ns = self._detect_namespace(root)
+        self._tags = _TagMap(self.ns)
 
         estimate = NormalizedEstimate()
         estimate.project_name = filename or "PriMus Import"
 
+        # Sezioni (categorie, elenco prezzi, voci computo) trovate in una sola visita
+        sections = self._index_sections(root)
+
         # 1) Definizioni / dizionari
         self._parse_units(root, estimate)
-        self._parse_wbs_like_definitions(root)   # categorie/capitoli (flat)
-        self._parse_price_list_items(root)       # EPItem
+        self._parse_wbs_like_definitions(sections["PweDGCapitoliCategorie"])   # categorie/capitoli (flat)
+        for elenco in sections["PweElencoPrezzi"]:
+            self._parse_price_list_items(elenco)                              # EPItem
 
         # 2) Voci computo + misure (VCItem + RGItem)
-        preventivo = self._parse_computo_as_preventivo(root, code="PRIMUS", name=estimate.project_name)
+        vc_items = (vc for computo in sections["PweVociComputo"] for vc in self._findall(computo, "VCItem"))
+        preventivo = self._parse_computo_as_preventivo(vc_items, code="PRIMUS", name=estimate.project_name)
+        return self._finalize(estimate, preventivo)
+
+    def _parse_streaming(self, file_content: bytes, filename: str | None) -> NormalizedEstimate:
+        """
+        Stessi passi del DOM su una lettura incrementale: i dizionari (categorie,
+        EPItem) sono letti alla chiusura del loro elemento, ogni VCItem diventa
+        una Measurement e viene svuotato subito. Richiede l'ordine PriMus
+        (dizionari prima delle voci), altrimenti StreamOrderError -> DOM.
+        """
+        estimate = NormalizedEstimate()
+        estimate.project_name = filename or "PriMus Import"
+
+        vc_items = self._stream_vcitems(file_content, estimate)
+        preventivo = self._parse_computo_as_preventivo(vc_items, code="PRIMUS", name=estimate.project_name)
+        return self._finalize(estimate, preventivo)
+
+    def _stream_vcitems(self, file_content: bytes, estimate: NormalizedEstimate) -> Iterator[ET.Element]:
+        """
+        Consuma gli eventi "end" (i soli necessari: XPWE ha un elemento per
+        campo, gli eventi "start" raddoppierebbero il costo), registra i
+        dizionari man mano e restituisce i VCItem, svuotandoli quando il
+        chiamante passa al successivo.
+
+        Senza eventi "start" il genitore non e' noto alla chiusura di un item:
+        l'item svuotato resta nel genitore finche' questo si chiude, e allora
+        si verifica che ogni item letto fosse figlio diretto della sua sezione,
+        come nel DOM.
+        """
+        self.ns = self._root_namespace(file_content)
+        self._tags = _TagMap(self.ns)
+        self._parse_units(None, estimate)
+        tag_dgc = self._tags["PweDGCapitoliCategorie"]
+        tag_elenco = self._tags["PweElencoPrezzi"]
+        tag_ep = self._tags["EPItem"]
+        tag_computo = self._tags["PweVociComputo"]
+        tag_vc = self._tags["VCItem"]
+
+        dgc_done = False
+        ep_read = ep_confirmed = vc_read = vc_confirmed = 0
+
+        stream = open_buffer(file_content)
+        try:
+            for _, elem in xml_backend.iterparse(stream, ("end",), self.backend):
+                tag = elem.tag
+                if tag == tag_vc:
+                    vc_read += 1
+                    yield elem
+                    elem.clear()
+                elif tag == tag_ep:
+                    if vc_read:
+                        raise StreamOrderError("<EPItem> found after the first <VCItem>")
+                    ep_read += 1
+                    self._parse_price_list_item(elem)
+                    elem.clear()
+                elif tag == tag_computo:
+                    vc_confirmed += len(elem.findall(tag_vc))
+                    elem.clear()
+                elif tag == tag_elenco:
+                    ep_confirmed += len(elem.findall(tag_ep))
+                    elem.clear()
+                elif tag == tag_dgc and not dgc_done:
+                    # Conta solo la prima sezione, come nel DOM; le categorie
+                    # servono gia' agli EPItem (link WBS) e ai VCItem
+                    if ep_read or vc_read:
+                        raise StreamOrderError("<PweDGCapitoliCategorie> found after the price list")
+                    self._parse_wbs_like_definitions(elem)
+                    dgc_done = True
+                    elem.clear()
+        finally:
+            if stream is not file_content:
+                stream.close()
+
+        if (ep_read, vc_read) != (ep_confirmed, vc_confirmed):
+            raise StreamOrderError("<EPItem>/<VCItem> found outside their section")
+        if not dgc_done:
+            self._parse_wbs_like_definitions(None)
+
+    def _root_namespace(self, file_content: bytes) -> str:
+        """Namespace dell'elemento radice, letto dai primi blocchi del file."""
+        pull = ET.XMLPullParser(("start",))
+        try:
+            for offset in range(0, len(file_content), 64 * 1024):
+                pull.feed(file_content[offset:offset + 64 * 1024])
+                for _, root in pull.read_events():
+                    return self._detect_namespace(root)
+        except ET.ParseError:
+            # L'errore emerge dalla lettura vera e propria
+            pass
+        return ""
+
+    def _finalize(self, estimate: NormalizedEstimate, preventivo: PreventivoModel) -> NormalizedEstimate:
         estimate.preventivi.append(preventivo)
 
         # 3) Post: link e filtri
@@ -88,20 +236,40 @@ class PrimusXpweParser(ParserProtocol):
             return root.tag.split("}")[0] + "}"
         return ""
 
-    def _find(self, node: ET.Element, path: str) -> Optional[ET.Element]:
-        return node.find(self._xp(path))
-
     def _findall(self, node: ET.Element, path: str) -> List[ET.Element]:
-        return node.findall(self._xp(path))
+        """
+        Figli diretti lungo un path fisso dello schema XPWE, es. "PweVCMisure/RGItem".
+        """
+        nodes = [node]
+        for name in path.split("/"):
+            tag = self._tags[name]
+            nodes = [child for parent in nodes for child in parent.findall(tag)]
+        return nodes
 
-    def _xp(self, path: str) -> str:
+    def _index_sections(self, root: ET.Element) -> Dict[str, Any]:
         """
-        Converte "PweDocumento/PweElencoPrezzi/EPItem" in path con namespace.
+        Una visita dell'albero (in ordine di documento) che raccoglie le sezioni
+        PweDGCapitoliCategorie (la prima), PweElencoPrezzi e PweVociComputo,
+        ovunque si trovino, senza scendere al loro interno.
         """
-        if not self.ns:
-            return ".//" + path
-        parts = path.split("/")
-        return ".//" + "/".join(f"{self.ns}{p}" for p in parts)
+        dgc_tag = self._tags["PweDGCapitoliCategorie"]
+        list_tags = {self._tags["PweElencoPrezzi"]: "PweElencoPrezzi", self._tags["PweVociComputo"]: "PweVociComputo"}
+        sections: Dict[str, Any] = {"PweDGCapitoliCategorie": None, "PweElencoPrezzi": [], "PweVociComputo": []}
+        stack = [iter([root])]
+        while stack:
+            for elem in stack[-1]:
+                name = list_tags.get(elem.tag)
+                if name is not None:
+                    sections[name].append(elem)
+                elif elem.tag == dgc_tag:
+                    if sections["PweDGCapitoliCategorie"] is None:
+                        sections["PweDGCapitoliCategorie"] = elem
+                elif len(elem):
+                    stack.append(iter(elem))
+                    break
+            else:
+                stack.pop()
+        return sections
 
     def _text(self, node: Optional[ET.Element], default: str = "") -> str:
         if node is None or node.text is None:
@@ -111,18 +279,19 @@ class PrimusXpweParser(ParserProtocol):
     def _attr(self, node: Optional[ET.Element], key: str, default: str = "") -> str:
         if node is None:
             return default
-        return (node.attrib.get(key) or default).strip()
+        return (node.get(key) or default).strip()
 
     def _get(self, node: Optional[ET.Element], key: str, default: str = "") -> str:
         """
-        Prova ad estrarre un attributo; se vuoto cerca un figlio <key>.
+        Prova ad estrarre un attributo; se vuoto cerca un figlio diretto <key>
+        (i campi di EPItem/VCItem/RGItem sono figli diretti nello schema XPWE).
         """
         if node is None:
             return default
-        val = (node.attrib.get(key) or "").strip()
+        val = (node.get(key) or "").strip()
         if val:
             return val
-        child = node.find(self._xp(key))
+        child = node.find(self._tags[key])
         if child is not None and child.text:
             return child.text.strip()
         return default
@@ -139,12 +308,12 @@ class PrimusXpweParser(ParserProtocol):
             return None
 
     def _round2(self, x: float) -> float:
-        return float(Decimal(f"{x:.10f}").quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+        return round_2dp_10f(x)
 
     # --------------------------
     # Pass 1: Units
     # --------------------------
-    def _parse_units(self, root: ET.Element, estimate: NormalizedEstimate) -> None:
+    def _parse_units(self, root: Optional[ET.Element], estimate: NormalizedEstimate) -> None:
         """
         PriMus: l'unita' e' spesso un testo su EPItem/VCItem. Qui puoi anche fare "registry"
         per uniformare, ma senza forzare. Minimale: no-op o raccolta set.
@@ -155,7 +324,7 @@ class PrimusXpweParser(ParserProtocol):
     # --------------------------
     # Pass 1: WBS-like (Categorie/Capitoli) - flat
     # --------------------------
-    def _parse_wbs_like_definitions(self, root: ET.Element) -> None:
+    def _parse_wbs_like_definitions(self, dgc: Optional[ET.Element]) -> None:
         """
         In XPWE tipicamente:
         - PweDGCapitoliCategorie contiene:
@@ -163,7 +332,6 @@ class PrimusXpweParser(ParserProtocol):
           - PweDGSuperCapitoli / PweDGCapitoli (e a volte sub)
         Creiamo WbsNode flat, con kind/level coerenti e id = ID numerico/stringa dell'XML.
         """
-        dgc = self._find(root, "PweDGCapitoliCategorie")
         if dgc is None:
             logger.warning("PweDGCapitoliCategorie not found")
             return
@@ -257,42 +425,45 @@ class PrimusXpweParser(ParserProtocol):
     # --------------------------
     # Pass 1: Elenco Prezzi (EPItem -> PriceListItem)
     # --------------------------
-    def _parse_price_list_items(self, root: ET.Element) -> None:
-        for ep in self._findall(root, "PweElencoPrezzi/EPItem"):
-            ep_id = self._attr(ep, "ID")
-            if not ep_id:
-                continue
+    def _parse_price_list_items(self, elenco: ET.Element) -> None:
+        for ep in self._findall(elenco, "EPItem"):
+            self._parse_price_list_item(ep)
 
-            tariffa = self._get(ep, "Tariffa")
-            articolo = self._get(ep, "Articolo")
-            code = tariffa or articolo or ep_id
+    def _parse_price_list_item(self, ep: ET.Element) -> None:
+        ep_id = self._attr(ep, "ID")
+        if not ep_id:
+            return
 
-            desc = self._get(ep, "DesRidotta", code)
-            desc_ext = self._get(ep, "DesEstesa", "")
+        tariffa = self._get(ep, "Tariffa")
+        articolo = self._get(ep, "Articolo")
+        code = tariffa or articolo or ep_id
 
-            unit = self._get(ep, "UnMisura", "nr")
+        desc = self._get(ep, "DesRidotta", code)
+        desc_ext = self._get(ep, "DesEstesa", "")
 
-            # Prezzi: Prezzo1..Prezzo5 (mappa "lista" -> valore)
-            prices: Dict[str, float] = {}
-            for k in ("Prezzo1", "Prezzo2", "Prezzo3", "Prezzo4", "Prezzo5"):
-                v = self._parse_float(self._get(ep, k))
-                if v is not None:
-                    prices[k] = v
+        unit = self._get(ep, "UnMisura", "nr")
 
-            item = PriceListItem(
-                id=ep_id,
-                code=code,
-                description=desc,
-                long_description=desc_ext,
-                unit=unit,
-                price_by_list=prices,
-            )
+        # Prezzi: Prezzo1..Prezzo5 (mappa "lista" -> valore)
+        prices: Dict[str, float] = {}
+        for k in ("Prezzo1", "Prezzo2", "Prezzo3", "Prezzo4", "Prezzo5"):
+            v = self._parse_float(self._get(ep, k))
+            if v is not None:
+                prices[k] = v
+
+        item = PriceListItem(
+            id=ep_id,
+            code=code,
+            description=desc,
+            long_description=desc_ext,
+            unit=unit,
+            price_by_list=prices,
+        )
 
-            # Link WBS-like dal prezzario (capitoli/categorie sugli EPItem)
-            # (resta flat; non decidiamo merceologico/spaziale qui)
-            self._attach_wbs_ids_from_epitem(ep, item)
+        # Link WBS-like dal prezzario (capitoli/categorie sugli EPItem)
+        # (resta flat; non decidiamo merceologico/spaziale qui)
+        self._attach_wbs_ids_from_epitem(ep, item)
 
-            self._price_list_items[ep_id] = item
+        self._price_list_items[ep_id] = item
 
     def _attach_wbs_ids_from_epitem(self, ep: ET.Element, item: PriceListItem) -> None:
         """
@@ -319,14 +490,14 @@ class PrimusXpweParser(ParserProtocol):
     # --------------------------
     # Pass 2: Computo (VCItem + RGItem)
     # --------------------------
-    def _parse_computo_as_preventivo(self, root: ET.Element, code: str, name: str) -> PreventivoModel:
+    def _parse_computo_as_preventivo(self, vc_items: Iterable[ET.Element], code: str, name: str) -> PreventivoModel:
         measurements: List[Measurement] = []
 
         # (opzionale) map per risoluzione riferimenti quantity, se nel tuo XPWE si usa
         raw_map: Dict[int, float] = {}
         ref_map: Dict[int, List[Tuple[int, float]]] = {}
 
-        for idx, vc in enumerate(self._findall(root, "PweVociComputo/VCItem")):
+        for idx, vc in enumerate(vc_items):
             m, prog_num, refs = self._parse_vcitem(vc, idx)
             if m is None:
                 continue
@@ -337,11 +508,9 @@ class PrimusXpweParser(ParserProtocol):
                 if refs:
                     ref_map[prog_num] = refs
 
-        # TODO (facoltativo): se vuoi la risoluzione riferimenti stile SIX, applicala qui:
-        # for m in measurements:
-        #     if m.progressive:
-        #         p = int(float(m.progressive))
-        #         m.total_quantity = self._resolve_quantity(p, raw_map, ref_map, set())
+        # TODO (facoltativo): se vuoi la risoluzione riferimenti stile SIX, applicala qui
+        # con parsers.shared.quantity_graph.QuantityGraph(raw_map, ref_map, round_fn=self._round2).
+        # Attenzione: le righe RGItem con IDVV (vedi voce) esportano gia' la Quantita calcolata.
 
         return PreventivoModel(
             id=str(uuid.uuid4()),
@@ -556,15 +725,3 @@ class PrimusXpweParser(ParserProtocol):
                     except Exception:
                         pass
         return refs
-
-    def _resolve_quantity(self, prog: int, raw_map: Dict[int, float], ref_map: Dict[int, List[Tuple[int, float]]], stack: Set[int]) -> float:
-        if prog in stack:
-            return 0.0
-        stack.add(prog)
-
-        total = raw_map.get(prog, 0.0)
-        for ref_prog, mult in ref_map.get(prog, []):
-            total += self._resolve_quantity(ref_prog, raw_map, ref_map, stack) * mult
-
-        stack.remove(prog)
-        return self._round2(total)
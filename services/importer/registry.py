@@ -4,10 +4,11 @@ Supports both New Domain Parsers (Six) and Legacy Function Parsers (Excel/Return
 """
 from __future__ import annotations
 
-import os
-import tempfile
+from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, Type
+from typing import Any, Dict, Type
+
+from openpyxl.utils.exceptions import InvalidFileException
 
 # New Domain Imports
 from core.interfaces import ParserProtocol
@@ -16,10 +17,13 @@ from parsers.xpwe.parser import PrimusXpweParser
 
 # Legacy Shared Imports
 from parsers.shared.base_types import NormalizedEstimate
+from parsers.shared.buffers import BufferReader
 from parsers.shared.normalize import normalize_estimate
 
 # Legacy Parsers Imports
+from parsers.excel.detector import detect_sheet_layout
 from parsers.excel.parser import parse_estimate_excel
+from parsers.excel.reader import open_sheet_rows
 from parsers.lx.parser import parse_lx_return_excel
 from parsers.mx.parser import parse_mx_return_excel
 
@@ -47,13 +51,16 @@ def get_parser(format_hint: str) -> ParserProtocol:
 # LEGACY REGISTRY (For Returns API / Compatibility)
 # ---------------------------------------------------------------------------
 
-def _with_tempfile(file_bytes: bytes, filename: str | None) -> Path:
-    suffix = Path(filename or "").suffix
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix or ".tmp")
-    tmp.write(file_bytes)
-    tmp.flush()
-    tmp.close()
-    return Path(tmp.name)
+def _excel_stream(file_bytes: bytes, filename: str | None) -> BufferReader:
+    """
+    Reader over the upload buffer (bytes or the mmap of the upload spool),
+    opened by openpyxl in place of a temporary copy of the file.
+    """
+    suffix = Path(filename or "").suffix.lower()
+    if suffix in (".xls", ".xlsb"):
+        # openpyxl checks the extension only for paths
+        raise InvalidFileException(f"openpyxl does not support the {suffix} file format, convert it to .xlsx")
+    return BufferReader(file_bytes)
 
 def parse_excel_estimate_from_bytes(
     *,
@@ -62,22 +69,18 @@ def parse_excel_estimate_from_bytes(
     sheet_name: str | None = None,
     price_column: str | None = None,
     quantity_column: str | None = None,
+    raw_columns: bool = False,
     **kwargs,
 ) -> NormalizedEstimate:
-    path = _with_tempfile(file_bytes, filename)
-    try:
+    with _excel_stream(file_bytes, filename) as stream:
         parsed = parse_estimate_excel(
-            file_path=path,
+            file_path=stream,
             sheet_name=sheet_name,
             price_column=price_column,
             quantity_column=quantity_column,
+            raw_columns=raw_columns,
         )
-        return normalize_estimate(parsed, format="excel", source="excel")
-    finally:
-        try:
-            os.remove(path)
-        except FileNotFoundError:
-            pass
+    return normalize_estimate(parsed, format="excel", source="excel")
 
 def parse_lx_estimate_from_bytes(
     *,
@@ -91,12 +94,12 @@ def parse_lx_estimate_from_bytes(
     progressive_column: str | None = None,
     header_row_index: int | None = None,
     long_description_columns: list[str] | None = None,
+    raw_columns: bool = False,
     **kwargs,
 ) -> NormalizedEstimate:
-    path = _with_tempfile(file_bytes, filename)
-    try:
+    with _excel_stream(file_bytes, filename) as stream:
         parsed = parse_lx_return_excel(
-            file_path=path,
+            file_path=stream,
             sheet_name=sheet_name,
             code_columns=code_columns or [],
             description_columns=description_columns or [],
@@ -105,13 +108,9 @@ def parse_lx_estimate_from_bytes(
             progressive_column=progressive_column,
             header_row_index=header_row_index,
             long_description_columns=long_description_columns,
+            raw_columns=raw_columns,
         )
-        return normalize_estimate(parsed, format="lx", source="excel")
-    finally:
-        try:
-            os.remove(path)
-        except FileNotFoundError:
-            pass
+    return normalize_estimate(parsed, format="lx", source="excel")
 
 def parse_mx_estimate_from_bytes(
     *,
@@ -123,29 +122,74 @@ def parse_mx_estimate_from_bytes(
     price_column: str | None = None,
     quantity_column: str | None = None,
     progressive_column: str | None = None,
+    raw_columns: bool = False,
     **kwargs,
 ) -> NormalizedEstimate:
-    path = _with_tempfile(file_bytes, filename)
-    try:
+    with _excel_stream(file_bytes, filename) as stream:
         parsed = parse_mx_return_excel(
-            file_path=path,
+            file_path=stream,
             sheet_name=sheet_name,
             code_columns=code_columns or [],
             description_columns=description_columns or [],
             price_column=price_column or "",
             quantity_column=quantity_column,
             progressive_column=progressive_column,
+            raw_columns=raw_columns,
         )
-        return normalize_estimate(parsed, format="mx", source="excel")
-    finally:
+    return normalize_estimate(parsed, format="mx", source="excel")
+
+def preview_excel_return_from_bytes(
+    *,
+    file_bytes: bytes,
+    filename: str | None = None,
+    sheet_name: str | None = None,
+    header_row_index: int | None = None,
+    max_rows: int = 500,
+    sample_size: int = 20,
+) -> dict[str, Any]:
+    """
+    Header, column suggestions and first data rows of a return sheet, for the
+    column mapping UI. Only a bounded prefix of the sheet is read.
+
+    Columns are in sheet coordinates (empty columns included): the import
+    reads the same letters when called with `raw_columns=True`.
+    """
+    with _excel_stream(file_bytes, filename) as stream, open_sheet_rows(stream, sheet_name) as reader:
+        sheet_rows = iter(reader)
         try:
-            os.remove(path)
-        except FileNotFoundError:
-            pass
+            layout = detect_sheet_layout(
+                (values for values, _formulas in sheet_rows),
+                header_row_index=header_row_index,
+                max_rows=max_rows,
+            )
+        finally:
+            sheet_rows.close()
+        title = reader.title
+        sheet_names = reader.sheet_names
+
+    header_idx = layout.header_idx
+    data_rows = layout.rows[header_idx + 1:] if header_idx is not None else []
+    filled = set(layout.filled_columns)
+    return {
+        "sheet_name": title,
+        "sheet_names": sheet_names,
+        "header_row_index": header_idx,
+        "columns": [
+            {**asdict(profile), "has_values": profile.column_index in filled}
+            for profile in layout.profiles
+        ],
+        "suggestions": {name: asdict(suggestion) for name, suggestion in layout.suggestions.items()},
+        "column_coordinates": "sheet",
+        "empty_columns": layout.empty_columns,
+        "sample_rows": [list(row) for row in data_rows[:sample_size]],
+        "rows_read": layout.rows_read,
+        "truncated": layout.truncated,
+    }
 
 __all__ = [
     "get_parser",
     "parse_lx_estimate_from_bytes",
     "parse_mx_estimate_from_bytes",
     "parse_excel_estimate_from_bytes",
+    "preview_excel_return_from_bytes",
 ]
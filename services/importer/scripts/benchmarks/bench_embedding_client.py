@@ -0,0 +1,67 @@
+"""
+Throughput of JinaEmbedder against a local stub of the embeddings API.
+
+Usage (from services/importer):
+    python scripts/benchmarks/bench_embedding_client.py [--items N] [--latency S] [--per-item S] [--repeat N]
+
+The stub (embedding/tests/stub_server.py) answers each request after a fixed
+latency plus a per-text cost, so the numbers show the effect of round trips
+and concurrency rather than of the network. The serial configuration is the
+previous client (batches of 50, one at a time); the others are the concurrent
+pooled client at increasing concurrency with the default batch limits.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTER_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+if IMPORTER_DIR not in sys.path:
+    sys.path.append(IMPORTER_DIR)
+
+from embedding.client import JinaEmbedder
+from embedding.tests.stub_server import StubJinaServer
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--items", type=int, default=15000, help="texts to embed (a 15k item price list by default)")
+    cli.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    cli.add_argument("--per-item", type=float, default=0.0002, help="seconds per text")
+    cli.add_argument("--repeat", type=int, default=3)
+    args = cli.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    texts = [f"Voce di elenco prezzi {i}: fornitura e posa in opera di materiale tipo {i % 97}" for i in range(args.items)]
+    configs = [
+        ("serial, batch 50", dict(concurrency=1, max_batch_items=50)),
+        ("concurrency 1", dict(concurrency=1)),
+        ("concurrency 4", dict(concurrency=4)),
+        ("concurrency 8", dict(concurrency=8)),
+    ]
+    print(f"{args.items} texts, {args.latency * 1000:.0f} ms per request + {args.per_item * 1e6:.0f} us per text")
+    with StubJinaServer(latency=args.latency, per_item=args.per_item) as server:
+        for label, options in configs:
+            embedder = JinaEmbedder("bench", api_url=server.url, **options)
+            requests_before = server.requests
+            elapsed = _best_of(args.repeat, lambda: embedder.compute_embeddings(texts))
+            embedder.close()
+            calls = (server.requests - requests_before) // args.repeat
+            print(f"{label:<18} {elapsed:8.2f} s  {args.items / elapsed:9.0f} texts/s  {calls} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Timing of the LX and MX/custom return parsers on a large synthetic return sheet.
+
+Usage (from services/importer):
+    python scripts/benchmarks/bench_excel_returns.py [--rows N] [--tail N] [--repeat N]
+
+The sheet holds one progressive (head) row every `--tail + 1` rows, followed by
+measurement rows carrying only a quantity; every fourth head has no price and
+takes it from its last tail row. Reports the size of the file and the best-of-N
+time of the sheet read and of the full LX and MX parses, so the difference
+is the columnar row processing, the head/tail segmentation and item building.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTER_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+if IMPORTER_DIR not in sys.path:
+    sys.path.append(IMPORTER_DIR)
+
+from openpyxl import Workbook
+
+from parsers.excel.reader import open_sheet_rows
+from parsers.lx.parser import parse_lx_return_excel
+from parsers.mx.parser import parse_mx_return_excel
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def build_return_sheet(rows: int, tail: int) -> bytes:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Ritorno")
+    sheet.append(["Progressivo", "Codice", "Descrizione", "Quantita", "Prezzo", "Importo"])
+    progressive = 0
+    written = 0
+    while written < rows:
+        progressive += 1
+        price_on_tail = progressive % 4 == 0
+        price = None if price_on_tail else 10 + progressive % 90
+        sheet.append([progressive, f"A.{progressive:06d}", f"Voce di computo {progressive}", None, price, None])
+        written += 1
+        for line in range(tail):
+            if written >= rows:
+                break
+            last = line == tail - 1
+            sheet.append([None, None, f"misura {line + 1}", 1.5 + line, 12.5 if price_on_tail and last else None, None])
+            written += 1
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--rows", type=int, default=100_000)
+    cli.add_argument("--tail", type=int, default=3, help="measurement rows after each progressive")
+    cli.add_argument("--repeat", type=int, default=3)
+    args = cli.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    content = build_return_sheet(args.rows, args.tail)
+    print(f"workbook: {len(content) / 1e6:.1f} MB, {args.rows} rows")
+
+    def read_sheet() -> None:
+        with open_sheet_rows(io.BytesIO(content), "Ritorno") as reader:
+            for _ in reader:
+                pass
+
+    columns = dict(
+        code_columns=["B"],
+        description_columns=["C"],
+        price_column="E",
+        quantity_column="D",
+        progressive_column="A",
+    )
+    timings = {
+        "sheet read": read_sheet,
+        "parse (LX)": lambda: parse_lx_return_excel(io.BytesIO(content), "Ritorno", **columns),
+        "parse (MX)": lambda: parse_mx_return_excel(io.BytesIO(content), "Ritorno", **columns),
+    }
+    for label, func in timings.items():
+        print(f"{label:<24} {_best_of(args.repeat, func) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Microbenchmark: integer-cents helpers (domain/services/fixed_point.py) against
+the Decimal expressions they replace.
+
+Usage (from services/importer):
+    python scripts/benchmarks/bench_fixed_point.py [--samples N] [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTER_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+if IMPORTER_DIR not in sys.path:
+    sys.path.append(IMPORTER_DIR)
+
+from domain.services.fixed_point import (
+    CentsTotal,
+    product_2dp,
+    round_2dp,
+    round_2dp_10f,
+    round_quantity_and_amount,
+)
+
+CENT = Decimal("0.01")
+
+
+def _decimal_round(x):
+    return float(Decimal(str(x)).quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _decimal_round_10f(x):
+    return float(Decimal(f"{x:.10f}").quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _decimal_product(values):
+    prod = Decimal("1.0")
+    for v in values:
+        prod *= Decimal(str(v))
+    return float(prod.quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _decimal_amount(q, p):
+    dq = Decimal(str(q)).quantize(CENT, rounding=ROUND_HALF_UP)
+    return float(dq), float((dq * Decimal(str(p))).quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _decimal_sum(rows):
+    total = Decimal(0)
+    for row in rows:
+        total += Decimal(str(row)).quantize(CENT, rounding=ROUND_HALF_UP)
+    return float(total)
+
+
+def _cents_sum(rows):
+    total = CentsTotal()
+    for row in rows:
+        total.add(row)
+    return total.value
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--samples", type=int, default=200000)
+    cli.add_argument("--repeat", type=int, default=5)
+    args = cli.parse_args()
+
+    rnd = random.Random(3)
+    # Measurement-like values: dimensions with up to 3 decimals and float products of them
+    values = [round(rnd.uniform(0, 50), rnd.randint(0, 3)) * rnd.choice((1, 1, 1.1, 0.37)) for _ in range(args.samples)]
+    dims = [[_decimal_round(rnd.uniform(0, 30)) for _ in range(rnd.randint(1, 4))] for _ in range(args.samples)]
+    prices = [round(rnd.uniform(0, 900), 2) for _ in range(args.samples)]
+    rows = [values[i:i + 4] for i in range(0, args.samples, 4)]
+
+    cases = [
+        ("round 2dp (str)", lambda: [_decimal_round(v) for v in values], lambda: [round_2dp(v) for v in values]),
+        ("round 2dp (:.10f)", lambda: [_decimal_round_10f(v) for v in values], lambda: [round_2dp_10f(v) for v in values]),
+        ("dimension product", lambda: [_decimal_product(d) for d in dims], lambda: [product_2dp(d) for d in dims]),
+        ("row sum", lambda: [_decimal_sum(r) for r in rows], lambda: [_cents_sum(r) for r in rows]),
+        (
+            "quantity x price",
+            lambda: [_decimal_amount(q, p) for q, p in zip(values, prices)],
+            lambda: [round_quantity_and_amount(q, p) for q, p in zip(values, prices)],
+        ),
+    ]
+    print(f"{'operation':<20} {'Decimal':>12} {'fixed point':>12} {'speedup':>8}")
+    for label, legacy, fixed in cases:
+        assert legacy() == fixed(), label
+        legacy_ns = _best_of(args.repeat, legacy) / args.samples * 1e9
+        fixed_ns = _best_of(args.repeat, fixed) / args.samples * 1e9
+        print(f"{label:<20} {legacy_ns:9.0f} ns {fixed_ns:9.0f} ns {legacy_ns / fixed_ns:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
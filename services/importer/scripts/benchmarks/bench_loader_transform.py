@@ -0,0 +1,92 @@
+"""
+Timing of LoaderService.transform on synthetic SIX estimates of growing size.
+
+Usage (from services/importer):
+    python scripts/benchmarks/bench_loader_transform.py [--sizes N,N,...] [--repeat N] [--embed]
+
+Each size is the number of measurements, against a price list of half as many
+products (30k measurements / 15k items at the default largest size). The SIX
+documents are parsed once, outside the timing; WBS6 nodes are moved to level 7
+so the transform does not call the embedding service for their descriptions.
+Reports the best-of-N transform time and the time per measurement, which stays
+flat when the transform scales linearly.
+
+With --embed the WBS6 nodes stay at level 6 and the price list items are
+embedded after the transform, with the offline hashing backend
+(embedding_backend="hashing"): the timing then covers the embedding code
+paths without network latency.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTER_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+if IMPORTER_DIR not in sys.path:
+    sys.path.append(IMPORTER_DIR)
+
+from api.endpoints.shared.embedding import compute_embeddings_for_items
+from core import settings
+from loader import LoaderService
+from parsers.six.parser import SixParser
+from parsers.tests.fixtures import build_six_document
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def build_estimate(measurements: int, keep_wbs6: bool = False):
+    document = build_six_document(
+        groups=200,
+        products=max(1, measurements // 2),
+        preventivi=1,
+        rilevazioni=measurements,
+    )
+    estimate = SixParser().parse(document, filename="bench.six")
+    if keep_wbs6:
+        return estimate
+    for node in estimate.wbs_nodes:
+        if node.level == 6:
+            node.level = 7
+    return estimate
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--sizes", default="3750,7500,15000,30000", help="comma separated measurement counts")
+    cli.add_argument("--repeat", type=int, default=3)
+    cli.add_argument("--embed", action="store_true", help="also embed WBS6 and price list items (hashing backend)")
+    args = cli.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    if args.embed:
+        settings.embedding_backend = "hashing"
+
+    def run(estimate):
+        _project, _groups, price_list, _estimate = LoaderService.transform(estimate, project_id="bench")
+        if args.embed:
+            compute_embeddings_for_items(price_list=price_list)
+
+    print(f"{'measurements':>12} {'items':>8} {'transform':>12} {'per measurement':>16}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        estimate = build_estimate(size, keep_wbs6=args.embed)
+        count = sum(len(prev.measurements) for prev in estimate.preventivi)
+        elapsed = _best_of(args.repeat, lambda: run(estimate))
+        print(
+            f"{count:>12} {len(estimate.price_list_items):>8} {elapsed * 1000:>9.1f} ms "
+            f"{elapsed / max(count, 1) * 1e6:>13.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
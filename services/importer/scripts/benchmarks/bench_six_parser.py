@@ -0,0 +1,93 @@
+"""
+Timing of SixParser on a large synthetic SIX document.
+
+Usage (from services/importer):
+    python scripts/benchmarks/bench_six_parser.py [--products N] [--rilevazioni N] [--repeat N] [--references] [--workers N]
+
+Reports the best-of-N time of the definition stage (gruppi, prodotti, unita di
+misura and preventivo discovery), of the product -> WBS linking and of the full
+DOM and streaming parses; with --workers, also of the DOM parse with the
+preventivi spread over a process pool.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTER_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+if IMPORTER_DIR not in sys.path:
+    sys.path.append(IMPORTER_DIR)
+
+from domain import NormalizedEstimate
+from parsers.six.parser import SixParser
+from parsers.tests.fixtures import build_six_document
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _definitions_stage(root: ET.Element) -> SixParser:
+    parser = SixParser()
+    parser.ns = parser._detect_namespace(root)
+    parser._collect_definitions(root, NormalizedEstimate())
+    return parser
+
+
+def _linking_stage(root: ET.Element) -> float:
+    parser = _definitions_stage(root)
+    start = time.perf_counter()
+    parser._link_products_to_wbs(NormalizedEstimate())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--groups", type=int, default=400)
+    cli.add_argument("--products", type=int, default=20000)
+    cli.add_argument("--preventivi", type=int, default=4)
+    cli.add_argument("--rilevazioni", type=int, default=20000)
+    cli.add_argument("--repeat", type=int, default=3)
+    cli.add_argument("--references", action="store_true", help='include "vedi voce" references between rilevazioni')
+    cli.add_argument("--workers", type=int, default=0, help="processes for the parallel DOM parse (0 = skip)")
+    args = cli.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    document = build_six_document(
+        groups=args.groups,
+        products=args.products,
+        preventivi=args.preventivi,
+        rilevazioni=args.rilevazioni,
+        references=args.references,
+    )
+    root = ET.fromstring(document)
+    print(f"document: {len(document) / 1e6:.1f} MB, {sum(1 for _ in root.iter())} elements")
+
+    timings = {
+        "definitions stage": lambda: _definitions_stage(root),
+        "parse (DOM)": lambda: SixParser(streaming=False, workers=0).parse(document, filename="bench.six"),
+        "parse (streaming)": lambda: SixParser(streaming=True).parse(document, filename="bench.six"),
+    }
+    if args.workers > 1:
+        timings[f"parse (DOM, {args.workers} proc)"] = lambda: SixParser(streaming=False, workers=args.workers).parse(
+            document, filename="bench.six"
+        )
+    for label, func in timings.items():
+        print(f"{label:<24} {_best_of(args.repeat, func) * 1000:10.1f} ms")
+        if label == "definitions stage":
+            linking = min(_linking_stage(root) for _ in range(args.repeat))
+            print(f"{'product -> WBS link':<24} {linking * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
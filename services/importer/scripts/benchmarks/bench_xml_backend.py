@@ -0,0 +1,75 @@
+"""
+Timing of the SIX and XPWE parsers on the ElementTree and lxml backends.
+
+Usage (from services/importer):
+    python scripts/benchmarks/bench_xml_backend.py [--rilevazioni N] [--items N] [--repeat N]
+
+Both backends parse the same synthetic documents; the outputs are checked to
+be identical before timing.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTER_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+if IMPORTER_DIR not in sys.path:
+    sys.path.append(IMPORTER_DIR)
+
+from parsers.shared import xml_backend
+from parsers.six.parser import SixParser
+from parsers.tests.fixtures import build_six_document, build_xpwe_document
+from parsers.xpwe.parser import PrimusXpweParser
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _dump(estimate):
+    data = estimate.model_dump(mode="json")
+    for prev in data["preventivi"]:
+        prev.pop("id")
+    return data
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--products", type=int, default=5000)
+    cli.add_argument("--rilevazioni", type=int, default=10000)
+    cli.add_argument("--items", type=int, default=20000)
+    cli.add_argument("--repeat", type=int, default=3)
+    args = cli.parse_args()
+
+    if xml_backend.lxml_etree is None:
+        sys.exit("lxml is not installed: nothing to compare")
+
+    logging.disable(logging.CRITICAL)
+    six = build_six_document(products=args.products, rilevazioni=args.rilevazioni)
+    xpwe = build_xpwe_document(products=args.products, items=args.items)
+    print(f"SIX: {len(six) / 1e6:.1f} MB, XPWE: {len(xpwe) / 1e6:.1f} MB")
+
+    cases = {
+        "SIX (DOM)": lambda backend: SixParser(streaming=False, workers=0, backend=backend).parse(six, "bench.six"),
+        "SIX (streaming)": lambda backend: SixParser(streaming=True, backend=backend).parse(six, "bench.six"),
+        "XPWE": lambda backend: PrimusXpweParser(backend=backend).parse(xpwe, "bench.xpwe"),
+    }
+    print(f"{'parse':<18} {'etree':>10} {'lxml':>10} {'speedup':>8}")
+    for label, parse in cases.items():
+        assert _dump(parse("etree")) == _dump(parse("lxml")), label
+        etree_s = _best_of(args.repeat, lambda: parse("etree"))
+        lxml_s = _best_of(args.repeat, lambda: parse("lxml"))
+        print(f"{label:<18} {etree_s * 1000:7.0f} ms {lxml_s * 1000:7.0f} ms {etree_s / lxml_s:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
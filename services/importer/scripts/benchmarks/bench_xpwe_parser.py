@@ -0,0 +1,69 @@
+"""
+Timing of PrimusXpweParser on synthetic XPWE documents of growing size.
+
+Usage (from services/importer):
+    python scripts/benchmarks/bench_xpwe_parser.py [--products N] [--items N N ...] [--repeat N]
+
+Reports, for the DOM and the streaming parse, the best-of-N parse time, the
+time per VCItem (flat when the parse is linear in the number of voci) and the
+peak Python memory of one parse (tracemalloc).
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTER_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+if IMPORTER_DIR not in sys.path:
+    sys.path.append(IMPORTER_DIR)
+
+from parsers.tests.fixtures import build_xpwe_document
+from parsers.xpwe.parser import PrimusXpweParser
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_mb(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--products", type=int, default=5000)
+    cli.add_argument("--items", type=int, nargs="+", default=[5000, 20000, 40000])
+    cli.add_argument("--repeat", type=int, default=3)
+    args = cli.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    print(f"{'VCItem':>8} {'size':>9} {'mode':>10} {'parse':>10} {'per item':>10} {'peak':>10}")
+    for items in args.items:
+        document = build_xpwe_document(products=args.products, items=items)
+        for mode, streaming in (("DOM", False), ("streaming", True)):
+            parse = lambda: PrimusXpweParser(streaming=streaming).parse(document, filename="bench.xpwe")
+            elapsed = _best_of(args.repeat, parse)
+            peak = _peak_mb(parse)
+            print(
+                f"{items:>8} {len(document) / 1e6:6.1f} MB {mode:>10} {elapsed * 1000:7.0f} ms "
+                f"{elapsed / items * 1e6:7.1f} us {peak:7.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Convert the stored price list item embeddings between float arrays and the
+compact binary encoding of embedding/vectors.py.
+
+Usage (from services/importer):
+    python scripts/migrate_embeddings.py --format float16 [--project ID] [--keep-float] [--dry-run]
+    python scripts/migrate_embeddings.py --format float            # back to float arrays
+
+--format float16/int8 writes `embedding_bin` (BSON binary) and removes the
+`embedding` array, unless --keep-float (Atlas $vectorSearch indexes the
+array). --format float rebuilds the arrays from `embedding_bin` and removes it;
+documents that still have the full-precision array only lose the binary.
+Documents are converted in batches of bulk updates; the report gives the
+vector bytes before and after.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import bson
+import pymongo
+from bson import Binary, ObjectId
+from dotenv import load_dotenv
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTER_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+if IMPORTER_DIR not in sys.path:
+    sys.path.append(IMPORTER_DIR)
+
+from embedding.vectors import BINARY_FIELD, STORAGE_FORMATS, decode_vector, encode_vector
+
+ROOT = Path(__file__).resolve().parents[3]
+ENV_PATH = ROOT / '.env'
+
+
+def load_env() -> Tuple[str, Optional[str]]:
+    load_dotenv(ENV_PATH)
+    mongo_uri = os.getenv('MONGODB_URI')
+    mongo_db = os.getenv('MONGODB_DBNAME')
+    if not mongo_uri:
+        mongo_uri = 'mongodb://localhost:27017/taboolo'
+    return mongo_uri, mongo_db
+
+
+def field_size(value: Any) -> int:
+    return len(bson.encode({'v': value})) if value is not None else 0
+
+
+def convert(doc: Dict[str, Any], fmt: str, keep_float: bool) -> Tuple[Optional[Dict[str, Any]], int, int]:
+    """Update for a document (None if nothing to do), vector bytes before and after."""
+    array, binary = doc.get('embedding'), doc.get(BINARY_FIELD)
+    before = field_size(array) + field_size(binary)
+    if fmt == 'float':
+        if array:
+            # The array kept by --keep-float is exact: drop the lossy copy only
+            if binary is None:
+                return None, before, before
+            return {'$unset': {BINARY_FIELD: ''}}, before, field_size(array)
+        vector = decode_vector(binary) if binary is not None else None
+        if vector is None:
+            return None, before, before
+        values = vector.tolist()
+        return {'$set': {'embedding': values}, '$unset': {BINARY_FIELD: ''}}, before, field_size(values)
+
+    if not array:
+        return None, before, before
+    encoded = Binary(encode_vector(array, fmt))
+    update: Dict[str, Any] = {'$set': {BINARY_FIELD: encoded}}
+    after = field_size(encoded)
+    if keep_float:
+        after += field_size(array)
+    else:
+        update['$unset'] = {'embedding': ''}
+    return update, before, after
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--format', choices=STORAGE_FORMATS, default='float16')
+    parser.add_argument('--project', help='only the items of this project id')
+    parser.add_argument('--keep-float', action='store_true', help='keep the float array next to the binary')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    mongo_uri, mongo_db = load_env()
+    client = pymongo.MongoClient(mongo_uri, connectTimeoutMS=30000)
+    try:
+        db = client[mongo_db] if mongo_db else client.get_default_database()
+    except Exception:
+        db = client.taboolo
+    coll = db.pricelistitems if 'pricelistitems' in db.list_collection_names() else db.pricelistitem
+
+    if args.format == 'float':
+        query: Dict[str, Any] = {BINARY_FIELD: {'$type': 'binData'}}
+    else:
+        query = {'embedding.0': {'$exists': True}}
+        if args.keep_float:
+            query[BINARY_FIELD] = {'$exists': False}
+    if args.project:
+        query['project_id'] = ObjectId(args.project) if ObjectId.is_valid(args.project) else args.project
+
+    converted = bytes_before = bytes_after = 0
+    ops: List[pymongo.UpdateOne] = []
+    cursor = coll.find(query, {'embedding': 1, BINARY_FIELD: 1}, batch_size=args.batch_size)
+    for doc in cursor:
+        update, before, after = convert(doc, args.format, args.keep_float)
+        if update is None:
+            continue
+        converted += 1
+        bytes_before += before
+        bytes_after += after
+        ops.append(pymongo.UpdateOne({'_id': doc['_id']}, update))
+        if len(ops) >= args.batch_size:
+            if not args.dry_run:
+                coll.bulk_write(ops, ordered=False)
+            ops = []
+            print(f'  {converted} documents...')
+    if ops and not args.dry_run:
+        coll.bulk_write(ops, ordered=False)
+
+    ratio = bytes_before / bytes_after if bytes_after else 0.0
+    action = 'would convert' if args.dry_run else 'converted'
+    print(f'{coll.name}: {action} {converted} documents to {args.format}')
+    print(f'vector bytes: {bytes_before / 1e6:.1f} MB -> {bytes_after / 1e6:.1f} MB ({ratio:.1f}x)')
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from parsers.shared.buffers import BufferReader
+from utils.upload import UploadSizeLimitMiddleware, enforce_upload_size, mapped_file, upload_buffer, upload_to_file
+
+_LIMIT = 64 * 1024
+_FILE_LIMIT = 24 * 1024
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=_LIMIT)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        with upload_buffer(file) as content:
+            return {"size": len(content), "head": bytes(content[:4]).decode()}
+
+    @app.post("/batch")
+    async def batch(files: list[UploadFile] = File(...)):
+        for file in files:
+            enforce_upload_size(file, _FILE_LIMIT)
+        return {"count": len(files)}
+
+    return app
+
+
+def _spooled_upload(data: bytes, max_size: int = 1024) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(data)
+    spool.seek(0)
+    return UploadFile(spool, size=len(data), filename="test.six")
+
+
+class TestUploadSizeLimitMiddleware(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = TestClient(_build_app())
+
+    def test_accepts_uploads_within_the_limit(self) -> None:
+        response = self.client.post("/upload", files={"file": ("a.six", b"<six" + b"x" * 1000)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"size": 1004, "head": "<six"})
+
+    def test_rejects_declared_content_length_before_reading(self) -> None:
+        response = self.client.post("/upload", files={"file": ("a.six", b"x" * (_LIMIT + 1))})
+        self.assertEqual(response.status_code, 413)
+
+    def test_rejects_chunked_body_while_streaming(self) -> None:
+        boundary = "b0undary"
+        head = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.six"\r\n\r\n'.encode()
+
+        def body():
+            yield head
+            for _ in range(_LIMIT // 1024 + 8):
+                yield b"x" * 1024
+            yield f"\r\n--{boundary}--\r\n".encode()
+
+        response = self.client.post(
+            "/upload",
+            content=body(),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        self.assertEqual(response.status_code, 413)
+
+    def test_request_limit_covers_all_files_per_file_limit_each(self) -> None:
+        two = [("files", ("a.xlsx", b"x" * 20_000)), ("files", ("b.xlsx", b"y" * 20_000))]
+        response = self.client.post("/batch", files=two)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"count": 2})
+
+        too_big = [("files", ("a.xlsx", b"x" * (_FILE_LIMIT + 1)))]
+        self.assertEqual(self.client.post("/batch", files=too_big).status_code, 413)
+
+
+class TestUploadBuffer(unittest.TestCase):
+    def test_maps_spooled_file_in_memory_and_on_disk(self) -> None:
+        for data in (b"small", b"y" * 4096):
+            file = _spooled_upload(data)
+            with upload_buffer(file) as content:
+                self.assertEqual(len(content), len(data))
+                self.assertEqual(content[:5], data[:5])
+
+    def test_readers_share_the_mapping(self) -> None:
+        file = _spooled_upload(b"0123456789" * 500)
+        with upload_buffer(file) as content:
+            first, second = BufferReader(content), BufferReader(content)
+            self.assertEqual(first.read(4), b"0123")
+            second.seek(-2, os.SEEK_END)
+            self.assertEqual(second.read(), b"89")
+            self.assertEqual(first.read(2), b"45")
+            first.close()
+            second.close()
+
+    def test_empty_upload(self) -> None:
+        with upload_buffer(_spooled_upload(b"")) as content:
+            self.assertEqual(content, b"")
+
+    def test_upload_moved_to_a_job_file(self) -> None:
+        for data in (b"", b"small", b"z" * 4096):
+            file = _spooled_upload(data)
+            path = upload_to_file(file)
+            self.addCleanup(os.unlink, path)
+            self.assertTrue(file.file.closed)
+            self.assertTrue(path.endswith(".six"))
+            with mapped_file(path) as content:
+                self.assertEqual(bytes(content), data)
+
+    def test_enforce_upload_size(self) -> None:
+        enforce_upload_size(_spooled_upload(b"abc"), 3)
+        with self.assertRaises(HTTPException) as ctx:
+            enforce_upload_size(_spooled_upload(b"abcd"), 3)
+        self.assertEqual(ctx.exception.status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
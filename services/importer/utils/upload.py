@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rifiuta con 413 i body multipart oltre `max_bytes` mentre arrivano:
+    subito se lo dichiara Content-Length, altrimenti al primo chunk oltre il
+    limite, prima che il file sia scritto per intero nello spool.
+
+    Il limite vale per l'intera richiesta (tutti i file e i campi del form):
+    il limite del singolo file lo applicano gli endpoint con `enforce_upload_size`.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        declared = _content_length(scope)
+        if declared is not None and declared > self.max_bytes:
+            response = JSONResponse({"detail": "Richiesta troppo grande"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail="Richiesta troppo grande",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _is_multipart(scope: Scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"content-type":
+            return value.lower().startswith(b"multipart/form-data")
+    return False
+
+
+def _content_length(scope: Scope) -> int | None:
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def enforce_upload_size(file: UploadFile, max_bytes: int, detail: str = "File troppo grande") -> None:
+    """413 se l'upload supera `max_bytes` (senza leggerlo: conta la dimensione dello spool)."""
+    if _upload_size(file) > max_bytes:
+        raise HTTPException(status_code=413, detail=detail)
+
+
+@contextmanager
+def upload_buffer(file: UploadFile) -> Iterator[bytes]:
+    """
+    Contenuto di un upload senza copiarlo: mmap del file di spool (una sola
+    copia su disco, condivisa da tutte le letture) o b"" se vuoto.
+    """
+    if _upload_size(file) == 0:
+        yield b""
+        return
+
+    spool = file.file
+    spool.flush()
+    # fileno() porta su disco anche uno spool ancora in memoria (< 1 MB)
+    mapped = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapped
+    finally:
+        _close_map(mapped)
+
+
+def upload_to_file(file: UploadFile) -> str:
+    """
+    Sposta l'upload in un file temporaneo con nome, per un job che vive oltre
+    la richiesta: copia a blocchi dallo spool (nessuna copia in memoria), poi
+    lo spool è chiuso, così resta una sola copia su disco. Il file è del
+    chiamante, che lo rimuove a fine job.
+    """
+    fd, path = tempfile.mkstemp(prefix="taboo-upload-", suffix=Path(file.filename or "").suffix)
+    spool = file.file
+    try:
+        spool.seek(0)
+        with os.fdopen(fd, "wb") as target:
+            shutil.copyfileobj(spool, target, 1024 * 1024)
+    except BaseException:
+        os.unlink(path)
+        raise
+    spool.close()
+    return path
+
+
+def remove_upload_file(path: str) -> None:
+    """Rimuove un file di `upload_to_file` a fine lavoro (un errore è solo registrato)."""
+    try:
+        os.unlink(path)
+    except OSError:
+        logger.warning(f"Could not remove the upload file {path}")
+
+
+@contextmanager
+def mapped_file(path: str) -> Iterator[bytes]:
+    """Contenuto di un file (es. di `upload_to_file`) come mmap in sola lettura, b"" se vuoto."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapped
+    finally:
+        _close_map(mapped)
+
+
+def _close_map(mapped: mmap.mmap) -> None:
+    try:
+        mapped.close()
+    except BufferError:
+        # Una vista ancora viva (es. un reader non chiuso): la mappa si libera con essa
+        pass
+
+
+def _upload_size(file: UploadFile) -> int:
+    if file.size is not None:
+        return file.size
+    spool = file.file
+    size = spool.seek(0, 2)
+    spool.seek(0)
+    return size